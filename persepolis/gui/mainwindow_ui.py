@@ -14,10 +14,11 @@
 #    along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from PyQt5 import QtCore, QtGui, QtWidgets
-from PyQt5.QtWidgets import QShortcut, QDateTimeEdit, QDoubleSpinBox, QPushButton, QComboBox,  QMenu, QTreeView, QSplitter, QSizePolicy, QGridLayout, QHBoxLayout, QVBoxLayout, QMenu, QTableWidgetItem, QAbstractItemView, QApplication, QToolBar, QMenuBar, QStatusBar, QTableWidget, QAction, QMainWindow, QWidget, QFrame, QAbstractItemView, QCheckBox, QSpinBox, QLabel
+from PyQt5.QtWidgets import QShortcut, QDateTimeEdit, QDoubleSpinBox, QPushButton, QComboBox,  QMenu, QTreeView, QSplitter, QSizePolicy, QGridLayout, QHBoxLayout, QVBoxLayout, QMenu, QTableWidgetItem, QAbstractItemView, QApplication, QToolBar, QMenuBar, QStatusBar, QTableView, QAction, QMainWindow, QWidget, QFrame, QAbstractItemView, QCheckBox, QSpinBox, QLabel
 from PyQt5.QtGui import QKeySequence, QIcon, QStandardItemModel, QStandardItem
-from PyQt5.QtCore import QCoreApplication, QRect, QSize, Qt, QTranslator, QLocale
+from PyQt5.QtCore import QCoreApplication, QRect, QSize, Qt, QTranslator, QLocale, QAbstractTableModel, QModelIndex, pyqtSignal
 from persepolis.gui import resources 
+from persepolis.scripts.useful_tools import humanReadbleSize, humanReadbleRate, humanReadbleTime
 
 
 
@@ -130,6 +131,10 @@ class MenuWidget(QPushButton):
 
         queueMenu.addAction(self.parent.moveDownSelectedAction)
 
+        queueMenu.addAction(self.parent.moveTopSelectedAction)
+
+        queueMenu.addAction(self.parent.moveBottomSelectedAction)
+
         editMenu.addAction(self.parent.preferencesAction)
 
         helpMenu.addAction(self.parent.aboutAction)
@@ -145,8 +150,297 @@ class MenuWidget(QPushButton):
 
 # viewMenu submenus
 
-# DownloadTableWidget Class adds QMenu to QTableWidget Class
-class DownloadTableWidget(QTableWidget):
+# DownloadTableModel keeps text of download_table cells.
+# every row is a list of 13 items:
+# ['file_name', 'status', 'size', 'downloaded_size', 'percent',
+# 'connections', 'rate', 'estimate_time_left', 'gid', 'link',
+# 'first_try_date', 'last_try_date', 'category']
+# size, downloaded_size, rate and estimate_time_left are numbers(Byte, Byte, Byte per second
+# and seconds) and they are converted to text only when cells are shown(see cellText function).
+# other items are strings.
+# rows can be read from data base page by page, when user scrolls down.
+# see setFetchFunction method.
+
+# columns of numbers
+SIZE_COLUMNS = (2, 3)
+RATE_COLUMN = 6
+TIME_COLUMN = 7
+
+
+# this function returns value of cell that is saved in DownloadTableModel.
+# numbers of size, rate and time columns are saved without change and
+# other values are converted to string.
+def cellValue(column, value):
+    if isinstance(value, int) and (column in SIZE_COLUMNS or column == RATE_COLUMN or column == TIME_COLUMN):
+        return value
+
+    return str(value)
+
+
+# this function returns text of cell.
+def cellText(column, value):
+    if isinstance(value, int):
+        if column in SIZE_COLUMNS:
+            return humanReadbleSize(value)
+        elif column == RATE_COLUMN:
+            return humanReadbleRate(value)
+        elif column == TIME_COLUMN:
+            return humanReadbleTime(value)
+
+    return value
+
+class DownloadTableModel(QAbstractTableModel):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        self.rows_list = []
+        self.header_list = [''] * 13
+
+        # fetch_function returns next page of rows.
+        # see data_base.py returnCategoryItemsPage method.
+        self.fetch_function = None
+        self.page_size = 200
+        self.last_position = None
+        self.can_fetch_more = False
+
+        # gid_row_dict is an index for finding row of gids.
+        # rows are inserted to top of the table, so row numbers are changing.
+        # this index is rebuilt when it's not valid any more.
+        self.gid_row_dict = {}
+        self.gid_row_dict_is_valid = True
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.rows_list)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return 13
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not(index.isValid()):
+            return None
+
+        if role == Qt.DisplayRole:
+            return self.text(index.row(), index.column())
+
+        # align center for items in download table
+        elif role == Qt.TextAlignmentRole:
+            return Qt.AlignCenter
+
+        return None
+
+    # items can be dragged and dropped for changing order of items.
+    def flags(self, index):
+        if not(index.isValid()):
+            return Qt.ItemIsDropEnabled
+
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsDragEnabled | Qt.ItemIsDropEnabled
+
+    def supportedDropActions(self):
+        return Qt.CopyAction | Qt.MoveAction
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal and section < len(self.header_list):
+            return self.header_list[section]
+
+        return super().headerData(section, orientation, role)
+
+    def setHorizontalHeaderLabels(self, header_list):
+        self.header_list = header_list
+        self.headerDataChanged.emit(Qt.Horizontal, 0, 12)
+
+    # this method returns row number of gid in table.
+    # it returns None if gid is not in table.
+    def rowOfGid(self, gid):
+        row = self.gid_row_dict.get(gid)
+
+        # check index and rebuild it if it's not valid.
+        if row is None or row >= len(self.rows_list) or self.rows_list[row][8] != gid:
+            if self.gid_row_dict_is_valid and row is None:
+                return None
+
+            self.gid_row_dict = {}
+            for i, row_list in enumerate(self.rows_list):
+                self.gid_row_dict[row_list[8]] = i
+            self.gid_row_dict_is_valid = True
+
+            row = self.gid_row_dict.get(gid)
+
+        return row
+
+    def text(self, row, column):
+        return cellText(column, self.rows_list[row][column])
+
+    # this method changes text of a cell.
+    # dataChanged is emitted only if text is changed.
+    def setText(self, row, column, text):
+        text = cellValue(column, text)
+        if self.rows_list[row][column] != text:
+            self.rows_list[row][column] = text
+
+            if column == 8:
+                self.gid_row_dict_is_valid = False
+
+            index = self.index(row, column)
+            self.dataChanged.emit(index, index)
+
+    # this method updates a row with update_list.
+    # None or empty items in update_list are ignored.
+    # dataChanged is emitted for changed cells only.
+    def updateRow(self, row, update_list):
+        row_list = self.rows_list[row]
+        first_column = None
+        last_column = None
+        for column, text in enumerate(update_list):
+            if text is not None and text != '':
+                text = cellValue(column, text)
+                if row_list[column] != text:
+                    row_list[column] = text
+                    if first_column is None:
+                        first_column = column
+                    last_column = column
+
+        if first_column is not None:
+            if first_column <= 8 <= last_column:
+                self.gid_row_dict_is_valid = False
+
+            self.dataChanged.emit(self.index(row, first_column), self.index(row, last_column))
+
+    # this method inserts a row with row_list values.
+    def insertRowList(self, row, row_list):
+        row_list = [cellValue(column, text) for column, text in enumerate(row_list)]
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.rows_list.insert(row, row_list)
+        self.endInsertRows()
+
+        # rows after the new row are shifted.
+        if row == len(self.rows_list) - 1:
+            self.gid_row_dict[row_list[8]] = row
+        else:
+            self.gid_row_dict_is_valid = False
+
+    def removeRows(self, row, count, parent=QModelIndex()):
+        if count <= 0 or row < 0 or row + count > len(self.rows_list):
+            return False
+
+        self.beginRemoveRows(QModelIndex(), row, row + count - 1)
+        del self.rows_list[row:row + count]
+        self.endRemoveRows()
+
+        self.gid_row_dict_is_valid = False
+        return True
+
+    # this method removes rows of gids in gid_list.
+    # neighbor rows are removed together.
+    def removeGids(self, gid_list):
+        rows_list = []
+        for gid in gid_list:
+            row = self.rowOfGid(gid)
+            if row is not None:
+                rows_list.append(row)
+
+        rows_list.sort(reverse=True)
+
+        # remove rows from bottom to top, so row numbers of
+        # remained rows are not changed.
+        i = 0
+        while i < len(rows_list):
+            last_row = rows_list[i]
+            first_row = last_row
+            while i + 1 < len(rows_list) and rows_list[i + 1] == first_row - 1:
+                i = i + 1
+                first_row = rows_list[i]
+
+            self.removeRows(first_row, last_row - first_row + 1)
+            i = i + 1
+
+    # this method replaces all rows of table.
+    def setRows(self, rows_list):
+        self.beginResetModel()
+        self.rows_list = [[cellValue(column, text) for column, text in enumerate(row_list)] for row_list in rows_list]
+        self.gid_row_dict = {}
+        self.gid_row_dict_is_valid = False
+        self.fetch_function = None
+        self.can_fetch_more = False
+        self.endResetModel()
+
+    # this method clears table and reads rows page by page with fetch_function.
+    # fetch_function(before_position, limit) must return a list of rows.
+    # every row contains 13 columns of table and position of row.
+    # only first page is read here and next pages are read when user scrolls down.
+    def setFetchFunction(self, fetch_function):
+        self.setRows([])
+        self.fetch_function = fetch_function
+        self.last_position = None
+        self.can_fetch_more = True
+        self.fetchMore()
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        return self.can_fetch_more
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or not(self.can_fetch_more):
+            return
+
+        page_list = self.fetch_function(self.last_position, self.page_size)
+
+        if len(page_list) < self.page_size:
+            self.can_fetch_more = False
+
+        if len(page_list) == 0:
+            return
+
+        self.last_position = page_list[-1][13]
+
+        # items that inserted to table after fetching first page
+        # are already in table.
+        new_rows_list = []
+        for row in page_list:
+            if self.rowOfGid(row[8]) is None:
+                new_rows_list.append([cellValue(column, text) for column, text in enumerate(row[:13])])
+
+        if len(new_rows_list) == 0:
+            return
+
+        first_row = len(self.rows_list)
+        self.beginInsertRows(QModelIndex(), first_row, first_row + len(new_rows_list) - 1)
+        self.rows_list.extend(new_rows_list)
+        self.endInsertRows()
+
+        for row, row_list in enumerate(new_rows_list, first_row):
+            self.gid_row_dict[row_list[8]] = row
+
+    # this method reads all remained pages.
+    def fetchAll(self):
+        while self.can_fetch_more:
+            self.fetchMore()
+
+
+# DownloadTableItem is returned by DownloadTableWidget.item method.
+# it's a light replacement of QTableWidgetItem.
+class DownloadTableItem():
+    def __init__(self, text):
+        self.text_value = text
+
+    def text(self):
+        return self.text_value
+
+
+# DownloadTableWidget shows DownloadTableModel and adds QMenu to QTableView Class.
+# some methods of QTableWidget are added to this class too.
+class DownloadTableWidget(QTableView):
+    itemSelectionChanged = pyqtSignal()
+    itemDoubleClicked = pyqtSignal(QModelIndex)
+
+    # ROWSDROPPED is emitted when user drops selected rows.
+    # target row is sent with signal(-1 for dropping under the last row).
+    ROWSDROPPED = pyqtSignal(int)
+
     def __init__(self, parent):
         super().__init__()
 
@@ -159,6 +453,18 @@ class DownloadTableWidget(QTableWidget):
         elif ui_direction in 'ltr':
             self.setLayoutDirection(Qt.LeftToRight)
 
+        self.download_table_model = DownloadTableModel(self)
+        self.setModel(self.download_table_model)
+
+        self.selectionModel().selectionChanged.connect(self.itemSelectionChanged)
+        self.doubleClicked.connect(self.itemDoubleClicked)
+
+        # drag and drop is enabled for queues.
+        # see toolBarAndContextMenuItems method in mainwindow.py
+        self.setDragEnabled(False)
+        self.setAcceptDrops(True)
+        self.setDropIndicatorShown(True)
+        self.setDefaultDropAction(Qt.MoveAction)
 
 # creating context menu
         self.tablewidget_menu = QMenu(self)
@@ -167,6 +473,78 @@ class DownloadTableWidget(QTableWidget):
     def contextMenuEvent(self, event):
         self.tablewidget_menu.popup(QtGui.QCursor.pos())
 
+    # only rows of this table can be dropped here.
+    # other drops(like links) are handled by MainWindow.
+    def dragEnterEvent(self, event):
+        if event.source() is self:
+            super().dragEnterEvent(event)
+        else:
+            event.ignore()
+
+    def dragMoveEvent(self, event):
+        if event.source() is self:
+            super().dragMoveEvent(event)
+        else:
+            event.ignore()
+
+    def dropEvent(self, event):
+        if event.source() is not self:
+            event.ignore()
+            return
+
+        index = self.indexAt(event.pos())
+        if index.isValid():
+            target_row = index.row()
+            if self.dropIndicatorPosition() == QAbstractItemView.BelowItem:
+                target_row = target_row + 1
+        else:
+            target_row = -1
+
+        if target_row >= self.rowCount():
+            target_row = -1
+
+        # CopyAction prevents QAbstractItemView from removing dragged rows.
+        # rows are moved by MainWindow.
+        event.setDropAction(Qt.CopyAction)
+        event.accept()
+
+        self.ROWSDROPPED.emit(target_row)
+
+    def rowCount(self):
+        return self.download_table_model.rowCount()
+
+    # model has 13 columns.
+    def setColumnCount(self, number):
+        pass
+
+    def setHorizontalHeaderLabels(self, header_list):
+        self.download_table_model.setHorizontalHeaderLabels(header_list)
+
+    def item(self, row, column):
+        if row is None or row < 0 or row >= self.download_table_model.rowCount():
+            return None
+
+        return DownloadTableItem(self.download_table_model.text(row, column))
+
+    def setItem(self, row, column, item):
+        self.download_table_model.setText(row, column, item.text())
+
+    def insertRow(self, row):
+        self.download_table_model.insertRowList(row, [''] * 13)
+
+    def removeRow(self, row):
+        self.download_table_model.removeRows(row, 1)
+
+    def setRowCount(self, number):
+        if number < self.rowCount():
+            self.download_table_model.removeRows(number, self.rowCount() - number)
+
+        while self.rowCount() < number:
+            self.insertRow(self.rowCount())
+
+    def clearContents(self):
+        self.download_table_model.setRows([[''] * 13 for row in range(self.rowCount())])
+
 
 # CategoryTreeView Class adds QMenu to QTreeView
 class CategoryTreeView(QTreeView):
@@ -309,6 +687,20 @@ class MainWindow_Ui(QMainWindow):
         self.reverse_checkBox = QCheckBox(self)
         start_verticalLayout.addWidget(self.reverse_checkBox)
 
+# parallel_downloads_spinBox
+        # number of downloads that queue downloads at the same time.
+        parallel_downloads_horizontalLayout = QHBoxLayout()
+
+        self.parallel_downloads_label = QLabel(self)
+        parallel_downloads_horizontalLayout.addWidget(self.parallel_downloads_label)
+
+        self.parallel_downloads_spinBox = QSpinBox(self)
+        self.parallel_downloads_spinBox.setMinimum(1)
+        self.parallel_downloads_spinBox.setMaximum(16)
+        parallel_downloads_horizontalLayout.addWidget(self.parallel_downloads_spinBox)
+
+        start_verticalLayout.addLayout(parallel_downloads_horizontalLayout)
+
         queue_panel_verticalLayout.addWidget(self.start_end_frame)
 
 # limit_after_frame
@@ -375,6 +767,7 @@ class MainWindow_Ui(QMainWindow):
             self.download_table_content_widget)
 
         self.download_table = DownloadTableWidget(self)
+        self.download_table_model = self.download_table.download_table_model
         download_table_content_widget_verticalLayout.addWidget(
             self.download_table)
         tabels_splitter.addWidget(self.download_table_content_widget)
@@ -579,6 +972,14 @@ class MainWindow_Ui(QMainWindow):
                                               self, statusTip=QCoreApplication.translate("mainwindow_ui_tr", 'Move currently selected items down by one row'), triggered=self.moveDownSelected)
         queueMenu.addAction(self.moveDownSelectedAction)
 
+        self.moveTopSelectedAction = QAction(QIcon(icons + 'multi_up'), QCoreApplication.translate("mainwindow_ui_tr", 'Move selected items to top'), self,
+                                            statusTip=QCoreApplication.translate("mainwindow_ui_tr", 'Move currently selected items to the top of the queue'), triggered=self.moveTopSelected)
+        queueMenu.addAction(self.moveTopSelectedAction)
+
+        self.moveBottomSelectedAction = QAction(QIcon(icons + 'multi_down'), QCoreApplication.translate("mainwindow_ui_tr", 'Move selected items to bottom'),
+                                              self, statusTip=QCoreApplication.translate("mainwindow_ui_tr", 'Move currently selected items to the bottom of the queue'), triggered=self.moveBottomSelected)
+        queueMenu.addAction(self.moveBottomSelectedAction)
+
         self.preferencesAction = QAction(QIcon(icons + 'preferences'), QCoreApplication.translate("mainwindow_ui_tr", 'Preferences'),
                                          self, statusTip=QCoreApplication.translate("mainwindow_ui_tr", 'Preferences'), triggered=self.openPreferences, menuRole=5)
         editMenu.addAction(self.preferencesAction)
@@ -615,6 +1016,9 @@ class MainWindow_Ui(QMainWindow):
 
         self.reverse_checkBox.setText(QCoreApplication.translate("mainwindow_ui_tr", "Download bottom of\n the list first"))
 
+        self.parallel_downloads_label.setText(QCoreApplication.translate("mainwindow_ui_tr", "Parallel downloads:"))
+        self.parallel_downloads_spinBox.setToolTip(QCoreApplication.translate("mainwindow_ui_tr", "<html><head/><body><p>Number of downloads that queue downloads at the same time.</p></body></html>"))
+
         self.limit_checkBox.setText(QCoreApplication.translate("mainwindow_ui_tr", "Limit Speed"))
         self.limit_comboBox.setItemText(0, "KiB/s")
         self.limit_comboBox.setItemText(1, "MiB/s")
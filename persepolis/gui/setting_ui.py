@@ -125,6 +125,22 @@ class Setting_Ui(QWidget):
         download_options_tab_verticalLayout.addLayout(
             self.rpc_horizontalLayout)
 
+        # rpc_protocol
+        rpc_protocol_horizontalLayout = QHBoxLayout()
+
+        self.rpc_protocol_label = QLabel(self.download_options_tab)
+        rpc_protocol_horizontalLayout.addWidget(self.rpc_protocol_label)
+
+        self.rpc_protocol_comboBox = QComboBox(self.download_options_tab)
+        rpc_protocol_horizontalLayout.addWidget(self.rpc_protocol_comboBox)
+
+        download_options_tab_verticalLayout.addLayout(
+            rpc_protocol_horizontalLayout)
+
+        # rpc_notifications
+        self.rpc_notifications_checkBox = QCheckBox(self.download_options_tab)
+        download_options_tab_verticalLayout.addWidget(self.rpc_notifications_checkBox)
+
         # wait_queue
         wait_queue_horizontalLayout = QHBoxLayout() 
 
@@ -138,6 +154,46 @@ class Setting_Ui(QWidget):
         download_options_tab_verticalLayout.addLayout(
             wait_queue_horizontalLayout) 
 
+        # max_parallel_downloads
+        max_parallel_horizontalLayout = QHBoxLayout()
+
+        self.max_parallel_label = QLabel(self.download_options_tab)
+        max_parallel_horizontalLayout.addWidget(self.max_parallel_label)
+
+        self.max_parallel_spinBox = QSpinBox(self.download_options_tab)
+        self.max_parallel_spinBox.setMinimum(1)
+        self.max_parallel_spinBox.setMaximum(16)
+        max_parallel_horizontalLayout.addWidget(self.max_parallel_spinBox)
+
+        download_options_tab_verticalLayout.addLayout(
+            max_parallel_horizontalLayout)
+
+        # global_speed_limit
+        global_limit_horizontalLayout = QHBoxLayout()
+
+        self.global_limit_label = QLabel(self.download_options_tab)
+        global_limit_horizontalLayout.addWidget(self.global_limit_label)
+
+        self.global_limit_spinBox = QSpinBox(self.download_options_tab)
+        self.global_limit_spinBox.setMinimum(0)
+        self.global_limit_spinBox.setMaximum(10000000)
+        global_limit_horizontalLayout.addWidget(self.global_limit_spinBox)
+
+        download_options_tab_verticalLayout.addLayout(
+            global_limit_horizontalLayout)
+
+        # speed_profiles
+        speed_profiles_horizontalLayout = QHBoxLayout()
+
+        self.speed_profiles_label = QLabel(self.download_options_tab)
+        speed_profiles_horizontalLayout.addWidget(self.speed_profiles_label)
+
+        self.speed_profiles_lineEdit = QLineEdit(self.download_options_tab)
+        speed_profiles_horizontalLayout.addWidget(self.speed_profiles_lineEdit)
+
+        download_options_tab_verticalLayout.addLayout(
+            speed_profiles_horizontalLayout)
+
         # change aria2 path
         aria2_path_verticalLayout = QVBoxLayout()
 
@@ -477,8 +533,29 @@ class Setting_Ui(QWidget):
         self.rpc_port_spinbox.setToolTip(
             QCoreApplication.translate("setting_ui_tr", "<html><head/><body><p> Specify a port number for JSON-RPC/XML-RPC server to listen to. Possible Values: 1024 - 65535 Default: 6801 </p></body></html>"))
 
+        self.rpc_protocol_label.setText(QCoreApplication.translate("setting_ui_tr", "RPC protocol: "))
+        self.rpc_protocol_comboBox.setToolTip(
+            QCoreApplication.translate("setting_ui_tr", "<html><head/><body><p>Protocol that Persepolis uses for communicating with Aria2. JSON-RPC is faster.</p></body></html>"))
+
+        self.rpc_notifications_checkBox.setText(QCoreApplication.translate("setting_ui_tr", "Get download changes from Aria2 notifications"))
+        self.rpc_notifications_checkBox.setToolTip(
+            QCoreApplication.translate("setting_ui_tr", "<html><head/><body><p>Persepolis waits for Aria2 notifications instead of checking downloads every 0.2 seconds.</p></body></html>"))
+
         self.wait_queue_label.setText(QCoreApplication.translate("setting_ui_tr", 'Wait between every downloads in queue:'))
 
+        self.max_parallel_label.setText(QCoreApplication.translate("setting_ui_tr", 'Maximum number of parallel downloads in all queues:'))
+        self.max_parallel_spinBox.setToolTip(
+            QCoreApplication.translate("setting_ui_tr", "<html><head/><body><p>Number of parallel downloads of every queue is set in queue panel. This value limits sum of them.</p></body></html>"))
+
+        self.global_limit_label.setText(QCoreApplication.translate("setting_ui_tr", 'Global download speed limit(KiB/s, 0 is unlimited):'))
+        self.global_limit_spinBox.setToolTip(
+            QCoreApplication.translate("setting_ui_tr", "<html><head/><body><p>Sum of download speed of all downloads. Speed limit of queues is split between downloads of queue.</p></body></html>"))
+
+        self.speed_profiles_label.setText(QCoreApplication.translate("setting_ui_tr", 'Speed profiles:'))
+        self.speed_profiles_lineEdit.setPlaceholderText('08:00-18:00=30%;18:00-08:00=100%')
+        self.speed_profiles_lineEdit.setToolTip(
+            QCoreApplication.translate("setting_ui_tr", "<html><head/><body><p>Change global speed limit in some hours of day. Value is percent of global speed limit(for example 30%) or a speed limit(for example 512K or 2M). Separate profiles by ';'.</p></body></html>"))
+
         self.aria2_path_checkBox.setText(QCoreApplication.translate("setting_ui_tr", 'Change Aria2 default path'))
         self.aria2_path_pushButton.setText(QCoreApplication.translate("setting_ui_tr", 'Change'))
         aria2_path_tooltip =QCoreApplication.translate("setting_ui_tr", "<html><head/><body><p>Attention: Wrong path may have caused problem! Do it carefully or don't change default setting!</p></body></html>" )
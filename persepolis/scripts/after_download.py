@@ -16,6 +16,7 @@
 from PyQt5.QtCore import QSize, QPoint, QTranslator, QCoreApplication, QLocale
 from persepolis.gui.after_download_ui import AfterDownloadWindow_Ui
 from persepolis.scripts.play import playNotification
+from persepolis.scripts.useful_tools import humanReadbleSize
 from persepolis.scripts import osCommands
 from PyQt5 import QtCore
 import os
@@ -69,7 +70,12 @@ class AfterDownloadWindow(AfterDownloadWindow_Ui):
         self.file_name_label.setText(file_name)
 
         # size
-        size = QCoreApplication.translate("after_download_src_ui_tr", "<b>Size</b>: ") + str(self.dict['size'])
+        if self.dict.get('total_bytes') != None:
+            file_size = humanReadbleSize(self.dict['total_bytes'])
+        else:
+            file_size = 'None'
+
+        size = QCoreApplication.translate("after_download_src_ui_tr", "<b>Size</b>: ") + file_size
         self.size_label.setText(size)
 
         # disable link_lineEdit and save_as_lineEdit
@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import threading
+import hashlib
+import base64
+import socket
+import struct
+import json
+import os
+
+# aria2 sends notifications over WebSocket when --enable-rpc is used.
+# WebSocket url is ws://host:port/jsonrpc
+# please see this link for more information:
+# https://aria2.github.io/manual/en/html/aria2c.html#notifications
+
+# aria2 notifications that Persepolis is listening to.
+NOTIFICATION_METHODS = ['aria2.onDownloadStart', 'aria2.onDownloadPause', 'aria2.onDownloadStop',
+                        'aria2.onDownloadComplete', 'aria2.onDownloadError', 'aria2.onBtDownloadComplete']
+
+# this string is defined in RFC 6455 for checking server handshake
+WEBSOCKET_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+# WebSocket opcodes
+OPCODE_CONTINUATION = 0x0
+OPCODE_TEXT = 0x1
+OPCODE_BINARY = 0x2
+OPCODE_CLOSE = 0x8
+OPCODE_PING = 0x9
+OPCODE_PONG = 0xA
+
+
+# This class is a minimal WebSocket client(RFC 6455).
+# it only supports things that aria2 needs: text messages, ping and close.
+class Aria2WebSocket():
+    def __init__(self, host, port, path='/jsonrpc', timeout=5):
+        self.host = host
+        self.port = port
+        self.path = path
+        self.timeout = timeout
+        self.sock = None
+        self.buffer = b''
+
+    # connect to aria2 and do opening handshake.
+    def connect(self):
+        self.sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self.buffer = b''
+
+        key = base64.b64encode(os.urandom(16)).decode('ascii')
+
+        request = 'GET ' + self.path + ' HTTP/1.1\r\n'\
+            + 'Host: ' + str(self.host) + ':' + str(self.port) + '\r\n'\
+            + 'Upgrade: websocket\r\n'\
+            + 'Connection: Upgrade\r\n'\
+            + 'Sec-WebSocket-Key: ' + key + '\r\n'\
+            + 'Sec-WebSocket-Version: 13\r\n\r\n'
+
+        self.sock.sendall(request.encode('ascii'))
+
+        # read response header
+        while b'\r\n\r\n' not in self.buffer:
+            data = self.sock.recv(4096)
+            if not(data):
+                raise ConnectionError('WebSocket handshake failed')
+            self.buffer = self.buffer + data
+
+        header, self.buffer = self.buffer.split(b'\r\n\r\n', 1)
+        header_lines = header.decode('latin-1').split('\r\n')
+
+        # status line must be "HTTP/1.1 101 Switching Protocols"
+        status_line = header_lines[0].split()
+        if len(status_line) < 2 or status_line[1] != '101':
+            raise ConnectionError('WebSocket handshake failed: ' + header_lines[0])
+
+        # check Sec-WebSocket-Accept value
+        accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode('ascii')).digest()).decode('ascii')
+        for line in header_lines[1:]:
+            name, _, value = line.partition(':')
+            if name.strip().lower() == 'sec-websocket-accept':
+                if value.strip() != accept:
+                    raise ConnectionError('WebSocket handshake failed: wrong accept key')
+                break
+        else:
+            raise ConnectionError('WebSocket handshake failed: no accept key')
+
+        # notifications are arriving without any timing, so socket must block.
+        self.sock.settimeout(None)
+
+    # read exactly length bytes from socket
+    def recvExactly(self, length):
+        while len(self.buffer) < length:
+            data = self.sock.recv(max(4096, length - len(self.buffer)))
+            if not(data):
+                raise ConnectionError('WebSocket connection is closed')
+            self.buffer = self.buffer + data
+
+        data = self.buffer[:length]
+        self.buffer = self.buffer[length:]
+        return data
+
+    # client frames must be masked(see RFC 6455 section 5.3)
+    def sendFrame(self, payload, opcode=OPCODE_TEXT):
+        header = bytes([0x80 | opcode])
+        length = len(payload)
+        if length < 126:
+            header = header + bytes([0x80 | length])
+        elif length < 65536:
+            header = header + bytes([0x80 | 126]) + struct.pack('!H', length)
+        else:
+            header = header + bytes([0x80 | 127]) + struct.pack('!Q', length)
+
+        mask = os.urandom(4)
+        masked_payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+
+        self.sock.sendall(header + mask + masked_payload)
+
+    # send text message
+    def sendMessage(self, text):
+        self.sendFrame(text.encode('utf-8'), OPCODE_TEXT)
+
+    # this method blocks until a complete text message is received.
+    # ping frames are answered and close frame raises ConnectionError.
+    def recvMessage(self):
+        message = b''
+        while True:
+            first_byte, second_byte = self.recvExactly(2)
+            fin = first_byte & 0x80
+            opcode = first_byte & 0x0F
+            masked = second_byte & 0x80
+            length = second_byte & 0x7F
+
+            if length == 126:
+                length = struct.unpack('!H', self.recvExactly(2))[0]
+            elif length == 127:
+                length = struct.unpack('!Q', self.recvExactly(8))[0]
+
+            if masked:
+                mask = self.recvExactly(4)
+                payload = bytes(b ^ mask[i % 4] for i, b in enumerate(self.recvExactly(length)))
+            else:
+                payload = self.recvExactly(length)
+
+            if opcode == OPCODE_CLOSE:
+                raise ConnectionError('WebSocket connection is closed by aria2')
+
+            elif opcode == OPCODE_PING:
+                self.sendFrame(payload, OPCODE_PONG)
+
+            elif opcode in [OPCODE_TEXT, OPCODE_BINARY, OPCODE_CONTINUATION]:
+                message = message + payload
+                if fin:
+                    return message.decode('utf-8')
+
+    def close(self):
+        if self.sock:
+            try:
+                self.sock.close()
+            except:
+                pass
+            self.sock = None
+
+
+# Aria2Notifications collects gids that aria2 notified about them.
+# listener thread adds gids and status thread takes them.
+class Aria2Notifications():
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.changed_gids = set()
+
+        # connected is True when WebSocket connection is available.
+        # if it's False, CheckDownloadInfoThread must poll aria2.
+        self.connected = False
+
+        # woken is True when some one wants status thread wake up(for example for shutting down)
+        self.woken = False
+
+    def addGids(self, gid_list):
+        with self.condition:
+            self.changed_gids.update(gid_list)
+            self.condition.notify_all()
+
+    # wake up waiting thread without any changed gid.
+    def wake(self):
+        with self.condition:
+            self.woken = True
+            self.condition.notify_all()
+
+    def setConnected(self, connected):
+        with self.condition:
+            self.connected = connected
+            self.condition.notify_all()
+
+    # wait until timeout or a notification is received.
+    # timeout can be None for waiting without timeout.
+    # this method returns a set of changed gids.
+    def waitForChanges(self, timeout=None):
+        with self.condition:
+            if not(self.changed_gids) and not(self.woken):
+                self.condition.wait(timeout)
+
+            changed_gids = self.changed_gids
+            self.changed_gids = set()
+            self.woken = False
+
+        return changed_gids
+
+
+# this function returns list of gids from aria2 notification message.
+# it returns None if message is not a download notification.
+def parseNotification(message):
+    try:
+        message_dict = json.loads(message)
+    except:
+        return None
+
+    if not(isinstance(message_dict, dict)) or message_dict.get('method') not in NOTIFICATION_METHODS:
+        return None
+
+    gid_list = []
+    for event in message_dict.get('params', []):
+        if isinstance(event, dict) and 'gid' in event:
+            gid_list.append(str(event['gid']))
+
+    return gid_list
+
+
+# listen to aria2 notifications and send them to notifications object.
+# this function blocks until WebSocket connection is closed.
+def listenToAria2(host, port, notifications):
+    websocket = Aria2WebSocket(host, port)
+    try:
+        websocket.connect()
+        notifications.setConnected(True)
+
+        while True:
+            gid_list = parseNotification(websocket.recvMessage())
+            if gid_list:
+                notifications.addGids(gid_list)
+    finally:
+        notifications.setConnected(False)
+        websocket.close()
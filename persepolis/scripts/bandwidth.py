@@ -0,0 +1,313 @@
+# -*- coding: utf-8 -*-
+
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from persepolis.scripts.time_scheduler import nextDeadline
+from persepolis.scripts import logger
+import threading
+import time
+
+# BandwidthManager decides speed limitation of active downloads.
+# all values are in KiB/s and 0 means unlimited.
+#
+# global limit is set in preferences window(global-speed-limit) and it's
+# sent to aria2 as max-overall-download-limit. aria2 splits it between active downloads.
+#
+# speed profiles change global limit in some hours of day(speed-profiles).
+# every profile is "HH:MM-HH:MM=VALUE" and profiles are separated by ";".
+# VALUE is percent of global limit(for example 30%) or a speed limit(for example 512K or 2M).
+# for example: "08:00-18:00=30%;18:00-08:00=100%"
+#
+# queue limit is set in queue panel. it's a budget for the whole queue, and
+# it's split between active downloads of queue(max-download-limit of every gid).
+# budget is split again when a download of queue starts or finishes.
+#
+# downloads have their own speed limitation too(progress window, add link window, ...).
+# a download never gets more than its own limitation.
+
+# if aria2 doesn't accept limits, they are sent again after RETRY_WAIT seconds.
+RETRY_WAIT = 5
+
+
+# this function converts limit_value("0", "512K", "1.5M") to KiB/s
+def parseLimit(limit):
+    try:
+        limit = str(limit).strip()
+        if limit[-1] in ['K', 'k']:
+            return max(round(float(limit[:-1])), 0)
+        elif limit[-1] in ['M', 'm']:
+            return max(round(1024 * float(limit[:-1])), 0)
+        else:
+            return max(round(float(limit) / 1024), 0)
+    except:
+        return 0
+
+
+# this function converts KiB/s to aria2 format
+def formatLimit(limit):
+    if limit:
+        return str(int(limit)) + 'K'
+    else:
+        return '0'
+
+
+# this function converts "HH:MM" to minutes after midnight
+def minuteOfDay(hh_mm):
+    hour, minute = hh_mm.strip().split(':')
+    hour = int(hour)
+    minute = int(minute)
+    if not(0 <= hour <= 23) or not(0 <= minute <= 59):
+        raise ValueError(hh_mm)
+
+    return hour * 60 + minute
+
+
+# this function returns a list of (start, end, value, percent) tuples.
+# start and end are minutes after midnight.
+# percent is True if value is percent of global limit.
+# wrong profiles are ignored.
+def parseProfiles(profiles_text):
+    profile_list = []
+    if not(profiles_text):
+        return profile_list
+
+    for profile in str(profiles_text).split(';'):
+        profile = profile.strip()
+        if not(profile):
+            continue
+
+        try:
+            time_range, value = profile.split('=')
+            start, end = time_range.split('-')
+            value = value.strip()
+
+            if value.endswith('%'):
+                profile_list.append((minuteOfDay(start), minuteOfDay(end), max(float(value[:-1]), 0), True))
+            else:
+                profile_list.append((minuteOfDay(start), minuteOfDay(end), parseLimit(value), False))
+        except:
+            logger.sendToLog("Wrong speed profile: " + profile, "ERROR")
+
+    return profile_list
+
+
+# this function splits budget between downloads fairly.
+# demand_dict contains gid and own limitation of download(0 means unlimited).
+# downloads that need less than their share, leave the rest for others.
+# it returns a dictionary that contains gid and its limit.
+def fairShare(budget, demand_dict):
+    if not(budget):
+        return dict(demand_dict)
+
+    # sort downloads from small demand to large demand. unlimited downloads are the last.
+    gid_list = sorted(demand_dict.keys(), key=lambda gid: (demand_dict[gid] == 0, demand_dict[gid], gid))
+
+    share_dict = {}
+    remaining = budget
+    for index, gid in enumerate(gid_list):
+        share = remaining // (len(gid_list) - index)
+
+        # aria2 treats 0 as unlimited, so every download gets 1 KiB/s at least.
+        share = max(share, 1)
+
+        if demand_dict[gid]:
+            share = min(share, demand_dict[gid])
+
+        share_dict[gid] = share
+        remaining = max(remaining - share, 0)
+
+    return share_dict
+
+
+class BandwidthManager():
+    # rpc is aria2 server proxy(see download.server)
+    def __init__(self, rpc, global_limit=0, profiles_text=''):
+        self.rpc = rpc
+        self.lock = threading.RLock()
+
+        self.global_limit = global_limit
+        self.profile_list = parseProfiles(profiles_text)
+
+        # download_dict contains gid of active downloads and
+        # a dictionary of their category and own limit.
+        self.download_dict = {}
+
+        # queue_limit_dict contains name of queues and their budgets.
+        self.queue_limit_dict = {}
+
+        # limits that are sent to aria2.
+        # manager doesn't send a limit to aria2 again, if it's not changed.
+        self.applied_global_limit = None
+        self.applied_dict = {}
+
+        # wake_function is called when speed profiles are changed or aria2 doesn't accept limits.
+        # so the thread that waits for next profile, finds new profiles
+        # and sends limits again(see BandwidthThread in mainwindow.py).
+        self.wake_function = None
+
+        # retry is True if aria2 didn't accept some limits in last rebalance.
+        self.retry = False
+
+    # this method returns global limit for now(minutes after midnight).
+    def effectiveGlobalLimit(self, now_minute):
+        for start, end, value, percent in self.profile_list:
+            if start <= end:
+                active = start <= now_minute < end
+            else:
+                # profile is continued after midnight, for example 22:00-06:00
+                active = now_minute >= start or now_minute < end
+
+            if not(active):
+                continue
+
+            if percent:
+                # percent of unlimited is unlimited!
+                if not(self.global_limit):
+                    return 0
+                return max(round(self.global_limit * value / 100), 1)
+            else:
+                if self.global_limit and value:
+                    return min(self.global_limit, value)
+                else:
+                    return self.global_limit or value
+
+        return self.global_limit
+
+    # this method returns next time(seconds since epoch) that a profile starts or ends.
+    # it returns None if there is no profile.
+    def nextProfileChange(self, now=None):
+        if now is None:
+            now = time.time()
+
+        deadline_list = []
+        for start, end, value, percent in self.profile_list:
+            for minute in [start, end]:
+                hh_mm = str(minute // 60) + ':' + str(minute % 60)
+
+                # boundary of current minute is passed, so next one is tomorrow.
+                deadline_list.append(nextDeadline(hh_mm, now + 60))
+
+        if deadline_list:
+            return min(deadline_list)
+        else:
+            return None
+
+    # this method returns limit of every active download.
+    def computeLimits(self):
+        limit_dict = {}
+        queue_dict = {}
+        for gid, download_dict in self.download_dict.items():
+            category = download_dict['category']
+            if self.queue_limit_dict.get(category):
+                if category not in queue_dict.keys():
+                    queue_dict[category] = {}
+                queue_dict[category][gid] = download_dict['limit']
+            else:
+                limit_dict[gid] = download_dict['limit']
+
+        for category, demand_dict in queue_dict.items():
+            limit_dict.update(fairShare(self.queue_limit_dict[category], demand_dict))
+
+        return limit_dict
+
+    # this method sends new limits to aria2.
+    # now is seconds since epoch.
+    def rebalance(self, now=None):
+        if now is None:
+            now = time.time()
+
+        local_time = time.localtime(now)
+        now_minute = local_time.tm_hour * 60 + local_time.tm_min
+
+        with self.lock:
+            self.retry = False
+
+            global_limit = self.effectiveGlobalLimit(now_minute)
+            if global_limit != self.applied_global_limit:
+                try:
+                    self.rpc.aria2.changeGlobalOption({'max-overall-download-limit': formatLimit(global_limit)})
+                    self.applied_global_limit = global_limit
+                    logger.sendToLog("Global download speed limit is changed to " + formatLimit(global_limit), "INFO")
+                except:
+                    self.retry = True
+                    logger.sendToLog("Global speed limitation was unsuccessful", "ERROR")
+
+            for gid, limit in self.computeLimits().items():
+                if self.applied_dict.get(gid) == limit:
+                    continue
+
+                try:
+                    self.rpc.aria2.changeOption(gid, {'max-download-limit': formatLimit(limit)})
+                    self.applied_dict[gid] = limit
+                except:
+                    self.retry = True
+                    logger.sendToLog("Speed limitation was unsuccessful " + str(gid), "ERROR")
+
+    # rebalance is called by user's changes in other threads.
+    # if aria2 didn't accept limits, BandwidthThread must try again.
+    def rebalanceAndWake(self):
+        self.rebalance()
+
+        if self.retry and self.wake_function:
+            self.wake_function()
+
+    # aria2 forgets limits when it's restarted.
+    # so all limits must be sent again.
+    def reset(self):
+        with self.lock:
+            self.applied_global_limit = None
+            self.applied_dict = {}
+
+    # category is name of the download's queue.
+    # limit is own limitation of download(limit_value in data base).
+    # downloadAria sends this limit to aria2 when download starts.
+    def downloadStarted(self, gid, category=None, limit='0'):
+        with self.lock:
+            limit = parseLimit(limit)
+            self.download_dict[gid] = {'category': category, 'limit': limit}
+            self.applied_dict[gid] = limit
+
+    def downloadFinished(self, gid):
+        with self.lock:
+            self.download_dict.pop(gid, None)
+            self.applied_dict.pop(gid, None)
+
+    def hasDownload(self, gid):
+        with self.lock:
+            return gid in self.download_dict.keys()
+
+    # user changed speed limitation of download in progress window.
+    def setDownloadLimit(self, gid, limit):
+        with self.lock:
+            if gid in self.download_dict.keys():
+                self.download_dict[gid]['limit'] = parseLimit(limit)
+            else:
+                self.download_dict[gid] = {'category': None, 'limit': parseLimit(limit)}
+
+            self.rebalanceAndWake()
+
+    # limit "0" removes budget of queue.
+    def setQueueLimit(self, category, limit):
+        with self.lock:
+            self.queue_limit_dict[category] = parseLimit(limit)
+            self.rebalanceAndWake()
+
+    def setGlobalLimit(self, global_limit, profiles_text):
+        with self.lock:
+            self.global_limit = int(global_limit)
+            self.profile_list = parseProfiles(profiles_text)
+            self.rebalance()
+
+        if self.wake_function:
+            self.wake_function()
@@ -18,7 +18,6 @@
 from persepolis.scripts.useful_tools import osAndDesktopEnvironment
 from persepolis.scripts import logger
 import subprocess
-import requests
 import urllib
 import os
 
@@ -14,12 +14,11 @@
     along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 
-from persepolis.scripts.useful_tools import determineConfigFolder
+from persepolis.scripts.useful_tools import determineConfigFolder, convertToByte
 from persepolis.scripts import logger
-from time import sleep
+import threading
 import traceback
 import sqlite3
-import random
 import ast
 import os
 
@@ -32,6 +31,70 @@ persepolis_tmp = os.path.join(config_folder, 'persepolis_tmp')
 
 
 
+# sqlite3 connection must not be used by several threads simultaneously.
+# This class gives every thread its own connection to data base file.
+# data base is in WAL journal mode, so readers don't wait for writer
+# and writer doesn't wait for readers.
+# please see this link for more information:
+# https://www.sqlite.org/wal.html
+class ThreadConnections():
+    def __init__(self, db_path, foreign_keys=False, pragmas_list=[]):
+        self.db_path = db_path
+        self.foreign_keys = foreign_keys
+        self.pragmas_list = pragmas_list
+        self.local = threading.local()
+
+    # this method returns connection of current thread.
+    # connection is created if thread doesn't have any connection.
+    def connection(self):
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            # wait 30 seconds if data base is locked by another process.
+            # sqlite3 keeps compiled statements of every connection in a cache,
+            # so parameterized queries are compiled once.
+            connection = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False, cached_statements=256)
+
+            connection.execute('PRAGMA journal_mode=WAL')
+
+            for pragma in self.pragmas_list:
+                connection.execute(pragma)
+
+            if self.foreign_keys:
+                # turn FOREIGN KEY Support on!
+                connection.execute('pragma foreign_keys=ON')
+
+            self.local.connection = connection
+            self.local.cursor = connection.cursor()
+
+        return connection
+
+    # this method returns cursor of current thread.
+    def cursor(self):
+        self.connection()
+        return self.local.cursor
+
+    # close connection of current thread.
+    # connections of other threads are closed when threads are finished.
+    def close(self):
+        connection = getattr(self.local, 'connection', None)
+        if connection is not None:
+            self.local.cursor.close()
+            connection.close()
+            self.local.connection = None
+            self.local.cursor = None
+
+
+# storage profile for persepolis.db
+# synchronous=NORMAL is safe in WAL mode and commits don't wait for fsync.
+# (only last commits may be lost after power failure, data base can't be corrupted)
+# cache_size is in KiB when it's negative. 8 MiB page cache.
+# mmap_size is in bytes. 64 MiB of data base is read by memory mapping.
+PERSEPOLIS_DB_PRAGMAS = ['PRAGMA synchronous=NORMAL',
+                         'PRAGMA cache_size=-8192',
+                         'PRAGMA mmap_size=67108864',
+                         'PRAGMA temp_store=MEMORY']
+
+
 # This class manages TempDB
 # TempDB contains gid of active downloads in every session.
 class TempDB():
@@ -45,121 +108,109 @@ class TempDB():
         self.temp_db_cursor = self.temp_db_connection.cursor()
 
         # create a lock for data base
-        self.lock = False
-
-    # this method locks data base. 
-    # this is pervent accessing data base simoltaneously.
-    def lockCursor(self):
-        while self.lock:
-            rand_float = random.uniform(0, 0.5)
-            sleep(rand_float)
-        
-        self.lock = True
+        # this is pervent accessing data base simoltaneously.
+        # temp_db is in RAM and all threads are using one connection,
+        # so all methods must lock data base.
+        self.lock = threading.RLock()
 
 
     # temp_db_table contains gid of active downloads. 
     def createTables(self):
         # lock data base
-        self.lockCursor()
-        self.temp_db_cursor.execute("""CREATE TABLE IF NOT EXISTS single_db_table(
-                                                                                ID INTEGER,
-                                                                                gid TEXT PRIMARY KEY,
-                                                                                status TEXT,
-                                                                                shutdown TEXT
-                                                                                )""") 
-
-        self.temp_db_cursor.execute("""CREATE TABLE IF NOT EXISTS queue_db_table(
-                                                                                ID INTEGER,
-                                                                                category TEXT PRIMARY KEY,
-                                                                                shutdown TEXT
-                                                                                )""") 
+        with self.lock:
+            self.temp_db_cursor.execute("""CREATE TABLE IF NOT EXISTS single_db_table(
+                                                                                    ID INTEGER,
+                                                                                    gid TEXT PRIMARY KEY,
+                                                                                    status TEXT,
+                                                                                    shutdown TEXT
+                                                                                    )""") 
+
+            self.temp_db_cursor.execute("""CREATE TABLE IF NOT EXISTS queue_db_table(
+                                                                                    ID INTEGER,
+                                                                                    category TEXT PRIMARY KEY,
+                                                                                    shutdown TEXT
+                                                                                    )""") 
  
-        self.temp_db_connection.commit()
-        self.lock = False
+            self.temp_db_connection.commit()
 
     # insert new item in single_db_table
     def insertInSingleTable(self, gid):
         # lock data base
-        self.lockCursor()
-        self.temp_db_cursor.execute("""INSERT INTO single_db_table VALUES(
-                                                                NULL,
-                                                                '{}',
-                                                                'active',
-                                                                NULL)""".format(gid)) 
+        with self.lock:
+            self.temp_db_cursor.execute("""INSERT INTO single_db_table VALUES(
+                                                                    NULL,
+                                                                    ?,
+                                                                    'active',
+                                                                    NULL)""", (gid,))
 
-        self.temp_db_connection.commit()
-        self.lock = False
+            self.temp_db_connection.commit()
 
 
     # insert new item in queue_db_table
     def insertInQueueTable(self, category):
         # lock data base
-        self.lockCursor()
-        self.temp_db_cursor.execute("""INSERT INTO queue_db_table VALUES(
-                                                                NULL,
-                                                                '{}',
-                                                                NULL)""".format(category)) 
+        with self.lock:
+            self.temp_db_cursor.execute("""INSERT INTO queue_db_table VALUES(
+                                                                    NULL,
+                                                                    ?,
+                                                                    NULL)""", (category,))
 
-        self.temp_db_connection.commit()
-        self.lock = False
+            self.temp_db_connection.commit()
 
 
     # this method updates single_db_table
     def updateSingleTable(self, dict):
         # lock data base
-        self.lockCursor()
-        keys_list = ['gid',
-                    'shutdown',
-                    'status'
-                    ]
-
-        for key in keys_list:
-            # if a key is missed in dict, 
-            # then add this key to the dict and assign None value for the key. 
-            if key not in dict.keys():
-                dict[key] = None
-
-        # update data base if value for the keys is not None
-        self.temp_db_cursor.execute("""UPDATE single_db_table SET shutdown = coalesce(:shutdown, shutdown),
-                                                                status = coalesce(:status, status)
-                                                                WHERE gid = :gid""", dict)
-
-        self.temp_db_connection.commit()
+        with self.lock:
+            keys_list = ['gid',
+                        'shutdown',
+                        'status'
+                        ]
+
+            for key in keys_list:
+                # if a key is missed in dict, 
+                # then add this key to the dict and assign None value for the key. 
+                if key not in dict.keys():
+                    dict[key] = None
+
+            # update data base if value for the keys is not None
+            self.temp_db_cursor.execute("""UPDATE single_db_table SET shutdown = coalesce(:shutdown, shutdown),
+                                                                    status = coalesce(:status, status)
+                                                                    WHERE gid = :gid""", dict)
+
+            self.temp_db_connection.commit()
         
-        self.lock = False
 
     # this method updates queue_db_table
     def updateQueueTable(self, dict):
         # lock data base
-        self.lockCursor()
-        keys_list = ['category',
-                    'shutdown']
+        with self.lock:
+            keys_list = ['category',
+                        'shutdown']
 
-        for key in keys_list:
-            # if a key is missed in dict, 
-            # then add this key to the dict and assign None value for the key. 
-            if key not in dict.keys():
-                dict[key] = None
+            for key in keys_list:
+                # if a key is missed in dict, 
+                # then add this key to the dict and assign None value for the key. 
+                if key not in dict.keys():
+                    dict[key] = None
 
-        # update data base if value for the keys is not None
-        self.temp_db_cursor.execute("""UPDATE queue_db_table SET shutdown = coalesce(:shutdown, shutdown)
-                                                                WHERE category = :category""", dict)
+            # update data base if value for the keys is not None
+            self.temp_db_cursor.execute("""UPDATE queue_db_table SET shutdown = coalesce(:shutdown, shutdown)
+                                                                    WHERE category = :category""", dict)
 
-        self.temp_db_connection.commit()
+            self.temp_db_connection.commit()
  
 
-        self.lock = False
 
     # this method returns gid of active downloads
     def returnActiveGids(self):
         # lock data base
-        self.lockCursor()
+        with self.lock:
 
-        self.temp_db_cursor.execute("""SELECT gid FROM single_db_table WHERE status = 'active'""")
+            self.temp_db_cursor.execute("""SELECT gid FROM single_db_table WHERE status = 'active'""")
         
-        list = self.temp_db_cursor.fetchall()
+            list = self.temp_db_cursor.fetchall()
 
-        self.lock = False
         gid_list = []
 
         for tuple in list:
@@ -172,12 +223,11 @@ class TempDB():
     # this method returns shutdown value for specific gid
     def returnGid(self, gid):
         # lock data base
-        self.lockCursor()
-        self.temp_db_cursor.execute("""SELECT shutdown, status FROM single_db_table WHERE gid = '{}'""".format(gid))
+        with self.lock:
+            self.temp_db_cursor.execute("""SELECT shutdown, status FROM single_db_table WHERE gid = ?""", (gid,))
         
-        list = self.temp_db_cursor.fetchall()
+            list = self.temp_db_cursor.fetchall()
 
-        self.lock = False
 
         tuple = list[0]
 
@@ -190,12 +240,11 @@ class TempDB():
     # This method returns values of columns for specific category
     def returnCategory(self, category):
         # lock data base
-        self.lockCursor()
-        self.temp_db_cursor.execute("""SELECT shutdown FROM queue_db_table WHERE category = '{}'""".format(category))
+        with self.lock:
+            self.temp_db_cursor.execute("""SELECT shutdown FROM queue_db_table WHERE category = ?""", (category,))
         
-        list = self.temp_db_cursor.fetchall()
+            list = self.temp_db_cursor.fetchall()
 
-        self.lock = False
 
         tuple = list[0]
 
@@ -205,25 +254,20 @@ class TempDB():
 
     def resetDataBase(self):
         # lock data base
-        self.lockCursor()
+        with self.lock:
 
-        # delete all items
-        self.temp_db_cursor.execute("""DELETE FROM single_db_table""")
-        self.temp_db_cursor.execute("""DELETE FROM queue_db_table""")
+            # delete all items
+            self.temp_db_cursor.execute("""DELETE FROM single_db_table""")
+            self.temp_db_cursor.execute("""DELETE FROM queue_db_table""")
 
-        # release lock
-        self.lock = False
 
 
     # close connections
     def closeConnections(self):
         # lock data base
-        self.lockCursor()
-        self.temp_db_cursor.close()
-        self.temp_db_connection.close()
-        self.lock = False
-
-
+        with self.lock:
+            self.temp_db_cursor.close()
+            self.temp_db_connection.close()
 
 
 # plugins.db is store links, when browser plugins are send new links.
@@ -233,86 +277,79 @@ class PluginsDB():
         # plugins.db file path
         plugins_db_path = os.path.join(persepolis_tmp, 'plugins.db')
 
-        # plugins_db_connection
-        self.plugins_db_connection = sqlite3.connect(plugins_db_path, check_same_thread=False)
+        # every thread has its own connection to plugins.db
+        self.connections = ThreadConnections(plugins_db_path)
 
-        # plugins_db_cursor
-        self.plugins_db_cursor = self.plugins_db_connection.cursor()
+        # create a lock for writing in data base
+        # this is pervent writing in data base simoltaneously.
+        self.lock = threading.RLock()
 
-        # create a lock for data base
-        self.lock = False
-
-    # this method locls data base. 
-    # this is pervent accessing data base simoltaneously.
-    def lockCursor(self):
-        while self.lock:
-            rand_float = random.uniform(0, 0.5)
-            sleep(rand_float)
-        
-        self.lock = True
+    # plugins_db_connection of current thread
+    @property
+    def plugins_db_connection(self):
+        return self.connections.connection()
+
+    # plugins_db_cursor of current thread
+    @property
+    def plugins_db_cursor(self):
+        return self.connections.cursor()
 
 
     # plugins_db_table contains links that sends by browser plugins. 
     def createTables(self):
         # lock data base
-        self.lockCursor()
-
-        self.plugins_db_cursor.execute("""CREATE TABLE IF NOT EXISTS plugins_db_table(
-                                                                                ID INTEGER PRIMARY KEY,
-                                                                                link TEXT,
-                                                                                referer TEXT,
-                                                                                load_cookies TEXT,
-                                                                                user_agent TEXT,
-                                                                                header TEXT,
-                                                                                out TEXT,
-                                                                                status TEXT
-                                                                                )""") 
-        self.plugins_db_connection.commit()
-
-        # release lock
-        self.lock = False
+        with self.lock:
+
+            self.plugins_db_cursor.execute("""CREATE TABLE IF NOT EXISTS plugins_db_table(
+                                                                                    ID INTEGER PRIMARY KEY,
+                                                                                    link TEXT,
+                                                                                    referer TEXT,
+                                                                                    load_cookies TEXT,
+                                                                                    user_agent TEXT,
+                                                                                    header TEXT,
+                                                                                    out TEXT,
+                                                                                    status TEXT
+                                                                                    )""") 
+            self.plugins_db_connection.commit()
+
 
     # insert new items in plugins_db_table
     def insertInPluginsTable(self, list):
         # lock data base
-        self.lockCursor()
-
-        for dict in list:
-            self.plugins_db_cursor.execute("""INSERT INTO plugins_db_table VALUES(
-                                                                        NULL,
-                                                                        :link,
-                                                                        :referer,
-                                                                        :load_cookies,
-                                                                        :user_agent,
-                                                                        :header,
-                                                                        :out,
-                                                                        'new'
-                                                                            )""", dict)
-
-        self.plugins_db_connection.commit()
-        # release lock
-        self.lock = False
+        with self.lock:
+
+            for dict in list:
+                self.plugins_db_cursor.execute("""INSERT INTO plugins_db_table VALUES(
+                                                                            NULL,
+                                                                            :link,
+                                                                            :referer,
+                                                                            :load_cookies,
+                                                                            :user_agent,
+                                                                            :header,
+                                                                            :out,
+                                                                            'new'
+                                                                                )""", dict)
+
+            self.plugins_db_connection.commit()
 
 # this method returns all new links in plugins_db_table
     def returnNewLinks(self):
         # lock data base
-        self.lockCursor()
+        with self.lock:
 
-        self.plugins_db_cursor.execute("""SELECT link, referer, load_cookies, user_agent, header, out
-                                            FROM plugins_db_table
-                                            WHERE status = 'new'""")
+            self.plugins_db_cursor.execute("""SELECT link, referer, load_cookies, user_agent, header, out
+                                                FROM plugins_db_table
+                                                WHERE status = 'new'""")
 
-        list = self.plugins_db_cursor.fetchall()
+            list = self.plugins_db_cursor.fetchall()
 
-        # chang all rows status to 'old'
-        self.plugins_db_cursor.execute("""UPDATE plugins_db_table SET status = 'old'
-                                            WHERE status = 'new'""")
+            # chang all rows status to 'old'
+            self.plugins_db_cursor.execute("""UPDATE plugins_db_table SET status = 'old'
+                                                WHERE status = 'new'""")
 
-        # commit changes
-        self.plugins_db_connection.commit()
+            # commit changes
+            self.plugins_db_connection.commit()
 
-        # release lock
-        self.lock = False
 
 
         # create new_list
@@ -338,25 +375,19 @@ class PluginsDB():
     # delete old links from data base
     def deleteOldLinks(self):
         # lock data base
-        self.lockCursor()
+        with self.lock:
 
-        self.plugins_db_cursor.execute("""DELETE FROM plugins_db_table WHERE status = 'old'""")
-        # commit changes
-        self.plugins_db_connection.commit()
+            self.plugins_db_cursor.execute("""DELETE FROM plugins_db_table WHERE status = 'old'""")
+            # commit changes
+            self.plugins_db_connection.commit()
 
-        # release lock
-        self.lock = False
 
     # close connections
     def closeConnections(self):
         # lock data base
-        self.lockCursor()
-
-        self.plugins_db_cursor.close()
-        self.plugins_db_connection.close()
+        with self.lock:
+            self.connections.close()
 
-        # release lock
-        self.lock = False
 
 
 # persepolis main data base contains downloads information
@@ -366,98 +397,97 @@ class PersepolisDB():
         # persepolis.db file path 
         persepolis_db_path = os.path.join(config_folder, 'persepolis.db')
 
-        # persepolis_db_connection
-        self.persepolis_db_connection = sqlite3.connect(persepolis_db_path, check_same_thread=False)
-
-        # turn FOREIGN KEY Support on!
-        self.persepolis_db_connection.execute('pragma foreign_keys=ON')
-
-        # persepolis_db_cursor
-        self.persepolis_db_cursor = self.persepolis_db_connection.cursor()
+        # every thread has its own connection to persepolis.db
+        # and FOREIGN KEY Support is turned on for every connection.
+        self.connections = ThreadConnections(persepolis_db_path, foreign_keys=True, pragmas_list=PERSEPOLIS_DB_PRAGMAS)
 
-        # Create a lock for data base
-        self.lock = False
+        # Create a lock for writing in data base
+        # this is pervent writing in data base simoltaneously.
+        # methods that only read data base don't need this lock.
+        self.lock = threading.RLock()
 
-    # this method locls data base. 
-    # this is pervent accessing data base simoltaneously.
-    def lockCursor(self):
-        while self.lock:
-            rand_float = random.uniform(0, 0.5)
-            sleep(rand_float)
+    # persepolis_db_connection of current thread
+    @property
+    def persepolis_db_connection(self):
+        return self.connections.connection()
 
-        self.lock = True
+    # persepolis_db_cursor of current thread
+    @property
+    def persepolis_db_cursor(self):
+        return self.connections.cursor()
 
 
     # queues_list contains name of categories and category settings
     def createTables(self):
 
         # lock data base
-        self.lockCursor()
-        # Create category_db_table and add 'All Downloads' and 'Single Downloads' to it
-        self.persepolis_db_cursor.execute("""CREATE TABLE IF NOT EXISTS category_db_table(
-                                                                category TEXT PRIMARY KEY,
-                                                                start_time_enable TEXT,
-                                                                start_time TEXT,
-                                                                end_time_enable TEXT,
-                                                                end_time TEXT,
-                                                                reverse TEXT,
-                                                                limit_enable TEXT,
-                                                                limit_value TEXT,
-                                                                after_download TEXT,
-                                                                gid_list TEXT
-                                                                            )""")
-
-        # download table contains download table download items information
-        self.persepolis_db_cursor.execute("""CREATE TABLE IF NOT EXISTS download_db_table(
-                                                                                    file_name TEXT,
-                                                                                    status TEXT,
-                                                                                    size TEXT,
-                                                                                    downloaded_size TEXT,
-                                                                                    percent TEXT,
-                                                                                    connections TEXT,
-                                                                                    rate TEXT,
-                                                                                    estimate_time_left TEXT,
-                                                                                    gid TEXT PRIMARY KEY,
+        with self.lock:
+            # Create category_db_table and add 'All Downloads' and 'Single Downloads' to it
+            self.persepolis_db_cursor.execute("""CREATE TABLE IF NOT EXISTS category_db_table(
+                                                                    category TEXT PRIMARY KEY,
+                                                                    start_time_enable TEXT,
+                                                                    start_time TEXT,
+                                                                    end_time_enable TEXT,
+                                                                    end_time TEXT,
+                                                                    reverse TEXT,
+                                                                    limit_enable TEXT,
+                                                                    limit_value TEXT,
+                                                                    after_download TEXT,
+                                                                    gid_list TEXT
+                                                                                )""")
+
+            # download table contains download table download items information
+            self.persepolis_db_cursor.execute("""CREATE TABLE IF NOT EXISTS download_db_table(
+                                                                                        file_name TEXT,
+                                                                                        status TEXT,
+                                                                                        size TEXT,
+                                                                                        downloaded_size TEXT,
+                                                                                        percent TEXT,
+                                                                                        connections TEXT,
+                                                                                        rate TEXT,
+                                                                                        estimate_time_left TEXT,
+                                                                                        gid TEXT PRIMARY KEY,
+                                                                                        link TEXT,
+                                                                                        first_try_date TEXT,
+                                                                                        last_try_date TEXT,
+                                                                                        category TEXT,
+                                                                                        FOREIGN KEY(category) REFERENCES category_db_table(category)
+                                                                                        ON UPDATE CASCADE
+                                                                                        ON DELETE CASCADE
+                                                                                             )""")
+
+
+            # addlink_db_table contains addlink window download information
+            self.persepolis_db_cursor.execute("""CREATE TABLE IF NOT EXISTS addlink_db_table(
+                                                                                    ID INTEGER PRIMARY KEY,
+                                                                                    gid TEXT,
+                                                                                    out TEXT,
+                                                                                    start_time TEXT,
+                                                                                    end_time TEXT,
                                                                                     link TEXT,
-                                                                                    first_try_date TEXT,
-                                                                                    last_try_date TEXT,
-                                                                                    category TEXT,
-                                                                                    FOREIGN KEY(category) REFERENCES category_db_table(category)
-                                                                                    ON UPDATE CASCADE
-                                                                                    ON DELETE CASCADE
-                                                                                         )""")
-
-
-        # addlink_db_table contains addlink window download information
-        self.persepolis_db_cursor.execute("""CREATE TABLE IF NOT EXISTS addlink_db_table(
-                                                                                ID INTEGER PRIMARY KEY,
-                                                                                gid TEXT,
-                                                                                out TEXT,
-                                                                                start_time TEXT,
-                                                                                end_time TEXT,
-                                                                                link TEXT,
-                                                                                ip TEXT,
-                                                                                port TEXT,
-                                                                                proxy_user TEXT,
-                                                                                proxy_passwd TEXT,
-                                                                                download_user TEXT,
-                                                                                download_passwd TEXT,
-                                                                                connections TEXT,
-                                                                                limit_value TEXT,
-                                                                                download_path TEXT,
-                                                                                referer TEXT,
-                                                                                load_cookies TEXT,
-                                                                                user_agent TEXT,
-                                                                                header TEXT,
-                                                                                after_download TEXT,
-                                                                                FOREIGN KEY(gid) REFERENCES download_db_table(gid) 
-                                                                                ON UPDATE CASCADE 
-                                                                                ON DELETE CASCADE 
-                                                                                    )""") 
-        self.persepolis_db_connection.commit()
+                                                                                    ip TEXT,
+                                                                                    port TEXT,
+                                                                                    proxy_user TEXT,
+                                                                                    proxy_passwd TEXT,
+                                                                                    download_user TEXT,
+                                                                                    download_passwd TEXT,
+                                                                                    connections TEXT,
+                                                                                    limit_value TEXT,
+                                                                                    download_path TEXT,
+                                                                                    referer TEXT,
+                                                                                    load_cookies TEXT,
+                                                                                    user_agent TEXT,
+                                                                                    header TEXT,
+                                                                                    after_download TEXT,
+                                                                                    FOREIGN KEY(gid) REFERENCES download_db_table(gid) 
+                                                                                    ON UPDATE CASCADE 
+                                                                                    ON DELETE CASCADE 
+                                                                                        )""") 
+            self.persepolis_db_connection.commit()
+
+            # upgrade structure of data base to the last version
+            self.upgradeDataBase()
             
-        # job is done! open the lock
-        self.lock = False
 
         # add 'All Downloads' and 'Single Downloads' to the category_db_table if they wasn't added. 
         answer = self.searchCategoryInCategoryTable('All Downloads')
@@ -509,140 +539,359 @@ class PersepolisDB():
             self.insertInCategoryTable(scheduled_downloads_dict)
 
 
+    # version of data base structure is saved in user_version of persepolis.db
+    # every method in migrations_list upgrades data base one version.
+    # new methods must be added to the end of migrations_list.
+    def upgradeDataBase(self):
+        migrations_list = [self.upgradeToVersion1, self.upgradeToVersion2, self.upgradeToVersion3,
+                           self.upgradeToVersion4, self.upgradeToVersion5, self.upgradeToVersion6,
+                           self.upgradeToVersion7]
+
+        # lock data base
+        with self.lock:
+            self.persepolis_db_cursor.execute("""PRAGMA user_version""")
+            db_version = self.persepolis_db_cursor.fetchone()[0]
+
+            for version in range(db_version + 1, len(migrations_list) + 1):
+                # upgrade data base and save new version number.
+                # every migration and its version number are saved in one transaction,
+                # so if Persepolis is closed or an error occurs in the middle of a migration,
+                # data base remains in the previous version.
+                # journal mode can't be changed in a transaction, so version 1 is not in a transaction.
+                try:
+                    if version != 1:
+                        self.persepolis_db_cursor.execute("""BEGIN""")
+
+                    migrations_list[version - 1]()
+                    self.persepolis_db_cursor.execute("""PRAGMA user_version = {}""".format(int(version)))
+                    self.persepolis_db_connection.commit()
+                except:
+                    self.persepolis_db_connection.rollback()
+
+                    logger.sendToLog("persepolis.db couldn't be upgraded to version " + str(version), "ERROR")
+                    error_message = str(traceback.format_exc())
+                    logger.sendToLog(error_message, "ERROR")
+
+                    # Persepolis starts with the last good version and
+                    # next start of Persepolis tries this migration again.
+                    logger.sendToLog("persepolis.db remains in version " + str(version - 1), "ERROR")
+                    break
+
+                logger.sendToLog("persepolis.db is upgraded to version " + str(version), "INFO")
+
+    # this method returns True if table has column.
+    # migrations check columns before ALTER TABLE, so running a migration
+    # on a data base that has the column already doesn't fail.
+    def columnExists(self, table, column):
+        self.persepolis_db_cursor.execute("""PRAGMA table_info(""" + table + """)""")
+
+        for tuple in self.persepolis_db_cursor.fetchall():
+            if tuple[1] == column:
+                return True
+
+        return False
+
+    # version 1: data base uses WAL journal mode.
+    # journal mode of data base file is changed permanently.
+    def upgradeToVersion1(self):
+        self.persepolis_db_cursor.execute("""PRAGMA journal_mode=WAL""")
+        self.persepolis_db_cursor.fetchall()
+
+    # version 2: indexes for columns that are used for searching.
+    # findActiveDownloads, returnDownloadingItems and returnPausedItems search status,
+    # returnItemsInDownloadTable searches category and searchGidInAddLinkTable searches gid.
+    def upgradeToVersion2(self):
+        self.persepolis_db_cursor.execute("""CREATE INDEX IF NOT EXISTS download_db_table_status_index
+                                                ON download_db_table(status)""")
+        self.persepolis_db_cursor.execute("""CREATE INDEX IF NOT EXISTS download_db_table_category_index
+                                                ON download_db_table(category, status)""")
+        self.persepolis_db_cursor.execute("""CREATE INDEX IF NOT EXISTS addlink_db_table_gid_index
+                                                ON addlink_db_table(gid)""")
+
+    # version 3: order of items in categories is saved in category_items_db_table.
+    # before version 3, order of every category was saved as a string of python list
+    # in gid_list column of category_db_table.
+    # every item of category has a position and items are sorted by position.
+    # position is a real number, so an item can be inserted between two items
+    # without changing position of other items.
+    def upgradeToVersion3(self):
+        self.persepolis_db_cursor.execute("""CREATE TABLE IF NOT EXISTS category_items_db_table(
+                                                                        category TEXT,
+                                                                        gid TEXT,
+                                                                        position REAL,
+                                                                        PRIMARY KEY(category, gid),
+                                                                        FOREIGN KEY(category) REFERENCES category_db_table(category)
+                                                                        ON UPDATE CASCADE
+                                                                        ON DELETE CASCADE,
+                                                                        FOREIGN KEY(gid) REFERENCES download_db_table(gid)
+                                                                        ON UPDATE CASCADE
+                                                                        ON DELETE CASCADE
+                                                                            )""")
+
+        self.persepolis_db_cursor.execute("""CREATE INDEX IF NOT EXISTS category_items_db_table_position_index
+                                                ON category_items_db_table(category, position)""")
+        self.persepolis_db_cursor.execute("""CREATE INDEX IF NOT EXISTS category_items_db_table_gid_index
+                                                ON category_items_db_table(gid)""")
+
+        # move old gid_lists to category_items_db_table
+        self.persepolis_db_cursor.execute("""SELECT category, gid_list FROM category_db_table""")
+        rows = self.persepolis_db_cursor.fetchall()
+
+        # setCategoryGidList is not used, because it commits changes in the middle of migration.
+        for tuple in rows:
+            try:
+                gid_list = ast.literal_eval(tuple[1])
+            except:
+                gid_list = []
+
+            self.persepolis_db_cursor.executemany("""INSERT OR IGNORE INTO category_items_db_table
+                                                        SELECT ?, gid, ? FROM download_db_table WHERE gid = ?""",
+                                                        [(str(tuple[0]), position, gid) for position, gid in enumerate(gid_list)])
+
+        # gid_list column is not used anymore.
+        self.persepolis_db_cursor.execute("""UPDATE category_db_table SET gid_list = NULL""")
+
+    # version 4: size of downloads is saved in Byte in total_bytes column for sorting.
+    def upgradeToVersion4(self):
+        if not(self.columnExists('download_db_table', 'total_bytes')):
+            self.persepolis_db_cursor.execute("""ALTER TABLE download_db_table ADD COLUMN total_bytes INTEGER""")
+
+        # find total_bytes from size column for old items
+        self.persepolis_db_cursor.execute("""SELECT gid, size FROM download_db_table""")
+        rows = self.persepolis_db_cursor.fetchall()
+
+        self.persepolis_db_cursor.executemany("""UPDATE download_db_table SET total_bytes = ? WHERE gid = ?""",
+                                                [(convertToByte(tuple[1]), tuple[0]) for tuple in rows])
+
+    # version 5: downloaded size, download speed and estimate time left are saved
+    # as numbers in completed_bytes(Byte), speed_bps(Byte per second) and
+    # eta_seconds(second) columns.
+    def upgradeToVersion5(self):
+        for column in ['completed_bytes', 'speed_bps', 'eta_seconds']:
+            if not(self.columnExists('download_db_table', column)):
+                self.persepolis_db_cursor.execute("""ALTER TABLE download_db_table ADD COLUMN """ + column + """ INTEGER""")
+
+        # find completed_bytes from downloaded_size column for old items.
+        # speed and estimate time left of old items are not valid any more.
+        self.persepolis_db_cursor.execute("""SELECT gid, downloaded_size FROM download_db_table""")
+        rows = self.persepolis_db_cursor.fetchall()
+
+        self.persepolis_db_cursor.executemany("""UPDATE download_db_table SET completed_bytes = ? WHERE gid = ?""",
+                                                [(convertToByte(tuple[1]), tuple[0]) for tuple in rows])
+
+    # version 6: number of downloads that queue downloads at the same time
+    # is saved in parallel_downloads column of category_db_table.
+    # old queues download one item at a time.
+    def upgradeToVersion6(self):
+        if not(self.columnExists('category_db_table', 'parallel_downloads')):
+            self.persepolis_db_cursor.execute("""ALTER TABLE category_db_table ADD COLUMN parallel_downloads INTEGER DEFAULT 1""")
+
+    # version 7: host_stats_db_table contains throughput and error history of every host.
+    # see host_tuner.py
+    def upgradeToVersion7(self):
+        self.persepolis_db_cursor.execute("""CREATE TABLE IF NOT EXISTS host_stats_db_table(
+                                                                        host TEXT PRIMARY KEY,
+                                                                        downloads INTEGER,
+                                                                        errors INTEGER,
+                                                                        consecutive_errors INTEGER,
+                                                                        max_connections INTEGER,
+                                                                        speed_bps INTEGER,
+                                                                        connection_speed_bps INTEGER,
+                                                                        average_bytes INTEGER,
+                                                                        last_try_date TEXT
+                                                                            )""")
+
     # insert new category in category_db_table
     def insertInCategoryTable(self, dict):    
         # lock data base
-        self.lockCursor()
-
-        self.persepolis_db_cursor.execute("""INSERT INTO category_db_table VALUES(
-                                                                            :category,
-                                                                            :start_time_enable,
-                                                                            :start_time,
-                                                                            :end_time_enable,
-                                                                            :end_time,
-                                                                            :reverse,
-                                                                            :limit_enable,
-                                                                            :limit_value,
-                                                                            :after_download,
-                                                                            :gid_list
-                                                                            )""", dict)
-        self.persepolis_db_connection.commit()
- 
-        # job is done! open the lock
-        self.lock = False
+        with self.lock:
+            # queue downloads one item at a time if parallel_downloads is not given.
+            if 'parallel_downloads' not in dict.keys():
+                dict['parallel_downloads'] = None
+
+            self.persepolis_db_cursor.execute("""INSERT INTO category_db_table VALUES(
+                                                                                :category,
+                                                                                :start_time_enable,
+                                                                                :start_time,
+                                                                                :end_time_enable,
+                                                                                :end_time,
+                                                                                :reverse,
+                                                                                :limit_enable,
+                                                                                :limit_value,
+                                                                                :after_download,
+                                                                                NULL,
+                                                                                coalesce(:parallel_downloads, 1)
+                                                                                )""", dict)
 
+            # add items of category to category_items_db_table
+            if 'gid_list' in dict.keys() and dict['gid_list']:
+                self.setCategoryGidList(dict['category'], dict['gid_list'])
 
+            self.persepolis_db_connection.commit()
 
+    # this method returns gid of category items sorted by position.
+    def returnCategoryGidList(self, category):
+        self.persepolis_db_cursor.execute("""SELECT gid FROM category_items_db_table WHERE category = ?
+                                                ORDER BY position""", (str(category),))
+        rows = self.persepolis_db_cursor.fetchall()
 
+        gid_list = []
+        for tuple in rows:
+            gid_list.append(tuple[0])
 
-    # insert in to download_db_table in persepolis.db
-    def insertInDownloadTable(self, list):
-        # lock data base
-        self.lockCursor()
-
-        for dict in list:
-            self.persepolis_db_cursor.execute("""INSERT INTO download_db_table VALUES(
-                                                                            :file_name,
-                                                                            :status,
-                                                                            :size,
-                                                                            :downloaded_size,
-                                                                            :percent,
-                                                                            :connections,
-                                                                            :rate,
-                                                                            :estimate_time_left,
-                                                                            :gid,
-                                                                            :link,
-                                                                            :first_try_date,
-                                                                            :last_try_date,
-                                                                            :category
-                                                                            )""", dict)
+        return gid_list
 
-        # commit changes
-        self.persepolis_db_connection.commit()
+    # this method replaces order of items in category with gid_list.
+    # gids that are not in download_db_table are ignored.
+    def setCategoryGidList(self, category, gid_list):
+        # format of old gid_list is string
+        if isinstance(gid_list, str):
+            gid_list = ast.literal_eval(gid_list)
 
+        # lock data base
+        with self.lock:
+            self.persepolis_db_cursor.execute("""DELETE FROM category_items_db_table WHERE category = ?""", (str(category),))
 
-        # job is done! open the lock
-        self.lock = False
+            self.persepolis_db_cursor.executemany("""INSERT OR IGNORE INTO category_items_db_table
+                                                        SELECT ?, gid, ? FROM download_db_table WHERE gid = ?""",
+                                                        [(str(category), position, gid) for position, gid in enumerate(gid_list)])
 
-        if len(list) != 0:
-            # item must be inserted to gid_list of 'All Downloads' and gid_list of category
-            # find download category and gid
-            category = dict['category']
+            self.persepolis_db_connection.commit()
 
-            # get category_dict from data base
-            category_dict = self.searchCategoryInCategoryTable(category)
+    # this method adds gids to the end of category.
+    # position of other items is not changed.
+    def appendGidsToCategory(self, category, gid_list):
+        # lock data base
+        with self.lock:
+            self.persepolis_db_cursor.execute("""SELECT max(position) FROM category_items_db_table WHERE category = ?""", (str(category),))
+            last_position = self.persepolis_db_cursor.fetchone()[0]
 
-            # get all_downloads_dict from data base
-            all_downloads_dict = self.searchCategoryInCategoryTable('All Downloads')
+            if last_position is None:
+                last_position = -1
 
-            # get gid_list
-            category_gid_list = category_dict['gid_list']
+            self.persepolis_db_cursor.executemany("""INSERT OR IGNORE INTO category_items_db_table VALUES(?, ?, ?)""",
+                                                        [(str(category), gid, last_position + i + 1) for i, gid in enumerate(gid_list)])
 
-            all_downloads_gid_list = all_downloads_dict['gid_list']
-    
-            for dict in list:
-                gid = dict['gid']
-         
-                # add gid of item to gid_list
-                category_gid_list.append(gid)
-                all_downloads_gid_list.append(gid)
+            self.persepolis_db_connection.commit()
 
+    # this method removes gids from category.
+    # position of other items is not changed.
+    def removeGidsFromCategory(self, category, gid_list):
+        # lock data base
+        with self.lock:
+            self.persepolis_db_cursor.executemany("""DELETE FROM category_items_db_table WHERE category = ? AND gid = ?""",
+                                                        [(str(category), gid) for gid in gid_list])
 
-            # updata category_db_table
-            self.updateCategoryTable([all_downloads_dict])
-            self.updateCategoryTable([category_dict])
+            self.persepolis_db_connection.commit()
 
 
-    # insert in addlink table in persepolis.db 
-    def insertInAddLinkTable(self, list):
+    # insert in to download_db_table in persepolis.db
+    def insertInDownloadTable(self, list):
         # lock data base
-        self.lockCursor()
+        with self.lock:
 
-        for dict in list:
-            # first column and after download column is NULL
-            self.persepolis_db_cursor.execute("""INSERT INTO addlink_db_table VALUES(NULL,
+            for dict in list:
+                # numeric columns are optional
+                for key in ['total_bytes', 'completed_bytes', 'speed_bps', 'eta_seconds']:
+                    if key not in dict.keys():
+                        dict[key] = None
+
+                # find size in Byte
+                if dict['total_bytes'] is None:
+                    dict['total_bytes'] = convertToByte(dict['size'])
+
+                self.persepolis_db_cursor.execute("""INSERT INTO download_db_table(
+                                                                                file_name,
+                                                                                status,
+                                                                                size,
+                                                                                downloaded_size,
+                                                                                percent,
+                                                                                connections,
+                                                                                rate,
+                                                                                estimate_time_left,
+                                                                                gid,
+                                                                                link,
+                                                                                first_try_date,
+                                                                                last_try_date,
+                                                                                category,
+                                                                                total_bytes,
+                                                                                completed_bytes,
+                                                                                speed_bps,
+                                                                                eta_seconds
+                                                                                ) VALUES(
+                                                                                :file_name,
+                                                                                :status,
+                                                                                :size,
+                                                                                :downloaded_size,
+                                                                                :percent,
+                                                                                :connections,
+                                                                                :rate,
+                                                                                :estimate_time_left,
                                                                                 :gid,
-                                                                                :out,
-                                                                                :start_time,
-                                                                                :end_time,
                                                                                 :link,
-                                                                                :ip,
-                                                                                :port,
-                                                                                :proxy_user,
-                                                                                :proxy_passwd,
-                                                                                :download_user,
-                                                                                :download_passwd,
-                                                                                :connections,
-                                                                                :limit_value,
-                                                                                :download_path,
-                                                                                :referer,
-                                                                                :load_cookies,
-                                                                                :user_agent,
-                                                                                :header,
-                                                                                NULL
+                                                                                :first_try_date,
+                                                                                :last_try_date,
+                                                                                :category,
+                                                                                :total_bytes,
+                                                                                :completed_bytes,
+                                                                                :speed_bps,
+                                                                                :eta_seconds
                                                                                 )""", dict)
-        self.persepolis_db_connection.commit() 
-    
- 
-        # job is done! open the lock
-        self.lock = False
 
+            # commit changes
+            self.persepolis_db_connection.commit()
 
 
 
+            if len(list) != 0:
+                # item must be inserted to the end of 'All Downloads' and category
+                # find download category
+                category = dict['category']
 
-    # return download information in download_db_table with special gid.
-    def searchGidInDownloadTable(self, gid):
+                gid_list = []
+                for dict in list:
+                    gid_list.append(dict['gid'])
+
+                self.appendGidsToCategory('All Downloads', gid_list)
+                self.appendGidsToCategory(category, gid_list)
+
+
+    # insert in addlink table in persepolis.db 
+    def insertInAddLinkTable(self, list):
         # lock data base
-        self.lockCursor()
+        with self.lock:
 
-        self.persepolis_db_cursor.execute("""SELECT * FROM download_db_table WHERE gid = '{}'""".format(str(gid)))
-        list = self.persepolis_db_cursor.fetchall()
+            for dict in list:
+                # first column and after download column is NULL
+                self.persepolis_db_cursor.execute("""INSERT INTO addlink_db_table VALUES(NULL,
+                                                                                    :gid,
+                                                                                    :out,
+                                                                                    :start_time,
+                                                                                    :end_time,
+                                                                                    :link,
+                                                                                    :ip,
+                                                                                    :port,
+                                                                                    :proxy_user,
+                                                                                    :proxy_passwd,
+                                                                                    :download_user,
+                                                                                    :download_passwd,
+                                                                                    :connections,
+                                                                                    :limit_value,
+                                                                                    :download_path,
+                                                                                    :referer,
+                                                                                    :load_cookies,
+                                                                                    :user_agent,
+                                                                                    :header,
+                                                                                    NULL
+                                                                                    )""", dict)
+            self.persepolis_db_connection.commit() 
 
-        # job is done! open the lock
-        self.lock = False
 
+    # return download information in download_db_table with special gid.
+    def searchGidInDownloadTable(self, gid):
 
+        self.persepolis_db_cursor.execute("""SELECT * FROM download_db_table WHERE gid = ?""", (str(gid),))
+        list = self.persepolis_db_cursor.fetchall()
 
 
         if list:
@@ -662,7 +911,11 @@ class PersepolisDB():
                 'link': tuple[9],
                 'first_try_date': tuple[10],
                 'last_try_date': tuple[11],
-                'category': tuple[12]
+                'category': tuple[12],
+                'total_bytes': tuple[13],
+                'completed_bytes': tuple[14],
+                'speed_bps': tuple[15],
+                'eta_seconds': tuple[16]
                 }
 
         # return results
@@ -671,21 +924,14 @@ class PersepolisDB():
     # return all items in download_db_table
     # '*' for category, cause that method returns all items. 
     def returnItemsInDownloadTable(self, category=None):
-        # lock data base
-        self.lockCursor()
 
         if category:
-            self.persepolis_db_cursor.execute("""SELECT * FROM download_db_table WHERE category = '{}'""".format(category))
+            self.persepolis_db_cursor.execute("""SELECT * FROM download_db_table WHERE category = ?""", (category,))
         else:
             self.persepolis_db_cursor.execute("""SELECT * FROM download_db_table""")
 
         rows = self.persepolis_db_cursor.fetchall()
 
-        # job is done! open the lock
-        self.lock = False
-
-
-
 
         downloads_dict = {}
         for tuple in rows:
@@ -702,7 +948,11 @@ class PersepolisDB():
                     'link': tuple[9],
                     'first_try_date': tuple[10],
                     'last_try_date': tuple[11],
-                    'category': tuple[12]
+                    'category': tuple[12],
+                    'total_bytes': tuple[13],
+                    'completed_bytes': tuple[14],
+                    'speed_bps': tuple[15],
+                    'eta_seconds': tuple[16]
                     }
 
             # add dict to the downloads_dict
@@ -712,17 +962,245 @@ class PersepolisDB():
 
         return downloads_dict
 
-      
+
+    # this method returns a page of category items in the order of download_table.
+    # newest item is shown in top of download_table, so items are sorted by position in
+    # descending order. every row contains the 13 columns of download_db_table and position.
+    # size, downloaded_size, rate and estimate_time_left columns are read from
+    # total_bytes, completed_bytes, speed_bps and eta_seconds(numbers), if they are available.
+    # if before_position is not None, then items before this position are returned.
+    def returnCategoryItemsPage(self, category, before_position=None, limit=200):
+        if before_position is None:
+            self.persepolis_db_cursor.execute("""SELECT download_db_table.file_name, download_db_table.status,
+                                                    coalesce(download_db_table.total_bytes, download_db_table.size),
+                                                    coalesce(download_db_table.completed_bytes, download_db_table.downloaded_size),
+                                                    download_db_table.percent, download_db_table.connections,
+                                                    coalesce(download_db_table.speed_bps, download_db_table.rate),
+                                                    coalesce(download_db_table.eta_seconds, download_db_table.estimate_time_left), download_db_table.gid,
+                                                    download_db_table.link, download_db_table.first_try_date, download_db_table.last_try_date,
+                                                    download_db_table.category, category_items_db_table.position
+                                                    FROM category_items_db_table JOIN download_db_table
+                                                    ON category_items_db_table.gid = download_db_table.gid
+                                                    WHERE category_items_db_table.category = ?
+                                                    ORDER BY category_items_db_table.position DESC LIMIT ?""", (str(category), limit))
+        else:
+            self.persepolis_db_cursor.execute("""SELECT download_db_table.file_name, download_db_table.status,
+                                                    coalesce(download_db_table.total_bytes, download_db_table.size),
+                                                    coalesce(download_db_table.completed_bytes, download_db_table.downloaded_size),
+                                                    download_db_table.percent, download_db_table.connections,
+                                                    coalesce(download_db_table.speed_bps, download_db_table.rate),
+                                                    coalesce(download_db_table.eta_seconds, download_db_table.estimate_time_left), download_db_table.gid,
+                                                    download_db_table.link, download_db_table.first_try_date, download_db_table.last_try_date,
+                                                    download_db_table.category, category_items_db_table.position
+                                                    FROM category_items_db_table JOIN download_db_table
+                                                    ON category_items_db_table.gid = download_db_table.gid
+                                                    WHERE category_items_db_table.category = ? AND category_items_db_table.position < ?
+                                                    ORDER BY category_items_db_table.position DESC LIMIT ?""", (str(category), before_position, limit))
+
+        return self.persepolis_db_cursor.fetchall()
+
+    # this method sorts items of category in category_items_db_table.
+    # sort_key is one of the keys in sort_order_dict.
+    # first item in sort order is shown in top of download_table,
+    # so it gets the biggest position.
+    # status order: complete, stopped, error, downloading, waiting, paused, scheduled, others.
+    def sortCategoryItems(self, category, sort_key):
+        sort_order_dict = {'name': 'download_db_table.file_name',
+                           'size': 'download_db_table.total_bytes DESC',
+                           'status': """CASE download_db_table.status WHEN 'complete' THEN 1
+                                                                     WHEN 'stopped' THEN 2
+                                                                     WHEN 'error' THEN 3
+                                                                     WHEN 'downloading' THEN 4
+                                                                     WHEN 'waiting' THEN 5
+                                                                     WHEN 'paused' THEN 6
+                                                                     WHEN 'scheduled' THEN 7
+                                                                     ELSE 8 END""",
+                           'first_try_date': 'download_db_table.first_try_date DESC',
+                           'last_try_date': 'download_db_table.last_try_date DESC'}
+
+        # lock data base
+        with self.lock:
+            # items with equal values keep their current order.
+            self.persepolis_db_cursor.execute("""SELECT category_items_db_table.gid
+                                                    FROM category_items_db_table JOIN download_db_table
+                                                    ON category_items_db_table.gid = download_db_table.gid
+                                                    WHERE category_items_db_table.category = ?
+                                                    ORDER BY """ + sort_order_dict[sort_key] + """, category_items_db_table.position DESC""",
+                                                    (str(category),))
+            rows = self.persepolis_db_cursor.fetchall()
+
+            number_of_items = len(rows)
+            self.persepolis_db_cursor.executemany("""UPDATE category_items_db_table SET position = ? WHERE category = ? AND gid = ?""",
+                                                    [(number_of_items - i, str(category), tuple[0]) for i, tuple in enumerate(rows)])
+
+            self.persepolis_db_connection.commit()
+
+    # this method returns position of gid in category.
+    def returnCategoryItemPosition(self, category, gid):
+        self.persepolis_db_cursor.execute("""SELECT position FROM category_items_db_table WHERE category = ? AND gid = ?""",
+                                                (str(category), str(gid)))
+        tuple = self.persepolis_db_cursor.fetchone()
+
+        if tuple:
+            return tuple[0]
+        else:
+            return None
+
+    # this method returns the nearest item to the position in category.
+    # if upper is True, the item with bigger position is returned.
+    # it returns (gid, position) or None.
+    def returnNeighborCategoryItem(self, category, position, upper=True):
+        if upper:
+            self.persepolis_db_cursor.execute("""SELECT gid, position FROM category_items_db_table
+                                                    WHERE category = ? AND position > ? ORDER BY position LIMIT 1""", (str(category), position))
+        else:
+            self.persepolis_db_cursor.execute("""SELECT gid, position FROM category_items_db_table
+                                                    WHERE category = ? AND position < ? ORDER BY position DESC LIMIT 1""", (str(category), position))
+
+        return self.persepolis_db_cursor.fetchone()
+
+    # this method sets positions of category items from 1 to number of items.
+    # order of items is not changed.
+    # it's needed when there is no room between two positions any more.
+    def renumberCategoryItems(self, category):
+        # lock data base
+        with self.lock:
+            self.persepolis_db_cursor.execute("""SELECT gid FROM category_items_db_table WHERE category = ? ORDER BY position""",
+                                                (str(category),))
+            rows = self.persepolis_db_cursor.fetchall()
+
+            self.persepolis_db_cursor.executemany("""UPDATE category_items_db_table SET position = ? WHERE category = ? AND gid = ?""",
+                                                    [(i + 1, str(category), tuple[0]) for i, tuple in enumerate(rows)])
+
+            self.persepolis_db_connection.commit()
+
+    # this method moves items of category.
+    # gid_list must be in the order of download_table(top item first).
+    # direction is:
+    # 'up' and 'down' for moving items by one row,
+    # 'top' and 'bottom' for moving items to the top or bottom of the download_table.
+    # only positions of moved items and their neighbors are changed.
+    def moveCategoryItems(self, category, gid_list, direction):
+        category = str(category)
+
+        # lock data base
+        with self.lock:
+            position_dict = {}
+            for gid in gid_list:
+                position = self.returnCategoryItemPosition(category, gid)
+                if position is not None:
+                    position_dict[gid] = position
+
+            # sort gids in order of download_table
+            gid_list = sorted(position_dict, key=position_dict.get, reverse=True)
+
+            # gid_list is empty or category has no items.
+            # max(position) and min(position) of an empty category are NULL.
+            if not(gid_list):
+                return
+
+            update_list = []
+            if direction == 'top' or direction == 'bottom':
+                if direction == 'top':
+                    self.persepolis_db_cursor.execute("""SELECT max(position) FROM category_items_db_table WHERE category = ?""", (category,))
+                    first_position = self.persepolis_db_cursor.fetchone()[0] + len(gid_list)
+                else:
+                    self.persepolis_db_cursor.execute("""SELECT min(position) FROM category_items_db_table WHERE category = ?""", (category,))
+                    first_position = self.persepolis_db_cursor.fetchone()[0] - 1
+
+                for i, gid in enumerate(gid_list):
+                    update_list.append((first_position - i, category, gid))
+
+            else:
+                upper = (direction == 'up')
+
+                # for moving up, top item must be moved first
+                # and for moving down, bottom item must be moved first.
+                if not(upper):
+                    gid_list.reverse()
+
+                # items that can't be moved, because they are in top(or bottom) of table.
+                fixed_gids = set()
+
+                for gid in gid_list:
+                    neighbor = self.returnNeighborCategoryItem(category, position_dict[gid], upper)
+
+                    if neighbor is None or neighbor[0] in fixed_gids:
+                        fixed_gids.add(gid)
+                        continue
+
+                    # substitute positions
+                    neighbor_gid, neighbor_position = neighbor
+                    for new_position, changed_gid in ((neighbor_position, gid), (position_dict[gid], neighbor_gid)):
+                        self.persepolis_db_cursor.execute("""UPDATE category_items_db_table SET position = ? WHERE category = ? AND gid = ?""",
+                                                            (new_position, category, changed_gid))
+
+                    position_dict[neighbor_gid] = position_dict[gid]
+                    position_dict[gid] = neighbor_position
+
+            self.persepolis_db_cursor.executemany("""UPDATE category_items_db_table SET position = ? WHERE category = ? AND gid = ?""",
+                                                    update_list)
+
+            self.persepolis_db_connection.commit()
+
+    # this method moves items of category before(above) target_gid in download_table.
+    # gid_list must be in the order of download_table(top item first).
+    # new positions are between position of target_gid and its upper item,
+    # so positions of other items are not changed.
+    def moveCategoryItemsBefore(self, category, gid_list, target_gid):
+        category = str(category)
+
+        # lock data base
+        with self.lock:
+            # target can't be one of the moving items.
+            # find first item under target that is not moving.
+            target_position = self.returnCategoryItemPosition(category, target_gid)
+            while target_gid in gid_list and target_position is not None:
+                neighbor = self.returnNeighborCategoryItem(category, target_position, upper=False)
+                if neighbor is None:
+                    target_gid, target_position = None, None
+                else:
+                    target_gid, target_position = neighbor
+
+            if target_position is None:
+                # move items to the bottom of the table
+                self.moveCategoryItems(category, gid_list, 'bottom')
+                return
+
+            # find upper item that is not moving
+            upper_position = target_position
+            while True:
+                neighbor = self.returnNeighborCategoryItem(category, upper_position, upper=True)
+                if neighbor is None:
+                    upper_position = None
+                    break
+
+                upper_position = neighbor[1]
+                if neighbor[0] not in gid_list:
+                    break
+
+            if upper_position is None:
+                upper_position = target_position + len(gid_list) + 1
+
+            step = (upper_position - target_position) / (len(gid_list) + 1)
+
+            # there is no room between positions, so renumber items and try again.
+            if step < 1e-9:
+                self.renumberCategoryItems(category)
+                self.moveCategoryItemsBefore(category, gid_list, target_gid)
+                return
+
+            self.persepolis_db_cursor.executemany("""UPDATE category_items_db_table SET position = ? WHERE category = ? AND gid = ?""",
+                                                    [(upper_position - (i + 1) * step, category, str(gid)) for i, gid in enumerate(gid_list)])
+
+            self.persepolis_db_connection.commit()
+
     # this method checks existance of a link in addlink_db_table
     def searchLinkInAddLinkTable(self, link):
-        # lock data base
-        self.lockCursor()
 
         self.persepolis_db_cursor.execute("""SELECT * FROM addlink_db_table WHERE link = (?)""", (link,))
         list = self.persepolis_db_cursor.fetchall()
 
-        # job is done! open the lock
-        self.lock = False
 
 
         if list:
@@ -731,21 +1209,12 @@ class PersepolisDB():
             return False
 
 
-
-
     # return download information in addlink_db_table with special gid.
     def searchGidInAddLinkTable(self, gid):
-        # lock data base
-        self.lockCursor()
 
-        self.persepolis_db_cursor.execute("""SELECT * FROM addlink_db_table WHERE gid = '{}'""".format(str(gid)))
+        self.persepolis_db_cursor.execute("""SELECT * FROM addlink_db_table WHERE gid = ?""", (str(gid),))
         list = self.persepolis_db_cursor.fetchall()
 
-        # job is done! open the lock
-        self.lock = False
-
-
-
 
         if list:
             tuple = list[0]
@@ -779,21 +1248,14 @@ class PersepolisDB():
     # return items in addlink_db_table
     # '*' for category, cause that method returns all items. 
     def returnItemsInAddLinkTable(self, category=None):
-        # lock data base
-        self.lockCursor()
 
         if category:
-            self.persepolis_db_cursor.execute("""SELECT * FROM addlink_db_table WHERE category = '{}'""".format(category))
+            self.persepolis_db_cursor.execute("""SELECT * FROM addlink_db_table WHERE category = ?""", (category,))
         else:
             self.persepolis_db_cursor.execute("""SELECT * FROM addlink_db_table""")
 
         rows = self.persepolis_db_cursor.fetchall()
 
-        # job is done! open the lock
-        self.lock = False
-
-
-
 
         addlink_dict = {}
         for tuple in rows:
@@ -831,32 +1293,41 @@ class PersepolisDB():
 # this method updates download_db_table
     def updateDownloadTable(self, list):
         # lock data base
-        self.lockCursor()
-
-        keys_list = ['file_name',
-                    'status',
-                    'size',
-                    'downloaded_size',
-                    'percent',
-                    'connections',
-                    'rate',
-                    'estimate_time_left',
-                    'gid',
-                    'link',
-                    'first_try_date',
-                    'last_try_date',
-                    'category'
-                    ]
-
-        for dict in list:
-            for key in keys_list:
-                # if a key is missed in dict, 
-                # then add this key to the dict and assign None value for the key. 
-                if key not in dict.keys():
-                    dict[key] = None
+        with self.lock:
+
+            keys_list = ['file_name',
+                        'status',
+                        'size',
+                        'downloaded_size',
+                        'percent',
+                        'connections',
+                        'rate',
+                        'estimate_time_left',
+                        'gid',
+                        'link',
+                        'first_try_date',
+                        'last_try_date',
+                        'category',
+                        'total_bytes',
+                        'completed_bytes',
+                        'speed_bps',
+                        'eta_seconds'
+                        ]
+
+            for dict in list:
+                for key in keys_list:
+                    # if a key is missed in dict, 
+                    # then add this key to the dict and assign None value for the key. 
+                    if key not in dict.keys():
+                        dict[key] = None
+
+                # find size in Byte if it's not available
+                if dict['total_bytes'] is None and dict['size'] is not None:
+                    dict['total_bytes'] = convertToByte(dict['size'])
 
             # update data base if value for the keys is not None
-            self.persepolis_db_cursor.execute("""UPDATE download_db_table SET   file_name = coalesce(:file_name, file_name),
+            # all rows are updated by one prepared statement in one transaction.
+            self.persepolis_db_cursor.executemany("""UPDATE download_db_table SET   file_name = coalesce(:file_name, file_name),
                                                                                     status = coalesce(:status, status),
                                                                                     size = coalesce(:size, size),
                                                                                     downloaded_size = coalesce(:downloaded_size, downloaded_size),
@@ -867,184 +1338,151 @@ class PersepolisDB():
                                                                                     link = coalesce(:link, link),
                                                                                     first_try_date = coalesce(:first_try_date, first_try_date),
                                                                                     last_try_date = coalesce(:last_try_date, last_try_date),
-                                                                                    category = coalesce(:category, category)
-                                                                                    WHERE gid = :gid""", dict)
-
-        # commit the changes
-        self.persepolis_db_connection.commit()
-
-
-        # job is done! open the lock
-        self.lock = False
-
+                                                                                    category = coalesce(:category, category),
+                                                                                    total_bytes = coalesce(:total_bytes, total_bytes),
+                                                                                    completed_bytes = coalesce(:completed_bytes, completed_bytes),
+                                                                                    speed_bps = coalesce(:speed_bps, speed_bps),
+                                                                                    eta_seconds = coalesce(:eta_seconds, eta_seconds)
+                                                                                    WHERE gid = :gid""", list)
 
+            # commit the changes
+            self.persepolis_db_connection.commit()
 
 
 # this method updates category_db_table
     def updateCategoryTable(self, list):
         # lock data base
-        self.lockCursor()
-
-        keys_list = ['category',
-                    'start_time_enable',
-                    'start_time',
-                    'end_time_enable',
-                    'end_time',
-                    'reverse',
-                    'limit_enable',
-                    'limit_value',
-                    'after_download',
-                    'gid_list']
+        with self.lock:
+
+            keys_list = ['category',
+                        'start_time_enable',
+                        'start_time',
+                        'end_time_enable',
+                        'end_time',
+                        'reverse',
+                        'limit_enable',
+                        'limit_value',
+                        'after_download',
+                        'parallel_downloads']
 
-        for dict in list:
-
-            # format of gid_list is list and must be converted to string for sqlite3
-            if 'gid_list' in dict.keys():
-                dict['gid_list'] = str(dict['gid_list'])
-
-            for key in keys_list:
-                # if a key is missed in dict, 
-                # then add this key to the dict and assign None value for the key. 
-                if key not in dict.keys():
-                    dict[key] = None
-
-
-
-
-            # update data base if value for the keys is not None
-            self.persepolis_db_cursor.execute("""UPDATE category_db_table SET   start_time_enable = coalesce(:start_time_enable, start_time_enable),
-                                                                                    start_time = coalesce(:start_time, start_time),
-                                                                                    end_time_enable = coalesce(:end_time_enable, end_time_enable),
-                                                                                    end_time = coalesce(:end_time, end_time),
-                                                                                    reverse = coalesce(:reverse, reverse),
-                                                                                    limit_enable = coalesce(:limit_enable, limit_enable),
-                                                                                    limit_value = coalesce(:limit_value, limit_value),
-                                                                                    after_download = coalesce(:after_download, after_download),
-                                                                                    gid_list = coalesce(:gid_list, gid_list)
-                                                                                    WHERE category = :category""", dict)
+            for dict in list:
 
-        # commit changes
-        self.persepolis_db_connection.commit()
+                # order of items is saved in category_items_db_table
+                if 'gid_list' in dict.keys() and dict['gid_list'] is not None:
+                    self.setCategoryGidList(dict['category'], dict['gid_list'])
 
+                for key in keys_list:
+                    # if a key is missed in dict, 
+                    # then add this key to the dict and assign None value for the key. 
+                    if key not in dict.keys():
+                        dict[key] = None
 
-        # job is done! open the lock
-        self.lock = False
 
+                # update data base if value for the keys is not None
+                self.persepolis_db_cursor.execute("""UPDATE category_db_table SET   start_time_enable = coalesce(:start_time_enable, start_time_enable),
+                                                                                        start_time = coalesce(:start_time, start_time),
+                                                                                        end_time_enable = coalesce(:end_time_enable, end_time_enable),
+                                                                                        end_time = coalesce(:end_time, end_time),
+                                                                                        reverse = coalesce(:reverse, reverse),
+                                                                                        limit_enable = coalesce(:limit_enable, limit_enable),
+                                                                                        limit_value = coalesce(:limit_value, limit_value),
+                                                                                        after_download = coalesce(:after_download, after_download),
+                                                                                        parallel_downloads = coalesce(:parallel_downloads, parallel_downloads)
+                                                                                        WHERE category = :category""", dict)
 
+            # commit changes
+            self.persepolis_db_connection.commit()
 
 
 # this method updates addlink_db_table
     def updateAddLinkTable(self, list):
         # lock data base
-        self.lockCursor()
-
-        keys_list = ['gid',
-                    'out',
-                    'start_time',
-                    'end_time',
-                    'link',
-                    'ip',
-                    'port',
-                    'proxy_user',
-                    'proxy_passwd',
-                    'download_user',
-                    'download_passwd',
-                    'connections',
-                    'limit_value',
-                    'download_path',
-                    'referer',
-                    'load_cookies',
-                    'user_agent',
-                    'header',
-                    'after_download']
-
-        for dict in list:
-            for key in keys_list:  
-                # if a key is missed in dict, 
-                # then add this key to the dict and assign None value for the key. 
-                if key not in dict.keys():
-                    dict[key] = None 
-
-            # update data base if value for the keys is not None
-            self.persepolis_db_cursor.execute("""UPDATE addlink_db_table SET out = coalesce(:out, out),
-                                                                                start_time = coalesce(:start_time, start_time),
-                                                                                end_time = coalesce(:end_time, end_time),
-                                                                                link = coalesce(:link, link),
-                                                                                ip = coalesce(:ip, ip),
-                                                                                port = coalesce(:port, port),
-                                                                                proxy_user = coalesce(:proxy_user, proxy_user),
-                                                                                proxy_passwd = coalesce(:proxy_passwd, proxy_passwd),
-                                                                                download_user = coalesce(:download_user, download_user),
-                                                                                download_passwd = coalesce(:download_passwd, download_passwd),
-                                                                                connections = coalesce(:connections, connections),
-                                                                                limit_value = coalesce(:limit_value, limit_value),
-                                                                                download_path = coalesce(:download_path, download_path),
-                                                                                referer = coalesce(:referer, referer),
-                                                                                load_cookies = coalesce(:load_cookies, load_cookies),
-                                                                                user_agent = coalesce(:user_agent, user_agent),
-                                                                                header = coalesce(:header, header),
-                                                                                after_download = coalesce(:after_download , after_download)
-                                                                                WHERE gid = :gid""", dict)
-        # commit the changes!
-        self.persepolis_db_connection.commit() 
-
-
-        # job is done! open the lock
-        self.lock = False
-
+        with self.lock:
+
+            keys_list = ['gid',
+                        'out',
+                        'start_time',
+                        'end_time',
+                        'link',
+                        'ip',
+                        'port',
+                        'proxy_user',
+                        'proxy_passwd',
+                        'download_user',
+                        'download_passwd',
+                        'connections',
+                        'limit_value',
+                        'download_path',
+                        'referer',
+                        'load_cookies',
+                        'user_agent',
+                        'header',
+                        'after_download']
 
+            for dict in list:
+                for key in keys_list:  
+                    # if a key is missed in dict, 
+                    # then add this key to the dict and assign None value for the key. 
+                    if key not in dict.keys():
+                        dict[key] = None 
+
+                # update data base if value for the keys is not None
+                self.persepolis_db_cursor.execute("""UPDATE addlink_db_table SET out = coalesce(:out, out),
+                                                                                    start_time = coalesce(:start_time, start_time),
+                                                                                    end_time = coalesce(:end_time, end_time),
+                                                                                    link = coalesce(:link, link),
+                                                                                    ip = coalesce(:ip, ip),
+                                                                                    port = coalesce(:port, port),
+                                                                                    proxy_user = coalesce(:proxy_user, proxy_user),
+                                                                                    proxy_passwd = coalesce(:proxy_passwd, proxy_passwd),
+                                                                                    download_user = coalesce(:download_user, download_user),
+                                                                                    download_passwd = coalesce(:download_passwd, download_passwd),
+                                                                                    connections = coalesce(:connections, connections),
+                                                                                    limit_value = coalesce(:limit_value, limit_value),
+                                                                                    download_path = coalesce(:download_path, download_path),
+                                                                                    referer = coalesce(:referer, referer),
+                                                                                    load_cookies = coalesce(:load_cookies, load_cookies),
+                                                                                    user_agent = coalesce(:user_agent, user_agent),
+                                                                                    header = coalesce(:header, header),
+                                                                                    after_download = coalesce(:after_download , after_download)
+                                                                                    WHERE gid = :gid""", dict)
+            # commit the changes!
+            self.persepolis_db_connection.commit() 
 
 
-    
     def setDefaultGidInAddlinkTable(self, gid, start_time=False, end_time=False, after_download=False):
         # lock data base
-        self.lockCursor()
-
-        # change value of start_time and end_time and after_download for special gid to NULL value
-        if start_time:
-            self.persepolis_db_cursor.execute("""UPDATE addlink_db_table SET start_time = NULL
-                                                                        WHERE gid = '{}' """.format(gid))
-        if end_time:
-            self.persepolis_db_cursor.execute("""UPDATE addlink_db_table SET end_time = NULL
-                                                                        WHERE gid = '{}' """.format(gid))
-        if after_download:
-            self.persepolis_db_cursor.execute("""UPDATE addlink_db_table SET after_download = NULL
-                                                                        WHERE gid = '{}' """.format(gid))
+        with self.lock:
+
+            # change value of start_time and end_time and after_download for special gid to NULL value
+            if start_time:
+                self.persepolis_db_cursor.execute("""UPDATE addlink_db_table SET start_time = NULL
+                                                                            WHERE gid = ? """, (gid,))
+            if end_time:
+                self.persepolis_db_cursor.execute("""UPDATE addlink_db_table SET end_time = NULL
+                                                                            WHERE gid = ? """, (gid,))
+            if after_download:
+                self.persepolis_db_cursor.execute("""UPDATE addlink_db_table SET after_download = NULL
+                                                                            WHERE gid = ? """, (gid,))
  
-        self.persepolis_db_connection.commit()
-
-
-        # job is done! open the lock
-        self.lock = False
-
-
-
+            self.persepolis_db_connection.commit()
 
 
     # return category information in category_db_table
     def searchCategoryInCategoryTable(self, category):
-        # lock data base
-        self.lockCursor()
 
-        self.persepolis_db_cursor.execute("""SELECT * FROM category_db_table WHERE category = '{}'""".format(str(category)))
+        self.persepolis_db_cursor.execute("""SELECT * FROM category_db_table WHERE category = ?""", (str(category),))
         list = self.persepolis_db_cursor.fetchall()
 
 
-        # job is done! open the lock
-        self.lock = False
-
-
-
-
-
         if list:
             tuple = list[0]
         else:
             return None
 
 
-        # convert string to list
-        gid_list = ast.literal_eval(tuple[9]) 
+        # get order of items from category_items_db_table
+        gid_list = self.returnCategoryGidList(category)
 
 
         # create a dictionary from results
@@ -1057,16 +1495,58 @@ class PersepolisDB():
                 'limit_enable': tuple[6],
                 'limit_value': tuple[7],
                 'after_download': tuple[8],
-                'gid_list': gid_list 
+                'gid_list': gid_list,
+                'parallel_downloads': tuple[10]
                 }
 
         # return dictionary
         return dict
 
+    # this method returns history of host in dictionary format.
+    # it returns None if nothing is downloaded from host before.
+    def searchHostInHostStatsTable(self, host):
+        self.persepolis_db_cursor.execute("""SELECT * FROM host_stats_db_table WHERE host = ?""", (str(host),))
+        list = self.persepolis_db_cursor.fetchall()
+
+        if list:
+            tuple = list[0]
+        else:
+            return None
+
+        dict = {'host': tuple[0],
+                'downloads': tuple[1],
+                'errors': tuple[2],
+                'consecutive_errors': tuple[3],
+                'max_connections': tuple[4],
+                'speed_bps': tuple[5],
+                'connection_speed_bps': tuple[6],
+                'average_bytes': tuple[7],
+                'last_try_date': tuple[8]
+                }
+
+        return dict
+
+    # insert or update history of host.
+    # dict must contain all keys of searchHostInHostStatsTable.
+    def updateHostStatsTable(self, dict):
+        # lock data base
+        with self.lock:
+            self.persepolis_db_cursor.execute("""INSERT OR REPLACE INTO host_stats_db_table VALUES(
+                                                                                :host,
+                                                                                :downloads,
+                                                                                :errors,
+                                                                                :consecutive_errors,
+                                                                                :max_connections,
+                                                                                :speed_bps,
+                                                                                :connection_speed_bps,
+                                                                                :average_bytes,
+                                                                                :last_try_date
+                                                                                )""", dict)
+
+            self.persepolis_db_connection.commit()
+
     # return categories name 
     def categoriesList(self):
-        # lock data base
-        self.lockCursor()
 
         self.persepolis_db_cursor.execute("""SELECT category FROM category_db_table ORDER BY ROWID""")
         rows = self.persepolis_db_cursor.fetchall() 
@@ -1077,12 +1557,6 @@ class PersepolisDB():
         for tuple in rows:
             queues_list.append(tuple[0])
 
-        # job is done! open the lock
-        self.lock = False
-
-
-
-
         # return the list
         return queues_list
 
@@ -1090,40 +1564,33 @@ class PersepolisDB():
 
     def setDBTablesToDefaultValue(self):
         # lock data base
-        self.lockCursor()
-
-    # change start_time_enable , end_time_enable , reverse ,
-    # limit_enable , after_download value to default value !
-        self.persepolis_db_cursor.execute("""UPDATE category_db_table SET start_time_enable = 'no', end_time_enable = 'no',
-                                        reverse = 'no', limit_enable = 'no', after_download = 'no'""")
-
-    # change status of download to 'stopped' if status isn't 'complete' or 'error'
-        self.persepolis_db_cursor.execute("""UPDATE download_db_table SET status = 'stopped' 
-                                        WHERE status NOT IN ('complete', 'error')""")
-
-    # change start_time and end_time and
-    # after_download value to None in addlink_db_table!
-        self.persepolis_db_cursor.execute("""UPDATE addlink_db_table SET start_time = NULL,
-                                                                        end_time = NULL,
-                                                                        after_download = NULL
-                                                                                        """)
+        with self.lock:
+
+            # change start_time_enable , end_time_enable , reverse ,
+            # limit_enable , after_download value to default value !
+            self.persepolis_db_cursor.execute("""UPDATE category_db_table SET start_time_enable = 'no', end_time_enable = 'no',
+                                            reverse = 'no', limit_enable = 'no', after_download = 'no'""")
+
+            # change status of download to 'stopped' if status isn't 'complete' or 'error'
+            self.persepolis_db_cursor.execute("""UPDATE download_db_table SET status = 'stopped' 
+                                            WHERE status NOT IN ('complete', 'error')""")
+
+            # change start_time and end_time and
+            # after_download value to None in addlink_db_table!
+            self.persepolis_db_cursor.execute("""UPDATE addlink_db_table SET start_time = NULL,
+                                                                            end_time = NULL,
+                                                                            after_download = NULL
+                                                                                            """)
     
-        self.persepolis_db_connection.commit()
-
-
-        # job is done! open the lock
-        self.lock = False
-
+            self.persepolis_db_connection.commit()
 
 
     def findActiveDownloads(self, category=None):
-        # lock data base
-        self.lockCursor()
 
         # find download items is download_db_table with status = "downloading" or "waiting" or paused or scheduled
         if category:
-            self.persepolis_db_cursor.execute("""SELECT gid FROM download_db_table WHERE (category = '{}') AND (status = 'downloading' OR status = 'waiting' 
-                                            OR status = 'scheduled' OR status = 'paused')""".format(str(category)))
+            self.persepolis_db_cursor.execute("""SELECT gid FROM download_db_table WHERE (category = ?) AND (status = 'downloading' OR status = 'waiting' 
+                                            OR status = 'scheduled' OR status = 'paused')""", (str(category),))
         else:
             self.persepolis_db_cursor.execute("""SELECT gid FROM download_db_table WHERE (status = 'downloading' OR status = 'waiting' 
                                             OR status = 'scheduled' OR status = 'paused')""")
@@ -1136,16 +1603,24 @@ class PersepolisDB():
         for tuple in list:
             gid_list.append(tuple[0])
             
-        # job is done! open the lock
-        self.lock = False
 
 
         return  gid_list 
 
+# this method returns gid of all items in download_db_table
+    def returnAllGids(self):
+        self.persepolis_db_cursor.execute("""SELECT gid FROM download_db_table""")
+
+        list = self.persepolis_db_cursor.fetchall()
+        gid_list = []
+
+        for tuple in list:
+            gid_list.append(tuple[0])
+
+        return gid_list
+
 # this method returns items with 'downloading' or 'waiting' status
     def returnDownloadingItems(self):
-        # lock data base
-        self.lockCursor()
 
         # find download items is download_db_table with status = "downloading" or "waiting" or paused or scheduled
         self.persepolis_db_cursor.execute("""SELECT gid FROM download_db_table WHERE (status = 'downloading' OR status = 'waiting')""")
@@ -1158,16 +1633,12 @@ class PersepolisDB():
         for tuple in list:
             gid_list.append(tuple[0])
             
-        # job is done! open the lock
-        self.lock = False
 
 
         return  gid_list 
 
 # this method returns items with 'paused' status.
     def returnPausedItems(self):
-        # lock data base
-        self.lockCursor()
 
         # find download items is download_db_table with status = "downloading" or "waiting" or paused or scheduled
         self.persepolis_db_cursor.execute("""SELECT gid FROM download_db_table WHERE (status = 'paused')""")
@@ -1180,8 +1651,6 @@ class PersepolisDB():
         for tuple in list:
             gid_list.append(tuple[0])
             
-        # job is done! open the lock
-        self.lock = False
 
 
         return  gid_list 
@@ -1189,86 +1658,48 @@ class PersepolisDB():
 
 # This method deletes a category from category_db_table
     def deleteCategory(self, category):
-
-        # delete gids of this category from gid_list of 'All Downloads'
-        category_dict = self.searchCategoryInCategoryTable(category)
-        all_downloads_dict = self.searchCategoryInCategoryTable('All Downloads')
-
-        # get gid_list
-        category_gid_list = category_dict['gid_list']
-        all_downloads_gid_list = all_downloads_dict['gid_list']
-
-        for gid in category_gid_list:
-            # delete item from all_downloads_gid_list
-            all_downloads_gid_list.remove(gid)
-
-        # update category_db_table
-        self.updateCategoryTable([all_downloads_dict])
-
-        # delete category from data_base
         # lock data base
-        self.lockCursor()
+        with self.lock:
 
-        self.persepolis_db_cursor.execute("""DELETE FROM category_db_table WHERE category = '{}'""".format(str(category)))
+            # delete category from data_base
+            # items of category are deleted from download_db_table and
+            # 'All Downloads' by FOREIGN KEY constraints(ON DELETE CASCADE)
+            self.persepolis_db_cursor.execute("""DELETE FROM category_db_table WHERE category = ?""", (str(category),))
 
-        # commit changes
-        self.persepolis_db_connection.commit()
+            # commit changes
+            self.persepolis_db_connection.commit()
 
-        # job is done! open the lock
-        self.lock = False
 
 
 # this method deletes all items in data_base
     def resetDataBase(self):
-        # update gid_list in categories with empty gid_list
-        all_downloads_dict = {'category': 'All Downloads', 'gid_list': []}
-        single_downloads_dict = {'category': 'Single Downloads', 'gid_list': []}
-        scheduled_downloads_dict = {'category': 'Scheduled Downloads', 'gid_list': []}
-
-
-        self.updateCategoryTable([all_downloads_dict, single_downloads_dict, scheduled_downloads_dict])
-
         # lock data base
-        self.lockCursor()
+        with self.lock:
+            # delete all items in category_items_db_table
+            self.persepolis_db_cursor.execute("""DELETE FROM category_items_db_table""")
 
-        # delete all items in category_db_table, except 'All Downloads' and 'Single Downloads'
-        self.persepolis_db_cursor.execute("""DELETE FROM category_db_table WHERE category NOT IN ('All Downloads', 'Single Downloads', 'Scheduled Downloads')""")
-        self.persepolis_db_cursor.execute("""DELETE FROM download_db_table""")
-        self.persepolis_db_cursor.execute("""DELETE FROM addlink_db_table""")
+            # delete all items in category_db_table, except 'All Downloads' and 'Single Downloads'
+            self.persepolis_db_cursor.execute("""DELETE FROM category_db_table WHERE category NOT IN ('All Downloads', 'Single Downloads', 'Scheduled Downloads')""")
+            self.persepolis_db_cursor.execute("""DELETE FROM download_db_table""")
+            self.persepolis_db_cursor.execute("""DELETE FROM addlink_db_table""")
 
-        # commit
-        self.persepolis_db_connection.commit()
+            # commit
+            self.persepolis_db_connection.commit()
 
-        # release lock
-        self.lock = False
 
-# This method deletes a download item from download_db_table
-    def deleteItemInDownloadTable(self, gid, category):
+# This method deletes download items from download_db_table
+# all items are deleted in one transaction.
+    def deleteItemsInDownloadTable(self, gid_list):
         # lock data base
-        self.lockCursor()
-
-        self.persepolis_db_cursor.execute("""DELETE FROM download_db_table WHERE gid = '{}'""".format(str(gid)))
-
-        # commit changes
-        self.persepolis_db_connection.commit()
+        with self.lock:
 
-        # job is done! open the lock
-        self.lock = False
+            # items are deleted from categories in category_items_db_table
+            # and from addlink_db_table by FOREIGN KEY constraints(ON DELETE CASCADE)
+            self.persepolis_db_cursor.executemany("""DELETE FROM download_db_table WHERE gid = ?""",
+                                                    [(str(gid),) for gid in gid_list])
 
-
-
-        # delete item from gid_list in category and All Downloads
-        for category_name in category, 'All Downloads':
-            category_dict = self.searchCategoryInCategoryTable(category_name)
-
-            # get gid_list
-            gid_list = category_dict['gid_list']
-
-            # delete item
-            gid_list.remove(gid)
-
-            # update category_db_table
-            self.updateCategoryTable([category_dict])
+            # commit changes
+            self.persepolis_db_connection.commit()
 
 
 # this method replaces:
@@ -1280,36 +1711,31 @@ class PersepolisDB():
     def correctDataBase(self):
 
         # lock data base
-        self.lockCursor()
+        with self.lock:
 
-        for units in [['KB', 'KiB'], ['MB', 'MiB'], ['GB', 'GiB']]:
-            dict = {'old_unit': units[0],
-                    'new_unit': units[1]}
+            for units in [['KB', 'KiB'], ['MB', 'MiB'], ['GB', 'GiB']]:
+                dict = {'old_unit': units[0],
+                        'new_unit': units[1]}
 
-            self.persepolis_db_cursor.execute("""UPDATE download_db_table 
-                    SET size = replace(size, :old_unit, :new_unit)""", dict)
-            self.persepolis_db_cursor.execute("""UPDATE download_db_table 
-                    SET rate = replace(rate, :old_unit, :new_unit)""", dict)
-            self.persepolis_db_cursor.execute("""UPDATE download_db_table 
-                    SET downloaded_size = replace(downloaded_size, :old_unit, :new_unit)""", dict)
+                self.persepolis_db_cursor.execute("""UPDATE download_db_table 
+                        SET size = replace(size, :old_unit, :new_unit)""", dict)
+                self.persepolis_db_cursor.execute("""UPDATE download_db_table 
+                        SET rate = replace(rate, :old_unit, :new_unit)""", dict)
+                self.persepolis_db_cursor.execute("""UPDATE download_db_table 
+                        SET downloaded_size = replace(downloaded_size, :old_unit, :new_unit)""", dict)
 
     
-        self.persepolis_db_connection.commit()
-
+            self.persepolis_db_connection.commit()
 
-        # job is done! open the lock
-        self.lock = False
+            # upgrade structure of data base if it's needed.
+            self.upgradeDataBase()
 
 
     # close connections
     def closeConnections(self):
         # lock data base
-        self.lockCursor()
-
-        self.persepolis_db_cursor.close()
-        self.persepolis_db_connection.close()
+        with self.lock:
+            self.connections.close()
 
-        # job is done! open the lock
-        self.lock = False
 
 
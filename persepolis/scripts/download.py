@@ -13,21 +13,46 @@
 #    You should have received a copy of the GNU General Public License
 #    along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from persepolis.scripts.useful_tools import freeSpace, humanReadbleSize
+from persepolis.scripts.useful_tools import freeSpace
+from persepolis.scripts.time_scheduler import time_scheduler, nextDeadline
+from persepolis.scripts.host_tuner import hostOfLink, tuneOptions
 from persepolis.scripts.bubble import notifySend
 from persepolis.scripts import logger
 from PyQt5.QtCore import QSettings
 import xmlrpc.client
 import urllib.parse
+import http.client
 import subprocess
 import traceback
+import threading
 import platform
 import shutil
 import time
-import ast
 import sys
 import os
 
+# orjson and ujson are faster than json.
+# they are used for JSON-RPC if they are installed.
+try:
+    import orjson
+    jsonLoads = orjson.loads
+
+    def jsonDumps(obj):
+        return orjson.dumps(obj)
+except ImportError:
+    try:
+        import ujson
+        jsonLoads = ujson.loads
+
+        def jsonDumps(obj):
+            return ujson.dumps(obj).encode('utf-8')
+    except ImportError:
+        import json
+        jsonLoads = json.loads
+
+        def jsonDumps(obj):
+            return json.dumps(obj).encode('utf-8')
+
 # Before reading this file, please read this link! 
 # this link helps you to understand this codes:
 # https://aria2.github.io/manual/en/html/aria2c.html#rpc-interface
@@ -49,10 +74,154 @@ port = int(persepolis_setting.value('settings/rpc-port'))
 # get aria2_path
 aria2_path = persepolis_setting.value('settings/aria2_path')
 
+# get rpc protocol from persepolis_setting
+# Persepolis can communicate with aria2 by XML-RPC or JSON-RPC.
+rpc_protocol = persepolis_setting.value('settings/rpc-protocol')
+
 # xml rpc
 SERVER_URI_FORMAT = 'http://{}:{:d}/rpc'
-server_uri = SERVER_URI_FORMAT.format(host, port)
-server = xmlrpc.client.ServerProxy(server_uri, allow_none=True)
+
+# json rpc
+JSON_SERVER_URI_FORMAT = 'http://{}:{:d}/jsonrpc'
+
+if rpc_protocol == 'JSON-RPC':
+    server_uri = JSON_SERVER_URI_FORMAT.format(host, port)
+else:
+    server_uri = SERVER_URI_FORMAT.format(host, port)
+
+# timeout of RPC requests in seconds
+RPC_TIMEOUT = 30
+
+
+# xmlrpc.client.Transport keeps HTTP/1.1 connection alive and reuses it for next requests.
+# if connection is reset by aria2, Transport tries again with new connection.
+# this class adds timeout to connection.
+class PersistentTransport(xmlrpc.client.Transport):
+    def __init__(self, timeout=RPC_TIMEOUT):
+        xmlrpc.client.Transport.__init__(self)
+        self.timeout = timeout
+
+    def make_connection(self, host):
+        connection = xmlrpc.client.Transport.make_connection(self, host)
+        connection.timeout = self.timeout
+        return connection
+
+
+# JSON-RPC client for aria2.
+# this class has the same interface as xmlrpc.client.ServerProxy,
+# for example server.aria2.tellStatus(gid, keys) or server.system.multicall(methods_list)
+# aria2 errors are raised as xmlrpc.client.Fault like ServerProxy.
+class JsonRpcServerProxy():
+    def __init__(self, uri, timeout=RPC_TIMEOUT):
+        split_uri = urllib.parse.urlsplit(uri)
+        self.host = split_uri.hostname
+        self.port = split_uri.port
+        self.path = split_uri.path
+        self.timeout = timeout
+        self.connection = None
+        self.request_id = 0
+
+    def request(self, method, params):
+        self.request_id = self.request_id + 1
+        body = jsonDumps({'jsonrpc': '2.0', 'id': str(self.request_id),
+                          'method': method, 'params': params})
+
+        # HTTP/1.1 connection is kept alive and reused.
+        # if aria2 closed it, request is sent again with new connection.
+        for attempt in range(2):
+            reused_connection = self.connection is not None
+            if not(reused_connection):
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+            try:
+                self.connection.request('POST', self.path, body, {'Content-Type': 'application/json'})
+                response = self.connection.getresponse()
+                data = response.read()
+                break
+            except (http.client.RemoteDisconnected, ConnectionResetError, ConnectionAbortedError, BrokenPipeError):
+                self.close()
+                if not(reused_connection) or attempt == 1:
+                    raise
+            except:
+                self.close()
+                raise
+
+        answer = jsonLoads(data)
+
+        if 'error' in answer:
+            error = answer['error']
+            raise xmlrpc.client.Fault(error.get('code'), error.get('message'))
+
+        return answer['result']
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    # server('close')() closes connection like xmlrpc.client.ServerProxy
+    def __call__(self, attr):
+        if attr == 'close':
+            return self.close
+
+        raise AttributeError('Attribute %r not found' % (attr,))
+
+    def __getattr__(self, name):
+        return JsonRpcMethod(self, name)
+
+
+# JsonRpcMethod is returned by JsonRpcServerProxy for server.aria2 and server.aria2.tellStatus and ...
+class JsonRpcMethod():
+    def __init__(self, proxy, name):
+        self.proxy = proxy
+        self.name = name
+
+    def __getattr__(self, name):
+        return JsonRpcMethod(self.proxy, self.name + '.' + name)
+
+    def __call__(self, *params):
+        return self.proxy.request(self.name, list(params))
+
+
+# xmlrpc.client.ServerProxy is not thread safe!
+# so every thread(DownloadLink, Queue, CheckDownloadInfoThread, ...) gets its own
+# ServerProxy and its own persistent connection to aria2.
+# server.aria2.xxx calls are sent by ServerProxy of current thread.
+class ThreadLocalServerProxy():
+    def __init__(self, uri):
+        self.uri = uri
+        self.local = threading.local()
+
+        # generation is increased by resetConnections method.
+        # threads create new ServerProxy if their generation is old.
+        self.generation = 0
+
+    def serverProxy(self):
+        if getattr(self.local, 'generation', None) != self.generation:
+            old_proxy = getattr(self.local, 'proxy', None)
+            if old_proxy is not None:
+                try:
+                    old_proxy('close')()
+                except:
+                    pass
+
+            if rpc_protocol == 'JSON-RPC':
+                self.local.proxy = JsonRpcServerProxy(self.uri)
+            else:
+                self.local.proxy = xmlrpc.client.ServerProxy(self.uri, transport=PersistentTransport(), allow_none=True)
+            self.local.generation = self.generation
+
+        return self.local.proxy
+
+    # close all connections. for example when aria2 is restarted.
+    def resetConnections(self):
+        self.generation = self.generation + 1
+
+    def __getattr__(self, name):
+        return getattr(self.serverProxy(), name)
+
+
+server = ThreadLocalServerProxy(server_uri)
 
 # start aria2 with RPC
 def startAria():
@@ -95,20 +264,49 @@ def startAria():
         subprocess.Popen([aria2d, '--no-conf', '--enable-rpc', '--rpc-listen-port=' + str(port),
                           '--rpc-max-request-size=2M', '--rpc-listen-all', '--quiet=true'], shell=False, creationflags=NO_WINDOW)
 
-    time.sleep(2)
+    # connections to old aria2 process are not valid anymore!
+    server.resetConnections()
 
+    # aria2 needs some time for starting RPC server.
     # check that starting is successful or not!
-    answer = aria2Version()
+    answer = waitForAria2()
 
     # return result
     return answer
 
+# this function waits until aria2 RPC server is answering or timeout is reached.
+# aria2 is checked with exponential backoff(0.05, 0.1, 0.2, 0.4, 0.5, 0.5, ... seconds),
+# so Persepolis doesn't wait more than necessary.
+def waitForAria2(timeout=2):
+    retry_wait = 0.05
+    end_time = time.time() + timeout
+    while True:
+        try:
+            return server.aria2.getVersion()
+        except:
+            # connections will be created again in next requests.
+            server.resetConnections()
+
+        # last check is done at end_time.
+        remaining_time = end_time - time.time()
+        if remaining_time <= 0:
+            break
+
+        time.sleep(min(retry_wait, remaining_time))
+        retry_wait = min(retry_wait * 2, 0.5)
+
+    # write ERROR messages in terminal and log
+    return aria2Version()
+
 # check aria2 release version . Persepolis uses this function to
 # check that aria2 RPC conection is available or not. 
 def aria2Version():
     try:
         answer = server.aria2.getVersion()
     except:
+        # connections will be created again in next requests.
+        server.resetConnections()
+
         # write ERROR messages in terminal and log
         logger.sendToLog("Aria2 didn't respond!", "ERROR")
         answer = "did not respond"
@@ -193,7 +391,7 @@ def downloadAria(gid, parent):
         ip_port = ""
 
     # call startTime if start_time is available
-    # startTime creates sleep loop if user set start_time
+    # startTime waits until start_time if user set start_time
     # see startTime function for more information. 
     if start_time:
         start_time_status = startTime(start_time, gid, parent)
@@ -227,6 +425,18 @@ def downloadAria(gid, parent):
     download_path_temp = persepolis_setting.value('settings/download_path_temp')
 
     if start_time_status != 'stopped':
+        # choose split, min-split-size and max-connection-per-server from
+        # history of host and size of file(spider finds size of file).
+        # see host_tuner.py
+        try:
+            total_bytes = parent.persepolis_db.searchGidInDownloadTable(gid)['total_bytes']
+            host_stats = parent.persepolis_db.searchHostInHostStatsTable(hostOfLink(link))
+        except:
+            total_bytes = None
+            host_stats = None
+
+        tuned_options = tuneOptions(host_stats, total_bytes, connections)
+
         # send download request to aria2
         aria_dict = {
             'gid': gid,
@@ -243,9 +453,9 @@ def downloadAria(gid, parent):
             'all-proxy-passwd': str(proxy_passwd),
             'http-user': str(download_user),
             'http-passwd': str(download_passwd),
-            'split': '16',
-            'max-connection-per-server': str(connections),
-            'min-split-size': '1M',
+            'split': tuned_options['split'],
+            'max-connection-per-server': tuned_options['max-connection-per-server'],
+            'min-split-size': tuned_options['min-split-size'],
             'continue': 'true',
             'dir': str(download_path_temp)
         }
@@ -320,6 +530,56 @@ def tellStatus(gid, parent):
     except:
         return None
 
+    return processDownloadStatus(gid, download_status, parent)
+
+# this function returns download status of all downloads in gid_list.
+# all tellStatus requests are sent to aria2 in one system.multicall request,
+# so number of RPC round trips doesn't depend on number of downloads.
+# output is gid_list and download_status_list like tellActive function.
+# gid of downloads that aria2 didn't return any information about them are not in output gid_list.
+# if aria2 doesn't respond, then output is None, None
+def tellStatusList(gid_list, parent):
+    if not(gid_list):
+        return [], []
+
+    methods_list = []
+    for gid in gid_list:
+        methods_list.append({'methodName': 'aria2.tellStatus',
+                             'params': [gid, ['status', 'connections', 'errorCode', 'errorMessage', 'downloadSpeed', 'dir', 'totalLength', 'completedLength', 'files']]})
+
+    try:
+        answer_list = server.system.multicall(methods_list)
+    except:
+        return None, None
+
+    returned_gid_list = []
+    download_status_list = []
+    for gid, answer in zip(gid_list, answer_list):
+        # successful answer is a list that contains one item.
+        # if aria2 couldn't find gid, answer is a dictionary that contains faultCode and faultString.
+        if not(isinstance(answer, list)) or not(answer):
+            continue
+
+        download_status = answer[0]
+        download_status['gid'] = str(gid)
+
+        try:
+            converted_info_dict = processDownloadStatus(gid, download_status, parent)
+        except:
+            # write ERROR messages in log
+            logger.sendToLog("Checking download status failed: " + str(gid), "ERROR")
+            error_message = str(traceback.format_exc())
+            logger.sendToLog(error_message, "ERROR")
+            continue
+
+        returned_gid_list.append(str(gid))
+        download_status_list.append(converted_info_dict)
+
+    return returned_gid_list, download_status_list
+
+# this function converts download_status that received from aria2 in desired format
+# and moves file to the download folder if download has completed.
+def processDownloadStatus(gid, download_status, parent):
     # convert download_status in desired format
     converted_info_dict = convertDownloadInformation(download_status)
 
@@ -342,15 +602,7 @@ def tellStatus(gid, parent):
                 file_name, download_path, persepolis_setting.value('settings/subfolder'))
 
         # find temp download path
-        file_status = str(download_status['files'])
-        file_status = file_status[1:-1]
-        file_status = ast.literal_eval(file_status)
-
-        # find user defined download path
-        path = str(file_status['path'])
-
-        # file_name
-        file_name = urllib.parse.unquote(os.path.basename(path))
+        file_information = fileInformation(download_status)
 
         # find file_size        
         try:
@@ -358,11 +610,26 @@ def tellStatus(gid, parent):
         except:
             file_size = None
 
-        file_path = downloadCompleteAction(parent, path, download_path, file_name, file_size)
+        # for single file downloads and multi-file downloads with a top directory,
+        # move_path_list contains one path(the file or the directory).
+        # otherwise every file is moved separately.
+        file_path = None
+        for path in file_information['move_path_list']:
+            # file_name
+            file_name = urllib.parse.unquote(os.path.basename(path))
+
+            if len(file_information['move_path_list']) > 1:
+                file_size = None
+
+            moved_path = downloadCompleteAction(parent, path, download_path, file_name, file_size)
+
+            if not(file_path):
+                file_path = moved_path
 
         # update download_path in addlink_db_table
-        add_link_dictionary['download_path'] = file_path
-        parent.persepolis_db.updateAddLinkTable([add_link_dictionary])
+        if file_path:
+            add_link_dictionary['download_path'] = file_path
+            parent.persepolis_db.updateAddLinkTable([add_link_dictionary])
 
 # if an error occured!
     if (converted_info_dict['status'] == "error"):
@@ -375,30 +642,112 @@ def tellStatus(gid, parent):
     # return results in dictionary format
     return converted_info_dict 
 
-# this function converts download information that received from aria2 in desired format.
-# input format must be a dictionary. 
-def convertDownloadInformation(download_status):
-    # find file_name
-    try:
-    # file_status contains name of download file and link of download file
-        file_status = str(download_status['files'])
-        file_status = file_status[1:-1]
-        file_status = ast.literal_eval(file_status)
-        path = str(file_status['path'])
-        file_name = urllib.parse.unquote(os.path.basename(path))
-        if not(file_name):
+# this function extracts file information from download_status that received from aria2.
+# download_status['files'] is a list of dictionaries. every dictionary contains
+# path, length, completedLength, selected and uris of one file.
+# torrents and metalinks may contain more than one file.
+# output is a dictionary:
+# file_name: name of download(name of top directory for multi-file downloads)
+# link: first uri of first file
+# move_path_list: paths that must be moved to download folder after completion.
+# files: list of dictionaries that contain progress of every file.
+def fileInformation(download_status):
+    files = download_status.get('files')
+    if not(files):
+        files = []
+
+    files_list = []
+    path_list = []
+    link = None
+
+    for file_dict in files:
+        path = file_dict.get('path')
+        if path:
+            path = str(path)
+        else:
+            # file name is not known yet. for example torrent metadata is not received.
+            path = None
+
+        try:
+            length = int(file_dict['length'])
+        except:
+            length = None
+
+        try:
+            completed_length = int(file_dict['completedLength'])
+        except:
+            completed_length = None
+
+        if length and completed_length != None:
+            percent = int(completed_length * 100 / length)
+        else:
+            percent = None
+
+        selected = (str(file_dict.get('selected')) != 'false')
+
+        if path:
+            file_name = urllib.parse.unquote(os.path.basename(path))
+        else:
             file_name = None
 
-        uris = file_status['uris']
-        uri = uris[0]
-        link = uri['uri']
+        files_list.append({'path': path,
+                           'file_name': file_name,
+                           'size': length,
+                           'downloaded_size': completed_length,
+                           'percent': percent,
+                           'selected': selected})
+
+        if path and selected:
+            path_list.append(path)
+
+        # find link
+        if link is None:
+            uris = file_dict.get('uris')
+            if uris:
+                link = uris[0].get('uri')
+
+    move_path_list = path_list
+
+    # find top directory of multi-file downloads.
+    # aria2 saves files of a torrent in a directory that is named after torrent.
+    download_dir = download_status.get('dir')
+    if len(path_list) > 1 and download_dir:
+        top_directory_list = []
+        for path in path_list:
+            relative_path = os.path.relpath(path, str(download_dir))
+            relative_path_split = relative_path.split(os.sep)
+            if len(relative_path_split) > 1 and relative_path_split[0] != '..':
+                top_directory_list.append(relative_path_split[0])
+            else:
+                top_directory_list.append(None)
 
-    except:
+        top_directory = top_directory_list[0]
+        if top_directory and top_directory_list.count(top_directory) == len(top_directory_list):
+            move_path_list = [os.path.join(str(download_dir), top_directory)]
 
+    # find file_name
+    if len(move_path_list) == 1:
+        file_name = urllib.parse.unquote(os.path.basename(move_path_list[0]))
+    elif files_list:
+        file_name = files_list[0]['file_name']
+    else:
         file_name = None
-        link = None
 
+    if not(file_name):
+        file_name = None
 
+    return {'file_name': file_name,
+            'link': link,
+            'move_path_list': move_path_list,
+            'files': files_list}
+
+# this function converts download information that received from aria2 in desired format.
+# input format must be a dictionary. 
+def convertDownloadInformation(download_status):
+    # find file_name and link
+    file_information = fileInformation(download_status)
+    file_name = file_information['file_name']
+    link = file_information['link']
 
     for i in download_status.keys():
         if not(download_status[i]):
@@ -416,25 +765,25 @@ def convertDownloadInformation(download_status):
     except:
         downloaded = None
 
-    # convert file_size and downloaded_size to KiB and MiB and GiB
-    if (downloaded != None and file_size != None and file_size != 0):
-        file_size_back = file_size
-
-        # converting file_size to KiB or MiB or GiB
-        size_str = humanReadbleSize(file_size)
-        downloaded_back = downloaded
-
-        downloaded_str = humanReadbleSize(downloaded)
-
     # find download percent from file_size and downloaded_size
-        file_size = file_size_back
-        downloaded = downloaded_back
+    if (downloaded != None and file_size != None and file_size != 0):
         percent = int(downloaded * 100 / file_size)
         percent_str = str(percent) + "%"
     else:
         percent_str = None
-        size_str = None
-        downloaded_str = None
+
+    # size, speed and estimate time left are saved in numbers.
+    # they are converted to KiB, MiB, ... when they are shown.
+    # see DownloadTableModel in mainwindow_ui.py
+    if file_size:
+        total_bytes = int(file_size)
+    else:
+        total_bytes = None
+
+    if downloaded != None:
+        completed_bytes = int(downloaded)
+    else:
+        completed_bytes = None
 
     # find download_speed
     try:
@@ -442,32 +791,11 @@ def convertDownloadInformation(download_status):
     except:
         download_speed = 0
 
-    # convert download_speed to desired units.
-    # and find estimate_time_left
-    if (downloaded != None and download_speed != 0):
-        estimate_time_left = int((file_size - downloaded)/download_speed)
-        
-        # converting file_size to KiB or MiB or GiB
-        download_speed_str = humanReadbleSize(download_speed) + '/s'
-
-        eta = ""
-        if estimate_time_left >= 3600:
-            eta = eta + str(int(estimate_time_left/3600)) + "h"
-            estimate_time_left = estimate_time_left % 3600
-            eta = eta + str(int(estimate_time_left/60)) + "m"
-            estimate_time_left = estimate_time_left % 60
-            eta = eta + str(estimate_time_left) + "s"
-        elif estimate_time_left >= 60:
-            eta = eta + str(int(estimate_time_left/60)) + "m"
-            estimate_time_left = estimate_time_left % 60
-            eta = eta + str(estimate_time_left) + "s"
-        else:
-            eta = eta + str(estimate_time_left) + "s"
-        estimate_time_left_str = eta
-
+    # find estimate_time_left
+    if (downloaded != None and file_size != None and download_speed != 0):
+        eta_seconds = int((file_size - downloaded)/download_speed)
     else:
-        download_speed_str = "0"
-        estimate_time_left_str = None
+        eta_seconds = None
 
     # find number of connections
     try:
@@ -498,13 +826,14 @@ def convertDownloadInformation(download_status):
                     'gid': download_status['gid'],
                     'file_name': file_name,
                     'status': status_str,
-                    'size': size_str,
-                    'downloaded_size': downloaded_str,
+                    'total_bytes': total_bytes,
+                    'completed_bytes': completed_bytes,
                     'percent': percent_str,
                     'connections': connections_str,
-                    'rate': download_speed_str,
-                    'estimate_time_left': estimate_time_left_str,
-                    'link': link
+                    'speed_bps': download_speed,
+                    'eta_seconds': eta_seconds,
+                    'link': link,
+                    'files': file_information['files']
                     }
 
     return download_info
@@ -516,8 +845,8 @@ def downloadCompleteAction(parent, path, download_path, file_name, file_size):
     i = 1
     file_path = os.path.join(download_path, file_name)
 
-# rename file if file already existed
-    while os.path.isfile(file_path):
+# rename file if file(or directory for multi-file downloads) already existed
+    while os.path.exists(file_path):
         file_name_split = file_name.split('.')
         extension_length = len(file_name_split[-1]) + 1
 
@@ -625,6 +954,10 @@ def shutDown():
 # this function sends remove request to aria2
 # and changes status of download to "stopped" in data_base
 def downloadStop(gid, parent):
+    # cancel start_time and end_time of download.
+    # if download is waiting for start_time, startTime returns 'stopped'.
+    time_scheduler.cancel(gid)
+
     # get download status from data_base
     dict = parent.persepolis_db.searchGidInDownloadTable(gid)
     status = dict['status']
@@ -659,6 +992,10 @@ def downloadStop(gid, parent):
         dict = {'gid': gid, 'status': 'stopped'}        
         parent.persepolis_db.updateDownloadTable([dict])
 
+        # startTime may have added start_time after first canceling.
+        # status is "stopped" now, so startTime doesn't add it again.
+        time_scheduler.cancel(gid)
+
     return answer
 
 
@@ -749,83 +1086,69 @@ def nowTime():
     now_time = time.strftime("%H:%M")
     return sigmaTime(now_time)
 
-# this function creates sleep time,if user sets "start time" for download.  
+# this function blocks download thread, if user sets "start time" for download.
+# time_scheduler wakes thread up at start_time, or when user stops download(see downloadStop).
 def startTime(start_time, gid, parent):
     # write some messages
     logger.sendToLog("Download starts at " + start_time, "INFO")
 
-    # start_time that specified by user
-    sigma_start = sigmaTime(start_time) 
+    # find next time that clock shows start_time(today or tomorrow)
+    deadline = nextDeadline(start_time)
 
-    # get current time
-    sigma_now = nowTime()  
+    # downloadStop cancels deadline, but if user stopped download before
+    # deadline is added to time_scheduler, canceling did nothing.
+    # so status is checked in data_base before and after waiting.
+    if downloadIsStopped(gid, parent):
+        return 'stopped'
 
-    status = 'scheduled'
+    # if user canceled download , then return 'stopped' and if download time arrived then return 'scheduled'!
+    if time_scheduler.waitForDeadline(gid, 'start', deadline) and not(downloadIsStopped(gid, parent)):
+        status = 'scheduled'
+    else:
+        status = 'stopped'
 
-  # this loop is countinuing until download time arrival!
-    while sigma_start != sigma_now:
-        time.sleep(2.1)
-        sigma_now = nowTime()
+    return status
 
-        # check download status from data_base
-        dict = parent.persepolis_db.searchGidInDownloadTable(gid)
-        data_base_download_status = dict['status']
-        
-        # if data_base_download_status = stopped >> it means that user
-        # canceled download , and loop must be breaked!
-        if data_base_download_status == 'stopped':
-            status = 'stopped'
-            break
-        else:
-            status = 'scheduled'
 
-# if user canceled download , then return 'stopped' and if download time arrived then return 'scheduled'!
-    return status  
+# this function returns True if user stopped download(see downloadStop).
+def downloadIsStopped(gid, parent):
+    dict = parent.persepolis_db.searchGidInDownloadTable(gid)
+    return dict is None or dict['status'] == 'stopped'
 
 
+# this function adds end_time of download to time_scheduler and returns immediately.
+# endTimeArrived is called at end_time.
+# time_scheduler forgets end_time, if user stops download(see downloadStop).
 def endTime(end_time, gid, parent):
     logger.sendToLog("End time is activated " + gid, "INFO")
-    sigma_end = sigmaTime(end_time)
 
-    # get current time
-    sigma_now = nowTime()
+    deadline = nextDeadline(end_time)
+    time_scheduler.addDeadline(gid, 'end', deadline, lambda: endTimeArrived(gid, parent))
 
-    # while current time is not equal to end_time, continue the loop
-    while sigma_end != sigma_now:
 
-        # get download status from data_base
-        dict = parent.persepolis_db.searchGidInDownloadTable(gid) 
-        status = dict['status']
-
-        # check download status
-        if status == 'downloading' or status == 'paused' or status == 'waiting':
-            # download continues!
-            answer = 'continue'
-        else:
-            # Download completed or stopped by user
-            # so break the loop
-            answer = 'end'
-            logger.sendToLog("Download has been finished! " + str(gid), "INFO")
-            break
+def endTimeArrived(gid, parent):
+    # get download status from data_base
+    dict = parent.persepolis_db.searchGidInDownloadTable(gid)
+    status = dict['status']
 
-        # get current time
-        sigma_now = nowTime()
-        time.sleep(2.1)
+    # Download completed or stopped by user
+    if status not in ['downloading', 'paused', 'waiting']:
+        logger.sendToLog("Download has been finished! " + str(gid), "INFO")
+        return
 
     # Time is up!
-    if answer != 'end':
-        logger.sendToLog("Time is up!", "INFO")
+    logger.sendToLog("Time is up!", "INFO")
+    answer = downloadStop(gid, parent)
+    i = 0
+    # try to stop download 10 times
+    while answer == 'None' and (i <= 9):
+        time.sleep(1)
         answer = downloadStop(gid, parent)
-        i = 0
-        # try to stop download 10 times
-        while answer == 'None' and (i <= 9):
-            time.sleep(1)
-            answer = downloadStop(gid, parent)
-            i = i + 1
-
-        # If aria2c not respond, so kill it. R.I.P :)) 
-        if (answer == 'None') and (os_type != 'Windows'):
-            os.system("killall aria2c")
-
-        # change end_time value to None in data_base
-        parent.persepolis_db.setDefaultGidInAddlinkTable(gid, end_time=True)
+        i = i + 1
+
+    # If aria2c not respond, so kill it. R.I.P :)) 
+    if (answer == 'None') and (os_type != 'Windows'):
+        os.system("killall aria2c")
+
+    # change end_time value to None in data_base
+    parent.persepolis_db.setDefaultGidInAddlinkTable(gid, end_time=True)
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import threading
+
+# DownloadEventBus passes changes of download status to the threads that are waiting for them.
+# CheckDownloadInfoThread publishes status of downloads(see mainwindow.py),
+# and Queue threads subscribe to the bus and wait for their downloads.
+# so Queue doesn't need to read status of downloads from data base.
+
+
+# every subscriber has its own list of events.
+# event is a (gid, status) tuple.
+class DownloadEventSubscriber():
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.event_list = []
+
+        # woken is True when some one wants subscriber wake up(for example for stopping queue)
+        self.woken = False
+
+    def addEvent(self, gid, status):
+        with self.condition:
+            self.event_list.append((gid, status))
+            self.condition.notify_all()
+
+    # wake up waiting thread without any event.
+    def wake(self):
+        with self.condition:
+            self.woken = True
+            self.condition.notify_all()
+
+    # wait until timeout or an event is received.
+    # timeout can be None for waiting without timeout.
+    # this method returns a list of events.
+    def waitForEvents(self, timeout=None):
+        with self.condition:
+            if not(self.event_list) and not(self.woken):
+                self.condition.wait(timeout)
+
+            event_list = self.event_list
+            self.event_list = []
+            self.woken = False
+
+        return event_list
+
+
+class DownloadEventBus():
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscriber_list = []
+
+        # last status of every gid that is published.
+        self.status_dict = {}
+
+    def subscribe(self):
+        subscriber = DownloadEventSubscriber()
+        with self.lock:
+            self.subscriber_list.append(subscriber)
+
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            if subscriber in self.subscriber_list:
+                self.subscriber_list.remove(subscriber)
+
+    # subscribers are notified only if status of gid is changed.
+    def publish(self, gid, status):
+        with self.lock:
+            if self.status_dict.get(gid) == status:
+                return
+
+            self.status_dict[gid] = status
+            subscriber_list = list(self.subscriber_list)
+
+        for subscriber in subscriber_list:
+            subscriber.addEvent(gid, status)
+
+    # wake all subscribers up.
+    def wake(self):
+        with self.lock:
+            subscriber_list = list(self.subscriber_list)
+
+        for subscriber in subscriber_list:
+            subscriber.wake()
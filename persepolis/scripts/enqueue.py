@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from persepolis.scripts.ipc import sendToRunningInstance
+import argparse
+import sys
+
+# persepolis --enqueue sends links to running instance of Persepolis.
+# this module never imports PyQt5 or data_base, so enqueueing links is fast.
+# links can be given as arguments:
+#       persepolis --enqueue URL1 URL2 ...
+# or they can be read from standard input(one link in every line):
+#       cat links.txt | persepolis --enqueue
+# all links are sent to running instance in one request.
+# see ipc.py for more information.
+
+
+# this function returns a list of link dictionaries(see browser_plugin_dict in persepolis.py).
+def returnEnqueueList(argv):
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('--enqueue', action='store', nargs='*')
+    parser.add_argument('--referer', action='store', nargs=1)
+    parser.add_argument('--cookie', action='store', nargs=1)
+    parser.add_argument('--agent', action='store', nargs=1)
+    parser.add_argument('--headers', action='store', nargs=1)
+    args, unknown = parser.parse_known_args(argv)
+
+    link_list = list(args.enqueue or [])
+
+    # read links from standard input if no link is given in arguments.
+    if (not(link_list) or link_list == ['-']) and not(sys.stdin.isatty()):
+        link_list = sys.stdin.read().splitlines()
+
+    enqueue_list = []
+    for link in link_list:
+        link = link.strip()
+
+        # ignore empty lines and comments
+        if not(link) or link.startswith('#') or link == '-':
+            continue
+
+        enqueue_list.append({'link': link,
+                             'referer': "".join(args.referer) if args.referer else None,
+                             'load_cookies': "".join(args.cookie) if args.cookie else None,
+                             'user_agent': "".join(args.agent) if args.agent else None,
+                             'header': "".join(args.headers) if args.headers else None,
+                             'out': None})
+
+    return enqueue_list
+
+
+# this function sends enqueue_list to running instance in one batch.
+# it returns True if running instance received links.
+def enqueue(enqueue_list):
+    if not(enqueue_list):
+        return True
+
+    return sendToRunningInstance({'command': 'add-links', 'links': enqueue_list})
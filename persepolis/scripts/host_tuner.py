@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from persepolis.scripts import logger
+import urllib.parse
+import threading
+import traceback
+import time
+
+# host tuner chooses split, min-split-size and max-connection-per-server for every new download.
+# it uses history of host that is saved in host_stats_db_table(see data_base.py).
+#
+# history of host:
+# max_connections: number of connections that host accepts without error.
+#       it's halved when a download fails after it opened more than one connection,
+#       and it's increased by 1 when a download completes.
+#       so hosts that ban many connections get less connections.
+#       errors before any connection is opened(broken link, DNS error, ...) and errors of
+#       downloads with one connection(disk is full, ...) don't change it.
+# speed_bps and connection_speed_bps: average download speed of host and average speed of
+#       every connection (Byte per second).
+# average_bytes: average size of files that are downloaded from host.
+#       it's used for pre-sizing, when spider couldn't find size of file(see SpiderThread in mainwindow.py).
+#       downloads that are started without spider use it in tuneOptions.
+#
+# HostStatsRecorder records history of hosts from download information(see CheckDownloadInfoThread in mainwindow.py).
+# tuneOptions is called in downloadAria(see download.py).
+
+# aria2 doesn't accept more than 16 connections per server.
+MAX_CONNECTIONS = 16
+
+MIB = 1024 * 1024
+
+# weight of new download in averages
+AVERAGE_WEIGHT = 0.3
+
+# if file is downloaded in less than FAST_DOWNLOAD_SECONDS with one connection,
+# opening more connections is not useful.
+FAST_DOWNLOAD_SECONDS = 2
+
+
+# this function returns host name of link in lower case.
+# it returns None if link has no host.
+def hostOfLink(link):
+    try:
+        host = urllib.parse.urlparse(str(link)).hostname
+    except:
+        host = None
+
+    if host:
+        return host.lower()
+    else:
+        return None
+
+
+def movingAverage(old_value, new_value):
+    if not(old_value):
+        return int(new_value)
+
+    return int(old_value + AVERAGE_WEIGHT * (new_value - old_value))
+
+
+# this function returns new history of host after a download is finished.
+# host_stats is old history of host or None.
+# status is 'complete' or 'error'.
+# total_bytes is size of file.
+# downloaded_bytes and seconds are downloaded size and download time in this try.
+# connections is maximum number of connections that download used(None if it's not known).
+def recordResult(host_stats, host, status, total_bytes, downloaded_bytes, seconds, connections, date):
+    if host_stats:
+        host_stats = dict(host_stats)
+    else:
+        host_stats = {'host': host,
+                      'downloads': 0,
+                      'errors': 0,
+                      'consecutive_errors': 0,
+                      'max_connections': MAX_CONNECTIONS,
+                      'speed_bps': None,
+                      'connection_speed_bps': None,
+                      'average_bytes': None,
+                      'last_try_date': None}
+
+    host_stats['downloads'] = host_stats['downloads'] + 1
+    host_stats['last_try_date'] = date
+
+    max_connections = host_stats['max_connections'] or MAX_CONNECTIONS
+    connections = int(connections or 0)
+
+    if status == 'complete':
+        host_stats['consecutive_errors'] = 0
+        host_stats['max_connections'] = min(max_connections + 1, MAX_CONNECTIONS)
+
+        if total_bytes:
+            host_stats['average_bytes'] = movingAverage(host_stats['average_bytes'], total_bytes)
+
+        # very short downloads don't show speed of host.
+        if downloaded_bytes and seconds and seconds >= 1 and connections:
+            speed = downloaded_bytes / seconds
+            host_stats['speed_bps'] = movingAverage(host_stats['speed_bps'], speed)
+            host_stats['connection_speed_bps'] = movingAverage(host_stats['connection_speed_bps'], speed / connections)
+    else:
+        host_stats['errors'] = host_stats['errors'] + 1
+        host_stats['consecutive_errors'] = host_stats['consecutive_errors'] + 1
+
+        # perhaps server bans many connections.
+        # so use half of connections that download used.
+        # if download had one connection or no connection, error is not about number of connections.
+        if connections > 1:
+            host_stats['max_connections'] = max(min(max_connections, connections) // 2, 1)
+
+    return host_stats
+
+
+# this function returns aria2 options for new download.
+# host_stats is history of host or None.
+# total_bytes is size of file that spider found or None.
+# connections is number of connections that user set for download.
+def tuneOptions(host_stats, total_bytes, connections):
+    try:
+        connections = int(connections)
+    except:
+        connections = MAX_CONNECTIONS
+
+    connections = min(max(connections, 1), MAX_CONNECTIONS)
+
+    if host_stats:
+        # don't open more connections than host accepts.
+        if host_stats['max_connections']:
+            connections = min(connections, host_stats['max_connections'])
+
+        # pre-sizing: spider couldn't find size of file,
+        # so guess it from files that downloaded from host before.
+        if not(total_bytes):
+            total_bytes = host_stats['average_bytes']
+
+        # one connection is enough for files that are downloaded very fast.
+        if total_bytes and host_stats['connection_speed_bps']:
+            if total_bytes / host_stats['connection_speed_bps'] < FAST_DOWNLOAD_SECONDS:
+                connections = 1
+
+    min_split_size = 1
+    if total_bytes:
+        # aria2 doesn't split pieces smaller than 2 * min-split-size.
+        # so small files don't need many connections.
+        connections = max(min(connections, total_bytes // (2 * MIB)), 1)
+
+        # big files are split to bigger pieces, so less requests are sent to server.
+        min_split_size = min(max(total_bytes // (connections * 4 * MIB), 1), 64)
+
+    return {'split': str(connections),
+            'max-connection-per-server': str(connections),
+            'min-split-size': str(min_split_size) + 'M'}
+
+
+# HostStatsRecorder receives download information that is converted by
+# download.convertDownloadInformation(or is read from data base) and
+# saves history of hosts when downloads are finished.
+class HostStatsRecorder():
+    def __init__(self, persepolis_db):
+        self.persepolis_db = persepolis_db
+        self.lock = threading.Lock()
+
+        # active_dict contains gid and information of active downloads:
+        # host, start_time, start_bytes and connections.
+        self.active_dict = {}
+
+        # last status of every gid.
+        # CheckDownloadInfoThread sends information of finished downloads more than one time.
+        self.status_dict = {}
+
+    def update(self, download_info, now=None):
+        if now is None:
+            now = time.time()
+
+        gid = download_info['gid']
+        status = download_info['status']
+
+        with self.lock:
+            old_status = self.status_dict.get(gid)
+            self.status_dict[gid] = status
+
+            if status == 'downloading':
+                try:
+                    connections = int(download_info.get('connections'))
+                except:
+                    connections = 0
+
+                completed_bytes = download_info.get('completed_bytes') or 0
+
+                if gid not in self.active_dict.keys():
+                    host = hostOfLink(download_info.get('link'))
+                    if not(host):
+                        return
+
+                    self.active_dict[gid] = {'host': host,
+                                             'start_time': now,
+                                             'start_bytes': completed_bytes,
+                                             'connections': connections}
+
+                active = self.active_dict[gid]
+                active['connections'] = max(active['connections'], connections)
+                return
+
+            if old_status == status:
+                return
+
+            active = self.active_dict.pop(gid, None)
+
+        # only complete and error downloads show behavior of host.
+        # stopped and paused downloads are forgotten.
+        if status not in ['complete', 'error']:
+            return
+
+        if not(active):
+            # download failed before it started(for example server refused connections).
+            host = hostOfLink(download_info.get('link'))
+            if status != 'error' or not(host):
+                return
+
+            active = {'host': host, 'start_time': now, 'start_bytes': 0, 'connections': None}
+
+        total_bytes = download_info.get('total_bytes')
+        if total_bytes:
+            downloaded_bytes = total_bytes - active['start_bytes']
+        else:
+            downloaded_bytes = None
+
+        date = time.strftime("%Y/%m/%d , %H:%M:%S", time.localtime(now))
+
+        try:
+            host_stats = self.persepolis_db.searchHostInHostStatsTable(active['host'])
+            host_stats = recordResult(host_stats, active['host'], status, total_bytes, downloaded_bytes,
+                                      now - active['start_time'], active['connections'], date)
+            self.persepolis_db.updateHostStatsTable(host_stats)
+        except:
+            logger.sendToLog("History of host couldn't be saved: " + str(active['host']), "ERROR")
+            error_message = str(traceback.format_exc())
+            logger.sendToLog(error_message, "ERROR")
@@ -20,6 +20,7 @@ from persepolis.scripts.useful_tools import determineConfigFolder, returnDefault
 from persepolis.scripts.browser_integration import browserIntegration
 from persepolis.scripts import osCommands
 from PyQt5.QtCore import QSettings
+import traceback
 import subprocess
 import shutil
 import time
@@ -46,38 +47,24 @@ log_file = os.path.join(str(config_folder), 'persepolisdm.log')
 # get current time
 current_time = time.strftime('%Y/%m/%d %H:%M:%S')
 
-# find number of lines in log_file. 
+# read log_file one time and find number of lines.
 with open(log_file) as f:
-    lines = sum(1 for _ in f)
+    f_lines = f.readlines()
+
+lines = len(f_lines)
 
 # if number of lines in log_file is more than 300, then keep last 200 lines in log_file.
 if lines < 300:
     f = open(log_file, 'a')
-    f.writelines('Persepolis Download Manager, '\
-            + current_time\
-            +'\n')
-    f.close()
 else:
 # keep last 200 lines
-    line_num = lines - 200
-    f = open(log_file, 'r')
-    f_lines = f.readlines()
-    f.close()
-
-    line_counter = 1
     f = open(log_file, 'w')
-    for line in f_lines:
-        if line_counter > line_num:
-            f.writelines(str(line))
-
-        line_counter = line_counter + 1
-    f.close()
+    f.writelines(f_lines[lines - 200:])
 
-    f = open(log_file, 'a')
-    f.writelines('Persepolis Download Manager, '\
-            + current_time\
-            +'\n')
-    f.close()
+f.writelines('Persepolis Download Manager, '\
+        + current_time\
+        +'\n')
+f.close()
 
 
 from persepolis.scripts.data_base import PersepolisDB, PluginsDB
@@ -86,7 +73,14 @@ from persepolis.scripts.data_base import PersepolisDB, PluginsDB
 persepolis_db = PersepolisDB()
 
 # create tables
-persepolis_db.createTables()
+# if persepolis.db couldn't be upgraded to the last version(see upgradeDataBase in data_base.py),
+# error is written in log and Persepolis starts. main window creates tables again and
+# if it fails, ErrorWindow lets user reset data base.
+try:
+    persepolis_db.createTables()
+except Exception:
+    logger.sendToLog("persepolis.db ERROR!", "ERROR")
+    logger.sendToLog(str(traceback.format_exc()), "ERROR")
 
 # close connections
 persepolis_db.closeConnections()
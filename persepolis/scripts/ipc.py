@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from persepolis.scripts.useful_tools import determineConfigFolder
+import platform
+import getpass
+import socket
+import json
+import os
+
+# running instance of Persepolis listens on a local socket(QLocalServer in mainwindow.py).
+# new instances of Persepolis(browser plugins, terminal arguments, ...) send their
+# requests to running instance with this local socket.
+# in GNU/Linux, BSD and mac osx local socket is a unix domain socket in persepolis_tmp folder.
+# in Windows local socket is a named pipe.
+# every request is a json object in one line and running instance answers "ok" line.
+# requests:
+# {"command": "show-window"} >> running instance shows main window.
+# {"command": "add-links", "links": [...]} >> links is a list of dictionaries
+#       (link, referer, load_cookies, user_agent, header, out).
+# {"command": "check-plugins"} >> running instance checks plugins_db for new links.
+
+os_type = platform.system()
+
+# keys of every link in "add-links" request
+LINK_KEYS = ['link', 'referer', 'load_cookies', 'user_agent', 'header', 'out']
+
+# persepolis tmp folder path
+persepolis_tmp = os.path.join(determineConfigFolder(), 'persepolis_tmp')
+
+# this method returns name of local server.
+def localServerName():
+    if os_type == 'Windows':
+        return 'persepolis_download_manager_' + str(getpass.getuser())
+    else:
+        return os.path.join(persepolis_tmp, 'persepolis-ipc')
+
+
+def encodeRequest(request_dict):
+    return (json.dumps(request_dict) + '\n').encode('utf-8')
+
+
+# this function returns a dictionary, or None if line is not a valid request.
+def decodeRequest(line):
+    try:
+        request_dict = json.loads(line.decode('utf-8'))
+    except:
+        return None
+
+    if not(isinstance(request_dict, dict)) or 'command' not in request_dict.keys():
+        return None
+
+    # every link must have all keys of browser_plugin_dict(see persepolis.py)
+    if request_dict['command'] == 'add-links':
+        links = []
+        for link_dict in request_dict.get('links', []):
+            if isinstance(link_dict, dict) and link_dict.get('link'):
+                for key in LINK_KEYS:
+                    if key not in link_dict.keys():
+                        link_dict[key] = None
+
+                links.append(link_dict)
+
+        request_dict['links'] = links
+
+    return request_dict
+
+
+# this function sends request_dict to running instance of Persepolis.
+# it returns True if running instance answered, otherwise returns False.
+# if answer is False, caller must use plugins_db and persepolis_tmp files instead.
+def sendToRunningInstance(request_dict, timeout=5):
+    message = encodeRequest(request_dict)
+    try:
+        if os_type == 'Windows':
+            # QLocalServer uses \\.\pipe\ + server name in Windows.
+            pipe = open('\\\\.\\pipe\\' + localServerName(), 'r+b', buffering=0)
+            try:
+                pipe.write(message)
+                answer = pipe.readline()
+            finally:
+                pipe.close()
+        else:
+            client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                client.settimeout(timeout)
+                client.connect(localServerName())
+                client.sendall(message)
+
+                # wait for answer
+                answer = b''
+                while not(answer.endswith(b'\n')):
+                    data = client.recv(1024)
+                    if not(data):
+                        break
+                    answer = answer + data
+            finally:
+                client.close()
+    except:
+        return False
+
+    return answer.strip() == b'ok'
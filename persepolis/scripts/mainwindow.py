@@ -14,8 +14,8 @@
 #    along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from PyQt5.QtWidgets import QAbstractItemView, QAction, QFileDialog, QSystemTrayIcon, QMenu, QApplication, QInputDialog, QMessageBox
-from PyQt5.QtCore import QTime, QCoreApplication, QRect, QSize, QPoint, QThread, pyqtSignal, Qt, QTranslator, QLocale
-from persepolis.scripts.useful_tools import freeSpace, determineConfigFolder, osAndDesktopEnvironment
+from PyQt5.QtCore import QTime, QCoreApplication, QRect, QSize, QPoint, QThread, QObject, pyqtSignal, Qt, QTranslator, QLocale
+from persepolis.scripts.useful_tools import freeSpace, determineConfigFolder, osAndDesktopEnvironment, humanReadbleSize, humanReadbleRate, humanReadbleTime
 from persepolis.gui.mainwindow_ui import MainWindow_Ui, QTableWidgetItem
 from persepolis.scripts.data_base import PluginsDB, PersepolisDB, TempDB
 from persepolis.scripts.browser_plugin_queue import BrowserPluginQueue
@@ -31,6 +31,13 @@ from persepolis.scripts.log_window import LogWindow
 from persepolis.scripts.update import checkupdate
 from persepolis.scripts.shutdown import shutDown
 from persepolis.scripts.about import AboutWindow
+from persepolis.scripts.aria2_websocket import Aria2Notifications, listenToAria2
+from persepolis.scripts.download_events import DownloadEventBus
+from persepolis.scripts.bandwidth import BandwidthManager, RETRY_WAIT
+from persepolis.scripts.host_tuner import HostStatsRecorder, hostOfLink
+from persepolis.scripts.time_scheduler import time_scheduler, nextDeadline
+from persepolis.scripts.ipc import localServerName, decodeRequest
+from PyQt5.QtNetwork import QLocalServer
 from persepolis.scripts.bubble import notifySend
 from PyQt5 import QtCore, QtGui, QtWidgets
 from persepolis.scripts import osCommands
@@ -39,22 +46,13 @@ from persepolis.scripts import logger
 from persepolis.scripts import spider
 from persepolis.gui import resources
 from functools import partial
-from copy import deepcopy
 from time import sleep
 import random
+import threading
 import time
 import sys
 import os
 
-try:
-    from persepolis.scripts.video_finder_addlink import VideoFinderAddLink
-    youtube_dl_is_installed = True
-except ModuleNotFoundError:
-    # if youtube_dl madule is not installed:
-    logger.sendToLog(
-                "youtube_dl is not installed.", "ERROR")
-    youtube_dl_is_installed = False
-
 
 # The GID (or gid) is a key to manage each download. Each download will be assigned a unique GID.
 # The GID is stored as 64-bit binary value in aria2. For RPC access,
@@ -71,14 +69,6 @@ except ModuleNotFoundError:
 global shutdown_notification
 shutdown_notification = 0
 
-# checking_flag : 0 >> normal situation ;
-# 1 >> remove button or delete button pressed or sorting form viewMenu or ... toggled by user ;
-# 2 >> check_download_info function is stopping until remove operation done ;
-# 3 >> deleteFileAction is done it's job and It is called removeButtonPressed.
-
-global checking_flag
-checking_flag = 0
-
 # when rpc connection between persepolis and aria is disconnected >>
 # aria2_disconnected = 1
 # aria2_disconnected = 0 >> every thing is ok :)
@@ -88,13 +78,17 @@ aria2_disconnected = 0
 global aria_startup_answer
 aria_startup_answer = None
 
-
-global button_pressed_counter
-button_pressed_counter = 0
-
 global plugin_links_checked
 plugin_links_checked = False
 
+# aria2_notifications contains gid of downloads that aria2 notified about them.
+# see aria2_websocket.py
+aria2_notifications = Aria2Notifications()
+
+# CheckDownloadInfoThread publishes changes of download status in download_events
+# and Queue threads wait for them. see download_events.py
+download_events = DownloadEventBus()
+
 # find os platform
 os_type, desktop_env = osAndDesktopEnvironment()
 
@@ -114,6 +108,131 @@ plugin_ready = os.path.join(persepolis_tmp, 'persepolis-plugin-ready')
 
 show_window_file = os.path.join(persepolis_tmp, 'show-window')
 
+# aria2 identifies each download by the ID called GID.
+# The GID must be hex string of 16 characters,
+# thus [0-9a-zA-Z] are allowed and leading zeros must
+# not be stripped. The GID all 0 is reserved and must
+# not be used. The GID must be unique, otherwise error
+# is reported and the download is not added.
+# GidAllocator keeps all used GIDs in a set, so checking
+# uniqueness of a new GID doesn't need data base.
+class GidAllocator():
+    def __init__(self, gid_list):
+        self.used_gids = set(gid_list)
+
+    # this method returns a list that contains number unique GIDs.
+    def allocate(self, number):
+        gid_list = []
+        while len(gid_list) < number:
+            # generate a random hex value between 1152921504606846976 and 18446744073709551615
+            # for download GID
+            gid = hex(random.randint(1152921504606846976, 18446744073709551615))[2:18]
+
+            # check gid used before or not!
+            if gid not in self.used_gids:
+                self.used_gids.add(gid)
+                gid_list.append(gid)
+
+        return gid_list
+
+
+# CheckDownloadInfoThread reads download table and data base frequently.
+# some jobs(sorting, removing, moving, ...) must be done when
+# CheckDownloadInfoThread is not checking downloads.
+# runPaused runs these jobs in main thread.
+# if CheckDownloadInfoThread is checking downloads, job is postponed
+# until the end of current checking section, and then PAUSEDSIGNAL
+# runs it in main thread. So user interface is never frozen.
+# CheckDownloadInfoThread doesn't start a new checking section until
+# all paused jobs are done.
+class CheckingGate(QObject):
+    PAUSEDSIGNAL = pyqtSignal(object)
+
+    def __init__(self):
+        QObject.__init__(self)
+        self.condition = threading.Condition()
+
+        # number of jobs that are waiting or running.
+        self.pause_counter = 0
+
+        # checking is True when CheckDownloadInfoThread is checking downloads.
+        self.checking = False
+        self.pending_list = []
+
+        self.PAUSEDSIGNAL.connect(self.runFunction)
+
+    # this method is called from main thread.
+    def runPaused(self, function):
+        with self.condition:
+            self.pause_counter = self.pause_counter + 1
+            if self.checking:
+                self.pending_list.append(function)
+                return
+
+        self.runFunction(function)
+
+    def runFunction(self, function):
+        try:
+            function()
+        finally:
+            self.resume()
+
+    def resume(self):
+        with self.condition:
+            self.pause_counter = max(self.pause_counter - 1, 0)
+            self.condition.notify_all()
+
+    # these methods are called from CheckDownloadInfoThread.
+    def startChecking(self):
+        with self.condition:
+            while self.pause_counter > 0:
+                self.condition.wait()
+
+            self.checking = True
+
+    def stopChecking(self):
+        with self.condition:
+            self.checking = False
+            pending_list = self.pending_list
+            self.pending_list = []
+            self.condition.notify_all()
+
+        # PAUSEDSIGNAL is queued to main thread.
+        for function in pending_list:
+            self.PAUSEDSIGNAL.emit(function)
+
+
+checking_gate = CheckingGate()
+
+
+# QueueSlots limits number of downloads that all queues download at the same time.
+# queue must take a slot before starting a download and
+# must release it when download is finished.
+# maximum is changed by user in preferences window(max-parallel-downloads).
+class QueueSlots():
+    def __init__(self, maximum):
+        self.lock = threading.Lock()
+        self.maximum = maximum
+        self.used_slots = 0
+
+    def setMaximum(self, maximum):
+        with self.lock:
+            self.maximum = maximum
+
+    # this method returns True if a slot is taken.
+    def take(self):
+        with self.lock:
+            if self.used_slots < self.maximum:
+                self.used_slots = self.used_slots + 1
+                return True
+            else:
+                return False
+
+    def release(self):
+        with self.lock:
+            self.used_slots = max(self.used_slots - 1, 0)
+
+
 # start aria2 when Persepolis starts
 class StartAria2Thread(QThread):
     ARIA2RESPONDSIGNAL = pyqtSignal(str)
@@ -179,6 +298,36 @@ class CheckSelectedRowThread(QThread):
             self.CHECKSELECTEDROWSIGNAL.emit()
 
 
+# This thread listens to aria2 notifications over WebSocket and passes
+# gid of changed downloads to CheckDownloadInfoThread by aria2_notifications.
+# if WebSocket connection is lost, it tries to reconnect.
+class Aria2NotificationThread(QThread):
+    def __init__(self):
+        QThread.__init__(self)
+
+    def run(self):
+        # wait until aria gets ready!(see StartAria2Thread for more information)
+        while shutdown_notification == 0 and aria_startup_answer != 'ready':
+            sleep(1)
+
+        retry_wait = 1
+        while shutdown_notification == 0:
+            try:
+                listenToAria2(download.host, download.port, aria2_notifications)
+            except:
+                pass
+
+            if shutdown_notification != 0:
+                break
+
+            # wake CheckDownloadInfoThread for polling.
+            aria2_notifications.wake()
+
+            # try again later
+            sleep(retry_wait)
+            retry_wait = min(retry_wait * 2, 10)
+
+
 # This thread is getting download information from aria2 and updating database
 # this class is checking aria2 rpc connection! if aria rpc is not
 # available , this class restarts aria!
@@ -191,7 +340,6 @@ class CheckDownloadInfoThread(QThread):
         self.parent = parent
 
     def run(self):
-        global checking_flag
         global shutdown_notification
         while True:
 
@@ -200,12 +348,6 @@ class CheckDownloadInfoThread(QThread):
 # 2 >> OK, let's close application!
 
 
-# checking_flag : 0 >> normal situation ;
-# 1 >> remove button or delete button pressed or sorting form viewMenu selected by user ;
-# 2 >> check_download_info function is stopping until remove operation done ;
-# 3 >> deleteFileAction is done it's job and It is called removeButtonPressed.
-
-
             # wait until aria gets ready!(see StartAria2Thread for more information)
             while shutdown_notification == 0 and aria_startup_answer != 'ready':
                 sleep(1)
@@ -213,49 +355,85 @@ class CheckDownloadInfoThread(QThread):
             # data base is updated one time in five times.
             update_data_base = False
             update_data_base_counter = 0
+
+            # if rpc-notifications is enabled, this thread waits for aria2 notifications
+            # instead of polling aria2 every 0.2 seconds.
+            # download information of changed downloads is received immediately after notification and
+            # speed and progress of active downloads is refreshed every refresh_interval seconds.
+            # if WebSocket connection is not available, polling is used.
+            # see aria2_websocket.py and Aria2NotificationThread for more information.
+            event_mode = (str(self.parent.persepolis_setting.value('settings/rpc-notifications')) == 'yes')
+            refresh_interval = 1
+            last_refresh_time = 0
+
             while shutdown_notification != 1:
-                sleep(0.2)
-                # if checking_flag is equal to 1, it means that user pressed
-                # remove or delete button . so checking download information
-                # must stop until removing is done! It avoids possiblity of crashing!
-                if checking_flag == 1:
-                    # Ok loop is stoped!
-                    checking_flag = 2
-
-                    # check that when job is done!
-                    while checking_flag != 0:
-                        sleep(0.2)
-
-                # lets getting downloads information from aria and putting them in download_status_list!
-
-                # find gid of active downloads first! (get them from data base)
-                # output of this method is a list of gid
-                active_gid_list = self.parent.temp_db.returnActiveGids()
-
-                # get download status of active downloads from aria2
-                # download_status_list is a list that contains some dictionaries.
-                # every dictionary contains download information.
-                # gid_list is a list that contains gid of downloads in download_status_list.
-                # see download.py file for more information.
-                gid_list, download_status_list = download.tellActive()
+                # changed_gids is None when all active downloads must be checked.
+                changed_gids = None
+
+                if event_mode and aria2_notifications.connected:
+                    active_gid_list = self.parent.temp_db.returnActiveGids()
+
+                    # if no download is active, just wait for notifications.
+                    if active_gid_list:
+                        timeout = max(last_refresh_time + refresh_interval - time.time(), 0)
+                    else:
+                        timeout = 10
+
+                    changed_gids = aria2_notifications.waitForChanges(timeout)
+
+                    if shutdown_notification == 1:
+                        break
+
+                    # time for refreshing speed and progress of active downloads!
+                    if time.time() - last_refresh_time >= refresh_interval:
+                        last_refresh_time = time.time()
+                        changed_gids = None
+
+                        # every refresh is 5 times longer than polling tick.
+                        update_data_base_counter = 4
+                else:
+                    sleep(0.2)
 
+                # GUI may want to change download table or data base(sorting, removing, ...)
+                # status thread must not work on them at the same time.
+                # startChecking waits until all paused jobs are done.
+                # see CheckingGate class for more information.
+                checking_gate.startChecking()
                 try:
-                    for gid in active_gid_list:
-
-                        # if gid not in gid_list, so download is completed or stopped or error occured!
-                        # because aria2 returns active downloads status with tellActive function in download.py file.
-                        # and complete or stopped or errored downloads are not active downloads.
-                        # so we must get download information with tellStatus function.
-                        # see download.py file (tellStatus and tellActive functions) for more information.
-                        # if aria doesn't not return download information with tellStatus and tellActive,
-                        # then perhaps some error occured.so download information must be in data_base.
-                        if gid not in gid_list:
-
-                            returned_dict = download.tellStatus(gid, self.parent)
-                            if returned_dict:
-                                download_status_list.append(returned_dict)
+                    # lets getting downloads information from aria and putting them in download_status_list!
+
+                    # find gid of active downloads first! (get them from data base)
+                    # output of this method is a list of gid
+                    active_gid_list = self.parent.temp_db.returnActiveGids()
+
+                    if changed_gids is not None:
+                        # only changed downloads must be checked.
+                        # other active downloads are checked in next refresh.
+                        active_gid_list = [gid for gid in active_gid_list if gid in changed_gids]
+
+                        if not(active_gid_list):
+                            continue
+
+                    # get download status of active downloads from aria2.
+                    # status of all downloads is received in one RPC request(system.multicall).
+                    # download_status_list is a list that contains some dictionaries.
+                    # every dictionary contains download information.
+                    # gid_list is a list that contains gid of downloads in download_status_list.
+                    # see download.py file (tellStatusList function) for more information.
+                    gid_list, download_status_list = download.tellStatusList(active_gid_list, self.parent)
+
+                    try:
+                        for converted_info_dict in download_status_list:
+                            # download is completed or stopped or error occured!
+                            # so data base must be updated.
+                            if converted_info_dict['status'] != 'downloading':
                                 update_data_base = True
-                            else:
+
+                        for gid in active_gid_list:
+
+                            # if aria doesn't not return download information,
+                            # then perhaps some error occured.so download information must be in data_base.
+                            if gid not in gid_list:
                                 # check data_base
                                 returned_dict = self.parent.persepolis_db.searchGidInDownloadTable(gid)
                                 download_status_list.append(returned_dict)
@@ -265,33 +443,45 @@ class CheckDownloadInfoThread(QThread):
                                     self.reconnectAria()
                                     continue
 
+                        if not(download_status_list):
+                            download_status_list = []
 
-                    if not(download_status_list):
-                        download_status_list = []
-
-                    # now we have a list that contains download information (download_status_list)
-                    # lets update download table in main window and update data base!
-                    # first emit a signal for updating MainWindow.
-                    self.DOWNLOAD_INFO_SIGNAL.emit(download_status_list)
-
-                    # data base is updated 1 time in 5 times.
-                    if update_data_base_counter == 4:
-                        update_data_base = True
-                    else:
-                        update_data_base_counter = update_data_base_counter + 1
-
-                    # updat data base!
-                    if update_data_base:
-                        self.parent.persepolis_db.updateDownloadTable(download_status_list)
+                        # now we have a list that contains download information (download_status_list)
+                        # lets update download table in main window and update data base!
+                        # first emit a signal for updating MainWindow.
+                        self.DOWNLOAD_INFO_SIGNAL.emit(download_status_list)
 
                         # data base is updated 1 time in 5 times.
-                        update_data_base = False
-                        update_data_base_counter = -1
-
-                except:
-                    # continue the loop if any error occured.
-                    self.reconnectAria()
-                    continue
+                        if update_data_base_counter == 4:
+                            update_data_base = True
+                        else:
+                            update_data_base_counter = update_data_base_counter + 1
+
+                        # updat data base!
+                        if update_data_base:
+                            self.parent.persepolis_db.updateDownloadTable(download_status_list)
+
+                            # data base is updated 1 time in 5 times.
+                            update_data_base = False
+                            update_data_base_counter = -1
+
+                        # notify Queue threads about changes of download status.
+                        # data base is updated before, if status is not 'downloading'.
+                        for converted_info_dict in download_status_list:
+                            if converted_info_dict:
+                                download_events.publish(converted_info_dict['gid'], converted_info_dict['status'])
+
+                                # save throughput and errors of host.
+                                # see HostStatsRecorder in host_tuner.py
+                                self.parent.host_stats_recorder.update(converted_info_dict)
+
+                    except:
+                        # continue the loop if any error occured.
+                        self.reconnectAria()
+                        continue
+                finally:
+                    # jobs that are requested during checking are done now.
+                    checking_gate.stopChecking()
 
             # Ok exit loop! get ready for shutting down!
             shutdown_notification = 2
@@ -334,8 +524,21 @@ class SpiderThread(QThread):
             # get file_name and file size with spider
             file_name, size = spider.spider(self.add_link_dictionary)
 
-            # update data base
             dict = {'file_name': file_name, 'size': size, 'gid': self.add_link_dictionary['gid']}
+
+            # pre-sizing: if server didn't send size of file, guess it from
+            # files that downloaded from this host before(see host_tuner.py).
+            # "~" shows that size is estimated. aria2 sends real size when download starts.
+            # downloadAria chooses number of connections from this size.
+            if not(size):
+                host_stats = self.parent.persepolis_db.searchHostInHostStatsTable(
+                        hostOfLink(self.add_link_dictionary['link']))
+
+                if host_stats and host_stats['average_bytes']:
+                    dict['size'] = '~' + humanReadbleSize(host_stats['average_bytes'])
+                    dict['total_bytes'] = host_stats['average_bytes']
+
+            # update data base
             self.parent.persepolis_db.updateDownloadTable([dict])
 
             # update table in MainWindow
@@ -346,6 +549,24 @@ class SpiderThread(QThread):
             logger.sendToLog(
                 "Spider couldn't find download information", "ERROR")
 
+# this thread removes files of deleted downloads,
+# so user interface is not frozen when many files must be removed.
+# file_list contains [file_path, notify] lists.
+# FILENOTFOUNDSIGNAL is emitted if file is not found and notify is True.
+class RemoveFilesThread(QThread):
+    FILENOTFOUNDSIGNAL = pyqtSignal(str)
+
+    def __init__(self, file_list):
+        QThread.__init__(self)
+        self.file_list = file_list
+
+    def run(self):
+        for file_path, notify in self.file_list:
+            remove_answer = osCommands.remove(file_path)
+
+            if remove_answer == 'no' and notify:
+                self.FILENOTFOUNDSIGNAL.emit(str(file_path))
+
 # this thread sending download request to aria2
 
 
@@ -363,8 +584,6 @@ class DownloadLink(QThread):
         try:
             self.parent.temp_db.insertInSingleTable(self.gid)
         except:
-            # release lock
-            self.parent.temp_db.lock = False
             dict = {'gid': self.gid, 'status': 'active'}
             self.parent.temp_db.updateSingleTable(dict)
 
@@ -390,6 +609,95 @@ class Queue(QThread):
         self.start_time = start_time
         self.end_time = end_time
 
+    # this method sends download request of gid to aria2.
+    # queue_counter is the number of downloads that queue started them.
+    # start_time is start time of queue, if this download must wait for it.
+    # this method returns True if download has a start time(start time of queue or
+    # wait time between downloads). so it's scheduled and next downloads must wait for it.
+    def startDownload(self, gid, queue_counter, start_time=None):
+        add_link_dict = {'gid': gid}
+
+        if self.end_time:
+            # it means user was set end time for download
+            # set end_hour and end_minute
+            add_link_dict['end_time'] = self.end_time
+
+        # user can set sleep time between download items in queue.
+        #see preferences window!
+        # find wait_queue value
+        wait_queue_list = self.parent.persepolis_setting.value('settings/wait-queue')
+        wait_queue_hour = int(wait_queue_list[0])
+        wait_queue_minute = int(wait_queue_list[1])
+
+        # check if user set sleep time between downloads in queue in setting window.
+        # if queue_counter is 1 , it means we are in the first download item in queue.
+        # and no need to wait for first item.
+        # downloads that wait for start time of queue don't need wait time.
+        if start_time:
+            add_link_dict['start_time'] = start_time
+
+        elif (wait_queue_hour != 0 or wait_queue_minute != 0) and queue_counter != 1:
+            now_time_hour = int(time.strftime("%H"))
+            now_time_minute = int(time.strftime("%M"))
+            now_time_second = int(time.strftime("%S"))
+
+            # add extra minute if we are in seond half of minute
+            if now_time_second > 30:
+                now_time_minute = now_time_minute + 1
+
+            # hour value can not be more than 23 and minute value can not be more than 59.
+            sigma_minute = wait_queue_minute + now_time_minute
+            sigma_hour = wait_queue_hour + now_time_hour
+            if sigma_minute > 59:
+                sigma_minute = sigma_minute - 60
+                sigma_hour = sigma_hour + 1
+
+            if sigma_hour > 23:
+                sigma_hour = sigma_hour - 24
+
+            # setting sigma_hour and sigma_minute for download's start time!
+            add_link_dict['start_time'] = str(sigma_hour) + ':' + str(sigma_minute)
+
+        # write changes in data base
+        self.parent.persepolis_db.updateAddLinkTable([add_link_dict])
+
+        # change status of download to waiting.
+        # so old status of download(stopped, error, ...) is not read
+        # before DownloadLink sends download request to aria2.
+        self.parent.persepolis_db.updateDownloadTable([{'gid': gid, 'status': 'waiting'}])
+        download_events.publish(gid, 'waiting')
+
+        # start new thread for download
+        new_download = DownloadLink(gid, self.parent)
+        self.parent.threadPool.append(new_download)
+        self.parent.threadPool[len(self.parent.threadPool) - 1].start()
+        self.parent.threadPool[len(
+            self.parent.threadPool) - 1].ARIA2NOTRESPOND.connect(self.parent.aria2NotRespond)
+
+        return 'start_time' in add_link_dict.keys()
+
+    # this method sends speed limitation of queue to bandwidth_manager.
+    # speed limitation of queue is split between active downloads of queue.
+    # see BandwidthManager class in bandwidth.py
+    # limit_changed is True if user changed speed limitation.
+    def limitActiveDownloads(self):
+        if self.limit_changed:
+            if self.limit:
+                # It means user want to limit download speed
+                # get limitation value
+                self.limit_comboBox_value = self.parent.limit_comboBox.currentText()
+                self.limit_spinBox_value = self.parent.limit_spinBox.value()
+                if self.limit_comboBox_value == "KiB/s":
+                    self.limit_value = str(self.limit_spinBox_value) + str("K")
+                else:
+                    self.limit_value = str(self.limit_spinBox_value) + str("M")
+            else:
+                # speed limitation is canceled by user!
+                self.limit_value = "0"
+
+            self.limit_changed = False
+            self.parent.bandwidth_manager.setQueueLimit(self.category, self.limit_value)
+
     def run(self):
         self.start = True
         self.stop = False
@@ -398,7 +706,15 @@ class Queue(QThread):
         self.after = False
         self.break_for_loop = False
 
+        # limit_value is the speed limitation of queue.
+        self.limit_value = None
+
         queue_counter = 0
+        end_deadline = None
+
+        # Queue receives status of its downloads from download_events.
+        # see DownloadEventBus class in download_events.py
+        self.download_events_subscriber = download_events.subscribe()
 
         # queue repeats 5 times!
         # and everty time loads queue list again!
@@ -411,209 +727,178 @@ class Queue(QThread):
 
             gid_list = category_table_dict['gid_list']
 
+            # number of downloads that queue downloads at the same time.
+            parallel_downloads = max(int(category_table_dict['parallel_downloads'] or 1), 1)
+
             # sort downloads top to the bottom of the list OR bottom to the top
             if not(self.parent.reverse_checkBox.isChecked()):
                 gid_list.reverse()
 
+            # if download was completed, it's not in pending_list.
+            # We don't want to download it two times :)
+            pending_list = [gid for gid in gid_list if download_table_dict[gid]['status'] != 'complete']
+
             # check that if user set start time
+            # first downloads of queue(as many as parallel_downloads) wait for start time of queue.
+            # they are started together, and next downloads wait for them.
             if self.start_time and counter == 0:
-                # find first download
-                # set start time for first download in queue
-                # status of first download must not be complete
-                for gid in gid_list:
-
-                    # get download information dictionary
-                    dict = download_table_dict[gid]
-
-                    # find status of download
-                    status = dict['status']
-
-                    if status != 'complete':
-                        # We find first item! GREAT!
-                        add_link_dict = {'gid': gid}
-
-                        # set start_time for this download
-                        add_link_dict['start_time'] = self.start_time
-
-                        # write changes in data base
-                        self.parent.persepolis_db.updateAddLinkTable([add_link_dict])
-
-                        # delete add_link_dict
-                        del add_link_dict
-
-                        # job is done! break the loop
-                        break
-
-
-            for gid in gid_list:
-
-                add_link_dict = {'gid': gid}
-
-                # find download information
-                dict = download_table_dict[gid]
-
-                # if download was completed, continue the loop
-                # with the next iteration of the loop!
-                # We don't want to download it two times :)
-                if dict['status'] == 'complete':
-                    continue
-
-                queue_counter = queue_counter + 1
-
-                # change status of download to waiting
-                status = 'waiting'
-                dict['status'] = status
-
-                if self.end_time:
-                    # it means user was set end time for download
-                    # set end_hour and end_minute
-                    add_link_dict['end_time'] = self.end_time
-
-                # user can set sleep time between download items in queue.
-                #see preferences window!
-                # find wait_queue value
-                wait_queue_list = self.parent.persepolis_setting.value('settings/wait-queue')
-                wait_queue_hour = int(wait_queue_list[0])
-                wait_queue_minute = int(wait_queue_list[1])
-
-                # check if user set sleep time between downloads in queue in setting window.
-                # if queue_counter is 1 , it means we are in the first download item in queue.
-                # and no need to wait for first item.
-                if (wait_queue_hour != 0 or wait_queue_minute != 0) and queue_counter != 1:
-                    now_time_hour = int(time.strftime("%H"))
-                    now_time_minute = int(time.strftime("%M"))
-                    now_time_second = int(time.strftime("%S"))
-
-                    # add extra minute if we are in seond half of minute
-                    if now_time_second > 30:
-                        now_time_minute = now_time_minute + 1
-
-                    # hour value can not be more than 23 and minute value can not be more than 59.
-                    sigma_minute = wait_queue_minute + now_time_minute
-                    sigma_hour = wait_queue_hour + now_time_hour
-                    if sigma_minute > 59:
-                        sigma_minute = sigma_minute - 60
-                        sigma_hour = sigma_hour + 1
-
-                    if sigma_hour > 23:
-                        sigma_hour = sigma_hour - 24
-
-                    # setting sigma_hour and sigma_minute for download's start time!
-                    add_link_dict['start_time'] = str(sigma_hour + ':' + sigma_minute)
-
-                # write changes in data base
-                self.parent.persepolis_db.updateAddLinkTable([add_link_dict])
-
-                # delete add_link_dict
-                del add_link_dict
-
-                # start new thread for download
-                new_download = DownloadLink(gid, self.parent)
-                self.parent.threadPool.append(new_download)
-                self.parent.threadPool[len(self.parent.threadPool) - 1].start()
-                self.parent.threadPool[len(
-                    self.parent.threadPool) - 1].ARIA2NOTRESPOND.connect(self.parent.aria2NotRespond)
-                sleep(3)
-
-                # limit download speed if user limited speed for previous download
-                if self.limit:
-                    self.limit_changed = True
-
-                # continue loop until download has finished
-                while status == 'downloading' or status == 'waiting' or status == 'paused' or status == 'scheduled':
-
-                    sleep(1)
-                    dict = self.parent.persepolis_db.searchGidInDownloadTable(gid)
-
-                    status = dict['status']
-
-
+                start_time_gids = set(pending_list[:parallel_downloads])
+            else:
+                start_time_gids = set()
 
-                    if status == 'error':
-                        error = 'error'
-                        # write error_message in log file
-                        error_message = 'Download failed - GID : '\
-                                    + str(gid)\
-                                    + '/nMessage : '\
-                                    + error
+            # active_dict contains gid and status of downloads that queue started them.
+            # every active download has a slot in parent.queue_slots(see QueueSlots class).
+            active_dict = {}
 
-                        logger.sendToLog(error_message, 'ERROR')
+            # end_time_reached is True if a download is stopped at end time.
+            end_time_reached = False
 
-                    elif status == 'complete':
-                        complete_message = 'Download complete - GID : '\
-                                    + str(gid)
+            # end time of queue in seconds since epoch.
+            # downloads are stopped at this time(see endTime in download.py).
+            if self.end_time and end_deadline is None:
+                end_deadline = nextDeadline(self.end_time)
 
-                        # write in log the complete_message
-                        logger.sendToLog(complete_message, 'INFO')
+            last_check_time = time.time()
 
+            try:
+                while pending_list or active_dict:
+                    # start next downloads if queue has free slot.
+                    # if a download is scheduled(start time or wait time between downloads),
+                    # next downloads must wait for it.
+                    # downloads that wait for start time of queue don't block each other.
+                    while pending_list and not(self.stop) and len(active_dict) < parallel_downloads\
+                            and not([gid for gid, status in active_dict.items() if status == 'scheduled' and gid not in start_time_gids])\
+                            and self.parent.queue_slots.take():
+
+                        gid = pending_list.pop(0)
+                        queue_counter = queue_counter + 1
+
+                        if gid in start_time_gids:
+                            scheduled = self.startDownload(gid, queue_counter, self.start_time)
+                        else:
+                            scheduled = self.startDownload(gid, queue_counter)
 
-                    if self.stop:
-                        # it means user stopped queue
-                        answer = download.downloadStop(gid, self.parent)
-
-                        # if aria2 did not respond , then this function is checking
-                        # for aria2 availability , and if aria2 disconnected then
-                        # aria2Disconnected is executed
-                        if answer == 'None':
-                            version_answer = download.aria2Version()
-                            if version_answer == 'did not respond':
-                                self.parent.aria2Disconnected()
-                        status = 'stopped'
-
-                    if self.limit and status == 'downloading' and self.limit_changed:
-                        # It means user want to limit download speed
-                        # get limitation value
-                        self.limit_comboBox_value = self.parent.limit_comboBox.currentText()
-                        self.limit_spinBox_value = self.parent.limit_spinBox.value()
-                        if self.limit_comboBox_value == "KiB/s":
-                            limit = str(self.limit_spinBox_value) + str("K")
+                        if scheduled:
+                            active_dict[gid] = 'scheduled'
                         else:
-                            limit = str(self.limit_spinBox_value) + str("M")
+                            active_dict[gid] = 'waiting'
+
+                    # wait for changes of download status.
+                    # next download is started as soon as a download is finished.
+                    # timeout is for checking stop and limit requests of user.
+                    event_list = self.download_events_subscriber.waitForEvents(0.5)
+
+                    # status of active downloads is checked in data base every 5 seconds too,
+                    # so queue doesn't get stuck if an event is missed.
+                    # only final status is read from data base, other status may be old.
+                    # (data base is updated one time in five times. see CheckDownloadInfoThread)
+                    if time.time() - last_check_time >= 5:
+                        last_check_time = time.time()
+                        for gid in active_dict.keys():
+                            dict = self.parent.persepolis_db.searchGidInDownloadTable(gid)
+                            if dict and dict['status'] in ['complete', 'error', 'stopped']:
+                                event_list.append((gid, dict['status']))
+
+                    # check status of active downloads
+                    for gid, status in event_list:
+                        if gid not in active_dict.keys():
+                            continue
+
+                        # startDownload publishes 'waiting' before downloadAria writes 'scheduled'.
+                        # scheduled download leaves 'scheduled' when it's downloading or finished.
+                        if active_dict[gid] == 'scheduled' and status == 'waiting':
+                            continue
+
+                        active_dict[gid] = status
+
+                        if status == 'error':
+                            error = 'error'
+                            # write error_message in log file
+                            error_message = 'Download failed - GID : '\
+                                        + str(gid)\
+                                        + '/nMessage : '\
+                                        + error
+
+                            logger.sendToLog(error_message, 'ERROR')
+
+                        elif status == 'complete':
+                            complete_message = 'Download complete - GID : '\
+                                        + str(gid)
 
-                        # apply limitation
-                        download.limitSpeed(gid, limit)
+                            # write in log the complete_message
+                            logger.sendToLog(complete_message, 'INFO')
+
+                        if status not in ['downloading', 'waiting', 'paused', 'scheduled']:
+                            # download is finished! free its slot for next download.
+                            del active_dict[gid]
+                            self.parent.queue_slots.release()
+
+                            # download is stopped at end time of queue.
+                            # if user stopped download from main window, queue continues.
+                            if status == 'stopped' and end_deadline and time.time() >= end_deadline:
+                                end_time_reached = True
+
+                    if self.stop or end_time_reached:
+                        # it means user stopped queue or end time is reached.
+                        # so all active downloads must be stopped.
+                        for gid in active_dict.keys():
+                            answer = download.downloadStop(gid, self.parent)
+
+                            # if aria2 did not respond , then this function is checking
+                            # for aria2 availability , and if aria2 disconnected then
+                            # aria2Disconnected is executed
+                            if answer == 'None':
+                                version_answer = download.aria2Version()
+                                if version_answer == 'did not respond':
+                                    self.parent.aria2Disconnected()
+
+                        # free slots
+                        for gid in active_dict.keys():
+                            self.parent.queue_slots.release()
+
+                        active_dict = {}
+
+                        # it means that break outer "for" loop
+                        self.break_for_loop = True
+                        break
 
-                        # done!
-                        self.limit_changed = False
+                    self.limitActiveDownloads()
 
-                    if not(self.limit) and status == 'downloading' and self.limit_changed:
-                        # speed limitation is canceled by user!
-                        # cancel limitation
-                        download.limitSpeed(gid, "0")
+            finally:
+                # if any error occured, slots of active downloads must be free.
+                for gid in active_dict.keys():
+                    self.parent.queue_slots.release()
 
-                        # done!
-                        self.limit_changed = False
+            if self.break_for_loop:
+                # it means queue stopped at end time or user stopped queue
 
-                if status == 'stopped':
-                    # it means queue stopped at end time or user stopped queue
+                if self.stop and self.after:
+                    # It means user activated shutdown before and now user
+                    # stopped queue . so after download must be canceled
+                    self.parent.after_checkBox.setChecked(False)
 
-                    if self.stop and self.after:
-                        # It means user activated shutdown before and now user
-                        # stopped queue . so after download must be canceled
-                        self.parent.after_checkBox.setChecked(False)
+                self.stop = True
+                self.limit = False
+                self.limit_changed = False
 
-                    self.stop = True
-                    self.limit = False
-                    self.limit_changed = False
+                if str(self.parent.category_tree.currentIndex().data()) == str(self.category):
+                    self.REFRESHTOOLBARSIGNAL.emit(self.category)
 
-                    # it means that break outer "for" loop
-                    self.break_for_loop = True
+                # show notification
+                notifySend(QCoreApplication.translate("mainwindow_src_ui_tr", "Persepolis"),
+                        QCoreApplication.translate("mainwindow_src_ui_tr", "Queue Stopped!"), 
+                        10000, 'no', parent=self.parent)
 
-                    if str(self.parent.category_tree.currentIndex().data()) == str(self.category):
-                        self.REFRESHTOOLBARSIGNAL.emit(self.category)
+                # write message in log
+                logger.sendToLog('Queue stopped', 'INFO')
 
-                    # show notification
-                    notifySend(QCoreApplication.translate("mainwindow_src_ui_tr", "Persepolis"),
-                            QCoreApplication.translate("mainwindow_src_ui_tr", "Queue Stopped!"), 
-                            10000, 'no', parent=self.parent)
+                break
 
-                    # write message in log
-                    logger.sendToLog('Queue stopped', 'INFO')
+        download_events.unsubscribe(self.download_events_subscriber)
 
-                    break
-
-            if self.break_for_loop:
-                break
+        # remove speed limitation of queue
+        if self.limit_value is not None:
+            self.parent.bandwidth_manager.setQueueLimit(self.category, '0')
 
         if self.start:
             # if queue finished :
@@ -659,12 +944,17 @@ class Queue(QThread):
 # 1-this class is checking that if user add a link with browsers plugin.
 # 2-assume that user executed program before .
 # if user is clicking on persepolis icon in menu this tread emits SHOWMAINWINDOWSIGNAL
+# if PersepolisLocalServer is listening, new requests are received by local server,
+# so this thread checks persepolis_tmp only one time(for requests that are sent before
+# local server started) and then exits.
+# polling is True if local server is not available.
 class CheckingThread(QThread):
     CHECKPLUGINDBSIGNAL = pyqtSignal()
     SHOWMAINWINDOWSIGNAL = pyqtSignal()
 
-    def __init__(self):
+    def __init__(self, polling=True):
         QThread.__init__(self)
+        self.polling = polling
 
     def run(self):
         global shutdown_notification
@@ -701,40 +991,120 @@ class CheckingThread(QThread):
                 while plugin_links_checked != True:  # wait for persepolis consideration!
                     sleep(0.5)
 
+            # local server is available! no need to poll persepolis_tmp.
+            if not(self.polling):
+                break
+
 
-# if checking_flag is equal to 1, it means that user pressed remove or delete button or ... . so checking download information must be stopped until job is done!
-# this thread checks checking_flag and when checking_flag changes to 2
-# QTABLEREADY signal is emmited
-class WaitThread(QThread):
-    QTABLEREADY = pyqtSignal()
+# PersepolisLocalServer receives requests of new instances of Persepolis
+# (browser plugins, terminal arguments, clicking on persepolis icon, ...).
+# it works in main thread and Qt event loop notifies it, so
+# no polling is needed.
+# see ipc.py for more information.
+class PersepolisLocalServer(QLocalServer):
+    CHECKPLUGINDBSIGNAL = pyqtSignal()
+    SHOWMAINWINDOWSIGNAL = pyqtSignal()
+    ADDLINKSSIGNAL = pyqtSignal(list)
 
     def __init__(self):
-        QThread.__init__(self)
+        QLocalServer.__init__(self)
+        # only current user can connect to local server.
+        self.setSocketOptions(QLocalServer.UserAccessOption)
+        self.newConnection.connect(self.newConnectionArrived)
 
-    def run(self):
-        global checking_flag
-        checking_flag = 1
-        while checking_flag != 2:
-            sleep(0.05)
-        self.QTABLEREADY.emit()
+    # this method returns True if local server is listening.
+    def startListening(self):
+        server_name = localServerName()
 
-# button_pressed_counter changed if user pressed move up and move down and ... actions
-# this thread is changing checking_flag to zero if button_pressed_counter
-# don't change for 2 seconds
+        # if last instance of persepolis is crashed, socket file is still existed.
+        # lock file guarantees that no other instance of persepolis is running, so remove it.
+        QLocalServer.removeServer(server_name)
 
+        return self.listen(server_name)
 
-class ButtonPressedThread(QThread):
-    def __init__(self):
+    def newConnectionArrived(self):
+        while self.hasPendingConnections():
+            connection = self.nextPendingConnection()
+            connection.readyRead.connect(partial(self.readRequest, connection))
+            connection.disconnected.connect(connection.deleteLater)
+
+            # request may be received before connecting readyRead
+            self.readRequest(connection)
+
+    def readRequest(self, connection):
+        while connection.canReadLine():
+            request_dict = decodeRequest(bytes(connection.readLine()))
+
+            if not(request_dict):
+                connection.write(b'error\n')
+                continue
+
+            if request_dict['command'] == 'show-window':
+                self.SHOWMAINWINDOWSIGNAL.emit()
+
+            elif request_dict['command'] == 'add-links':
+                self.ADDLINKSSIGNAL.emit(request_dict['links'])
+
+            elif request_dict['command'] == 'check-plugins':
+                self.CHECKPLUGINDBSIGNAL.emit()
+
+            connection.write(b'ok\n')
+
+        connection.flush()
+
+
+# BandwidthThread informs bandwidth_manager about downloads that start or finish.
+# and bandwidth_manager splits speed limitations again.
+# this thread wakes up when speed profile is changed too.
+# see BandwidthManager class in bandwidth.py
+class BandwidthThread(QThread):
+    def __init__(self, parent):
         QThread.__init__(self)
+        self.parent = parent
 
     def run(self):
-        global checking_flag
-        current_button_pressed_value = deepcopy(button_pressed_counter) + 1
-        while current_button_pressed_value != button_pressed_counter:
-            current_button_pressed_value = deepcopy(button_pressed_counter)
-            sleep(2)
-# job is done!
-        checking_flag = 0
+        bandwidth_manager = self.parent.bandwidth_manager
+        subscriber = download_events.subscribe()
+        bandwidth_manager.wake_function = subscriber.wake
+
+        # limits can not be sent to aria2 before aria2 starts.
+        # startAriaMessage sends limits when aria2 is ready.
+        while shutdown_notification == 0 and aria_startup_answer != 'ready':
+            sleep(0.5)
+
+        while shutdown_notification == 0:
+            bandwidth_manager.rebalance()
+
+            # wake up when next speed profile starts.
+            deadline = bandwidth_manager.nextProfileChange()
+            if deadline:
+                time_scheduler.addDeadline('bandwidth', 'profile', deadline, subscriber.wake)
+            else:
+                time_scheduler.cancel('bandwidth', 'profile')
+
+            # if aria2 didn't accept some limits, try again after RETRY_WAIT seconds.
+            if bandwidth_manager.retry:
+                timeout = RETRY_WAIT
+            else:
+                timeout = None
+
+            for gid, status in subscriber.waitForEvents(timeout):
+                if status == 'downloading':
+                    if not(bandwidth_manager.hasDownload(gid)):
+                        try:
+                            category = self.parent.persepolis_db.searchGidInDownloadTable(gid)['category']
+                            limit = self.parent.persepolis_db.searchGidInAddLinkTable(gid)['limit_value']
+                        except:
+                            category = None
+                            limit = '0'
+
+                        bandwidth_manager.downloadStarted(gid, category, limit)
+                else:
+                    # paused download doesn't need bandwidth.
+                    bandwidth_manager.downloadFinished(gid)
+
+        time_scheduler.cancel('bandwidth', 'profile')
+        download_events.unsubscribe(subscriber)
 
 
 class ShutDownThread(QThread):
@@ -879,6 +1249,16 @@ class MainWindow(MainWindow_Ui):
         self.checkSelectedRow()
 
 
+# queue_slots limits number of downloads that all queues download at the same time.
+        # see QueueSlots class
+        self.queue_slots = QueueSlots(int(self.persepolis_setting.value('settings/max-parallel-downloads', 5)))
+
+# bandwidth_manager splits global speed limit and speed limit of queues between downloads.
+        # see BandwidthManager class in bandwidth.py
+        self.bandwidth_manager = BandwidthManager(download.server,
+                int(self.persepolis_setting.value('settings/global-speed-limit', 0)),
+                str(self.persepolis_setting.value('settings/speed-profiles', '')))
+
 # list of threads
         self.threadPool = []
 
@@ -895,6 +1275,10 @@ class MainWindow(MainWindow_Ui):
         # create an object for PersepolisDB
         self.persepolis_db = PersepolisDB()
 
+        # host_stats_recorder saves history of hosts for choosing number of connections.
+        # see host_tuner.py
+        self.host_stats_recorder = HostStatsRecorder(self.persepolis_db)
+
         # create an object fo TempDB
         self.temp_db = TempDB()
 
@@ -907,6 +1291,9 @@ class MainWindow(MainWindow_Ui):
         # see data_base.py for more information.
         self.persepolis_db.setDBTablesToDefaultValue()
 
+        # load all used GIDs for generating unique GID for new downloads.
+        self.gid_allocator = GidAllocator(self.persepolis_db.returnAllGids())
+
         # get queues name from data base
         queues_list = self.persepolis_db.categoriesList()
 
@@ -921,39 +1308,8 @@ class MainWindow(MainWindow_Ui):
 
 
         # add download items to the download_table
-        # read download items from data base
-        download_table_dict = self.persepolis_db.returnItemsInDownloadTable()
-
-        # read gid_list from date base
-        category_dict = self.persepolis_db.searchCategoryInCategoryTable('All Downloads')
-        gid_list = category_dict['gid_list']
-
-        keys_list = ['file_name',
-                    'status',
-                    'size',
-                    'downloaded_size',
-                    'percent',
-                    'connections',
-                    'rate',
-                    'estimate_time_left',
-                    'gid',
-                    'link',
-                    'first_try_date',
-                    'last_try_date',
-                    'category'
-                    ]
-
-        # insert items in download_table
-        for gid in gid_list:
-            # create new row
-            self.download_table.insertRow(0)
-
-            dict = download_table_dict[gid]
-            i = 0
-            for key in keys_list:
-                item = QTableWidgetItem(str(dict[key]))
-                self.download_table.setItem(0, i, item)
-                i = i + 1
+        # items are read from data base page by page, when user scrolls down.
+        self.download_table_model.setFetchFunction(partial(self.persepolis_db.returnCategoryItemsPage, 'All Downloads'))
 
 
 # defining some lists and dictionaries for running addlinkwindows and
@@ -986,13 +1342,37 @@ class MainWindow(MainWindow_Ui):
         self.threadPool[2].CHECKSELECTEDROWSIGNAL.connect(
                                     self.checkSelectedRow)
 
+# PersepolisLocalServer
+        self.local_server = PersepolisLocalServer()
+        self.local_server.CHECKPLUGINDBSIGNAL.connect(self.checkPluginCall)
+        self.local_server.SHOWMAINWINDOWSIGNAL.connect(self.showMainWindow)
+        self.local_server.ADDLINKSSIGNAL.connect(self.checkPluginCall)
+
+        local_server_answer = self.local_server.startListening()
+        if not(local_server_answer):
+            logger.sendToLog(
+                "Local server is not available: " + str(self.local_server.errorString()), "ERROR")
+
 # CheckingThread
-        check_browser_plugin = CheckingThread()
+        # if local server is not available, CheckingThread polls persepolis_tmp.
+        check_browser_plugin = CheckingThread(polling=not(local_server_answer))
         self.threadPool.append(check_browser_plugin)
         self.threadPool[3].start()
         self.threadPool[3].CHECKPLUGINDBSIGNAL.connect(self.checkPluginCall)
         self.threadPool[3].SHOWMAINWINDOWSIGNAL.connect(self.showMainWindow)
 
+# Aria2NotificationThread
+        # this thread is started if user enabled aria2 notifications in settings.
+        if str(self.persepolis_setting.value('settings/rpc-notifications')) == 'yes':
+            aria2_notification_thread = Aria2NotificationThread()
+            self.threadPool.append(aria2_notification_thread)
+            self.threadPool[len(self.threadPool) - 1].start()
+
+# BandwidthThread
+        bandwidth_thread = BandwidthThread(self)
+        self.threadPool.append(bandwidth_thread)
+        self.threadPool[len(self.threadPool) - 1].start()
+
 # keepAwake
         keep_awake = KeepAwakeThread()
         self.threadPool.append(keep_awake)
@@ -1008,6 +1388,10 @@ class MainWindow(MainWindow_Ui):
 # function  executes
         self.download_table.itemDoubleClicked.connect(self.openFile)
 
+# if user drags and drops items in download_table, then dropSelected
+# function executes
+        self.download_table.ROWSDROPPED.connect(self.dropSelected)
+
 # connecting queue_panel_show_button to showQueuePanelOptions
         self.queue_panel_show_button.clicked.connect(
             self.showQueuePanelOptions)
@@ -1193,10 +1577,13 @@ class MainWindow(MainWindow_Ui):
     def startAriaMessage(self, message):
         global aria_startup_answer
         if message == 'yes':
-            sleep(0.5)
             self.statusbar.showMessage(QCoreApplication.translate("mainwindow_src_ui_tr", 'Ready...'))
             aria_startup_answer = 'ready'
 
+            # send speed limitations to aria2
+            self.bandwidth_manager.reset()
+            self.bandwidth_manager.rebalanceAndWake()
+
             self.category_tree_qwidget.setEnabled(True)
 
         elif message == 'try again':
@@ -1233,6 +1620,10 @@ class MainWindow(MainWindow_Ui):
             self.statusbar.showMessage(QCoreApplication.translate("mainwindow_src_ui_tr", 'Reconnecting Aria2...'))
             logger.sendToLog('Reconnecting Aria2 ...', 'INFO')
 
+            # new aria2 doesn't know speed limitations
+            self.bandwidth_manager.reset()
+            self.bandwidth_manager.rebalanceAndWake()
+
             # get items with 'downloading' or 'waiting' status from data base and restart them.
             downloading_gid_list = self.persepolis_db.returnDownloadingItems()
 
@@ -1321,97 +1712,51 @@ class MainWindow(MainWindow_Ui):
                 if status == 'error':
                     # check free space in temp_download_folder!
                     # perhaps insufficient space in hard disk caused this error!
-                    # find free space in KiB
+                    # find free space in Byte
                     free_space = freeSpace(temp_download_folder)
 
-                    # find file size
-                    file_size = dict['size']
-
-                    if file_size != None:
-                        if file_size[-2:] != ' B':
-                            unit = file_size[-3:]
-                            try:
-                                if unit == 'GiB':
-                                    size_value = float(file_size[:-4])
-                                else:
-                                    size_value = int(file_size[:-4])
-                            except:
-                                size_value = None
-                        else:
-                            unit = None
-
-                            try:
-                                size_value = int(file_size)
-                            except:
-                                size_value = None
-
-                        if free_space != None and size_value != None:
-                            if unit == 'TiB':
-                                free_space = free_space/(1073741824*1024)
-                                free_space = round(free_space, 2)
-                            elif unit == 'GiB':
-                                free_space = free_space/1073741824
-                                free_space = round(free_space, 2)
-                            elif unit == 'MiB':
-                                free_space = int(free_space/1048576)
-                            elif unit == 'KiB':
-                                free_space = int(free_space/1024)
-                            else:
-                                free_space = int(free_space)
+                    # find remained size of file in Byte
+                    size_value = dict.get('total_bytes')
+                    if size_value != None and dict.get('completed_bytes') != None:
+                        size_value = size_value - dict['completed_bytes']
 
-                            if free_space < size_value:
-                                error = 'Insufficient disk space!'
+                    if free_space != None and size_value != None:
+                        if free_space < size_value:
+                            error = 'Insufficient disk space!'
 
 
-                                # write error_message in log file
-                                error_message = 'Download failed - GID : '\
-                                    + str(gid)\
-                                    + '/nMessage : '\
-                                    + error
+                            # write error_message in log file
+                            error_message = 'Download failed - GID : '\
+                                + str(gid)\
+                                + '/nMessage : '\
+                                + error
 
-                                logger.sendToLog(error_message, 'ERROR')
+                            logger.sendToLog(error_message, 'ERROR')
 
-                                # show notification
-                                notifySend(QCoreApplication.translate("mainwindow_src_ui_tr", "Error: ") + error,
-                                        QCoreApplication.translate("mainwindow_src_ui_tr", 'Please change the temporary download folder'),
-                                        10000, 'fail', parent=self)
+                            # show notification
+                            notifySend(QCoreApplication.translate("mainwindow_src_ui_tr", "Error: ") + error,
+                                    QCoreApplication.translate("mainwindow_src_ui_tr", 'Please change the temporary download folder'),
+                                    10000, 'fail', parent=self)
 
 
 
 
             # find row of this gid in download_table!
-            row = None
-            for i in range(self.download_table.rowCount()):
-                row_gid = self.download_table.item(i, 8).text()
-                if gid == row_gid:
-                    row = i
-                    break
+            row = self.download_table_model.rowOfGid(gid)
 
             # updat download_table items
+            # only changed cells are updated.
+            # size, speed and estimate time left are converted to text when they are shown.
+            # see DownloadTableModel in mainwindow_ui.py
             if row != None:
-                update_list = [dict['file_name'], dict['status'], dict['size'], dict['downloaded_size'], dict['percent'],
-                            dict['connections'], dict['rate'], dict['estimate_time_left'], dict['gid'], None, None, None, None]
-                for i in range(12):
-
-                    # update download_table cell if update_list item in not None
-                    if update_list[i]:
-                        text = update_list[i]
-                    else:
-                        text = self.download_table.item(row, i).text()
-
-                    # create a QTableWidgetItem
-                    item = QTableWidgetItem(text)
-
-                    # set item
-                    try:
-                        self.download_table.setItem(row, i, item)
-                    except Exception as problem:
-                        logger.sendToLog(
-                            "Error occured while updating download table", "INFO")
-                        logger.sendToLog(problem, "ERROR")
-
-                # update download_table (refreshing!)
-                self.download_table.viewport().update()
+                update_list = [dict['file_name'], dict['status'], dict['total_bytes'], dict['completed_bytes'], dict['percent'],
+                            dict['connections'], dict['speed_bps'], dict['eta_seconds'], dict['gid'], None, None, None, None]
+                try:
+                    self.download_table_model.updateRow(row, update_list)
+                except Exception as problem:
+                    logger.sendToLog(
+                        "Error occured while updating download table", "INFO")
+                    logger.sendToLog(problem, "ERROR")
 
 
             # update progresswindow labels
@@ -1428,15 +1773,18 @@ class MainWindow(MainWindow_Ui):
                 progress_window.link_label.setToolTip(link)
 
                 # downloaded
-                downloaded_size = dict['downloaded_size']
+                downloaded_size = dict['completed_bytes']
 
                 if downloaded_size == None:
                     downloaded_size = 'None'
+                else:
+                    downloaded_size = humanReadbleSize(downloaded_size)
 
-
-                file_size = dict['size']
+                file_size = dict['total_bytes']
                 if file_size == None:
                     file_size = 'None'
+                else:
+                    file_size = humanReadbleSize(file_size)
 
               
                 downloaded = QCoreApplication.translate("mainwindow_src_ui_tr", "<b>Downloaded</b>: ") \
@@ -1448,13 +1796,18 @@ class MainWindow(MainWindow_Ui):
 
                 # Transfer rate
                 rate = QCoreApplication.translate("mainwindow_src_ui_tr", "<b>Transfer rate</b>: ") \
-                    + str(dict['rate'])
+                    + humanReadbleRate(dict['speed_bps'])
 
                 progress_window.rate_label.setText(rate)
 
                 # Estimate time left
+                if dict['eta_seconds'] != None:
+                    eta = humanReadbleTime(dict['eta_seconds'])
+                else:
+                    eta = 'None'
+
                 estimate_time_left = QCoreApplication.translate("mainwindow_src_ui_tr", "<b>Estimated time left</b>: ") \
-                    + str(dict['estimate_time_left'])
+                    + eta
 
                 progress_window.time_label.setText(estimate_time_left)
 
@@ -1637,32 +1990,10 @@ class MainWindow(MainWindow_Ui):
         link_clipborad.setText(str(link_string), mode=link_clipborad.Clipboard)
         self.addLinkButtonPressed(button=link_clipborad)
 
-# aria2 identifies each download by the ID called GID.
-# The GID must be hex string of 16 characters,
-# thus [0-9a-zA-Z] are allowed and leading zeros must
-# not be stripped. The GID all 0 is reserved and must
-# not be used. The GID must be unique, otherwise error
-# is reported and the download is not added.
 # gidGenerator generates GID for downloads
+# see GidAllocator class for more information.
     def gidGenerator(self):
-        return_list = True
-        # this loop repeats until we have a unique GID
-        while True:
-
-        # generate a random hex value between 1152921504606846976 and 18446744073709551615
-        # for download GID
-            my_gid = hex(random.randint(1152921504606846976, 18446744073709551615))
-            my_gid = my_gid[2:18]
-            my_gid = str(my_gid)
-
-            # check my_gid used before or not!
-            category_dict = self.persepolis_db.searchCategoryInCategoryTable('All Downloads')
-            gid_list = category_dict['gid_list']
-
-            if not(my_gid in gid_list):
-                break
-
-        return my_gid
+        return self.gid_allocator.allocate(1)[0]
 
 # this methode returns index of all selected rows in list format
     def userSelectedRows(self):
@@ -1820,15 +2151,17 @@ class MainWindow(MainWindow_Ui):
 
 
 # when user requests calls persepolis with browser plugin,
-# this method is called by CheckingThread.
-    def checkPluginCall(self):
+# this method is called by CheckingThread or PersepolisLocalServer.
+# PersepolisLocalServer sends list_of_links directly.
+    def checkPluginCall(self, list_of_links=None):
         global plugin_links_checked
 
-        # get new links from plugins_db
-        list_of_links = self.plugins_db.returnNewLinks()
+        if list_of_links is None:
+            # get new links from plugins_db
+            list_of_links = self.plugins_db.returnNewLinks()
 
-        # notify that job is done!and new links can be received form plugins_db
-        plugin_links_checked = True
+            # notify that job is done!and new links can be received form plugins_db
+            plugin_links_checked = True
 
         # Capture youtube,... media as per setting.
         if self.persepolis_setting.value('settings/video_finder/enable', 'yes') == 'yes':
@@ -1992,13 +2325,7 @@ class MainWindow(MainWindow_Ui):
             # create a row in download_table for new download
             list = [file_name, status, '***', '***', '***',
                 '***', '***', '***', gid, add_link_dictionary['link'], date, date, category]
-            self.download_table.insertRow(0)
-            j = 0
-            # add item in list to the row
-            for i in list:
-                item = QTableWidgetItem(i)
-                self.download_table.setItem(0, j, item)
-                j = j + 1
+            self.download_table_model.insertRowList(0, list)
 
         # if user didn't press download_later_pushButton in add_link window
         # then create new qthread for new download!
@@ -2191,17 +2518,9 @@ class MainWindow(MainWindow_Ui):
 # callBack of PropertiesWindow
     def propertiesCallback(self, add_link_dictionary, gid, category):
 
-        # if checking_flag is equal to 1, it means that user pressed remove or
-        # delete button or ... . so checking download information must be
-        # stopped until job is done!
-        if checking_flag != 2:
-            wait_check = WaitThread()
-            self.threadPool.append(wait_check)
-            self.threadPool[len(self.threadPool) - 1].start()
-            self.threadPool[len(self.threadPool) - 1].QTABLEREADY.connect(
-                partial(self.propertiesCallback2, add_link_dictionary, gid, category))
-        else:
-            self.propertiesCallback2(self, add_link_dictionary, gid, category)
+        # CheckDownloadInfoThread must be paused until job is done!
+        # see CheckingGate class
+        checking_gate.runPaused(partial(self.propertiesCallback2, add_link_dictionary, gid, category))
 
     def propertiesCallback2(self, add_link_dictionary, gid, category):
         # current_category_tree_text is current category that highlited by user
@@ -2217,12 +2536,7 @@ class MainWindow(MainWindow_Ui):
 
 
         # find row of this gid!
-        row = None
-        for i in range(self.download_table.rowCount()):
-            row_gid = self.download_table.item(i, 8).text()
-            if gid == row_gid:
-                row = i
-                break
+        row = self.download_table_model.rowOfGid(gid)
 
         if row:
             if current_category_tree_text == 'All Downloads':
@@ -2235,9 +2549,6 @@ class MainWindow(MainWindow_Ui):
                 self.download_table.removeRow(row)
 
 
-        # tell the CheckDownloadInfoThread that job is done!
-        global checking_flag
-        checking_flag = 0
 
 
 # This method is called if user presses "show/hide progress window" button in
@@ -2338,12 +2649,22 @@ class MainWindow(MainWindow_Ui):
         # hide system_tray_icon
         self.system_tray_icon.hide()
 
+        # new instances of persepolis can't send requests anymore.
+        self.local_server.close()
+
         download.shutDown()  # shutting down Aria2
         sleep(0.5)
         global shutdown_notification  # see start of this script and see inherited QThreads
 # shutdown_notification = 0 >> persepolis running , 1 >> persepolis is
 # ready for close(closeEvent called) , 2 >> OK, let's close application!
         shutdown_notification = 1
+
+        # wake CheckDownloadInfoThread up, if it's waiting for aria2 notifications.
+        aria2_notifications.wake()
+
+        # wake BandwidthThread and queues up, if they are waiting for download events.
+        download_events.wake()
+
         while shutdown_notification != 2:
             sleep(0.1)
 
@@ -2595,17 +2916,9 @@ class MainWindow(MainWindow_Ui):
 
 # this method is called when user presses 'remove selected items' button
     def removeSelected(self, menu):
-        # if checking_flag is equal to 1, it means that user pressed remove or
-        # delete button or ... . so checking download information must be
-        # stopped until job is done!
-        if checking_flag != 2:
-            wait_check = WaitThread()
-            self.threadPool.append(wait_check)
-            self.threadPool[len(self.threadPool) - 1].start()
-            self.threadPool[len(self.threadPool) -
-                            1].QTABLEREADY.connect(self.removeSelected2)
-        else:
-            self.removeSelected2()
+        # CheckDownloadInfoThread must be paused until job is done!
+        # see CheckingGate class
+        checking_gate.runPaused(self.removeSelected2)
 
     def removeSelected2(self):
         # find selected rows!
@@ -2649,13 +2962,10 @@ class MainWindow(MainWindow_Ui):
                            QCoreApplication.translate("mainwindow_src_ui_tr", "Please stop the following download first: ") + file_name,
                         5000, 'fail', parent=self)
 
-        # find row number for specific gid
+        # find files that must be removed
+        remove_file_list = []
         for gid in gid_list:
-            for i in range(self.download_table.rowCount()):
-                row_gid = self.download_table.item(i, 8).text()
-                if gid == row_gid:
-                    row = i
-                    break
+            row = self.download_table_model.rowOfGid(gid)
 
             # find status
             status = self.download_table.item(row, 1).text()
@@ -2663,32 +2973,45 @@ class MainWindow(MainWindow_Ui):
             # find filename
             file_name = self.download_table.item(row, 0).text()
 
-            # find category
-            category = self.download_table.item(row, 12).text()
-
-            # remove row from download_table
-            self.download_table.removeRow(row)
-
-            # remove download item from data base
-            self.persepolis_db.deleteItemInDownloadTable(gid, category)
-
             # remove file of download from download temp folder
             if file_name != '***' and status != 'complete':
                 file_name_path = os.path.join(
                     temp_download_folder,  str(file_name))
-                osCommands.remove(file_name_path)  # remove file
+                remove_file_list.append([file_name_path, False])  # remove file
 
                 file_name_aria = file_name_path + str('.aria2')
-                osCommands.remove(file_name_aria)  # remove file.aria
+                remove_file_list.append([file_name_aria, False])  # remove file.aria
+
+        # remove rows from download_table
+        self.download_table_model.removeGids(gid_list)
 
-        # tell the CheckDownloadInfoThread that job is done!
-        global checking_flag
-        checking_flag = 0
+        # remove download items from data base
+        self.persepolis_db.deleteItemsInDownloadTable(gid_list)
 
+        # remove files in background
+        self.removeFiles(remove_file_list)
 
 
 
 
+
+
+# this method removes files in file_list in background.
+# see RemoveFilesThread
+    def removeFiles(self, file_list):
+        if len(file_list) == 0:
+            return
+
+        remove_files_thread = RemoveFilesThread(file_list)
+        self.threadPool.append(remove_files_thread)
+        self.threadPool[len(self.threadPool) - 1].start()
+        self.threadPool[len(self.threadPool) - 1].FILENOTFOUNDSIGNAL.connect(self.fileNotFound)
+
+# this method notifies user that file_path is not found
+    def fileNotFound(self, file_path):
+        notifySend(str(file_path), QCoreApplication.translate("mainwindow_src_ui_tr", 'Not Found'),
+                5000, 'warning', parent=self)
+
 # this method is called when user presses 'delete selected items'
     def deleteSelected(self, menu):
         # showing Warning message to the user.
@@ -2718,17 +3041,9 @@ class MainWindow(MainWindow_Ui):
                 return
 
 
-        # if checking_flag is equal to 1, it means that user pressed remove or
-        # delete button or ... . so checking download information must be
-        # stopped until job is done!
-        if checking_flag != 2:
-            wait_check = WaitThread()
-            self.threadPool.append(wait_check)
-            self.threadPool[len(self.threadPool) - 1].start()
-            self.threadPool[len(self.threadPool) -
-                            1].QTABLEREADY.connect(self.deleteSelected2)
-        else:
-            self.deleteSelected2()
+        # CheckDownloadInfoThread must be paused until job is done!
+        # see CheckingGate class
+        checking_gate.runPaused(self.deleteSelected2)
 
     def deleteSelected2(self):
         gid_list = []
@@ -2773,21 +3088,14 @@ class MainWindow(MainWindow_Ui):
                                                       'Operation was not successful! Stop the following download first: ') + file_name,
                         5000, 'fail', parent=self)
 
-        # remove selected rows
-        # find row number for specific gid
+        # find files that must be removed
+        remove_file_list = []
         for gid in gid_list:
-            for i in range(self.download_table.rowCount()):
-                row_gid = self.download_table.item(i, 8).text()
-                if gid == row_gid:
-                    row = i
-                    break
+            row = self.download_table_model.rowOfGid(gid)
 
             # find file_name
             file_name = self.download_table.item(row, 0).text()
 
-            # find category
-            category = self.download_table.item(row, 12).text()
-
             # find status
             status = self.download_table.item(row, 1).text()
 
@@ -2798,545 +3106,105 @@ class MainWindow(MainWindow_Ui):
                     temp_download_folder, str(file_name))
 
                 # remove file : file_name_path
-                osCommands.remove(file_name_path)
+                remove_file_list.append([file_name_path, False])
 
                 # remove aria2 download information file : file_name_aria
                 file_name_aria = file_name_path + str('.aria2')
-                osCommands.remove(file_name_aria)
+                remove_file_list.append([file_name_aria, False])
 
             # remove downloaded file, if download is completed
+            # user is notified if file is not found.
             if status == 'complete':
 
                 # find download path
                 dict = self.persepolis_db.searchGidInAddLinkTable(gid)
                 file_path = dict['download_path']
 
-                remove_answer = osCommands.remove(file_path)
-
+                remove_file_list.append([file_path, True])
 
-                if remove_answer == 'no':
-                    notifySend(str(file_path), QCoreApplication.translate("mainwindow_src_ui_tr", 'Not Found'),
-                            5000, 'warning', parent=self)
+        # remove rows from download_table
+        self.download_table_model.removeGids(gid_list)
 
-            # remove row from download_table
-            self.download_table.removeRow(row)
+        # remove download items from data base
+        self.persepolis_db.deleteItemsInDownloadTable(gid_list)
 
+        # remove files in background
+        self.removeFiles(remove_file_list)
 
-            # remove download item from data base
-            self.persepolis_db.deleteItemInDownloadTable(gid, category)
 
 
-        # telling the CheckDownloadInfoThread that job is done!
-        global checking_flag
-        checking_flag = 0
-
-
-# this method sorts download table by name
-    def sortByName(self, menu_item):
-
-        # if checking_flag is equal to 1, it means that user pressed remove or
-        # delete button or ... . so checking download information must be
-        # stopped until job is done!
-        if checking_flag != 2:
-            wait_check = WaitThread()
-            self.threadPool.append(wait_check)
-            self.threadPool[len(self.threadPool) - 1].start()
-            self.threadPool[len(self.threadPool) -
-                            1].QTABLEREADY.connect(self.sortByName2)
-        else:
-            self.sortByName2()
-
-    def sortByName2(self):
-        # find names and gid of downloads and save them in name_gid_dict
-        # gid is key and name is value.
-        gid_name_dict = {}
-        for row in range(self.download_table.rowCount()):
-            name = self.download_table.item(row, 0).text()
-            gid = self.download_table.item(row, 8).text()
-            gid_name_dict[gid] = name
-
-        # sort names
-        gid_sorted_list = sorted(gid_name_dict, key=gid_name_dict.get)
-
-        # clear download_table and add sorted items
-        self.download_table.clearContents()
 
+# this method sorts items of selected category in data base and
+# reloads download_table.
+# sort_key is 'name', 'size', 'status', 'first_try_date' or 'last_try_date'.
+# see sortCategoryItems method in data_base.py
+    def sortDownloadTable(self, sort_key):
         # find name of selected category
         current_category_tree_text = str(current_category_tree_index.data())
 
-        # get download information from data base
-        if current_category_tree_text == 'All Downloads':
-            downloads_dict = self.persepolis_db.returnItemsInDownloadTable()
-        else:
-            downloads_dict = self.persepolis_db.returnItemsInDownloadTable(current_category_tree_text)
-
-        j = 0
-
-        for gid in gid_sorted_list:
-            #enter download rows according to gid_sorted_list
-            download_info = downloads_dict[gid]
+        # sort items in data base
+        self.persepolis_db.sortCategoryItems(current_category_tree_text, sort_key)
 
-            keys_list = ['file_name',
-                        'status',
-                        'size',
-                        'downloaded_size',
-                        'percent',
-                        'connections',
-                        'rate',
-                        'estimate_time_left',
-                        'gid',
-                        'link',
-                        'first_try_date',
-                        'last_try_date',
-                        'category'
-                        ]
+        # reload download_table
+        self.download_table_model.setFetchFunction(partial(self.persepolis_db.returnCategoryItemsPage, current_category_tree_text))
 
-            i = 0
-            for key in keys_list:
-                item = QTableWidgetItem(download_info[key])
-
-                # insert item in download_table
-                self.download_table.setItem(j, i, item)
-
-                i = i+1
-
-            j = j + 1
-
-        # save sorted list (gid_sorted_list) in data base
-        category_dict = {'category': current_category_tree_text}
-
-        # update gid_list
-        gid_sorted_list.reverse()
-        category_dict['gid_list'] = gid_sorted_list
 
+# this method sorts download table by name
+    def sortByName(self, menu_item):
 
-        # update category_db_table
-        self.persepolis_db.updateCategoryTable([category_dict])
+        # CheckDownloadInfoThread must be paused until job is done!
+        # see CheckingGate class
+        checking_gate.runPaused(self.sortByName2)
 
-        # tell the CheckDownloadInfoThread that job is done!
-        global checking_flag
-        checking_flag = 0
+    def sortByName2(self):
+        self.sortDownloadTable('name')
 
 
 
 # this method sorts items in download_table by size
     def sortBySize(self, menu_item):
 
-        # if checking_flag is equal to 1, it means that user pressed remove or
-        # delete button or ... . so checking download information must be
-        # stopped until job is done!
-        if checking_flag != 2:
-            wait_check = WaitThread()
-            self.threadPool.append(wait_check)
-            self.threadPool[len(self.threadPool) - 1].start()
-            self.threadPool[len(self.threadPool) -
-                            1].QTABLEREADY.connect(self.sortBySize2)
-        else:
-            self.sortBySize2()
+        # CheckDownloadInfoThread must be paused until job is done!
+        # see CheckingGate class
+        checking_gate.runPaused(self.sortBySize2)
 
     def sortBySize2(self):
-
-        # find name of selected category
-        current_category_tree_text = str(current_category_tree_index.data())
-
-
-        # find gid and size of downloads
-        gid_size_dict = {}
-        for row in range(self.download_table.rowCount()):
-            size_str = self.download_table.item(row, 2).text()
-            gid = self.download_table.item(row, 8).text()
-
-            # convert file size to the Byte
-            try:
-                size_int = float(size_str[:-3])
-                size_symbol = str(size_str[-2])
-                if size_symbol == 'G':
-                    size = size_int * 1073741824
-                elif size_symbol == 'M':
-                    size = size_int * 1048576
-                elif size_symbol == 'K': 
-                    size = size_int * 1024
-                else:  # Byte
-                    size = size_int
-            except:
-                size = 0
-
-            # create a dictionary from gid and size of files in Bytes
-            # gid as key and size as value
-            gid_size_dict[gid] = size
-
-        # sort gid_size_dict
-        gid_sorted_list = sorted(
-            gid_size_dict, key=gid_size_dict.get, reverse=True)
-
-        # clear download_table by size
-        self.download_table.clearContents()
-
-        # get download information from data base
-        if current_category_tree_text == 'All Downloads':
-            downloads_dict = self.persepolis_db.returnItemsInDownloadTable()
-        else:
-            downloads_dict = self.persepolis_db.returnItemsInDownloadTable(current_category_tree_text)
-
-        j = 0
-
-        for gid in gid_sorted_list:
-            #enter download rows according to gid_sorted_list
-            download_info = downloads_dict[gid]
-
-            keys_list = ['file_name',
-                        'status',
-                        'size',
-                        'downloaded_size',
-                        'percent',
-                        'connections',
-                        'rate',
-                        'estimate_time_left',
-                        'gid',
-                        'link',
-                        'first_try_date',
-                        'last_try_date',
-                        'category'
-                        ]
-
-            i = 0
-            for key in keys_list:
-                item = QTableWidgetItem(download_info[key])
-
-                # insert item in download_table
-                self.download_table.setItem(j, i, item)
-
-                i = i+1
-
-            j = j + 1
-
-        # save sorted list (gid_sorted_list) in data base
-        category_dict = {'category': current_category_tree_text}
-
-        # update gid_list
-        gid_sorted_list.reverse()
-
-        category_dict['gid_list'] = gid_sorted_list
-
-
-        # update category_db_table
-        self.persepolis_db.updateCategoryTable([category_dict])
-
-        # tell the CheckDownloadInfoThread that job is done!
-        global checking_flag
-        checking_flag = 0
+        self.sortDownloadTable('size')
 
 
 
 # this method sorts download_table items with status
     def sortByStatus(self, item):
 
-        # if checking_flag is equal to 1, it means that user pressed remove or
-        # delete button or ... . so checking download information must be
-        # stopped until job is done!
-        if checking_flag != 2:
-            wait_check = WaitThread()
-            self.threadPool.append(wait_check)
-            self.threadPool[len(self.threadPool) - 1].start()
-            self.threadPool[len(self.threadPool) -
-                            1].QTABLEREADY.connect(self.sortByStatus2)
-        else:
-            self.sortByStatus2()
+        # CheckDownloadInfoThread must be paused until job is done!
+        # see CheckingGate class
+        checking_gate.runPaused(self.sortByStatus2)
 
     def sortByStatus2(self):
-
-        # find name of selected category
-        current_category_tree_text = str(current_category_tree_index.data())
-
-        # find gid and status of downloads
-        gid_status_dict = {}
-        for row in range(self.download_table.rowCount()):
-            status = self.download_table.item(row, 1).text()
-            gid = self.download_table.item(row, 8).text()
-            # assign a number to every status
-            if status == 'complete':
-                status_int = 1
-            elif status == 'stopped':
-                status_int = 2
-            elif status == 'error':
-                status_int = 3
-            elif status == 'downloading':
-                status_int = 4
-            elif status == 'waiting':
-                status_int = 5
-            else:
-                status_int = 6
-
-            # create a dictionary from gid and size_int of files in Bytes
-            gid_status_dict[gid] = status_int
-
-        # sort gid_status_dict
-        gid_sorted_list = sorted(gid_status_dict, key=gid_status_dict.get)
-
-        # get download information from data base
-        if current_category_tree_text == 'All Downloads':
-            downloads_dict = self.persepolis_db.returnItemsInDownloadTable()
-        else:
-            downloads_dict = self.persepolis_db.returnItemsInDownloadTable(current_category_tree_text)
-
-        # clear download_table
-        self.download_table.clearContents()
-
-        j = 0
-
-        for gid in gid_sorted_list:
-            #enter download rows according to gid_sorted_list
-            download_info = downloads_dict[gid]
-
-            keys_list = ['file_name',
-                        'status',
-                        'size',
-                        'downloaded_size',
-                        'percent',
-                        'connections',
-                        'rate',
-                        'estimate_time_left',
-                        'gid',
-                        'link',
-                        'first_try_date',
-                        'last_try_date',
-                        'category'
-                        ]
-
-            i = 0
-            for key in keys_list:
-                item = QTableWidgetItem(download_info[key])
-
-                # insert item in download_table
-                self.download_table.setItem(j, i, item)
-
-                i = i+1
-
-            j = j + 1
-
-        # save sorted list (gid_sorted_list) in data base
-        category_dict = {'category': current_category_tree_text}
-
-        # update gid_list
-        gid_sorted_list.reverse()
-
-        category_dict['gid_list'] = gid_sorted_list
-
-
-        # update category_db_table
-        self.persepolis_db.updateCategoryTable([category_dict])
-
-        # tell the CheckDownloadInfoThread that job is done!
-        global checking_flag
-        checking_flag = 0
+        self.sortDownloadTable('status')
 
 
 
     # this method sorts download table with date added information
     def sortByFirstTry(self, item):
 
-        # if checking_flag is equal to 1, it means that user pressed remove or
-        # delete button or ... . so checking download information must be
-        # stopped until job is done!
-        if checking_flag != 2:
-            wait_check = WaitThread()
-            self.threadPool.append(wait_check)
-            self.threadPool[len(self.threadPool) - 1].start()
-            self.threadPool[len(self.threadPool) -
-                            1].QTABLEREADY.connect(self.sortByFirstTry2)
-        else:
-            self.sortByFirstTry2()
+        # CheckDownloadInfoThread must be paused until job is done!
+        # see CheckingGate class
+        checking_gate.runPaused(self.sortByFirstTry2)
 
     def sortByFirstTry2(self):
-        # find gid and first try date
-        gid_try_dict = {}
-        for row in range(self.download_table.rowCount()):
-            first_try_date = self.download_table.item(row, 10).text()
-            gid = self.download_table.item(row, 8).text()
-
-            # convert date and hour in first_try_date to a number
-            # for example , first_try_date = '2016/11/05 , 07:45:38'
-            # must be converted to 20161105074538
-            first_try_date_splited = first_try_date.split(' , ')
-            date_list = first_try_date_splited[0].split('/')
-            hour_list = first_try_date_splited[1].split(':')
-            date_joind = "".join(date_list)
-            hour_joind = "".join(hour_list)
-            date_hour_str = date_joind + hour_joind
-            date_hour = int(date_hour_str)
-
-            # create a dictionary
-            # gid as key and date_hour as value
-            gid_try_dict[gid] = date_hour
-
-        # sort
-        gid_sorted_list = sorted(
-            gid_try_dict, key=gid_try_dict.get, reverse=True)
-
-        # clear download_table
-        self.download_table.clearContents()
-
-        # find name of selected category
-        current_category_tree_text = str(current_category_tree_index.data())
-
-        # get download information from data base
-        if current_category_tree_text == 'All Downloads':
-            downloads_dict = self.persepolis_db.returnItemsInDownloadTable()
-        else:
-            downloads_dict = self.persepolis_db.returnItemsInDownloadTable(current_category_tree_text)
-
-        j = 0
-
-        for gid in gid_sorted_list:
-            #enter download rows according to gid_sorted_list
-            download_info = downloads_dict[gid]
-
-            keys_list = ['file_name',
-                        'status',
-                        'size',
-                        'downloaded_size',
-                        'percent',
-                        'connections',
-                        'rate',
-                        'estimate_time_left',
-                        'gid',
-                        'link',
-                        'first_try_date',
-                        'last_try_date',
-                        'category'
-                        ]
-
-            i = 0
-            for key in keys_list:
-                item = QTableWidgetItem(download_info[key])
-
-                # insert item in download_table
-                self.download_table.setItem(j, i, item)
-
-                i = i+1
-
-            j = j + 1
-
-        # save sorted list (gid_list) in data base
-        category_dict = {'category': current_category_tree_text}
-
-        # update gid_sorted_list
-        gid_sorted_list.reverse()
-
-        category_dict['gid_list'] = gid_sorted_list
-
-
-        # update category_db_table
-        self.persepolis_db.updateCategoryTable([category_dict])
-
-        # tell the CheckDownloadInfoThread that job is done!
-        global checking_flag
-        checking_flag = 0
+        self.sortDownloadTable('first_try_date')
 
 
 
 # this method sorts download_table with order of last modify date
     def sortByLastTry(self, item):
-        # if checking_flag is equal to 1, it means that user pressed remove or
-        # delete button or ... . so checking download information must be
-        # stopped until job is done!
-        if checking_flag != 2:
-            wait_check = WaitThread()
-            self.threadPool.append(wait_check)
-            self.threadPool[len(self.threadPool) - 1].start()
-            self.threadPool[len(self.threadPool) -
-                            1].QTABLEREADY.connect(self.sortByLastTry2)
-        else:
-            self.sortByLastTry2()
+        # CheckDownloadInfoThread must be paused until job is done!
+        # see CheckingGate class
+        checking_gate.runPaused(self.sortByLastTry2)
 
     def sortByLastTry2(self):
-
-        # create a dictionary
-        # gid as key and date_hour as value
-        gid_try_dict = {}
-
-        # find gid and last try date for download items in download_table
-        for row in range(self.download_table.rowCount()):
-            last_try_date = self.download_table.item(row, 11).text()
-            gid = self.download_table.item(row, 8).text()
-
-            # convert date and hour in last_try_date to a number
-            # for example , last_try_date = '2016/11/05 , 07:45:38'
-            # must be converted to 20161105074538
-            last_try_date_splited = last_try_date.split(' , ')
-            date_list = last_try_date_splited[0].split('/')
-            hour_list = last_try_date_splited[1].split(':')
-            date_joind = "".join(date_list)
-            hour_joind = "".join(hour_list)
-            date_hour_str = date_joind + hour_joind
-            date_hour = int(date_hour_str)
-
-            # add gid and date_hour to gid_try_dict
-            gid_try_dict[gid] = date_hour
-
-        # sort
-        gid_sorted_list = sorted(
-            gid_try_dict, key=gid_try_dict.get, reverse=True)
-
-        # clear download_table
-        self.download_table.clearContents()
-
-        # find name of selected category
-        current_category_tree_text = str(current_category_tree_index.data())
-
-        # get download information from data base
-        if current_category_tree_text == 'All Downloads':
-            downloads_dict = self.persepolis_db.returnItemsInDownloadTable()
-        else:
-            downloads_dict = self.persepolis_db.returnItemsInDownloadTable(current_category_tree_text)
-
-        j = 0
-
-        for gid in gid_sorted_list:
-            #enter download rows according to gid_sorted_list
-            download_info = downloads_dict[gid]
-
-            keys_list = ['file_name',
-                        'status',
-                        'size',
-                        'downloaded_size',
-                        'percent',
-                        'connections',
-                        'rate',
-                        'estimate_time_left',
-                        'gid',
-                        'link',
-                        'first_try_date',
-                        'last_try_date',
-                        'category'
-                        ]
-
-            i = 0
-            for key in keys_list:
-                item = QTableWidgetItem(download_info[key])
-
-                # insert item in download_table
-                self.download_table.setItem(j, i, item)
-
-                i = i+1
-
-            j = j + 1
-
-        # save sorted list (gid_list) in data base
-        category_dict = {'category': current_category_tree_text}
-
-        # update gid_sorted_list
-        gid_sorted_list.reverse()
-
-        category_dict['gid_list'] = gid_sorted_list
-
-
-        # update category_db_table
-        self.persepolis_db.updateCategoryTable([category_dict])
-
-        # tell the CheckDownloadInfoThread that job is done!
-        global checking_flag
-        checking_flag = 0
+        self.sortDownloadTable('last_try_date')
 
 
 # this method called , when user clicks on 'create new queue' button in
@@ -3465,12 +3333,13 @@ class MainWindow(MainWindow_Ui):
         # get now time and date
         date = download.nowDate()
 
-        # add dictionary of downloads to data base
-        for add_link_dictionary in add_link_dictionary_list:
+        # aria2 identifies each download by the ID called GID. The GID must
+        # be hex string of 16 characters.
+        # generate GIDs for all links together.
+        gid_list = self.gid_allocator.allocate(len(add_link_dictionary_list))
 
-            # aria2 identifies each download by the ID called GID. The GID must
-            # be hex string of 16 characters.
-            gid = self.gidGenerator()
+        # add dictionary of downloads to data base
+        for add_link_dictionary, gid in zip(add_link_dictionary_list, gid_list):
 
             add_link_dictionary['gid'] = gid
 
@@ -3508,12 +3377,7 @@ class MainWindow(MainWindow_Ui):
             download_table_list.append(dict)
 
             # create a row in download_table
-            self.download_table.insertRow(0)
-            j = 0
-            for i in list:
-                item = QTableWidgetItem(i)
-                self.download_table.setItem(0, j, item)
-                j = j + 1
+            self.download_table_model.insertRowList(0, list)
 
             # spider is finding file size and file name
             new_spider = SpiderThread(add_link_dictionary, self)
@@ -3534,18 +3398,9 @@ class MainWindow(MainWindow_Ui):
     def categoryTreeSelected(self, item):
         new_selection = item
         if current_category_tree_index != new_selection:
-            # if checking_flag is equal to 1, it means that user pressed remove
-            # or delete button or ... . so checking download information must
-            # be stopped until job is done!
-            if checking_flag != 2:
-
-                wait_check = WaitThread()
-                self.threadPool.append(wait_check)
-                self.threadPool[len(self.threadPool) - 1].start()
-                self.threadPool[len(self.threadPool) - 1].QTABLEREADY.connect(
-                    partial(self.categoryTreeSelected2, new_selection))
-            else:
-                self.categoryTreeSelected2(new_selection)
+            # CheckDownloadInfoThread must be paused until job is done!
+            # see CheckingGate class
+            checking_gate.runPaused(partial(self.categoryTreeSelected2, new_selection))
 
     def categoryTreeSelected2(self, new_selection):
         global current_category_tree_index
@@ -3588,6 +3443,9 @@ class MainWindow(MainWindow_Ui):
         else:
             queue_dict['reverse'] = 'no'
 
+        # parallel_downloads_spinBox
+        queue_dict['parallel_downloads'] = self.parallel_downloads_spinBox.value()
+
         # limit_checkBox
         if self.limit_checkBox.isChecked():
             queue_dict['limit_enable'] = 'yes'
@@ -3623,49 +3481,11 @@ class MainWindow(MainWindow_Ui):
             self.category_tree.currentIndex().data())
 
 
-        # read download items from data base
-        if current_category_tree_text == 'All Downloads':
-            download_table_dict = self.persepolis_db.returnItemsInDownloadTable()
-        else:
-            download_table_dict = self.persepolis_db.returnItemsInDownloadTable(current_category_tree_text)
-
-        # get gid_list
-        category_dict = self.persepolis_db.searchCategoryInCategoryTable(current_category_tree_text)
-        gid_list = category_dict['gid_list']
-
-
-        keys_list = ['file_name',
-                    'status',
-                    'size',
-                    'downloaded_size',
-                    'percent',
-                    'connections',
-                    'rate',
-                    'estimate_time_left',
-                    'gid',
-                    'link',
-                    'first_try_date',
-                    'last_try_date',
-                    'category'
-                    ]
-
-        # insert items in download_table
-        for gid in gid_list:
-            # create new row
-            self.download_table.insertRow(0)
-
-            dict = download_table_dict[gid]
-            i = 0
-            for key in keys_list:
-                item = QTableWidgetItem(str(dict[key]))
-
-                self.download_table.setItem(0, i, item)
+        # read download items from data base.
+        # only first page is read now and other pages are read when user scrolls down,
+        # so switching between categories doesn't depend on the number of items.
+        self.download_table_model.setFetchFunction(partial(self.persepolis_db.returnCategoryItemsPage, current_category_tree_text))
 
-                i = i + 1
-
-        # tell the CheckDownloadInfoThread that job is done!
-        global checking_flag
-        checking_flag = 0
 
         # update toolBar and tablewidget_menu items
         self.toolBarAndContextMenuItems(str(current_category_tree_text))
@@ -3810,6 +3630,9 @@ class MainWindow(MainWindow_Ui):
                 self.removeQueueAction.setEnabled(False)
                 self.moveUpSelectedAction.setEnabled(False)
                 self.moveDownSelectedAction.setEnabled(False)
+                self.moveTopSelectedAction.setEnabled(False)
+                self.moveBottomSelectedAction.setEnabled(False)
+                self.download_table.setDragEnabled(False)
             else:
                 # if queue didn't start
                 self.stopQueueAction.setEnabled(False)
@@ -3817,6 +3640,9 @@ class MainWindow(MainWindow_Ui):
                 self.removeQueueAction.setEnabled(True)
                 self.moveUpSelectedAction.setEnabled(True)
                 self.moveDownSelectedAction.setEnabled(True)
+                self.moveTopSelectedAction.setEnabled(True)
+                self.moveBottomSelectedAction.setEnabled(True)
+                self.download_table.setDragEnabled(True)
  
 
         else:
@@ -3826,6 +3652,9 @@ class MainWindow(MainWindow_Ui):
             self.removeQueueAction.setEnabled(False)
             self.moveUpSelectedAction.setEnabled(False)
             self.moveDownSelectedAction.setEnabled(False)
+            self.moveTopSelectedAction.setEnabled(False)
+            self.moveBottomSelectedAction.setEnabled(False)
+            self.download_table.setDragEnabled(False)
 
         # add sortMenu to download_table context menu
         sortMenu = self.download_table.tablewidget_menu.addMenu(QCoreApplication.translate("mainwindow_src_ui_tr", 'Sort by'))
@@ -3910,8 +3739,8 @@ class MainWindow(MainWindow_Ui):
         try:
             self.temp_db.insertInQueueTable(current_category_tree_text)
         except:
-            # release lock
-            self.temp_db.lock = False
+            # this queue was created before!
+            pass
 
         queue_info_dict = {'category': current_category_tree_text}
 
@@ -3943,6 +3772,9 @@ class MainWindow(MainWindow_Ui):
         else:
             queue_info_dict['reverse'] = 'no'
 
+        # parallel_downloads_spinBox
+        queue_info_dict['parallel_downloads'] = self.parallel_downloads_spinBox.value()
+
         # update data base
         self.persepolis_db.updateCategoryTable([queue_info_dict])
 
@@ -3976,18 +3808,9 @@ class MainWindow(MainWindow_Ui):
 # this method is called , when user want to add a download to a queue with
 # context menu. see also toolBarAndContextMenuItems() method
     def addToQueue(self, data, menu):
-        # if checking_flag is equal to 1, it means that user pressed remove or
-        # delete button or ... . so checking download information must be
-        # stopped until job is done!
-
-        if checking_flag != 2:
-            wait_check = WaitThread()
-            self.threadPool.append(wait_check)
-            self.threadPool[len(self.threadPool) - 1].start()
-            self.threadPool[len(
-                self.threadPool) - 1].QTABLEREADY.connect(partial(self.addToQueue2, data))
-        else:
-            self.addToQueue2(data)
+        # CheckDownloadInfoThread must be paused until job is done!
+        # see CheckingGate class
+        checking_gate.runPaused(partial(self.addToQueue2, data))
 
     def addToQueue2(self, data):
         send_message = False
@@ -4019,11 +3842,7 @@ class MainWindow(MainWindow_Ui):
 
         # find row number for specific gid
         for gid in gid_list:
-            for i in range(self.download_table.rowCount()):
-                row_gid = self.download_table.item(i, 8).text()
-                if gid == row_gid:
-                    row = i
-                    break
+            row = self.download_table_model.rowOfGid(gid)
 
             # current_category = former selected category
             current_category = self.download_table.item(row, 12).text()
@@ -4035,30 +3854,11 @@ class MainWindow(MainWindow_Ui):
                 self.persepolis_db.updateDownloadTable([dict])
                 self.persepolis_db.setDefaultGidInAddlinkTable(gid, start_time=True, end_time=True, after_download=True)
 
-                # delete item from gid_list in current_category
-                current_category_dict = self.persepolis_db.searchCategoryInCategoryTable(current_category)
-
-                # get gid_list
-                current_category_gid_list = current_category_dict['gid_list']
-
-                # delete item
-                current_category_gid_list = current_category_gid_list.remove(gid)
+                # delete item from current_category
+                self.persepolis_db.removeGidsFromCategory(current_category, [gid])
 
-                # update category_db_table
-                self.persepolis_db.updateCategoryTable([current_category_dict])
-
-                # add item to gid_list of new_category
-                # get category_dict from data base
-                new_category_dict = self.persepolis_db.searchCategoryInCategoryTable(new_category)
-
-                # get gid_list
-                new_category_gid_list = new_category_dict['gid_list']
-
-                # add gid of item to gid_list
-                new_category_gid_list = new_category_gid_list.append(gid)
-
-                # updata category_db_table
-                self.persepolis_db.updateCategoryTable([new_category_dict])
+                # add item to the end of new_category
+                self.persepolis_db.appendGidsToCategory(new_category, [gid])
 
                 # update category in download_table
                 current_category_tree_text = str(current_category_tree_index.data())
@@ -4075,8 +3875,6 @@ class MainWindow(MainWindow_Ui):
                     QCoreApplication.translate("mainwindow_src_ui_tr", "Please stop download progress first."),
                     5000, 'no', parent=self)
 
-        global checking_flag
-        checking_flag = 0
 
 
 
@@ -4228,6 +4026,9 @@ class MainWindow(MainWindow_Ui):
         # read queue_info_dict from data base
         queue_info_dict = self.persepolis_db.searchCategoryInCategoryTable(category)
 
+        # parallel_downloads_spinBox
+        self.parallel_downloads_spinBox.setValue(int(queue_info_dict['parallel_downloads'] or 1))
+
         # check queue condition
         if str(category) in self.queue_list_dict.keys():
             queue_status = self.queue_list_dict[str(category)].start
@@ -4360,174 +4161,85 @@ class MainWindow(MainWindow_Ui):
 
 
 # this method is called when user pressed moveUpSelectedAction
-# this method subtituts selected  items with upper one
+# this method moves selected items up by one row
     def moveUpSelected(self, menu):
-        global button_pressed_counter
-        button_pressed_counter = button_pressed_counter + 1
-# if checking_flag is equal to 1, it means that user pressed remove or
-# delete button or ... . so checking download information must be stopped
-# until job is done!
-
-        if checking_flag != 2:
-            button_pressed_thread = ButtonPressedThread()
-            self.threadPool.append(button_pressed_thread)
-            self.threadPool[len(self.threadPool) - 1].start()
-
-            wait_check = WaitThread()
-            self.threadPool.append(wait_check)
-            self.threadPool[len(self.threadPool) - 1].start()
-            self.threadPool[len(self.threadPool) -
-                            1].QTABLEREADY.connect(self.moveUpSelected2)
-        else:
-            self.moveUpSelected2()
-
-    def moveUpSelected2(self):
-        # current_category_tree_text is the name of queue that selected by user
-        current_category_tree_text = str(current_category_tree_index.data())
-
-        # get gid_list from data base
-        category_dict = self.persepolis_db.searchCategoryInCategoryTable(
-                        current_category_tree_text)
-
-        gid_list = category_dict['gid_list']
-
-        # find selected rows
-        rows_list = self.userSelectedRows()
-
-        new_rows_list = []
-
-        # move up selected rows
-        for old_row in rows_list:
-            new_row = int(old_row) - 1
-            old_row_items_list = []
-            new_row_items_list = []
-
-            if new_row >= 0:
-                new_rows_list.append(new_row)
-                # old index and new index of item in gid_list
-                old_index = len(gid_list) - old_row - 1
-                new_index = old_index + 1
-
-                # subtitute items in gid_list
-                gid_list[old_index], gid_list[new_index] = gid_list[new_index], gid_list[old_index]
-
-                # subtitute items in download_table
-                # read current items in download_table
-                for i in range(13):
-                    old_row_items_list.append(
-                        self.download_table.item(old_row, i).text())
-
-                    new_row_items_list.append(
-                        self.download_table.item(new_row, i).text())
-
-                # subtituting
-                for i in range(13):
-                    # old row
-                    item = QTableWidgetItem(new_row_items_list[i])
-
-                    self.download_table.setItem(old_row, i, item)
-
-                    # new row
-                    item = QTableWidgetItem(old_row_items_list[i])
-
-                    self.download_table.setItem(new_row, i, item)
-
-        # remove highlight from old rows
-        self.download_table.clearSelection()
-
-        # Visit this link for more information
-        # doc.qt.io/qt-5/qabstractitemview.html
-        self.download_table.setSelectionMode(QAbstractItemView.MultiSelection)
-
-        # Highlight newer rows
-        for row in new_rows_list:
-            self.download_table.selectRow(row)
-
-        # change selection mode to the normal situation 
-        self.download_table.setSelectionMode(QAbstractItemView.ExtendedSelection)
-
-        # update data base
-        self.persepolis_db.updateCategoryTable([category_dict])
-
+        self.moveSelected('up')
 
 # this method is called if user pressed moveDownSelected action
-# this method is subtituting selected download item with lower download item
+# this method moves selected items down by one row
     def moveDownSelected(self, menu):
-        global button_pressed_counter
-        button_pressed_counter = button_pressed_counter + 1
-# if checking_flag is equal to 1, it means that user pressed remove or
-# delete button or ... . so checking download information must be stopped
-# until job is done!
-        if checking_flag != 2:
-            button_pressed_thread = ButtonPressedThread()
-            self.threadPool.append(button_pressed_thread)
-            self.threadPool[len(self.threadPool) - 1].start()
-
-            wait_check = WaitThread()
-            self.threadPool.append(wait_check)
-            self.threadPool[len(self.threadPool) - 1].start()
-            self.threadPool[len(self.threadPool) -
-                            1].QTABLEREADY.connect(self.moveDownSelected2)
-        else:
-            self.moveDownSelected2()
-
-    def moveDownSelected2(self):
-
-        # an old row and new row must be subtituted by each other
-
-        # find selected rows
-        rows_list = self.userSelectedRows() 
-
+        self.moveSelected('down')
+
+# this method is called if user pressed moveTopSelected action
+# this method moves selected items to the top of the queue
+    def moveTopSelected(self, menu):
+        self.moveSelected('top')
+
+# this method is called if user pressed moveBottomSelected action
+# this method moves selected items to the bottom of the queue
+    def moveBottomSelected(self, menu):
+        self.moveSelected('bottom')
+
+# this method is called if user dragged selected items and dropped them on target_row.
+# target_row is -1 if items dropped under the last row.
+    def dropSelected(self, target_row):
+        # items can be moved only in queues that are not started.
+        if self.moveUpSelectedAction.isEnabled():
+            self.moveSelected('drop', target_row)
+
+# direction is 'up', 'down', 'top', 'bottom' or 'drop'
+    def moveSelected(self, direction, target_row=None):
+        # CheckDownloadInfoThread must be paused until job is done!
+        # see CheckingGate class
+        checking_gate.runPaused(partial(self.moveSelected2, direction, target_row))
+
+    def moveSelected2(self, direction, target_row=None):
         # current_category_tree_text is the name of queue that selected by user
         current_category_tree_text = str(current_category_tree_index.data())
 
-        # get gid_list from data base
-        category_dict = self.persepolis_db.searchCategoryInCategoryTable(
-                current_category_tree_text)
-
-        gid_list = category_dict['gid_list']
-
-        rows_list.reverse()
-
-        new_rows_list = []
-
-        # move up selected rows
-        for old_row in rows_list:
-
-            new_row = int(old_row) + 1
-            if new_row < self.download_table.rowCount():
-                new_rows_list.append(new_row)
-
-                # old index and new index in gid_list
-                old_index = len(gid_list) - old_row - 1
-                new_index = old_index - 1
-
-                # subtitute gids in gid_list
-                gid_list[old_index], gid_list[new_index] = gid_list[new_index], gid_list[old_index]
+        # find gid of selected rows
+        gid_list = []
+        for row in self.userSelectedRows():
+            gid_list.append(self.download_table.item(row, 8).text())
 
-                # subtitute items in download_table
-                old_row_items_list = []
-                new_row_items_list = []
+        if len(gid_list) == 0:
+            return
 
-                # read current items in download_table
-                for i in range(13):
-                    old_row_items_list.append(
-                        self.download_table.item(old_row, i).text())
+        # change positions in data base.
+        # only positions of moved items(and their neighbors) are changed.
+        # see data_base.py
+        if direction == 'drop':
+            # items dropped under the last row that is read from data base.
+            # read next page and drop items before the first item of it.
+            if target_row == -1 and self.download_table_model.canFetchMore():
+                target_row = self.download_table.rowCount()
+                self.download_table_model.fetchMore()
+
+            target_item = self.download_table.item(target_row, 8)
+            if target_item:
+                self.persepolis_db.moveCategoryItemsBefore(current_category_tree_text, gid_list, target_item.text())
+            else:
+                self.persepolis_db.moveCategoryItems(current_category_tree_text, gid_list, 'bottom')
+        else:
+            self.persepolis_db.moveCategoryItems(current_category_tree_text, gid_list, direction)
 
-                    new_row_items_list.append(
-                        self.download_table.item(new_row, i).text())
+        # update download_table and highlight moved items
+        self.reloadDownloadTable(gid_list)
 
-                # subtituting
-                for i in range(13):
-                    # old row
-                    item = QTableWidgetItem(new_row_items_list[i])
+# this method reads items of selected category from data base again.
+# number of read rows and scroll position of download_table are not changed.
+# items in selected_gid_list are highlighted.
+    def reloadDownloadTable(self, selected_gid_list=[]):
+        row_count = self.download_table.rowCount()
+        scroll_value = self.download_table.verticalScrollBar().value()
 
-                    self.download_table.setItem(old_row, i, item)
+        current_category_tree_text = str(current_category_tree_index.data())
+        self.download_table_model.setFetchFunction(partial(self.persepolis_db.returnCategoryItemsPage, current_category_tree_text))
 
-                    # new_row
-                    item = QTableWidgetItem(old_row_items_list[i])
+        while self.download_table.rowCount() < row_count and self.download_table_model.canFetchMore():
+            self.download_table_model.fetchMore()
 
-                    self.download_table.setItem(new_row, i, item)
+        self.download_table.verticalScrollBar().setValue(scroll_value)
 
         # remove highlight from old rows
         self.download_table.clearSelection()
@@ -4536,18 +4248,16 @@ class MainWindow(MainWindow_Ui):
         # doc.qt.io/qt-5/qabstractitemview.html
         self.download_table.setSelectionMode(QAbstractItemView.MultiSelection)
 
-        # Highlight newer rows
-        for row in new_rows_list:
-            self.download_table.selectRow(row)
+        # Highlight moved rows
+        for gid in selected_gid_list:
+            row = self.download_table_model.rowOfGid(gid)
+            if row != None:
+                self.download_table.selectRow(row)
 
         # change selection mode to the normal situation 
         self.download_table.setSelectionMode(QAbstractItemView.ExtendedSelection)
 
 
-        # update data base
-        self.persepolis_db.updateCategoryTable([category_dict])
-
-
 
 # see browser_plugin_queue.py file
     def queueSpiderCallBack(self, filename, child, row_number):
@@ -4578,50 +4288,25 @@ class MainWindow(MainWindow_Ui):
 
     def spiderUpdate(self, dict):
         gid = dict['gid']
-        row = None
-        for i in range(self.download_table.rowCount()):
-            row_gid = self.download_table.item(i, 8).text()
-            if gid == row_gid:
-                row = i
-                break
+        row = self.download_table_model.rowOfGid(gid)
 
         # updat download_table items
         if row != None:
             update_list = [dict['file_name'], dict['status'], dict['size'], dict['downloaded_size'], dict['percent'],
                             dict['connections'], dict['rate'], dict['estimate_time_left'], dict['gid'], None, None, None, None]
-            for i in range(12):
-
-                # update download_table cell if update_list item in not None
-                if update_list[i]:
-                    text = update_list[i]
-                else:
-                    text = self.download_table.item(row, i).text()
-
-                # create a QTableWidgetItem
-                item = QTableWidgetItem(text)
-
-                # set item
-                try:
-                    self.download_table.setItem(row, i, item)
-                except Exception as problem:
-                    logger.sendToLog(
-                        "Error occured while updating download table", "INFO")
-                    logger.sendToLog(problem, "ERROR")
+            try:
+                self.download_table_model.updateRow(row, update_list)
+            except Exception as problem:
+                logger.sendToLog(
+                    "Error occured while updating download table", "INFO")
+                logger.sendToLog(problem, "ERROR")
 
 
 # this method deletes all items in data base
     def clearDownloadList(self, item):
-        # if checking_flag is equal to 1, it means that user pressed remove or
-        # delete button or ... . so checking download information must be
-        # stopped until job is done!
-        if checking_flag != 2:
-            wait_check = WaitThread()
-            self.threadPool.append(wait_check)
-            self.threadPool[len(self.threadPool) - 1].start()
-            self.threadPool[len(self.threadPool) -
-                            1].QTABLEREADY.connect(self.clearDownloadList2)
-        else:
-            self.clearDownloadList2()
+        # CheckDownloadInfoThread must be paused until job is done!
+        # see CheckingGate class
+        checking_gate.runPaused(self.clearDownloadList2)
 
 
     def clearDownloadList(self):
@@ -4650,12 +4335,20 @@ class MainWindow(MainWindow_Ui):
         self.download_table.setRowCount(0)
 
 
-        # tell the CheckDownloadInfoThread that job is done!
-        global checking_flag
-        checking_flag = 0
 
 
     def showVideoFinderAddLinkWindow(self,input_dict=None, menu=None):
+        # importing youtube_dl takes a long time, so video_finder_addlink
+        # is imported when user needs it for the first time.
+        try:
+            from persepolis.scripts.video_finder_addlink import VideoFinderAddLink
+            youtube_dl_is_installed = True
+        except ModuleNotFoundError:
+            # if youtube_dl madule is not installed:
+            logger.sendToLog(
+                        "youtube_dl is not installed.", "ERROR")
+            youtube_dl_is_installed = False
+
         # first check youtube_dl_is_installed value!
         # if youtube_dl is not installed show an error message.
         if youtube_dl_is_installed:
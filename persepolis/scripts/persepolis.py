@@ -28,8 +28,25 @@ if os_type == 'Linux' or os_type == 'FreeBSD'  or os_type == 'OpenBSD' or os_typ
         print('Do not run persepolis as root.')
         sys.exit(1)
 
+# persepolis --enqueue URL1 URL2 ... (or links in standard input)
+# sends links to running instance of persepolis in one batch, without importing PyQt5.
+# if persepolis is not running, links are added in normal way(see plugin_list).
+# see enqueue.py for more information.
+enqueue_list = []
+if '--enqueue' in sys.argv[1:]:
+    from persepolis.scripts.enqueue import returnEnqueueList, enqueue
+
+    enqueue_list = returnEnqueueList(sys.argv[1:])
+    if not(enqueue_list):
+        print('No link is given!')
+        sys.exit(1)
+
+    if enqueue(enqueue_list):
+        sys.exit(0)
+
 
 from persepolis.scripts import osCommands
+from persepolis.scripts.ipc import sendToRunningInstance
 import argparse
 import struct
 import json
@@ -185,6 +202,7 @@ parser.add_argument('--name', action='store', nargs = 1, help='The  file  name
 parser.add_argument('--default', action='store_true', help='restore default setting')
 parser.add_argument('--clear', action='store_true', help='Clear download list and user setting!')
 parser.add_argument('--tray', action='store_true', help="Persepolis is starting in tray icon. It's useful when you want to put persepolis in system's startup.")
+parser.add_argument('--enqueue', action='store', nargs = '*', help='Send download links to running Persepolis in one batch. If no link is given, links are read from standard input(one link in every line).')
 parser.add_argument('--parent-window', action='store', nargs = 1, help='this switch is used for chrome native messaging in Windows')
 parser.add_argument('--version', action='version', version='Persepolis Download Manager 3.1.0')
 
@@ -333,7 +351,8 @@ else:
 # when browsers plugin calls persepolis or user runs persepolis by terminal arguments,
 # then persepolis creats a request file in persepolis_tmp folder and link information added to
 # plugins_db.db file(see data_base.py for more information).
-# persepolis mainwindow checks persepolis_tmp for plugins request file every 2 seconds (see CheckingThread class in mainwindow.py)
+# persepolis mainwindow checks persepolis_tmp for plugins request file(see CheckingThread class in mainwindow.py)
+# if another instance of persepolis is running, links are sent to it by local socket directly.
 # when requset received in CheckingThread, a popup window (AddLinkWindow) comes up and window gets additional download information
 # from user (port , proxy , ...) and download starts and request file deleted
 
@@ -348,7 +367,16 @@ if ('link' in add_link_dictionary.keys()):
 
     plugin_list.append(plugin_dict)
 
-if len(plugin_list) != 0:
+# if another instance of persepolis is running, links are sent to it by local socket.
+# see ipc.py and PersepolisLocalServer in mainwindow.py for more information.
+links_sent = False
+# add links of --enqueue
+plugin_list.extend(enqueue_list)
+
+if len(plugin_list) != 0 and not(lock_file_validation):
+    links_sent = sendToRunningInstance({'command': 'add-links', 'links': plugin_list})
+
+if len(plugin_list) != 0 and not(links_sent):
     # import PluginsDB
     from persepolis.scripts.data_base import PluginsDB
     
@@ -365,6 +393,11 @@ if len(plugin_list) != 0:
     plugin_ready = os.path.join(persepolis_tmp, 'persepolis-plugin-ready')
     osCommands.touch(plugin_ready)
 
+    # running instance may start its local server after our first try.
+    # so notify it again.
+    if not(lock_file_validation):
+        sendToRunningInstance({'command': 'check-plugins'})
+
     # start persepolis in system tray
     start_in_tray = True 
 
@@ -453,9 +486,12 @@ def main():
     # (see CheckingThread in mainwindow.py for more information)
         if len(plugin_list) == 0:
 
-            show_window_file = os.path.join(persepolis_tmp, 'show-window')
-            f = open(show_window_file, 'w')
-            f.close()
+            # send request to running instance by local socket.
+            # if local socket is not available, use show_window_file.
+            if not(sendToRunningInstance({'command': 'show-window'})):
+                show_window_file = os.path.join(persepolis_tmp, 'show-window')
+                f = open(show_window_file, 'w')
+                f.close()
 
         sys.exit(0)
 
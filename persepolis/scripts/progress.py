@@ -168,7 +168,8 @@ class ProgressWindow(ProgressWindow_Ui):
             # check download status is "scheduled" or not!
             if self.status != 'scheduled':
                 # tell aria2 for unlimiting speed
-                download.limitSpeed(self.gid, "0")
+                # bandwidth_manager keeps speed limitation of queue and global speed limit.
+                self.parent.bandwidth_manager.setDownloadLimit(self.gid, "0")
             else:
                 # update limit value in data_base
                 add_link_dictionary = {'gid': self.gid, 'limit_value': '0'}
@@ -248,7 +249,7 @@ class ProgressWindow(ProgressWindow_Ui):
 # else save the request in data_base
 
         if self.status != 'scheduled':
-            download.limitSpeed(self.gid, limit_value)
+            self.parent.bandwidth_manager.setDownloadLimit(self.gid, limit_value)
         else:
             # update limit value in data_base
             add_link_dictionary = {'gid': self.gid, 'limit_value': limit_value}
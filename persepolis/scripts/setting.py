@@ -51,6 +51,18 @@ class PreferencesWindow(Setting_Ui):
         self.rpc_port_spinbox.setValue(
             int(self.persepolis_setting.value('rpc-port')))
 
+        # rpc_protocol
+        self.rpc_protocol_comboBox.addItems(['XML-RPC', 'JSON-RPC'])
+        current_rpc_protocol_index = self.rpc_protocol_comboBox.findText(
+            str(self.persepolis_setting.value('rpc-protocol')))
+        self.rpc_protocol_comboBox.setCurrentIndex(current_rpc_protocol_index)
+
+        # rpc_notifications
+        if str(self.persepolis_setting.value('rpc-notifications')) == 'yes':
+            self.rpc_notifications_checkBox.setChecked(True)
+        else:
+            self.rpc_notifications_checkBox.setChecked(False)
+
 # add support for other languages
         locale = str(self.persepolis_setting.value('settings/locale'))
         QLocale.setDefault(QLocale(locale))
@@ -63,6 +75,16 @@ class PreferencesWindow(Setting_Ui):
         q_time = QTime(int(wait_queue_list[0]), int(wait_queue_list[1]))
         self.wait_queue_time.setTime(q_time)
 
+# max_parallel_downloads
+        self.max_parallel_spinBox.setValue(
+            int(self.persepolis_setting.value('max-parallel-downloads')))
+
+# global_speed_limit and speed_profiles
+        self.global_limit_spinBox.setValue(
+            int(self.persepolis_setting.value('global-speed-limit', 0)))
+        self.speed_profiles_lineEdit.setText(
+            str(self.persepolis_setting.value('speed-profiles', '')))
+
 # change aria2 path
         self.aria2_path_pushButton.clicked.connect(self.changeAria2Path)
         self.aria2_path_checkBox.toggled.connect(self.ariaCheckBoxToggled)
@@ -498,6 +520,15 @@ class PreferencesWindow(Setting_Ui):
         self.connections_spinBox.setValue(
             int(self.setting_dict['connections']))
         self.rpc_port_spinbox.setValue(int(self.setting_dict['rpc-port']))
+        current_rpc_protocol_index = self.rpc_protocol_comboBox.findText(
+            str(self.setting_dict['rpc-protocol']))
+        self.rpc_protocol_comboBox.setCurrentIndex(current_rpc_protocol_index)
+
+        if self.setting_dict['rpc-notifications'] == 'yes':
+            self.rpc_notifications_checkBox.setChecked(True)
+        else:
+            self.rpc_notifications_checkBox.setChecked(False)
+
         self.aria2_path_lineEdit.setText('')
         self.aria2_path_checkBox.setChecked(False)
 
@@ -506,6 +537,16 @@ class PreferencesWindow(Setting_Ui):
         q_time = QTime(wait_queue_list[0], wait_queue_list[1])
         self.wait_queue_time.setTime(q_time)
 
+# max-parallel-downloads
+        self.max_parallel_spinBox.setValue(
+            int(self.setting_dict['max-parallel-downloads']))
+
+# global-speed-limit and speed-profiles
+        self.global_limit_spinBox.setValue(
+            int(self.setting_dict['global-speed-limit']))
+        self.speed_profiles_lineEdit.setText(
+            str(self.setting_dict['speed-profiles']))
+
 # save_as_tab
         self.download_folder_lineEdit.setText(
             str(self.setting_dict['download_path']))
@@ -617,6 +658,13 @@ class PreferencesWindow(Setting_Ui):
             'connections', self.connections_spinBox.value())
         self.persepolis_setting.setValue(
             'rpc-port', self.rpc_port_spinbox.value())
+        self.persepolis_setting.setValue(
+            'rpc-protocol', self.rpc_protocol_comboBox.currentText())
+
+        if self.rpc_notifications_checkBox.isChecked():
+            self.persepolis_setting.setValue('rpc-notifications', 'yes')
+        else:
+            self.persepolis_setting.setValue('rpc-notifications', 'no')
         self.persepolis_setting.setValue(
             'download_path', self.download_folder_lineEdit.text())
         self.persepolis_setting.setValue(
@@ -627,6 +675,20 @@ class PreferencesWindow(Setting_Ui):
             'notification', self.notification_comboBox.currentText())
         self.persepolis_setting.setValue(
             'wait-queue', self.wait_queue_time.text().split(':'))
+        self.persepolis_setting.setValue(
+            'max-parallel-downloads', self.max_parallel_spinBox.value())
+
+        # apply new value to queues
+        self.parent.queue_slots.setMaximum(self.max_parallel_spinBox.value())
+
+        self.persepolis_setting.setValue(
+            'global-speed-limit', self.global_limit_spinBox.value())
+        self.persepolis_setting.setValue(
+            'speed-profiles', self.speed_profiles_lineEdit.text())
+
+        # apply new speed limits to downloads
+        self.parent.bandwidth_manager.setGlobalLimit(
+            self.global_limit_spinBox.value(), self.speed_profiles_lineEdit.text())
 
 # change aria2_path
         if self.aria2_path_checkBox.isChecked():
@@ -943,7 +1005,7 @@ class PreferencesWindow(Setting_Ui):
         show_message_box = False
         for key in self.first_key_value_dict.keys():
             if self.first_key_value_dict[key] != self.second_key_value_dict[key]:
-                if key in ['locale', 'aria2_path', 'download_path_temp', 'download_path', 'custom-font', 'rpc-port', 'max-tries', 'retry-wait', 'timeout', 'connections', 'style', 'font', 'font-size', 'color-scheme']:
+                if key in ['locale', 'aria2_path', 'download_path_temp', 'download_path', 'custom-font', 'rpc-port', 'rpc-protocol', 'rpc-notifications', 'max-tries', 'retry-wait', 'timeout', 'connections', 'style', 'font', 'font-size', 'color-scheme']:
                     show_message_box = True
 
         # if any thing changed that needs restarting, then notify user about "Some changes take effect after restarting persepolis"
@@ -14,18 +14,20 @@
 #    along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from persepolis.scripts.useful_tools import humanReadbleSize
-from requests.cookies import cookiejar_from_dict
 from http.cookies import SimpleCookie
-from requests import Session
-import requests
 
 
 # for more information about "requests" library , please see
 # http://docs.python-requests.org/en/master/
+# importing requests takes a long time, so it's imported when
+# spider is called for the first time(not in startup of Persepolis).
 
 
 # spider function finds name of file and file size from header
 def spider(add_link_dictionary):
+    import requests
+    from requests.cookies import cookiejar_from_dict
+
     # get user's download request from add_link_dictionary
     link = add_link_dictionary['link']
     ip = add_link_dictionary['ip']
@@ -77,7 +79,7 @@ def spider(add_link_dictionary):
         header = {}
 
     filename = None
-    filesize = None
+    file_size = None
     if 'Content-Disposition' in header.keys():  # checking if filename is available
         content_disposition = header['Content-Disposition']
         if content_disposition.find('filename') != -1:
@@ -108,6 +110,9 @@ def spider(add_link_dictionary):
 
 # this function finds and returns file name for links.
 def queueSpider(add_link_dictionary):
+    import requests
+    from requests.cookies import cookiejar_from_dict
+
     # get download information from add_link_dictionary
     for i in ['link', 'header', 'out', 'user_agent', 'load_cookies', 'referer']:
         if not (i in add_link_dictionary):
@@ -158,6 +163,9 @@ def queueSpider(add_link_dictionary):
 
 
 def addLinkSpider(add_link_dictionary):
+    import requests
+    from requests.cookies import cookiejar_from_dict
+
     # get user's download information from add_link_dictionary
     for i in ['link', 'header', 'out', 'user_agent', 'load_cookies', 'referer']:
         if not (i in add_link_dictionary):
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from persepolis.scripts import logger
+import threading
+import datetime
+import heapq
+import time
+
+# TimeScheduler owns all start_time and end_time deadlines of downloads.
+# deadlines are kept in a heap and one thread sleeps until the nearest deadline.
+# so scheduled downloads don't need a sleep loop for checking time.
+# see startTime and endTime in download.py
+
+# if system clock is changed or system is suspended, sleeping thread doesn't
+# notice it. so scheduler thread checks the clock at least every MAX_WAIT seconds.
+MAX_WAIT = 60
+
+
+# this function returns next time that clock shows hh_mm("HH:MM" format) in seconds since epoch.
+# if hh_mm is current minute, deadline is now.
+# if hh_mm has been passed today, deadline is tomorrow.
+def nextDeadline(hh_mm, now=None):
+    if now is None:
+        now = time.time()
+
+    hour, minute = hh_mm.split(':')
+    now_datetime = datetime.datetime.fromtimestamp(now)
+    deadline = now_datetime.replace(hour=int(hour), minute=int(minute), second=0, microsecond=0)
+
+    # deadline is passed! it's for tomorrow.
+    # adding one day to deadline instead of 24 hours keeps the wall clock time
+    # in daylight saving days.
+    if deadline + datetime.timedelta(minutes=1) <= now_datetime:
+        deadline = deadline + datetime.timedelta(days=1)
+
+    return deadline.timestamp()
+
+
+class TimeScheduler():
+    def __init__(self):
+        self.condition = threading.Condition()
+
+        # heap of [deadline, counter, key, function, cancel_function] lists.
+        # counter keeps order of deadlines with same time.
+        self.heap = []
+        self.counter = 0
+
+        # key is (gid, kind) tuple. kind is 'start' or 'end'.
+        # this dictionary helps to find and cancel entries in heap.
+        self.entry_dict = {}
+
+        self.thread = None
+
+    # this method runs function at deadline(seconds since epoch).
+    # function runs in a new thread, so slow functions don't delay other deadlines.
+    # cancel_function is called if deadline is canceled.
+    # every gid has only one deadline of every kind, so old deadline is replaced.
+    def addDeadline(self, gid, kind, deadline, function, cancel_function=None):
+        with self.condition:
+            self.removeEntry((gid, kind))
+
+            entry = [deadline, self.counter, (gid, kind), function, cancel_function]
+            self.counter = self.counter + 1
+
+            self.entry_dict[(gid, kind)] = entry
+            heapq.heappush(self.heap, entry)
+
+            # start scheduler thread for first time.
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, daemon=True)
+                self.thread.start()
+
+            # wake scheduler thread up, perhaps new deadline is nearer.
+            self.condition.notify_all()
+
+    # cancel deadlines of gid.
+    # if kind is None, all deadlines of gid are canceled.
+    def cancel(self, gid, kind=None):
+        if kind is None:
+            kind_list = ['start', 'end']
+        else:
+            kind_list = [kind]
+
+        with self.condition:
+            for kind in kind_list:
+                self.removeEntry((gid, kind))
+
+    # canceled entries remain in heap, but their function is None.
+    # scheduler thread drops them when their time arrives.
+    def removeEntry(self, key):
+        entry = self.entry_dict.pop(key, None)
+        if entry:
+            entry[3] = None
+            if entry[4]:
+                entry[4]()
+
+    # this method blocks calling thread until deadline.
+    # it returns True if deadline is arrived and False if it's canceled.
+    def waitForDeadline(self, gid, kind, deadline):
+        event = threading.Event()
+        answer_list = []
+
+        def deadlineArrived():
+            answer_list.append(True)
+            event.set()
+
+        self.addDeadline(gid, kind, deadline, deadlineArrived, event.set)
+
+        event.wait()
+        return bool(answer_list)
+
+    def run(self):
+        while True:
+            due_list = []
+            with self.condition:
+                now = time.time()
+
+                # remove due deadlines from heap.
+                # if system was suspended, missed deadlines are run now.
+                while self.heap and self.heap[0][0] <= now:
+                    entry = heapq.heappop(self.heap)
+                    if entry[3] is not None:
+                        del self.entry_dict[entry[2]]
+                        due_list.append(entry)
+
+                if not(due_list):
+                    if self.heap:
+                        wait_time = min(self.heap[0][0] - now, MAX_WAIT)
+                    else:
+                        wait_time = None
+
+                    self.condition.wait(wait_time)
+                    continue
+
+            # run functions outside of lock
+            for entry in due_list:
+                gid, kind = entry[2]
+                logger.sendToLog(kind + " time is arrived for " + str(gid), "INFO")
+                function_thread = threading.Thread(target=entry[3], daemon=True)
+                function_thread.start()
+
+
+time_scheduler = TimeScheduler()
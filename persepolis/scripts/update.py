@@ -19,7 +19,6 @@ from persepolis.scripts import osCommands
 from PyQt5 import QtWidgets, QtCore
 from PyQt5.QtGui import QIcon
 import platform
-import requests
 import platform
 import ast
 
@@ -101,6 +100,9 @@ class checkupdate(QWidget):
         self.check_button.setText(QCoreApplication.translate("update_src_ui_tr", 'Checking...'))
 
         try:
+            # requests is imported here for faster startup of Persepolis.
+            import requests
+
             # get information dictionary from github
             updatesource = requests.get('https://persepolisdm.github.io/version')
 
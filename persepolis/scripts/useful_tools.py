@@ -13,7 +13,6 @@
 #    You should have received a copy of the GNU General Public License
 #    along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from PyQt5.QtWidgets import QStyleFactory
 import os
 import platform
 
@@ -70,6 +69,35 @@ def humanReadbleSize(size):
 
     p = 2 if i > 1 else None
     return str(round(size, p)) +' '+ labels[i]
+
+# this function converts download speed(Byte per second) to KiB/s or MiB/s or GiB/s
+def humanReadbleRate(speed):
+    if not(speed):
+        return '0'
+
+    return humanReadbleSize(speed) + '/s'
+
+# this function converts estimate time left(seconds) to hours, minutes and seconds.
+# for example 3725 >> 1h2m5s
+def humanReadbleTime(seconds):
+    seconds = int(seconds)
+
+    if seconds >= 3600:
+        return str(int(seconds / 3600)) + 'h' + str(int((seconds % 3600) / 60)) + 'm' + str(seconds % 60) + 's'
+    elif seconds >= 60:
+        return str(int(seconds / 60)) + 'm' + str(seconds % 60) + 's'
+    else:
+        return str(seconds) + 's'
+
+# this function converts output of humanReadbleSize to the Byte.
+# it returns None if size_str is not in humanReadbleSize format.
+def convertToByte(size_str):
+    units_dict = {'B': 1, 'KiB': 1024, 'MiB': 1048576, 'GiB': 1073741824, 'TiB': 1099511627776}
+    try:
+        size_value, unit = str(size_str).split(' ')
+        return int(float(size_value) * units_dict[unit])
+    except:
+        return None
    
 # this function checks free space in hard disk.
 def freeSpace(dir):
@@ -108,6 +136,9 @@ def returnDefaultSettings():
 
 
     # find available styles(It's depends on operating system and desktop environments).
+    # QStyleFactory is imported here, so modules that don't need Qt(like ipc.py) can
+    # import useful_tools without importing PyQt5.
+    from PyQt5.QtWidgets import QStyleFactory
     available_styles = QStyleFactory.keys()
     style = 'Fusion'
     color_scheme = 'Persepolis Light Blue'
@@ -183,10 +214,10 @@ def returnDefaultSettings():
 
 
     # Persepolis default setting
-    default_setting_dict = {'locale': 'en_US', 'toolbar_icon_size': 32, 'wait-queue': [0, 0], 'awake': 'no', 'custom-font': 'no', 'column0': 'yes',
+    default_setting_dict = {'locale': 'en_US', 'toolbar_icon_size': 32, 'wait-queue': [0, 0], 'max-parallel-downloads': 5, 'global-speed-limit': 0, 'speed-profiles': '', 'awake': 'no', 'custom-font': 'no', 'column0': 'yes',
                         'column1': 'yes', 'column2': 'yes', 'column3': 'yes', 'column4': 'yes', 'column5': 'yes', 'column6': 'yes', 'column7': 'yes',
                         'column10': 'yes', 'column11': 'yes', 'column12': 'yes', 'subfolder': 'yes', 'startup': 'no', 'show-progress': 'yes',
-                        'show-menubar': 'no', 'show-sidepanel': 'yes', 'rpc-port': 6801, 'notification': 'Native notification', 'after-dialog': 'yes',
+                        'show-menubar': 'no', 'show-sidepanel': 'yes', 'rpc-port': 6801, 'rpc-protocol': 'JSON-RPC', 'rpc-notifications': 'yes', 'notification': 'Native notification', 'after-dialog': 'yes',
                         'tray-icon': 'yes', 'max-tries': 5, 'retry-wait': 0, 'timeout': 60, 'connections': 16, 'download_path_temp': download_path_temp,
                         'download_path': download_path, 'sound': 'yes', 'sound-volume': 100, 'style': style, 'color-scheme': color_scheme,
                         'icons': icons, 'font': 'Ubuntu', 'font-size': 9, 'aria2_path': '', 'video_finder/enable': 'yes', 'video_finder/hide_no_audio': 'yes',
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# this script measures speed of persepolis.db(see persepolis/scripts/data_base.py).
+# update: CheckDownloadInfoThread updates all active downloads in every tick.
+#         all downloads are updated by one updateDownloadTable call(one transaction),
+#         old versions of Persepolis called updateDownloadTable for every download.
+#
+# data bases are created in a temporary home folder.
+#
+# usage:
+#       python3 test/benchmark_data_base.py [number of ticks]
+
+import sys
+import time
+import shutil
+import tempfile
+
+# home folder is changed to a temporary folder before persepolis modules are imported.
+# see temporary_home.py
+import temporary_home
+
+from persepolis.scripts import data_base
+
+# number of active downloads in every tick
+DOWNLOADS_PER_TICK = 100
+
+
+# this function returns a list of dictionaries for insertInDownloadTable.
+def downloadList(number, category='Single Downloads'):
+    download_list = []
+    for i in range(number):
+        download_list.append({'file_name': 'file' + str(i), 'status': 'downloading', 'size': '1 GiB',
+                              'downloaded_size': '0', 'percent': '0%', 'connections': '16',
+                              'rate': '0', 'estimate_time_left': '0', 'gid': '%016x' % i,
+                              'link': 'http://example.com/' + str(i), 'first_try_date': '2024/03/10 , 10:00:00',
+                              'last_try_date': '2024/03/10 , 10:00:00', 'category': category})
+
+    return download_list
+
+
+# this function returns changes of downloads in a tick of CheckDownloadInfoThread.
+def tickList(tick):
+    update_list = []
+    for i in range(DOWNLOADS_PER_TICK):
+        update_list.append({'gid': '%016x' % i, 'status': 'downloading',
+                            'percent': str(tick % 100) + '%', 'connections': '16',
+                            'total_bytes': 1024 ** 3, 'completed_bytes': tick * 1024 ** 2,
+                            'speed_bps': 1024 ** 2, 'eta_seconds': 600})
+
+    return update_list
+
+
+# this function creates persepolis.db in a temporary folder.
+def createDataBase():
+    data_base.config_folder = tempfile.mkdtemp()
+
+    persepolis_db = data_base.PersepolisDB()
+    persepolis_db.createTables()
+
+    return persepolis_db
+
+
+def removeDataBase(persepolis_db):
+    persepolis_db.closeConnections()
+    shutil.rmtree(data_base.config_folder)
+
+
+def updateBenchmark(ticks):
+    persepolis_db = createDataBase()
+    try:
+        persepolis_db.insertInDownloadTable(downloadList(DOWNLOADS_PER_TICK))
+
+        print('update of %d downloads in every tick(%d ticks):' % (DOWNLOADS_PER_TICK, ticks))
+        print('    %-22s %12s %14s' % ('', 'ms per tick', 'updates/s'))
+
+        result_dict = {}
+        for name in ['one call per tick', 'one call per download']:
+            start = time.perf_counter()
+            for tick in range(ticks):
+                if name == 'one call per tick':
+                    persepolis_db.updateDownloadTable(tickList(tick))
+                else:
+                    for dict in tickList(tick):
+                        persepolis_db.updateDownloadTable([dict])
+
+            duration = time.perf_counter() - start
+            result_dict[name] = duration
+
+            print('    %-22s %12.2f %14.0f' % (name, 1000 * duration / ticks,
+                                              ticks * DOWNLOADS_PER_TICK / duration))
+
+        # last tick is saved.
+        dict = persepolis_db.searchGidInDownloadTable('%016x' % (DOWNLOADS_PER_TICK - 1))
+        assert dict['completed_bytes'] == (ticks - 1) * 1024 ** 2
+    finally:
+        removeDataBase(persepolis_db)
+
+    return result_dict
+
+
+def main():
+    if len(sys.argv) > 1:
+        ticks = int(sys.argv[1])
+    else:
+        ticks = 100
+
+    result_dict = updateBenchmark(ticks)
+
+    # one transaction for all downloads must not be slower than one transaction for every download.
+    if result_dict['one call per tick'] > result_dict['one call per download']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# this script measures time of converting download status that is received from aria2
+# (see fileInformation, convertDownloadInformation and processDownloadStatus in persepolis/scripts/download.py).
+# CheckDownloadInfoThread calls processDownloadStatus for every active download in every tick.
+# 1000 synthetic status dictionaries are used: single file downloads and
+# torrents with 10 files, active and paused.
+#
+# PyQt5 is needed. settings are created in a temporary home folder.
+#
+# usage:
+#       python3 test/benchmark_download_status.py [number of runs]
+
+import sys
+import time
+import statistics
+
+# home folder is changed to a temporary folder before persepolis modules are imported.
+# see temporary_home.py
+import temporary_home
+
+# initialization.py creates settings like the first start of Persepolis.
+import persepolis.scripts.initialization
+from persepolis.scripts import download
+
+# number of status dictionaries
+DOWNLOADS = 1000
+
+# number of files in torrents
+TORRENT_FILES = 10
+
+
+# this function returns status of a download like answer of aria2.tellStatus.
+# every fourth download is a torrent and every third download is paused.
+def downloadStatus(i):
+    download_dir = '/home/user/Downloads'
+
+    if i % 4 == 0:
+        path_list = [download_dir + '/torrent' + str(i) + '/file' + str(j) + '.mkv' for j in range(TORRENT_FILES)]
+    else:
+        path_list = [download_dir + '/file%20' + str(i) + '.iso']
+
+    files = []
+    for j, path in enumerate(path_list):
+        files.append({'index': str(j + 1), 'path': path, 'length': '104857600',
+                      'completedLength': str((i * 1048576) % 104857600), 'selected': 'true',
+                      'uris': [{'status': 'used', 'uri': 'http://example.com/file' + str(i)}]})
+
+    if i % 3 == 0:
+        status = 'paused'
+        download_speed = '0'
+    else:
+        status = 'active'
+        download_speed = str(1048576 + i)
+
+    return {'gid': '%016x' % i, 'status': status, 'connections': '16', 'errorCode': '0',
+            'downloadSpeed': download_speed, 'dir': download_dir,
+            'totalLength': str(104857600 * len(path_list)),
+            'completedLength': str(((i * 1048576) % 104857600) * len(path_list)), 'files': files}
+
+
+def main():
+    if len(sys.argv) > 1:
+        runs = int(sys.argv[1])
+    else:
+        runs = 20
+
+    status_list = [downloadStatus(i) for i in range(DOWNLOADS)]
+
+    # parent(main window) is used only for completed downloads.
+    case_list = [('fileInformation', lambda status: download.fileInformation(status)),
+                 ('convertDownloadInformation', lambda status: download.convertDownloadInformation(status)),
+                 ('processDownloadStatus', lambda status: download.processDownloadStatus(status['gid'], status, None))]
+
+    # check output
+    converted_info_dict = download.processDownloadStatus(status_list[1]['gid'], status_list[1], None)
+    assert converted_info_dict['status'] == 'downloading'
+    assert converted_info_dict['file_name'] == 'file 1.iso'
+    assert converted_info_dict['total_bytes'] == 104857600
+    assert download.fileInformation(status_list[0])['file_name'] == 'torrent0'
+
+    print('time of %d status dictionaries(median of %d runs):' % (DOWNLOADS, runs))
+    print('    %-28s %10s %16s' % ('function', 'ms', 'us per download'))
+
+    for name, function in case_list:
+        time_list = []
+        for run in range(runs):
+            start = time.perf_counter()
+            for status in status_list:
+                function(status)
+            time_list.append(time.perf_counter() - start)
+
+        median = statistics.median(time_list)
+        print('    %-28s %10.2f %16.2f' % (name, 1000 * median, 1000000 * median / DOWNLOADS))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# this script measures speed of download_table of main window
+# (see DownloadTableModel and DownloadTableWidget in persepolis/gui/mainwindow_ui.py)
+# with 1000 and 10000 rows:
+# insert: new downloads are inserted to top of table one by one(like callback of AddLinkWindow).
+# set rows: all rows are replaced(like changing category).
+# update: CheckDownloadInfoThread sends status of 100 active downloads in every tick.
+#         checkDownloadInfo finds row of every gid and updates changed cells.
+# table is shown and painted by Qt offscreen platform, so display is not needed.
+#
+# PyQt5 is needed. settings are created in a temporary home folder.
+#
+# usage:
+#       python3 test/benchmark_download_table.py [number of ticks]
+
+import sys
+import time
+
+# home folder is changed to a temporary folder before persepolis modules are imported.
+# see temporary_home.py
+import temporary_home
+
+# initialization.py creates settings like the first start of Persepolis.
+import persepolis.scripts.initialization
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QSettings
+from persepolis.gui.mainwindow_ui import DownloadTableWidget
+
+# number of rows in table
+ROWS_LIST = [1000, 10000]
+
+# number of active downloads in every tick
+DOWNLOADS_PER_TICK = 100
+
+# time of update must not depend on number of rows.
+# update of 10000 rows table must not be MAX_UPDATE_RATIO times slower than 1000 rows table.
+MAX_UPDATE_RATIO = 3
+
+
+# DownloadTableWidget reads ui_direction from persepolis_setting of main window.
+class FakeMainWindow():
+    def __init__(self):
+        self.persepolis_setting = QSettings('persepolis_download_manager', 'persepolis')
+
+
+def rowList(i):
+    return ['file' + str(i), 'stopped', '***', '***', '***', '***', '***', '***', '%016x' % i,
+            'http://example.com/' + str(i), '2024/03/10 , 10:00:00', '2024/03/10 , 10:00:00', 'Single Downloads']
+
+
+# this function returns update_list of checkDownloadInfo for a download.
+def updateList(i, tick):
+    return ['file' + str(i), 'downloading', 1024 ** 3, tick * 1024 ** 2, str(tick % 100) + '%',
+            '16', 1024 ** 2 + tick, 1000 - tick, '%016x' % i, None, None, None, None]
+
+
+# this function processes events of Qt and paints table.
+def paint(application, table):
+    application.processEvents()
+    table.viewport().repaint()
+
+
+def tableBenchmark(application, rows, ticks):
+    table = DownloadTableWidget(FakeMainWindow())
+    model = table.download_table_model
+    table.resize(1000, 600)
+    table.show()
+    paint(application, table)
+
+    result_dict = {}
+
+    # insert
+    start = time.perf_counter()
+    for i in range(rows):
+        model.insertRowList(0, rowList(i))
+    paint(application, table)
+    result_dict['insert'] = time.perf_counter() - start
+
+    # set rows
+    rows_list = [rowList(i) for i in range(rows)]
+    start = time.perf_counter()
+    model.setRows(rows_list)
+    paint(application, table)
+    result_dict['set rows'] = time.perf_counter() - start
+
+    # active downloads are in top of table and in the middle of table.
+    # first lookup builds index of gids and it's not counted.
+    active_list = list(range(DOWNLOADS_PER_TICK // 2)) + list(range(rows // 2, rows // 2 + DOWNLOADS_PER_TICK // 2))
+    model.rowOfGid('%016x' % 0)
+
+    start = time.perf_counter()
+    for tick in range(ticks):
+        for i in active_list:
+            row = model.rowOfGid('%016x' % i)
+            model.updateRow(row, updateList(i, tick))
+
+        paint(application, table)
+
+    result_dict['update'] = (time.perf_counter() - start) / ticks
+
+    # shown text
+    assert model.text(0, 6).endswith(' MiB/s')
+
+    table.close()
+    table.deleteLater()
+    application.processEvents()
+
+    return result_dict
+
+
+def main():
+    if len(sys.argv) > 1:
+        ticks = int(sys.argv[1])
+    else:
+        ticks = 50
+
+    application = QApplication(sys.argv)
+
+    print('download_table(%d ticks, %d active downloads in every tick):' % (ticks, DOWNLOADS_PER_TICK))
+    print('    %8s %12s %12s %18s' % ('rows', 'insert(ms)', 'set rows(ms)', 'update tick(ms)'))
+
+    update_list = []
+    for rows in ROWS_LIST:
+        result_dict = tableBenchmark(application, rows, ticks)
+        update_list.append(result_dict['update'])
+
+        print('    %8d %12.1f %12.1f %18.2f' % (rows, 1000 * result_dict['insert'],
+                                                1000 * result_dict['set rows'], 1000 * result_dict['update']))
+
+    if update_list[-1] > MAX_UPDATE_RATIO * update_list[0]:
+        print('update time depends on number of rows!')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# this script measures number of links that persepolis --enqueue sends to
+# running instance of Persepolis in a second(see enqueue.py and ipc.py).
+# PersepolisLocalServer of mainwindow.py receives requests in Qt event loop of
+# main thread, like running instance does. main window is not created and
+# received links are only counted.
+# links are sent in batches of different sizes. one link in every request is
+# like old versions of Persepolis that sent every link separately.
+#
+# PyQt5 is needed. settings and local socket are created in a temporary home folder.
+#
+# usage:
+#       python3 test/benchmark_enqueue.py [number of links]
+
+import sys
+import time
+import threading
+import traceback
+
+# home folder is changed to a temporary folder before persepolis modules are imported.
+# see temporary_home.py
+import temporary_home
+
+# initialization.py creates settings like the first start of Persepolis.
+import persepolis.scripts.initialization
+from persepolis.scripts import mainwindow
+from persepolis.scripts import enqueue
+
+from PyQt5.QtCore import QCoreApplication, QMetaObject, Qt
+
+# number of links in every request
+BATCH_SIZE_LIST = [1, 10, 100, 1000]
+
+
+# this function returns enqueue_list of number links like persepolis --enqueue.
+def enqueueList(number):
+    argv = ['--enqueue'] + ['http://example.com/file' + str(i) + '.iso' for i in range(number)]
+    argv = argv + ['--referer', 'http://example.com/', '--agent', 'Mozilla/5.0']
+    return enqueue.returnEnqueueList(argv)
+
+
+# this function sends all links with batch_size links in every request
+# and returns number of requests that running instance did not receive.
+def sendLinks(enqueue_list, batch_size):
+    failed = 0
+    for i in range(0, len(enqueue_list), batch_size):
+        if not(enqueue.enqueue(enqueue_list[i:i + batch_size])):
+            failed = failed + 1
+
+    return failed
+
+
+def main():
+    if len(sys.argv) > 1:
+        links = int(sys.argv[1])
+    else:
+        links = 1000
+
+    application = QCoreApplication(sys.argv)
+
+    local_server = mainwindow.PersepolisLocalServer()
+    if not(local_server.startListening()):
+        print('local server is not listening: ' + local_server.errorString())
+        sys.exit(1)
+
+    received_list = []
+    local_server.ADDLINKSSIGNAL.connect(received_list.extend)
+
+    enqueue_list = enqueueList(links)
+    result_dict = {}
+    error_list = []
+
+    # client runs in another thread, so Qt event loop of main thread
+    # can answer requests.
+    def client():
+        try:
+            for batch_size in BATCH_SIZE_LIST:
+                start = time.perf_counter()
+                failed = sendLinks(enqueue_list, batch_size)
+                result_dict[batch_size] = (time.perf_counter() - start, failed)
+        except:
+            error_list.append(traceback.format_exc())
+        finally:
+            QMetaObject.invokeMethod(application, 'quit', Qt.QueuedConnection)
+
+    client_thread = threading.Thread(target=client)
+    client_thread.start()
+    application.exec_()
+    client_thread.join()
+
+    local_server.close()
+
+    if error_list:
+        print(error_list[0])
+        sys.exit(1)
+
+    print('enqueueing %d links:' % links)
+    print('    %-16s %10s %12s %12s %8s' % ('links/request', 'requests', 'total(ms)', 'links/s', 'failed'))
+
+    for batch_size in BATCH_SIZE_LIST:
+        duration, failed = result_dict[batch_size]
+        requests = (links + batch_size - 1) // batch_size
+        print('    %-16d %10d %12.1f %12.0f %8d' % (batch_size, requests, 1000 * duration,
+                                                    links / duration, failed))
+
+    # all links are received with all keys.
+    assert len(received_list) == links * len(BATCH_SIZE_LIST)
+    assert received_list[-1]['link'] == enqueue_list[-1]['link']
+    assert received_list[-1]['referer'] == 'http://example.com/'
+
+    # one request for all links must not be slower than one request for every link.
+    if any(result_dict[batch_size][1] for batch_size in BATCH_SIZE_LIST) or \
+            result_dict[BATCH_SIZE_LIST[-1]][0] > result_dict[1][0]:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
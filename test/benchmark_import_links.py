@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# this script measures speed of importing many links
+# (see GidAllocator and queueCallback in persepolis/scripts/mainwindow.py).
+# gid: GidAllocator generates GIDs of all links together and checks uniqueness in a set,
+#      old versions of Persepolis read gid list of 'All Downloads' from data base for every GID.
+#      old method is very slow, so it's measured with OLD_GID_LINKS links.
+# insert: all links are written in data base by one insertInDownloadTable and
+#         one insertInAddLinkTable call, compared with one call for every link.
+#
+# PyQt5 is needed. data bases and settings are created in a temporary home folder.
+#
+# usage:
+#       python3 test/benchmark_import_links.py [number of links]
+
+import sys
+import time
+import random
+
+# home folder is changed to a temporary folder before persepolis modules are imported.
+# see temporary_home.py
+import temporary_home
+
+# initialization.py creates settings like the first start of Persepolis.
+import persepolis.scripts.initialization
+from persepolis.scripts import mainwindow
+
+from benchmark_data_base import downloadList, createDataBase, removeDataBase
+
+# number of downloads that are in data base before import
+OLD_DOWNLOADS = 10000
+
+# number of links that are used for old method of generating GIDs
+OLD_GID_LINKS = 200
+
+
+# this function returns a list of dictionaries for insertInAddLinkTable.
+def addLinkList(gid_list):
+    add_link_dictionary_list = []
+    for i, gid in enumerate(gid_list):
+        add_link_dictionary_list.append({'gid': gid, 'out': None, 'start_time': None, 'end_time': None,
+                                         'link': 'http://example.com/import/' + str(i), 'ip': None, 'port': None,
+                                         'proxy_user': None, 'proxy_passwd': None, 'download_user': None,
+                                         'download_passwd': None, 'connections': '16', 'limit_value': '0',
+                                         'download_path': None, 'referer': None, 'load_cookies': None,
+                                         'user_agent': None, 'header': None, 'after_download': 'no'})
+
+    return add_link_dictionary_list
+
+
+# this function returns a list of dictionaries for insertInDownloadTable like queueCallback.
+def importList(gid_list, category):
+    download_table_list = []
+    for i, gid in enumerate(gid_list):
+        download_table_list.append({'file_name': '***', 'status': 'stopped', 'size': '***',
+                                    'downloaded_size': '***', 'percent': '***', 'connections': '***',
+                                    'rate': '***', 'estimate_time_left': '***', 'gid': gid,
+                                    'link': 'http://example.com/import/' + str(i),
+                                    'first_try_date': '2024/03/10 , 10:00:00',
+                                    'last_try_date': '2024/03/10 , 10:00:00', 'category': category})
+
+    return download_table_list
+
+
+# old gidGenerator of mainwindow.py
+def oldGidGenerator(persepolis_db):
+    while True:
+        gid = hex(random.randint(1152921504606846976, 18446744073709551615))[2:18]
+
+        gid_list = persepolis_db.searchCategoryInCategoryTable('All Downloads')['gid_list']
+        if not(gid in gid_list):
+            return gid
+
+
+def gidBenchmark(links):
+    persepolis_db = createDataBase()
+    try:
+        persepolis_db.insertInDownloadTable(downloadList(OLD_DOWNLOADS))
+
+        start = time.perf_counter()
+        gid_allocator = mainwindow.GidAllocator(persepolis_db.returnAllGids())
+        gid_list = gid_allocator.allocate(links)
+        allocator_time = time.perf_counter() - start
+
+        assert len(set(gid_list)) == links
+
+        start = time.perf_counter()
+        for i in range(OLD_GID_LINKS):
+            oldGidGenerator(persepolis_db)
+        old_time = time.perf_counter() - start
+    finally:
+        removeDataBase(persepolis_db)
+
+    print('GIDs of %d links(%d downloads in data base):' % (links, OLD_DOWNLOADS))
+    print('    %-28s %12s %14s' % ('', 'total ms', 'us per link'))
+    print('    %-28s %12.2f %14.2f' % ('GidAllocator', 1000 * allocator_time,
+                                       1000000 * allocator_time / links))
+    print('    %-28s %12.2f %14.2f' % ('data base for every GID', 1000 * old_time * links / OLD_GID_LINKS,
+                                       1000000 * old_time / OLD_GID_LINKS))
+    print('    (old method is measured with %d links)' % OLD_GID_LINKS)
+
+    return allocator_time / links, old_time / OLD_GID_LINKS
+
+
+def insertBenchmark(links):
+    print('')
+    print('writing %d links in data base:' % links)
+    print('    %-28s %12s %14s' % ('', 'total ms', 'links/s'))
+
+    result_dict = {}
+    for name in ['one call for all links', 'one call for every link']:
+        persepolis_db = createDataBase()
+        try:
+            gid_list = mainwindow.GidAllocator([]).allocate(links)
+            download_table_list = importList(gid_list, 'Single Downloads')
+            add_link_dictionary_list = addLinkList(gid_list)
+
+            start = time.perf_counter()
+            if name == 'one call for all links':
+                persepolis_db.insertInDownloadTable(download_table_list)
+                persepolis_db.insertInAddLinkTable(add_link_dictionary_list)
+            else:
+                for dict, add_link_dictionary in zip(download_table_list, add_link_dictionary_list):
+                    persepolis_db.insertInDownloadTable([dict])
+                    persepolis_db.insertInAddLinkTable([add_link_dictionary])
+
+            duration = time.perf_counter() - start
+            result_dict[name] = duration
+
+            # all links are saved.
+            assert len(persepolis_db.returnCategoryGidList('All Downloads')) == links
+            assert persepolis_db.searchGidInAddLinkTable(gid_list[-1])['link'] == add_link_dictionary_list[-1]['link']
+        finally:
+            removeDataBase(persepolis_db)
+
+        print('    %-28s %12.2f %14.0f' % (name, 1000 * duration, links / duration))
+
+    return result_dict
+
+
+def main():
+    if len(sys.argv) > 1:
+        links = int(sys.argv[1])
+    else:
+        links = 10000
+
+    allocator_time, old_time = gidBenchmark(links)
+    result_dict = insertBenchmark(links)
+
+    # GidAllocator and one transaction for all links must not be slower than old methods.
+    if allocator_time > old_time or result_dict['one call for all links'] > result_dict['one call for every link']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# this script measures speed of removing selected items from a category with 10000 downloads
+# (see removeSelected2 and deleteSelected2 in persepolis/scripts/mainwindow.py).
+# data base: all items are deleted by one deleteItemsInDownloadTable call(one transaction),
+#            compared with one call for every item.
+# table: rows are removed by removeGids of DownloadTableModel(neighbor rows together),
+#        compared with removing rows one by one from bottom to top.
+# selected rows: first quarter of rows(neighbor rows) and every second row of the rest.
+#
+# PyQt5 is needed. data bases and settings are created in a temporary home folder.
+#
+# usage:
+#       python3 test/benchmark_remove_items.py [number of rows]
+
+import sys
+import time
+
+# home folder is changed to a temporary folder before persepolis modules are imported.
+# see temporary_home.py
+import temporary_home
+
+# initialization.py creates settings like the first start of Persepolis.
+import persepolis.scripts.initialization
+
+from PyQt5.QtWidgets import QApplication
+from persepolis.gui.mainwindow_ui import DownloadTableWidget
+
+from benchmark_data_base import downloadList, createDataBase, removeDataBase
+from benchmark_download_table import FakeMainWindow, rowList, paint
+
+
+# this function returns gids of selected rows.
+def selectedGids(rows):
+    block = rows // 4
+    row_list = list(range(block)) + list(range(block, rows, 2))
+    return ['%016x' % row for row in row_list]
+
+
+def dataBaseBenchmark(rows, gid_list):
+    result_dict = {}
+    for name in ['batched', 'one by one']:
+        persepolis_db = createDataBase()
+        try:
+            persepolis_db.insertInDownloadTable(downloadList(rows))
+
+            start = time.perf_counter()
+            if name == 'batched':
+                persepolis_db.deleteItemsInDownloadTable(gid_list)
+            else:
+                for gid in gid_list:
+                    persepolis_db.deleteItemsInDownloadTable([gid])
+
+            result_dict[name] = time.perf_counter() - start
+
+            # items are removed from categories too.
+            assert len(persepolis_db.returnCategoryGidList('All Downloads')) == rows - len(gid_list)
+            assert len(persepolis_db.returnCategoryGidList('Single Downloads')) == rows - len(gid_list)
+        finally:
+            removeDataBase(persepolis_db)
+
+    return result_dict
+
+
+def tableBenchmark(application, rows, gid_list):
+    result_dict = {}
+    for name in ['batched', 'one by one']:
+        table = DownloadTableWidget(FakeMainWindow())
+        model = table.download_table_model
+        table.resize(1000, 600)
+        table.show()
+        model.setRows([rowList(i) for i in range(rows)])
+        paint(application, table)
+
+        start = time.perf_counter()
+        if name == 'batched':
+            model.removeGids(gid_list)
+        else:
+            row_list = sorted([model.rowOfGid(gid) for gid in gid_list], reverse=True)
+            for row in row_list:
+                table.removeRow(row)
+
+        paint(application, table)
+        result_dict[name] = time.perf_counter() - start
+
+        assert model.rowCount() == rows - len(gid_list)
+        assert model.rowOfGid(gid_list[-1]) is None
+
+        table.close()
+        table.deleteLater()
+        application.processEvents()
+
+    return result_dict
+
+
+def main():
+    if len(sys.argv) > 1:
+        rows = int(sys.argv[1])
+    else:
+        rows = 10000
+
+    application = QApplication(sys.argv)
+
+    gid_list = selectedGids(rows)
+
+    result_list = [('data base', dataBaseBenchmark(rows, gid_list)),
+                   ('download_table', tableBenchmark(application, rows, gid_list))]
+
+    print('removing %d of %d items:' % (len(gid_list), rows))
+    print('    %-16s %14s %16s' % ('', 'batched(ms)', 'one by one(ms)'))
+
+    failed = False
+    for name, result_dict in result_list:
+        print('    %-16s %14.1f %16.1f' % (name, 1000 * result_dict['batched'], 1000 * result_dict['one by one']))
+
+        # batched removing must not be slower than removing one by one.
+        if result_dict['batched'] > result_dict['one by one']:
+            failed = True
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# this script measures RPC calls per second between Persepolis and aria2
+# (see ThreadLocalServerProxy, PersistentTransport and JsonRpcServerProxy in persepolis/scripts/download.py).
+# a local SimpleXMLRPCServer(XML-RPC) and a local JSON-RPC server answer
+# aria2.tellStatus like aria2. both servers keep HTTP/1.1 connections alive like aria2.
+# calls are sent:
+# 1. with a new connection for every call(connections are reset before every call).
+# 2. with persistent connection of ThreadLocalServerProxy in one thread.
+# 3. with persistent connections of ThreadLocalServerProxy in THREADS threads.
+#
+# PyQt5 is needed. settings are created in a temporary home folder.
+#
+# usage:
+#       python3 test/benchmark_rpc.py [number of calls]
+
+import sys
+import json
+import time
+import threading
+import socketserver
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from xmlrpc.server import SimpleXMLRPCServer, SimpleXMLRPCRequestHandler
+
+# home folder is changed to a temporary folder before persepolis modules are imported.
+# see temporary_home.py
+import temporary_home
+
+# initialization.py creates settings like the first start of Persepolis.
+import persepolis.scripts.initialization
+from persepolis.scripts import download
+
+# number of threads for third test
+THREADS = 4
+
+# keys that CheckDownloadInfoThread asks(see tellStatusList in download.py)
+STATUS_KEYS = ['status', 'connections', 'errorCode', 'errorMessage', 'downloadSpeed',
+               'dir', 'totalLength', 'completedLength', 'files']
+
+
+# this function returns status of a download like aria2.
+def tellStatus(gid, keys=None):
+    return {'gid': gid, 'status': 'active', 'connections': '16', 'downloadSpeed': '1048576',
+            'dir': '/tmp', 'totalLength': '1073741824', 'completedLength': '536870912',
+            'files': [{'index': '1', 'path': '/tmp/file.iso', 'length': '1073741824',
+                       'completedLength': '536870912', 'selected': 'true',
+                       'uris': [{'status': 'used', 'uri': 'http://example.com/file.iso'}]}]}
+
+
+def getVersion():
+    return {'version': '1.37.0', 'enabledFeatures': ['Async DNS', 'HTTPS', 'Metalink']}
+
+
+METHODS_DICT = {'aria2.tellStatus': tellStatus, 'aria2.getVersion': getVersion}
+
+
+# answers are sent without delay(TCP_NODELAY), like aria2.
+class XmlRpcHandler(SimpleXMLRPCRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    rpc_paths = ('/rpc',)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class XmlRpcServer(socketserver.ThreadingMixIn, SimpleXMLRPCServer):
+    daemon_threads = True
+
+
+class JsonRpcHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        result = METHODS_DICT[request['method']](*request['params'])
+        body = json.dumps({'jsonrpc': '2.0', 'id': request['id'], 'result': result}).encode('utf-8')
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class JsonRpcServer(socketserver.ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+# this function starts server in a thread and returns uri of server.
+def startServer(protocol):
+    if protocol == 'XML-RPC':
+        rpc_server = XmlRpcServer(('localhost', 0), requestHandler=XmlRpcHandler, logRequests=False, allow_none=True)
+        for name, function in METHODS_DICT.items():
+            rpc_server.register_function(function, name)
+
+        uri_format = download.SERVER_URI_FORMAT
+    else:
+        rpc_server = JsonRpcServer(('localhost', 0), JsonRpcHandler)
+        uri_format = download.JSON_SERVER_URI_FORMAT
+
+    threading.Thread(target=rpc_server.serve_forever, daemon=True).start()
+
+    return rpc_server, uri_format.format('localhost', rpc_server.server_address[1])
+
+
+# this function sends calls and returns calls per second.
+def sendCalls(server, calls, threads, new_connection):
+    error_list = []
+
+    def run():
+        try:
+            for i in range(calls):
+                if new_connection:
+                    server.resetConnections()
+
+                answer = server.aria2.tellStatus('2089b05ecca3d829', STATUS_KEYS)
+                assert answer['status'] == 'active'
+        except Exception as error:
+            error_list.append(error)
+
+    thread_list = [threading.Thread(target=run) for i in range(threads)]
+
+    start = time.perf_counter()
+    for thread in thread_list:
+        thread.start()
+
+    for thread in thread_list:
+        thread.join()
+
+    duration = time.perf_counter() - start
+
+    if error_list:
+        raise error_list[0]
+
+    return calls * threads / duration
+
+
+def main():
+    if len(sys.argv) > 1:
+        calls = int(sys.argv[1])
+    else:
+        calls = 2000
+
+    print('aria2.tellStatus calls per second(%d calls in every thread):' % calls)
+    print('    %-10s %16s %16s %16s' % ('protocol', 'new connection', 'persistent', str(THREADS) + ' threads'))
+
+    result_list = []
+    for protocol in ['XML-RPC', 'JSON-RPC']:
+        rpc_server, uri = startServer(protocol)
+
+        # ThreadLocalServerProxy chooses protocol from settings.
+        download.rpc_protocol = protocol
+        server = download.ThreadLocalServerProxy(uri)
+
+        # first call creates connection and it's not counted.
+        server.aria2.getVersion()
+
+        new_connection = sendCalls(server, calls, 1, True)
+        persistent = sendCalls(server, calls, 1, False)
+        parallel = sendCalls(server, calls, THREADS, False)
+
+        print('    %-10s %16.0f %16.0f %16.0f' % (protocol, new_connection, persistent, parallel))
+        result_list.append((new_connection, persistent))
+
+        server.resetConnections()
+        rpc_server.shutdown()
+        rpc_server.server_close()
+
+    # persistent connection must not be slower than new connection for every call.
+    for new_connection, persistent in result_list:
+        if persistent < new_connection:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# this script measures parse time of aria2 answer of tellActive with 100 active downloads.
+# JSON-RPC answer is parsed by json, orjson and ujson(if they are installed) and
+# XML-RPC answer is parsed by xmlrpc.client.
+# JsonRpcServerProxy of persepolis/scripts/download.py uses orjson or ujson if they are installed
+# (see jsonLoads in download.py). if PyQt5 is installed, jsonLoads of download.py is measured too.
+#
+# usage:
+#       python3 test/benchmark_rpc_parse.py [number of runs]
+
+import sys
+import json
+import time
+import statistics
+import xmlrpc.client
+
+# home folder is changed to a temporary folder before persepolis modules are imported.
+# see temporary_home.py
+import temporary_home
+
+# number of active downloads in answer of tellActive
+DOWNLOADS = 100
+
+
+# this function returns status of a download like aria2.
+def downloadStatus(i):
+    return {'gid': '%016x' % i, 'status': 'active', 'connections': '16', 'errorCode': '0',
+            'downloadSpeed': str(1048576 + i), 'dir': '/home/user/Downloads',
+            'totalLength': '1073741824', 'completedLength': str(536870912 + i),
+            'files': [{'index': '1', 'path': '/home/user/Downloads/file' + str(i) + '.iso',
+                       'length': '1073741824', 'completedLength': str(536870912 + i), 'selected': 'true',
+                       'uris': [{'status': 'used', 'uri': 'http://example.com/file' + str(i) + '.iso'},
+                                {'status': 'waiting', 'uri': 'http://example.com/file' + str(i) + '.iso'}]}]}
+
+
+# this function returns a dictionary of parse functions.
+# every function receives answer of aria2 in bytes and returns list of downloads.
+def parserDict():
+    parser_dict = {'json': lambda data: json.loads(data)['result']}
+
+    try:
+        import orjson
+        parser_dict['orjson'] = lambda data: orjson.loads(data)['result']
+    except ImportError:
+        pass
+
+    try:
+        import ujson
+        parser_dict['ujson'] = lambda data: ujson.loads(data)['result']
+    except ImportError:
+        pass
+
+    try:
+        # initialization.py creates settings like the first start of Persepolis.
+        import persepolis.scripts.initialization
+        from persepolis.scripts import download
+        parser_dict['download.jsonLoads'] = lambda data: download.jsonLoads(data)['result']
+    except ImportError:
+        pass
+
+    return parser_dict
+
+
+def main():
+    if len(sys.argv) > 1:
+        runs = int(sys.argv[1])
+    else:
+        runs = 500
+
+    status_list = [downloadStatus(i) for i in range(DOWNLOADS)]
+
+    json_data = json.dumps({'jsonrpc': '2.0', 'id': '1', 'result': status_list}).encode('utf-8')
+    xml_data = xmlrpc.client.dumps((status_list,), methodresponse=True).encode('utf-8')
+
+    case_list = [(name, parser, json_data) for name, parser in parserDict().items()]
+    case_list.append(('xmlrpc.client', lambda data: xmlrpc.client.loads(data)[0][0], xml_data))
+
+    print('parse time of tellActive answer with %d downloads(median of %d runs):' % (DOWNLOADS, runs))
+    print('    JSON answer: %d bytes, XML answer: %d bytes' % (len(json_data), len(xml_data)))
+    print('    %-20s %10s %14s' % ('parser', 'ms', 'answers/s'))
+
+    for name, parser, data in case_list:
+        # answer must be the same as status_list
+        assert parser(data) == status_list
+
+        time_list = []
+        for i in range(runs):
+            start = time.perf_counter()
+            parser(data)
+            time_list.append(time.perf_counter() - start)
+
+        median = statistics.median(time_list)
+        print('    %-20s %10.3f %14.0f' % (name, 1000 * median, 1 / median))
+
+
+if __name__ == '__main__':
+    main()
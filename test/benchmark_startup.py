@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# this script measures startup time of Persepolis:
+# 1. import time of initialization and mainwindow in a new python process.
+#    heavy modules(requests, youtube_dl, ...) must not be imported in startup.
+# 2. time that startAria waits for aria2 RPC server(see waitForAria2 in download.py).
+#    Persepolis waited 2 seconds before checking aria2 in old versions.
+#    if aria2c is not installed, a fake aria2 that starts after some delay is used.
+#
+# PyQt5 is needed. settings and config folder are created in a temporary
+# home folder, so settings of user are not changed.
+#
+# usage:
+#       python3 test/benchmark_startup.py [number of runs]
+
+import os
+import sys
+import json
+import time
+import shutil
+import socket
+import tempfile
+import subprocess
+import statistics
+
+package_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# these modules take a long time for importing, and they are imported
+# when user needs them.
+HEAVY_MODULES = ['requests', 'youtube_dl', 'psutil']
+
+# Persepolis waited OLD_ARIA2_WAIT seconds before checking aria2.
+OLD_ARIA2_WAIT = 2
+
+IMPORT_CODE = """
+import sys
+import json
+import time
+
+sys.path.insert(0, {package_folder!r})
+
+start = time.perf_counter()
+import persepolis.scripts.initialization
+initialization = time.perf_counter() - start
+
+start = time.perf_counter()
+import persepolis.scripts.mainwindow
+mainwindow = time.perf_counter() - start
+
+print(json.dumps({{'initialization': initialization,
+                  'mainwindow': mainwindow,
+                  'heavy': [module for module in {heavy_modules!r} if module in sys.modules]}}))
+"""
+
+
+def importBenchmark(runs):
+    code = IMPORT_CODE.format(package_folder=package_folder, heavy_modules=HEAVY_MODULES)
+
+    result_list = []
+    # first run creates settings and config folder and it's not counted.
+    for i in range(runs + 1):
+        output = subprocess.check_output([sys.executable, '-c', code])
+        result_list.append(json.loads(output.decode().strip().splitlines()[-1]))
+
+    result_list = result_list[1:]
+
+    print('import time(median of %d runs):' % runs)
+    for key in ['initialization', 'mainwindow']:
+        print('    %-16s %7.1f ms' % (key, 1000 * statistics.median([result[key] for result in result_list])))
+
+    heavy_list = sorted(set(module for result in result_list for module in result['heavy']))
+    if heavy_list:
+        print('    heavy modules in startup: ' + ', '.join(heavy_list))
+    else:
+        print('    heavy modules in startup: none')
+
+    return heavy_list
+
+
+# FakeAria2 doesn't answer until ready_time, like aria2 that is starting.
+class FakeAria2():
+    def __init__(self, delay):
+        self.ready_time = time.time() + delay
+
+    @property
+    def aria2(self):
+        return self
+
+    def getVersion(self):
+        if time.time() < self.ready_time:
+            raise ConnectionRefusedError()
+
+        return {'version': 'fake'}
+
+    def resetConnections(self):
+        pass
+
+
+def ariaBenchmark(runs):
+    from persepolis.scripts import download
+
+    if shutil.which('aria2c') and sys.platform.startswith('linux'):
+        print('time of startAria with aria2c(median of %d runs):' % runs)
+
+        time_list = []
+        for i in range(runs):
+            start = time.perf_counter()
+            answer = download.startAria()
+            time_list.append(time.perf_counter() - start)
+
+            download.shutDown()
+
+            # wait until aria2 releases the port.
+            time.sleep(1)
+
+        print('    %7.1f ms (old: more than %d ms), answer: %s'
+              % (1000 * statistics.median(time_list), 1000 * OLD_ARIA2_WAIT, answer))
+        return
+
+    print('aria2c is not found. fake aria2 with startup delay is used.')
+    print('    %-10s %12s %12s  %s' % ('delay', 'waitForAria2', 'old', 'answer'))
+
+    real_server = download.server
+    try:
+        for delay in [0, 0.02, 0.1, 0.3, 1, 1.9]:
+            time_list = []
+            for i in range(runs):
+                download.server = FakeAria2(delay)
+                start = time.perf_counter()
+                answer = download.waitForAria2()
+                time_list.append(time.perf_counter() - start)
+
+            print('    %7.0f ms %9.0f ms %9.0f ms  %s'
+                  % (1000 * delay, 1000 * statistics.median(time_list), 1000 * OLD_ARIA2_WAIT, answer))
+    finally:
+        download.server = real_server
+
+
+# this function returns a free TCP port for aria2.
+def freePort():
+    with socket.socket() as sock:
+        sock.bind(('localhost', 0))
+        return sock.getsockname()[1]
+
+
+def main():
+    if len(sys.argv) > 1:
+        runs = int(sys.argv[1])
+    else:
+        runs = 5
+
+    # use a temporary home folder for settings and data bases.
+    home_folder = tempfile.mkdtemp()
+    os.environ['HOME'] = home_folder
+    os.environ.pop('XDG_CONFIG_HOME', None)
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+    sys.path.insert(0, package_folder)
+
+    try:
+        heavy_list = importBenchmark(runs)
+
+        # use a free port, so aria2 of user is not shut down.
+        from PyQt5.QtCore import QSettings
+        persepolis_setting = QSettings('persepolis_download_manager', 'persepolis')
+        persepolis_setting.setValue('settings/rpc-port', freePort())
+        persepolis_setting.sync()
+
+        ariaBenchmark(runs)
+    finally:
+        shutil.rmtree(home_folder, ignore_errors=True)
+
+    if heavy_list:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
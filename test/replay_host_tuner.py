@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# this script replays download traces with host tuner(persepolis/scripts/host_tuner.py)
+# and with old fixed options(split 16), and compares download time and errors.
+# Qt and aria2 are not needed.
+#
+# usage:
+#       python3 test/replay_host_tuner.py [traces.json]
+#
+# traces.json is a list of hosts(see test/host_traces.json):
+# host: host name
+# per_connection_bps: speed of every connection(Byte per second)
+# host_bps: maximum speed of host
+# ban_connections: host refuses downloads with more connections than this value(0 means no limit)
+# sizes: size of files that were downloaded from host in order.
+
+import os
+import sys
+import json
+
+# home folder is changed to a temporary folder before persepolis modules are imported.
+# see temporary_home.py
+import temporary_home
+
+from persepolis.scripts.host_tuner import recordResult, tuneOptions
+
+# every connection needs some time for connecting and sending request.
+CONNECTION_SETUP_SECONDS = 0.1
+
+# failed downloads are tried again, like queue does.
+MAX_TRIES = 5
+
+# number of connections that user set in add link window.
+USER_CONNECTIONS = 16
+
+
+def oldOptions(host_stats, total_bytes, connections):
+    return {'split': '16',
+            'max-connection-per-server': str(connections),
+            'min-split-size': '1M'}
+
+
+# this function returns status and download time of one try.
+def simulate(trace, size, options):
+    connections = min(int(options['split']), int(options['max-connection-per-server']))
+
+    # aria2 doesn't split pieces smaller than 2 * min-split-size.
+    min_split_size = int(options['min-split-size'][:-1]) * 1024 * 1024
+    connections = max(min(connections, size // (2 * min_split_size)), 1)
+
+    if trace['ban_connections'] and connections > trace['ban_connections']:
+        return 'error', CONNECTION_SETUP_SECONDS * connections, connections
+
+    speed = min(connections * trace['per_connection_bps'], trace['host_bps'])
+    seconds = size / speed + CONNECTION_SETUP_SECONDS * connections
+    return 'complete', seconds, connections
+
+
+def replay(trace, options_function):
+    host_stats = None
+    total_seconds = 0
+    errors = 0
+    failed = 0
+
+    for size in trace['sizes']:
+        for i in range(MAX_TRIES):
+            options = options_function(host_stats, size, USER_CONNECTIONS)
+            status, seconds, connections = simulate(trace, size, options)
+
+            total_seconds = total_seconds + seconds
+            host_stats = recordResult(host_stats, trace['host'], status, size, size,
+                                      seconds, connections, 'replay')
+
+            if status == 'complete':
+                break
+
+            errors = errors + 1
+        else:
+            failed = failed + 1
+
+    return total_seconds, errors, failed
+
+
+def main():
+    if len(sys.argv) > 1:
+        traces_path = sys.argv[1]
+    else:
+        traces_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'host_traces.json')
+
+    with open(traces_path) as traces_file:
+        traces_list = json.load(traces_file)
+
+    print('%-22s %28s %28s' % ('host', 'old: seconds/errors/failed', 'tuner: seconds/errors/failed'))
+
+    old_total = [0, 0, 0]
+    tuner_total = [0, 0, 0]
+    for trace in traces_list:
+        old_answer = replay(trace, oldOptions)
+        tuner_answer = replay(trace, tuneOptions)
+
+        print('%-22s %16.1f/%d/%d %22.1f/%d/%d' % ((trace['host'],) + old_answer + tuner_answer))
+
+        for i in range(3):
+            old_total[i] = old_total[i] + old_answer[i]
+            tuner_total[i] = tuner_total[i] + tuner_answer[i]
+
+    # time of failed downloads is counted until they are failed for last time.
+    print('%-22s %16.1f/%d/%d %22.1f/%d/%d' % (('total',) + tuple(old_total) + tuple(tuner_total)))
+
+
+if __name__ == '__main__':
+    main()
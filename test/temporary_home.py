@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# tests and benchmarks import this module before persepolis modules.
+# logger.py opens log file in config folder when it's imported, and data bases and
+# Qt settings are saved in home folder of user.
+# so home folder is changed to a temporary folder that is removed at exit.
+# config folder is created like initialization.py does.
+
+import os
+import sys
+import atexit
+import shutil
+import platform
+import tempfile
+
+home_folder = tempfile.mkdtemp(prefix='persepolis_test_')
+
+os.environ['HOME'] = home_folder
+os.environ['USERPROFILE'] = home_folder
+os.environ.pop('XDG_CONFIG_HOME', None)
+
+# Qt doesn't need a display.
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+os_type = platform.system()
+if os_type == 'Darwin':
+    config_folder = os.path.join(home_folder, 'Library/Application Support/persepolis_download_manager')
+elif os_type == 'Windows':
+    config_folder = os.path.join(home_folder, 'AppData', 'Local', 'persepolis_download_manager')
+else:
+    config_folder = os.path.join(home_folder, '.config/persepolis_download_manager')
+
+os.makedirs(os.path.join(config_folder, 'persepolis_tmp'), exist_ok=True)
+
+atexit.register(shutil.rmtree, home_folder, True)
+
+# package folder
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# tests for persepolis/scripts/aria2_websocket.py
+# a fake aria2 WebSocket server sends notifications to listenToAria2.
+# usage:
+#       python3 test/test_aria2_websocket.py
+# or all tests:
+#       python3 -m unittest discover -s test -p "test_*.py"
+
+import os
+import sys
+import json
+import base64
+import socket
+import struct
+import hashlib
+import threading
+import traceback
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from persepolis.scripts.aria2_websocket import Aria2WebSocket, Aria2Notifications, listenToAria2,\
+    parseNotification, WEBSOCKET_GUID, OPCODE_TEXT, OPCODE_CONTINUATION, OPCODE_CLOSE, OPCODE_PING, OPCODE_PONG
+
+
+# this function returns an aria2 notification message.
+def notification(method, gid_list):
+    return json.dumps({'jsonrpc': '2.0', 'method': method,
+                       'params': [{'gid': gid} for gid in gid_list]})
+
+
+# FakeAria2Server accepts one WebSocket connection like aria2.
+# script is a function that receives server and talks to client.
+class FakeAria2Server():
+    def __init__(self, script, wrong_accept_key=False):
+        self.script = script
+        self.wrong_accept_key = wrong_accept_key
+        self.error_list = []
+
+        self.listen_sock = socket.socket()
+        self.listen_sock.bind(('localhost', 0))
+        self.listen_sock.listen(1)
+        self.port = self.listen_sock.getsockname()[1]
+
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        try:
+            self.sock, address = self.listen_sock.accept()
+            self.sock.settimeout(10)
+            self.buffer = b''
+            self.handshake()
+            self.script(self)
+        except:
+            self.error_list.append(traceback.format_exc())
+        finally:
+            self.listen_sock.close()
+
+    def recvExactly(self, length):
+        while len(self.buffer) < length:
+            data = self.sock.recv(4096)
+            if not(data):
+                raise ConnectionError('client closed connection')
+            self.buffer = self.buffer + data
+
+        data = self.buffer[:length]
+        self.buffer = self.buffer[length:]
+        return data
+
+    def handshake(self):
+        while b'\r\n\r\n' not in self.buffer:
+            self.buffer = self.buffer + self.sock.recv(4096)
+
+        header, self.buffer = self.buffer.split(b'\r\n\r\n', 1)
+        header_lines = header.decode('latin-1').split('\r\n')
+        self.request_line = header_lines[0]
+
+        key = None
+        for line in header_lines[1:]:
+            name, _, value = line.partition(':')
+            if name.strip().lower() == 'sec-websocket-key':
+                key = value.strip()
+
+        if self.wrong_accept_key:
+            key = 'wrong'
+
+        accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode('ascii')).digest()).decode('ascii')
+
+        self.sock.sendall(('HTTP/1.1 101 Switching Protocols\r\n'
+                           + 'Upgrade: websocket\r\n'
+                           + 'Connection: Upgrade\r\n'
+                           + 'Sec-WebSocket-Accept: ' + accept + '\r\n\r\n').encode('ascii'))
+
+    # server frames are not masked.
+    def sendFrame(self, payload, opcode=OPCODE_TEXT, fin=True):
+        if isinstance(payload, str):
+            payload = payload.encode('utf-8')
+
+        header = bytes([(0x80 if fin else 0) | opcode])
+        length = len(payload)
+        if length < 126:
+            header = header + bytes([length])
+        elif length < 65536:
+            header = header + bytes([126]) + struct.pack('!H', length)
+        else:
+            header = header + bytes([127]) + struct.pack('!Q', length)
+
+        self.sock.sendall(header + payload)
+
+    # client frames must be masked.
+    def recvFrame(self):
+        first_byte, second_byte = self.recvExactly(2)
+        if not(second_byte & 0x80):
+            raise ValueError('client frame is not masked')
+
+        length = second_byte & 0x7F
+        if length == 126:
+            length = struct.unpack('!H', self.recvExactly(2))[0]
+        elif length == 127:
+            length = struct.unpack('!Q', self.recvExactly(8))[0]
+
+        mask = self.recvExactly(4)
+        payload = bytes(b ^ mask[i % 4] for i, b in enumerate(self.recvExactly(length)))
+
+        return first_byte & 0x0F, payload
+
+    def close(self):
+        self.sendFrame(b'', OPCODE_CLOSE)
+        self.sock.close()
+
+
+class TestParseNotification(unittest.TestCase):
+    def test_download_notification(self):
+        self.assertEqual(parseNotification(notification('aria2.onDownloadComplete', ['a', 'b'])), ['a', 'b'])
+
+    def test_other_messages(self):
+        # answer of a JSON-RPC call
+        self.assertEqual(parseNotification(json.dumps({'jsonrpc': '2.0', 'id': 1, 'result': 'OK'})), None)
+        self.assertEqual(parseNotification(notification('aria2.unknown', ['a'])), None)
+        self.assertEqual(parseNotification('not json'), None)
+        self.assertEqual(parseNotification('[1, 2]'), None)
+
+
+class TestListenToAria2(unittest.TestCase):
+    # this method runs listenToAria2 in a thread and returns notifications and exception of listener.
+    def listen(self, server):
+        notifications = Aria2Notifications()
+        connected_list = []
+        error_list = []
+
+        real_set_connected = notifications.setConnected
+
+        def setConnected(connected):
+            connected_list.append(connected)
+            real_set_connected(connected)
+
+        notifications.setConnected = setConnected
+
+        def run():
+            try:
+                listenToAria2('localhost', server.port, notifications)
+            except Exception as error:
+                error_list.append(error)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+
+        server.thread.join(10)
+        thread.join(10)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(server.error_list, [])
+
+        return notifications, connected_list, error_list
+
+    def test_round_trip(self):
+        big_gid_list = ['%016x' % i for i in range(10)]
+        huge_gid_list = ['%016x' % i for i in range(3000)]
+
+        def script(server):
+            self.assertTrue(server.request_line.startswith('GET /jsonrpc '))
+
+            # small, 16 bit length and 64 bit length frames
+            server.sendFrame(notification('aria2.onDownloadStart', ['gid1']))
+            server.sendFrame(notification('aria2.onDownloadPause', big_gid_list))
+            server.sendFrame(notification('aria2.onDownloadStop', huge_gid_list))
+
+            # messages that are not notification are ignored.
+            server.sendFrame(json.dumps({'jsonrpc': '2.0', 'id': 1, 'result': 'OK'}))
+
+            # fragmented message
+            message = notification('aria2.onDownloadError', ['gid2'])
+            server.sendFrame(message[:10], OPCODE_TEXT, fin=False)
+            server.sendFrame(message[10:20], OPCODE_CONTINUATION, fin=False)
+            server.sendFrame(message[20:], OPCODE_CONTINUATION)
+
+            # client answers ping with the same payload.
+            server.sendFrame(b'ping payload', OPCODE_PING)
+            self.assertEqual(server.recvFrame(), (OPCODE_PONG, b'ping payload'))
+
+            server.sendFrame(notification('aria2.onDownloadComplete', ['gid3']))
+            server.close()
+
+        notifications, connected_list, error_list = self.listen(FakeAria2Server(script))
+
+        # listener stops when aria2 closes connection.
+        self.assertEqual(len(error_list), 1)
+        self.assertIsInstance(error_list[0], ConnectionError)
+        self.assertEqual(connected_list, [True, False])
+        self.assertFalse(notifications.connected)
+
+        self.assertEqual(notifications.waitForChanges(0),
+                         set(['gid1', 'gid2', 'gid3'] + big_gid_list + huge_gid_list))
+
+        # nothing is left.
+        self.assertEqual(notifications.waitForChanges(0), set())
+
+    def test_wrong_accept_key(self):
+        notifications, connected_list, error_list = self.listen(
+            FakeAria2Server(lambda server: None, wrong_accept_key=True))
+
+        self.assertEqual(len(error_list), 1)
+        self.assertIn('accept key', str(error_list[0]))
+        self.assertEqual(connected_list, [False])
+
+    def test_client_messages_are_masked(self):
+        message_list = []
+        long_message = 'x' * 70000
+
+        def script(server):
+            for i in range(3):
+                opcode, payload = server.recvFrame()
+                message_list.append((opcode, payload.decode('utf-8')))
+            server.close()
+
+        server = FakeAria2Server(script)
+
+        websocket = Aria2WebSocket('localhost', server.port)
+        websocket.connect()
+        websocket.sendMessage('{"method": "aria2.tellActive"}')
+        websocket.sendMessage('a' * 200)
+        websocket.sendMessage(long_message)
+
+        self.assertRaises(ConnectionError, websocket.recvMessage)
+        websocket.close()
+
+        server.thread.join(10)
+        self.assertEqual(server.error_list, [])
+        self.assertEqual(message_list, [(OPCODE_TEXT, '{"method": "aria2.tellActive"}'),
+                                        (OPCODE_TEXT, 'a' * 200),
+                                        (OPCODE_TEXT, long_message)])
+
+
+class TestAria2Notifications(unittest.TestCase):
+    def test_wait_returns_after_notification(self):
+        notifications = Aria2Notifications()
+        timer = threading.Timer(0.05, lambda: notifications.addGids(['gid1']))
+        timer.start()
+
+        self.assertEqual(notifications.waitForChanges(10), {'gid1'})
+        timer.join()
+
+    def test_wake(self):
+        notifications = Aria2Notifications()
+        timer = threading.Timer(0.05, notifications.wake)
+        timer.start()
+
+        self.assertEqual(notifications.waitForChanges(10), set())
+        self.assertFalse(notifications.woken)
+        timer.join()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# tests for persepolis/scripts/bandwidth.py
+# aria2 is replaced by FakeRPC, so tests don't need aria2.
+# usage:
+#       python3 test/test_bandwidth.py
+# or all tests:
+#       python3 -m unittest discover -s test -p "test_*.py"
+
+import datetime
+import unittest
+
+# home folder is changed to a temporary folder before persepolis modules are imported.
+# see temporary_home.py
+import temporary_home
+
+from persepolis.scripts.bandwidth import BandwidthManager, fairShare, parseLimit, parseProfiles
+
+
+# this function returns seconds since epoch for local date and time.
+def localTime(year, month, day, hour, minute, second=0):
+    return datetime.datetime(year, month, day, hour, minute, second).timestamp()
+
+
+# FakeRPC records calls that BandwidthManager sends to aria2.
+# if fail is True, calls raise an exception like a stopped aria2.
+class FakeAria2():
+    def __init__(self):
+        self.call_list = []
+        self.fail = False
+
+    def changeGlobalOption(self, options):
+        if self.fail:
+            raise ConnectionRefusedError()
+        self.call_list.append(('global', options['max-overall-download-limit']))
+        return 'OK'
+
+    def changeOption(self, gid, options):
+        if self.fail:
+            raise ConnectionRefusedError()
+        self.call_list.append((gid, options['max-download-limit']))
+        return 'OK'
+
+
+class FakeRPC():
+    def __init__(self):
+        self.aria2 = FakeAria2()
+
+
+class TestFunctions(unittest.TestCase):
+    def test_parse_limit(self):
+        self.assertEqual(parseLimit('0'), 0)
+        self.assertEqual(parseLimit('512K'), 512)
+        self.assertEqual(parseLimit('1.5M'), 1536)
+        self.assertEqual(parseLimit('wrong'), 0)
+
+    def test_parse_profiles_ignores_wrong_profiles(self):
+        self.assertEqual(parseProfiles('08:00-18:00=30%; 25:00-01:00=1M; 18:00-08:00=2M'),
+                         [(480, 1080, 30.0, True), (1080, 480, 2048, False)])
+
+    def test_fair_share_equal(self):
+        self.assertEqual(fairShare(300, {'a': 0, 'b': 0, 'c': 0}),
+                         {'a': 100, 'b': 100, 'c': 100})
+
+    def test_fair_share_redistributes_unused_share(self):
+        # 'a' needs only 50, so 'b' and 'c' share the rest.
+        self.assertEqual(fairShare(300, {'a': 50, 'b': 0, 'c': 0}),
+                         {'a': 50, 'b': 125, 'c': 125})
+
+        # 'b' needs 100 of its 125 share, so 'c' gets 150.
+        self.assertEqual(fairShare(300, {'a': 50, 'b': 100, 'c': 0}),
+                         {'a': 50, 'b': 100, 'c': 150})
+
+    def test_fair_share_never_sends_zero(self):
+        # 0 is unlimited in aria2.
+        self.assertEqual(fairShare(1, {'a': 0, 'b': 0}), {'a': 1, 'b': 1})
+
+    def test_fair_share_without_budget(self):
+        self.assertEqual(fairShare(0, {'a': 50, 'b': 0}), {'a': 50, 'b': 0})
+
+
+class TestBandwidthManager(unittest.TestCase):
+    def setUp(self):
+        self.rpc = FakeRPC()
+
+    def calls(self):
+        call_list = self.rpc.aria2.call_list
+        self.rpc.aria2.call_list = []
+        return call_list
+
+    def test_queue_budget_is_shared(self):
+        manager = BandwidthManager(self.rpc)
+        manager.downloadStarted('gid1', 'queue1', '0')
+        manager.downloadStarted('gid2', 'queue1', '100K')
+        manager.downloadStarted('gid3', 'queue1', '0')
+        manager.downloadStarted('gid4', 'Single Downloads', '0')
+
+        # gid2 needs only 100K and downloadAria has sent it already.
+        manager.setQueueLimit('queue1', '600K')
+        self.assertEqual(sorted(self.calls()),
+                         [('gid1', '250K'), ('gid3', '250K'), ('global', '0')])
+
+        # budget of finished download is given to others.
+        manager.downloadFinished('gid1')
+        manager.rebalance()
+        self.assertEqual(self.calls(), [('gid3', '500K')])
+
+        # removing budget gives own limitation back to downloads.
+        manager.setQueueLimit('queue1', '0')
+        self.assertEqual(self.calls(), [('gid3', '0')])
+
+    def test_only_changed_limits_are_sent(self):
+        manager = BandwidthManager(self.rpc, 1024)
+        manager.downloadStarted('gid1', 'queue1', '0')
+        manager.setQueueLimit('queue1', '200K')
+        self.calls()
+
+        manager.rebalance()
+        manager.setDownloadLimit('gid1', '0')
+        self.assertEqual(self.calls(), [])
+
+        manager.setDownloadLimit('gid1', '50K')
+        self.assertEqual(self.calls(), [('gid1', '50K')])
+
+    def test_profile_across_midnight(self):
+        manager = BandwidthManager(self.rpc, 1000, '22:00-06:00=50%;12:00-13:00=300K')
+
+        manager.rebalance(localTime(2024, 3, 10, 21, 59))
+        self.assertEqual(self.calls(), [('global', '1000K')])
+
+        manager.rebalance(localTime(2024, 3, 10, 22, 0))
+        self.assertEqual(self.calls(), [('global', '500K')])
+
+        manager.rebalance(localTime(2024, 3, 11, 0, 30))
+        self.assertEqual(self.calls(), [])
+
+        manager.rebalance(localTime(2024, 3, 11, 6, 0))
+        self.assertEqual(self.calls(), [('global', '1000K')])
+
+        manager.rebalance(localTime(2024, 3, 11, 12, 30))
+        self.assertEqual(self.calls(), [('global', '300K')])
+
+    def test_next_profile_change(self):
+        manager = BandwidthManager(self.rpc, 1000, '22:00-06:00=50%')
+
+        self.assertEqual(manager.nextProfileChange(localTime(2024, 3, 10, 21, 0)),
+                         localTime(2024, 3, 10, 22, 0))
+
+        # boundary of current minute is passed.
+        self.assertEqual(manager.nextProfileChange(localTime(2024, 3, 10, 22, 0)),
+                         localTime(2024, 3, 11, 6, 0))
+
+        self.assertEqual(BandwidthManager(self.rpc).nextProfileChange(), None)
+
+    def test_percent_of_unlimited_is_unlimited(self):
+        manager = BandwidthManager(self.rpc, 0, '00:00-23:59=30%')
+        manager.rebalance(localTime(2024, 3, 10, 10, 0))
+        self.assertEqual(self.calls(), [('global', '0')])
+
+    def test_failed_calls_are_retried(self):
+        wake_list = []
+        manager = BandwidthManager(self.rpc, 1000)
+        manager.wake_function = lambda: wake_list.append(True)
+        manager.downloadStarted('gid1', 'queue1', '0')
+
+        self.rpc.aria2.fail = True
+        manager.setQueueLimit('queue1', '100K')
+        self.assertTrue(manager.retry)
+        self.assertEqual(wake_list, [True])
+
+        # BandwidthThread calls rebalance again.
+        self.rpc.aria2.fail = False
+        manager.rebalance()
+        self.assertFalse(manager.retry)
+        self.assertEqual(sorted(self.calls()), [('gid1', '100K'), ('global', '1000K')])
+
+    def test_reset_sends_all_limits_again(self):
+        manager = BandwidthManager(self.rpc, 1000)
+        manager.downloadStarted('gid1', 'queue1', '0')
+        manager.setQueueLimit('queue1', '100K')
+        self.calls()
+
+        # aria2 is restarted.
+        manager.reset()
+        manager.rebalance()
+        self.assertEqual(sorted(self.calls()), [('gid1', '100K'), ('global', '1000K')])
+
+
+if __name__ == '__main__':
+    unittest.main()
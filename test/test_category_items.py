@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# tests for order of items in categories
+# (see moveCategoryItems in persepolis/scripts/data_base.py).
+# usage:
+#       python3 test/test_category_items.py
+# or all tests:
+#       python3 -m unittest discover -s test -p "test_*.py"
+
+import shutil
+import tempfile
+import unittest
+
+# home folder is changed to a temporary folder before persepolis modules are imported.
+# see temporary_home.py
+import temporary_home
+
+from persepolis.scripts import data_base
+
+
+class TestMoveCategoryItems(unittest.TestCase):
+    def setUp(self):
+        # use a temporary folder instead of config folder of user.
+        self.real_config_folder = data_base.config_folder
+        self.temp_folder = tempfile.mkdtemp()
+        data_base.config_folder = self.temp_folder
+
+        self.persepolis_db = data_base.PersepolisDB()
+        self.persepolis_db.createTables()
+
+        self.persepolis_db.insertInCategoryTable({'category': 'Empty Queue', 'start_time_enable': 'no',
+                                                  'start_time': '0:0', 'end_time_enable': 'no', 'end_time': '0:0',
+                                                  'reverse': 'no', 'limit_enable': 'no', 'limit_value': '0K',
+                                                  'after_download': 'no'})
+
+        download_list = []
+        for gid in ['gid0', 'gid1', 'gid2']:
+            download_list.append({'file_name': gid, 'status': 'stopped', 'size': '1 MiB',
+                                  'downloaded_size': '0', 'percent': '0%', 'connections': '0',
+                                  'rate': '0', 'estimate_time_left': '0', 'gid': gid,
+                                  'link': 'http://example.com/' + gid, 'first_try_date': '2024/03/10 , 10:00:00',
+                                  'last_try_date': '2024/03/10 , 10:00:00', 'category': 'Single Downloads'})
+
+        self.persepolis_db.insertInDownloadTable(download_list)
+
+    def tearDown(self):
+        self.persepolis_db.closeConnections()
+        data_base.config_folder = self.real_config_folder
+        shutil.rmtree(self.temp_folder)
+
+    def test_empty_category(self):
+        self.assertEqual(self.persepolis_db.returnCategoryGidList('Empty Queue'), [])
+
+        for direction in ['top', 'bottom', 'up', 'down']:
+            self.persepolis_db.moveCategoryItems('Empty Queue', ['gid0'], direction)
+
+        self.assertEqual(self.persepolis_db.returnCategoryGidList('Empty Queue'), [])
+        self.assertEqual(self.persepolis_db.returnCategoryGidList('Single Downloads'), ['gid0', 'gid1', 'gid2'])
+
+    def test_empty_gid_list(self):
+        for direction in ['top', 'bottom', 'up', 'down']:
+            self.persepolis_db.moveCategoryItems('Single Downloads', [], direction)
+
+        self.assertEqual(self.persepolis_db.returnCategoryGidList('Single Downloads'), ['gid0', 'gid1', 'gid2'])
+
+    def test_top_and_bottom(self):
+        # position of top item of download_table is max(position).
+        self.persepolis_db.moveCategoryItems('Single Downloads', ['gid0'], 'top')
+        self.assertEqual(self.persepolis_db.returnCategoryGidList('Single Downloads'), ['gid1', 'gid2', 'gid0'])
+
+        self.persepolis_db.moveCategoryItems('Single Downloads', ['gid2', 'gid0'], 'bottom')
+        self.assertEqual(self.persepolis_db.returnCategoryGidList('Single Downloads'), ['gid2', 'gid0', 'gid1'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# tests for CheckingGate of persepolis/scripts/mainwindow.py
+# a thread works like CheckDownloadInfoThread and main thread requests jobs
+# while thread is checking downloads. time from stopChecking to running job
+# in main thread and time from stopChecking to the next checking section of
+# thread are measured. no window is created.
+# usage:
+#       python3 test/test_checking_gate.py
+# or all tests:
+#       python3 -m unittest discover -s test -p "test_*.py"
+
+import time
+import threading
+import traceback
+import unittest
+
+# home folder is changed to a temporary folder before persepolis modules are imported.
+# see temporary_home.py
+import temporary_home
+
+# mainwindow.py needs PyQt5 and settings of Persepolis.
+# initialization.py creates settings like the first start of Persepolis.
+try:
+    import persepolis.scripts.initialization
+    from persepolis.scripts import mainwindow
+    from PyQt5.QtCore import QCoreApplication, QEventLoop, QTimer
+except ImportError:
+    mainwindow = None
+
+# number of checking sections
+SECTIONS = 200
+
+# p99 of waiting times must be less than WAIT_LIMIT seconds.
+WAIT_LIMIT = 0.1
+
+
+# this function returns percentile of values.
+def percentile(value_list, percent):
+    value_list = sorted(value_list)
+    return value_list[int(round(percent / 100 * (len(value_list) - 1)))]
+
+
+@unittest.skipIf(mainwindow is None, 'PyQt5 is not installed')
+class TestCheckingGate(unittest.TestCase):
+    def setUp(self):
+        # PAUSEDSIGNAL is queued to event loop of main thread.
+        self.application = QCoreApplication.instance() or QCoreApplication([])
+        self.checking_gate = mainwindow.CheckingGate()
+
+        # checker thread sets started when a checking section is started and
+        # waits for posted before stopping it, so job is always postponed.
+        self.started = threading.Event()
+        self.posted = threading.Event()
+
+        self.stop_time_list = []
+        self.resume_time_list = []
+        self.run_time_list = []
+        self.checking_list = []
+        self.error_list = []
+
+    # this method works like CheckDownloadInfoThread.run
+    def checker(self):
+        try:
+            for section in range(SECTIONS + 1):
+                self.checking_gate.startChecking()
+
+                # next section is started after job of previous section.
+                if section > 0:
+                    self.resume_time_list.append(time.perf_counter())
+
+                if section == SECTIONS:
+                    self.checking_gate.stopChecking()
+                    break
+
+                self.started.set()
+                self.assertTrue(self.posted.wait(10))
+                self.posted.clear()
+
+                self.stop_time_list.append(time.perf_counter())
+                self.checking_gate.stopChecking()
+        except:
+            self.error_list.append(traceback.format_exc())
+
+    def test_time_to_acknowledge(self):
+        loop = QEventLoop()
+
+        # if job is not run, loop is stopped by timer.
+        timer = QTimer()
+        timer.setSingleShot(True)
+        timer.timeout.connect(loop.quit)
+
+        # job runs in main thread when checking section is stopped.
+        # exceptions must not be raised in slots of Qt, so checking is saved and checked later.
+        def job():
+            self.run_time_list.append(time.perf_counter())
+            self.checking_list.append(self.checking_gate.checking)
+            loop.quit()
+
+        thread = threading.Thread(target=self.checker, daemon=True)
+        thread.start()
+
+        for section in range(SECTIONS):
+            self.assertTrue(self.started.wait(10))
+            self.started.clear()
+
+            self.checking_gate.runPaused(job)
+            self.posted.set()
+
+            timer.start(10000)
+            loop.exec_()
+            timer.stop()
+
+        thread.join(10)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(self.error_list, [])
+
+        # every job was postponed and run one time.
+        self.assertEqual(len(self.run_time_list), SECTIONS)
+
+        # checker was not checking while job was running.
+        self.assertEqual(self.checking_list, [False] * SECTIONS)
+        self.assertEqual(self.checking_gate.pause_counter, 0)
+
+        # time from stopChecking to job in main thread
+        run_wait_list = [run - stop for stop, run in zip(self.stop_time_list, self.run_time_list)]
+
+        # time from stopChecking to next checking section(acknowledgement of job).
+        resume_wait_list = [resume - stop for stop, resume in zip(self.stop_time_list, self.resume_time_list)]
+
+        print('')
+        print('CheckingGate(%d sections):' % SECTIONS)
+        print('    %-28s %10s %10s' % ('', 'p50(ms)', 'p99(ms)'))
+        for name, wait_list in [('stopChecking to job', run_wait_list),
+                                ('stopChecking to next section', resume_wait_list)]:
+            print('    %-28s %10.3f %10.3f' % (name, 1000 * percentile(wait_list, 50),
+                                               1000 * percentile(wait_list, 99)))
+
+        for run_wait, resume_wait in zip(run_wait_list, resume_wait_list):
+            # next section is started after job.
+            self.assertGreaterEqual(resume_wait, run_wait)
+
+        self.assertLess(percentile(run_wait_list, 99), WAIT_LIMIT)
+        self.assertLess(percentile(resume_wait_list, 99), WAIT_LIMIT)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# tests for upgrading structure of persepolis.db
+# (see upgradeDataBase in persepolis/scripts/data_base.py).
+# usage:
+#       python3 test/test_data_base_upgrade.py
+# or all tests:
+#       python3 -m unittest discover -s test -p "test_*.py"
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+# home folder is changed to a temporary folder before persepolis modules are imported.
+# see temporary_home.py
+import temporary_home
+
+from persepolis.scripts import data_base
+
+LAST_VERSION = 7
+
+
+class TestDataBaseUpgrade(unittest.TestCase):
+    def setUp(self):
+        # use a temporary folder instead of config folder of user.
+        self.real_config_folder = data_base.config_folder
+        self.temp_folder = tempfile.mkdtemp()
+        data_base.config_folder = self.temp_folder
+
+        self.db_path = os.path.join(self.temp_folder, 'persepolis.db')
+        self.persepolis_db = None
+
+    def tearDown(self):
+        if self.persepolis_db:
+            self.persepolis_db.closeConnections()
+
+        data_base.config_folder = self.real_config_folder
+        shutil.rmtree(self.temp_folder)
+
+    # this method creates persepolis.db with structure of old versions(user_version 0).
+    def createOldDataBase(self):
+        connection = sqlite3.connect(self.db_path)
+        connection.execute("""CREATE TABLE category_db_table(category TEXT PRIMARY KEY, start_time_enable TEXT,
+                                start_time TEXT, end_time_enable TEXT, end_time TEXT, reverse TEXT,
+                                limit_enable TEXT, limit_value TEXT, after_download TEXT, gid_list TEXT)""")
+        connection.execute("""CREATE TABLE download_db_table(file_name TEXT, status TEXT, size TEXT,
+                                downloaded_size TEXT, percent TEXT, connections TEXT, rate TEXT,
+                                estimate_time_left TEXT, gid TEXT PRIMARY KEY, link TEXT, first_try_date TEXT,
+                                last_try_date TEXT, category TEXT)""")
+        connection.execute("""CREATE TABLE addlink_db_table(ID INTEGER PRIMARY KEY, gid TEXT, out TEXT,
+                                start_time TEXT, end_time TEXT, link TEXT, ip TEXT, port TEXT, proxy_user TEXT,
+                                proxy_passwd TEXT, download_user TEXT, download_passwd TEXT, connections TEXT,
+                                limit_value TEXT, download_path TEXT, referer TEXT, load_cookies TEXT,
+                                user_agent TEXT, header TEXT, after_download TEXT)""")
+
+        for category, gid_list in [('All Downloads', "['gid1', 'gid2']"),
+                                   ('Single Downloads', "['gid1']"),
+                                   ('Scheduled Downloads', "['gid2']")]:
+            connection.execute("""INSERT INTO category_db_table VALUES(?, 'no', '0:0', 'no', '0:0', 'no',
+                                    'no', '0K', 'no', ?)""", (category, gid_list))
+
+        connection.execute("""INSERT INTO download_db_table VALUES('file1', 'complete', '1.5 MiB', '1.5 MiB',
+                                '100%', '0', '0', '0', 'gid1', 'http://example.com/1', '', '', 'Single Downloads')""")
+        connection.execute("""INSERT INTO download_db_table VALUES('file2', 'stopped', '2 GiB', '512 MiB',
+                                '25%', '0', '0', '0', 'gid2', 'http://example.com/2', '', '', 'Scheduled Downloads')""")
+        connection.commit()
+        connection.close()
+
+    def userVersion(self):
+        return self.persepolis_db.persepolis_db_cursor.execute("""PRAGMA user_version""").fetchone()[0]
+
+    def openDataBase(self):
+        self.persepolis_db = data_base.PersepolisDB()
+        self.persepolis_db.createTables()
+
+    def checkLastVersion(self):
+        self.assertEqual(self.userVersion(), LAST_VERSION)
+
+        dict = self.persepolis_db.searchGidInDownloadTable('gid2')
+        self.assertEqual(dict['total_bytes'], 2 * 1024 ** 3)
+        self.assertEqual(dict['completed_bytes'], 512 * 1024 ** 2)
+
+        self.assertEqual(self.persepolis_db.returnCategoryGidList('All Downloads'), ['gid1', 'gid2'])
+        self.assertEqual(self.persepolis_db.returnCategoryGidList('Scheduled Downloads'), ['gid2'])
+        self.assertEqual(self.persepolis_db.searchCategoryInCategoryTable('Single Downloads')['parallel_downloads'], 1)
+
+    def test_new_data_base(self):
+        self.openDataBase()
+        self.assertEqual(self.userVersion(), LAST_VERSION)
+        self.assertTrue(self.persepolis_db.columnExists('download_db_table', 'eta_seconds'))
+
+    def test_upgrade_old_data_base(self):
+        self.createOldDataBase()
+        self.openDataBase()
+        self.checkLastVersion()
+
+    def test_migrations_run_again(self):
+        self.createOldDataBase()
+        self.openDataBase()
+
+        # for example an old version of Persepolis changed user_version.
+        # ALTER TABLE must not fail for columns that exist.
+        for version in range(LAST_VERSION):
+            self.persepolis_db.persepolis_db_cursor.execute("""PRAGMA user_version = {}""".format(version))
+            self.persepolis_db.persepolis_db_connection.commit()
+
+            self.persepolis_db.upgradeDataBase()
+            self.checkLastVersion()
+
+    def test_failed_migration_is_rolled_back(self):
+        self.createOldDataBase()
+
+        real_upgrade = data_base.PersepolisDB.upgradeToVersion5
+
+        # version 5 fails after it adds its columns.
+        def failedUpgrade(persepolis_db):
+            real_upgrade(persepolis_db)
+            raise sqlite3.OperationalError('disk I/O error')
+
+        data_base.PersepolisDB.upgradeToVersion5 = failedUpgrade
+        try:
+            # error is written in log and upgrading stops without an exception.
+            self.persepolis_db = data_base.PersepolisDB()
+            self.persepolis_db.upgradeDataBase()
+        finally:
+            data_base.PersepolisDB.upgradeToVersion5 = real_upgrade
+
+        # data base remains in version 4 without columns of version 5.
+        self.assertEqual(self.userVersion(), 4)
+        self.assertTrue(self.persepolis_db.columnExists('download_db_table', 'total_bytes'))
+        self.assertFalse(self.persepolis_db.columnExists('download_db_table', 'completed_bytes'))
+        self.assertFalse(self.persepolis_db.persepolis_db_connection.in_transaction)
+
+        # next start of Persepolis upgrades data base.
+        self.persepolis_db.closeConnections()
+        self.openDataBase()
+        self.checkLastVersion()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# stress test for locks and per thread connections of data bases
+# (see ThreadConnections, TempDB and PersepolisDB in persepolis/scripts/data_base.py).
+# many threads read and write data bases at the same time, like
+# CheckDownloadInfoThread, queues and main window do.
+# time that every operation waits for lock of data base is saved and
+# p50 and p99 of waiting times are printed.
+# usage:
+#       python3 test/test_db_threads.py
+# or all tests:
+#       python3 -m unittest discover -s test -p "test_*.py"
+
+import time
+import shutil
+import tempfile
+import threading
+import traceback
+import unittest
+
+# home folder is changed to a temporary folder before persepolis modules are imported.
+# see temporary_home.py
+import temporary_home
+
+from persepolis.scripts import data_base
+
+WRITERS = 8
+READERS = 8
+ITEMS_PER_WRITER = 20
+UPDATES = 50
+
+# p99 of waiting for lock must be less than LOCK_WAIT_LIMIT seconds.
+LOCK_WAIT_LIMIT = 2
+
+
+# this function returns percentile of values.
+def percentile(value_list, percent):
+    value_list = sorted(value_list)
+    return value_list[int(round(percent / 100 * (len(value_list) - 1)))]
+
+
+# TimedLock is used instead of lock of data base and saves waiting time of
+# operations for lock. name of operation is set by TimedLock.operation.
+# data base locks are reentrant, so only first acquire of thread is timed.
+class TimedLock():
+    def __init__(self, lock):
+        self.lock = lock
+        self.local = threading.local()
+        self.wait_dict = {}
+        self.dict_lock = threading.Lock()
+
+    def __enter__(self):
+        depth = getattr(self.local, 'depth', 0)
+
+        start = time.perf_counter()
+        self.lock.acquire()
+        wait = time.perf_counter() - start
+
+        if depth == 0:
+            name = getattr(self.local, 'name', 'other')
+            with self.dict_lock:
+                self.wait_dict.setdefault(name, []).append(wait)
+
+        self.local.depth = depth + 1
+        return self
+
+    def __exit__(self, *args):
+        self.local.depth = self.local.depth - 1
+        self.lock.release()
+
+    # this method runs function and saves waiting times with name.
+    def operation(self, name, function, *args):
+        self.local.name = name
+        try:
+            return function(*args)
+        finally:
+            self.local.name = 'other'
+
+    # this method prints waiting times of operations and returns p99 of all of them.
+    def report(self, title):
+        print('')
+        print('lock waiting time of ' + title + ':')
+        print('    %-10s %8s %10s %10s' % ('operation', 'count', 'p50(ms)', 'p99(ms)'))
+
+        all_list = []
+        for name in sorted(self.wait_dict):
+            wait_list = self.wait_dict[name]
+            all_list.extend(wait_list)
+            print('    %-10s %8d %10.3f %10.3f' % (name, len(wait_list), 1000 * percentile(wait_list, 50),
+                                                   1000 * percentile(wait_list, 99)))
+
+        print('    %-10s %8d %10.3f %10.3f' % ('all', len(all_list), 1000 * percentile(all_list, 50),
+                                               1000 * percentile(all_list, 99)))
+
+        return percentile(all_list, 99)
+
+
+class TestDataBaseThreads(unittest.TestCase):
+    def setUp(self):
+        # use a temporary folder instead of config folder of user.
+        self.real_config_folder = data_base.config_folder
+        self.temp_folder = tempfile.mkdtemp()
+        data_base.config_folder = self.temp_folder
+
+        self.error_list = []
+
+    def tearDown(self):
+        data_base.config_folder = self.real_config_folder
+        shutil.rmtree(self.temp_folder)
+
+    # this method runs functions in threads at the same time
+    # and saves exceptions of threads in error_list.
+    def runThreads(self, function_list):
+        barrier = threading.Barrier(len(function_list))
+
+        def run(function):
+            try:
+                barrier.wait()
+                function()
+            except:
+                self.error_list.append(traceback.format_exc())
+
+        thread_list = [threading.Thread(target=run, args=(function,)) for function in function_list]
+        for thread in thread_list:
+            thread.start()
+
+        for thread in thread_list:
+            thread.join(120)
+            self.assertFalse(thread.is_alive())
+
+        self.assertEqual(self.error_list, [])
+
+    def test_persepolis_db(self):
+        persepolis_db = data_base.PersepolisDB()
+        persepolis_db.createTables()
+
+        timed_lock = TimedLock(persepolis_db.lock)
+        persepolis_db.lock = timed_lock
+
+        writers_done = threading.Event()
+        # connections are kept in connection_list, so their id is not reused.
+        connection_list = []
+        connection_lock = threading.Lock()
+
+        def gidOf(writer, item):
+            return '%08x%08x' % (writer, item)
+
+        def saveConnection():
+            with connection_lock:
+                connection_list.append(persepolis_db.persepolis_db_connection)
+
+        def writer(number):
+            saveConnection()
+
+            download_list = []
+            for item in range(ITEMS_PER_WRITER):
+                download_list.append({'file_name': 'file', 'status': 'downloading', 'size': '1 MiB',
+                                      'downloaded_size': '0', 'percent': '0%', 'connections': '1',
+                                      'rate': '0', 'estimate_time_left': '0', 'gid': gidOf(number, item),
+                                      'link': 'http://example.com/', 'first_try_date': '2024/03/10 , 10:00:00',
+                                      'last_try_date': '2024/03/10 , 10:00:00', 'category': 'Single Downloads'})
+
+            timed_lock.operation('insert', persepolis_db.insertInDownloadTable, download_list)
+
+            # CheckDownloadInfoThread updates all active items every time.
+            for update in range(1, UPDATES + 1):
+                timed_lock.operation('update', persepolis_db.updateDownloadTable,
+                                     [{'gid': gidOf(number, item),
+                                       'percent': str(update) + '%',
+                                       'completed_bytes': update}
+                                      for item in range(ITEMS_PER_WRITER)])
+
+            timed_lock.operation('update', persepolis_db.updateDownloadTable,
+                                 [{'gid': gidOf(number, item), 'status': 'complete'}
+                                  for item in range(ITEMS_PER_WRITER)])
+
+        # searches of PersepolisDB don't lock data base, so they are not in report of lock.
+        def reader():
+            saveConnection()
+
+            while not(writers_done.is_set()):
+                timed_lock.operation('read', persepolis_db.returnItemsInDownloadTable, 'Single Downloads')
+                timed_lock.operation('read', persepolis_db.findActiveDownloads)
+                timed_lock.operation('read', persepolis_db.returnCategoryGidList, 'All Downloads')
+                dict = timed_lock.operation('read', persepolis_db.searchGidInDownloadTable, gidOf(0, 0))
+                if dict:
+                    self.assertTrue(dict['percent'].endswith('%'))
+
+        def writers():
+            self.runThreads([lambda number=number: writer(number) for number in range(WRITERS)])
+            writers_done.set()
+
+        self.runThreads([writers] + [reader for i in range(READERS)])
+
+        self.assertLess(timed_lock.report('PersepolisDB'), LOCK_WAIT_LIMIT)
+
+        # every thread has its own connection.
+        self.assertEqual(len(set(id(connection) for connection in connection_list)), WRITERS + READERS)
+
+        # all changes are saved.
+        gid_list = [gidOf(number, item) for number in range(WRITERS) for item in range(ITEMS_PER_WRITER)]
+        self.assertEqual(sorted(persepolis_db.returnCategoryGidList('All Downloads')), sorted(gid_list))
+        self.assertEqual(persepolis_db.findActiveDownloads(), [])
+
+        for gid in gid_list:
+            dict = persepolis_db.searchGidInDownloadTable(gid)
+            self.assertEqual(dict['percent'], str(UPDATES) + '%')
+            self.assertEqual(dict['completed_bytes'], UPDATES)
+            self.assertEqual(dict['total_bytes'], 1024 * 1024)
+            self.assertEqual(dict['status'], 'complete')
+
+        persepolis_db.closeConnections()
+
+    def test_temp_db(self):
+        temp_db = data_base.TempDB()
+        temp_db.createTables()
+
+        timed_lock = TimedLock(temp_db.lock)
+        temp_db.lock = timed_lock
+
+        def worker(number):
+            gid_list = ['%08x%08x' % (number, item) for item in range(ITEMS_PER_WRITER)]
+            for gid in gid_list:
+                timed_lock.operation('insert', temp_db.insertInSingleTable, gid)
+
+            for update in range(UPDATES):
+                for gid in gid_list:
+                    timed_lock.operation('update', temp_db.updateSingleTable, {'gid': gid, 'shutdown': str(update)})
+                    dict = timed_lock.operation('read', temp_db.returnGid, gid)
+                    self.assertEqual(dict['shutdown'], str(update))
+
+                timed_lock.operation('read', temp_db.returnActiveGids)
+
+            for gid in gid_list:
+                timed_lock.operation('update', temp_db.updateSingleTable, {'gid': gid, 'status': 'stopped'})
+
+        self.runThreads([lambda number=number: worker(number) for number in range(WRITERS)])
+
+        self.assertLess(timed_lock.report('TempDB'), LOCK_WAIT_LIMIT)
+
+        self.assertEqual(temp_db.returnActiveGids(), [])
+        temp_db.closeConnections()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# tests for DownloadTableModel of persepolis/gui/mainwindow_ui.py
+# size, speed and estimate time left are saved in numbers and
+# they are converted to text when cells are shown.
+# usage:
+#       python3 test/test_download_table_model.py
+# or all tests:
+#       python3 -m unittest discover -s test -p "test_*.py"
+
+import unittest
+
+# home folder is changed to a temporary folder before persepolis modules are imported.
+# see temporary_home.py
+import temporary_home
+
+try:
+    from PyQt5.QtCore import Qt
+    from persepolis.gui.mainwindow_ui import DownloadTableModel
+except ImportError:
+    DownloadTableModel = None
+
+
+# this function returns a row of download_table.
+def rowList(gid, size='***', downloaded_size='***', rate='***', estimate_time_left='***'):
+    return ['file', 'downloading', size, downloaded_size, '0%', '16', rate, estimate_time_left,
+            gid, 'http://example.com/', '2024/03/10 , 10:00:00', '2024/03/10 , 10:00:00', 'Single Downloads']
+
+
+@unittest.skipIf(DownloadTableModel is None, 'PyQt5 is not installed')
+class TestDownloadTableModel(unittest.TestCase):
+    def setUp(self):
+        self.model = DownloadTableModel()
+        self.changed_list = []
+        self.model.dataChanged.connect(lambda first, last: self.changed_list.append((first.column(), last.column())))
+
+    def shownText(self, row, column):
+        return self.model.data(self.model.index(row, column), Qt.DisplayRole)
+
+    def test_numbers_are_shown_as_text(self):
+        self.model.insertRowList(0, rowList('gid1', 3 * 1024 ** 3, 1536 * 1024, 2048, 3725))
+
+        self.assertEqual(self.shownText(0, 2), '3.0 GiB')
+        self.assertEqual(self.shownText(0, 3), '2 MiB')
+        self.assertEqual(self.shownText(0, 6), '2 KiB/s')
+        self.assertEqual(self.shownText(0, 7), '1h2m5s')
+
+        # item method of DownloadTableWidget uses text method.
+        self.assertEqual(self.model.text(0, 2), '3.0 GiB')
+        self.assertEqual(self.model.text(0, 8), 'gid1')
+
+    def test_old_strings(self):
+        # items that are not downloaded yet and old rows of data base contain strings.
+        self.model.setRows([rowList('gid1'), rowList('gid2', '1.5 MiB', '0', '0', '0')])
+
+        self.assertEqual(self.shownText(0, 2), '***')
+        self.assertEqual(self.shownText(1, 2), '1.5 MiB')
+        self.assertEqual(self.shownText(1, 7), '0')
+
+    def test_update_row(self):
+        self.model.insertRowList(0, rowList('gid1'))
+
+        update_list = ['file', 'downloading', 1024 ** 2, 512, '0%', '16', 1024, 1023, 'gid1',
+                       None, None, None, None]
+        self.model.updateRow(0, update_list)
+        self.assertEqual(self.changed_list, [(2, 7)])
+        self.assertEqual(self.shownText(0, 3), '512 B')
+
+        # same numbers don't change cells.
+        self.model.updateRow(0, update_list)
+        self.assertEqual(len(self.changed_list), 1)
+
+        # speed is zero when download is paused.
+        # estimate time left is None, so it's not changed.
+        self.model.updateRow(0, ['file', 'paused', 1024 ** 2, 512, '0%', '0', 0, None, 'gid1',
+                                 None, None, None, None])
+        self.assertEqual(self.changed_list[1], (1, 6))
+        self.assertEqual(self.shownText(0, 6), '0')
+        self.assertEqual(self.shownText(0, 7), '17m3s')
+
+
+if __name__ == '__main__':
+    unittest.main()
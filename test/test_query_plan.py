@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# this test checks that searches of persepolis.db use indexes of version 2
+# (see upgradeToVersion2 in persepolis/scripts/data_base.py).
+# statements that PersepolisDB methods send to sqlite are recorded and
+# their EXPLAIN QUERY PLAN is checked.
+# usage:
+#       python3 test/test_query_plan.py
+# or all tests:
+#       python3 -m unittest discover -s test -p "test_*.py"
+
+import shutil
+import tempfile
+import unittest
+
+# home folder is changed to a temporary folder before persepolis modules are imported.
+# see temporary_home.py
+import temporary_home
+
+from persepolis.scripts import data_base
+
+# number of items in test data base
+ITEMS = 2000
+
+
+class TestQueryPlan(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # use a temporary folder instead of config folder of user.
+        cls.real_config_folder = data_base.config_folder
+        cls.temp_folder = tempfile.mkdtemp()
+        data_base.config_folder = cls.temp_folder
+
+        cls.persepolis_db = data_base.PersepolisDB()
+        cls.persepolis_db.createTables()
+
+        status_list = ['complete', 'error', 'stopped', 'downloading', 'paused', 'scheduled', 'waiting']
+        download_list = []
+        addlink_list = []
+        for i in range(ITEMS):
+            gid = '%016x' % i
+            download_list.append({'file_name': 'file' + str(i),
+                                  'status': status_list[i % len(status_list)],
+                                  'size': '1 MiB',
+                                  'downloaded_size': '0',
+                                  'percent': '0%',
+                                  'connections': '0',
+                                  'rate': '0',
+                                  'estimate_time_left': '0',
+                                  'gid': gid,
+                                  'link': 'http://example.com/' + str(i),
+                                  'first_try_date': '2024/03/10 , 10:00:00',
+                                  'last_try_date': '2024/03/10 , 10:00:00',
+                                  'category': 'Single Downloads'})
+
+            addlink_list.append({'gid': gid, 'out': None, 'start_time': None, 'end_time': None,
+                                 'link': 'http://example.com/' + str(i), 'ip': None, 'port': None,
+                                 'proxy_user': None, 'proxy_passwd': None, 'download_user': None,
+                                 'download_passwd': None, 'connections': '16', 'limit_value': '0',
+                                 'download_path': None, 'referer': None, 'load_cookies': None,
+                                 'user_agent': None, 'header': None, 'after_download': 'no'})
+
+        cls.persepolis_db.insertInDownloadTable(download_list)
+        cls.persepolis_db.insertInAddLinkTable(addlink_list)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.persepolis_db.closeConnections()
+        data_base.config_folder = cls.real_config_folder
+        shutil.rmtree(cls.temp_folder)
+
+    # this method runs function and returns query plans of statements that function sent.
+    def queryPlans(self, function, *args):
+        connection = self.persepolis_db.persepolis_db_connection
+
+        statement_list = []
+        connection.set_trace_callback(statement_list.append)
+        try:
+            function(*args)
+        finally:
+            connection.set_trace_callback(None)
+
+        plan_list = []
+        for statement in statement_list:
+            rows = connection.execute('EXPLAIN QUERY PLAN ' + statement).fetchall()
+            plan_list.append(' | '.join(row[-1] for row in rows))
+
+        self.assertTrue(plan_list)
+        return plan_list
+
+    def assertIndex(self, plan_list, index):
+        for plan in plan_list:
+            self.assertIn('INDEX ' + index, plan)
+            self.assertNotIn('SCAN', plan.replace('SCAN CONSTANT ROW', ''))
+
+    def test_version(self):
+        version = self.persepolis_db.persepolis_db_cursor.execute('PRAGMA user_version').fetchone()[0]
+        self.assertGreaterEqual(version, 2)
+
+    def test_status_searches(self):
+        for function in [self.persepolis_db.findActiveDownloads,
+                         self.persepolis_db.returnDownloadingItems,
+                         self.persepolis_db.returnPausedItems]:
+            self.assertIndex(self.queryPlans(function), 'download_db_table_status_index')
+
+    def test_category_searches(self):
+        self.assertIndex(self.queryPlans(self.persepolis_db.findActiveDownloads, 'Single Downloads'),
+                         'download_db_table_category_index')
+        self.assertIndex(self.queryPlans(self.persepolis_db.returnItemsInDownloadTable, 'Single Downloads'),
+                         'download_db_table_category_index')
+
+    def test_addlink_gid_search(self):
+        self.assertIndex(self.queryPlans(self.persepolis_db.searchGidInAddLinkTable, '%016x' % 10),
+                         'addlink_db_table_gid_index')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# this test runs Queue of persepolis/scripts/mainwindow.py with a fake aria2 and
+# measures time of downloading all items of queue(makespan).
+# queue with parallel downloads(parallel_downloads of category) must be
+# faster than queue that downloads items one by one, and
+# QueueSlots must limit number of downloads of all queues.
+# usage:
+#       python3 test/test_queue_makespan.py
+# or all tests:
+#       python3 -m unittest discover -s test -p "test_*.py"
+
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+
+# home folder is changed to a temporary folder before persepolis modules are imported.
+# see temporary_home.py
+import temporary_home
+
+from persepolis.scripts import data_base
+
+# mainwindow.py needs PyQt5 and settings of Persepolis.
+# initialization.py creates settings like the first start of Persepolis.
+try:
+    import persepolis.scripts.initialization
+    from persepolis.scripts import mainwindow
+    from PyQt5.QtCore import QSettings
+except ImportError:
+    mainwindow = None
+
+# number of downloads in queue
+DOWNLOADS = 8
+
+# download time of every item in seconds
+DOWNLOAD_TIME = 0.2
+
+
+# FakeAria2 is used instead of download.downloadAria.
+# every download takes DOWNLOAD_TIME seconds and status of download
+# is written in data base and published like CheckDownloadInfoThread does.
+class FakeAria2():
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active_downloads = 0
+        self.max_active_downloads = 0
+
+    def setStatus(self, gid, status, parent):
+        parent.persepolis_db.updateDownloadTable([{'gid': gid, 'status': status}])
+        mainwindow.download_events.publish(gid, status)
+
+    def downloadAria(self, gid, parent):
+        with self.lock:
+            self.active_downloads = self.active_downloads + 1
+            self.max_active_downloads = max(self.max_active_downloads, self.active_downloads)
+
+        self.setStatus(gid, 'downloading', parent)
+        time.sleep(DOWNLOAD_TIME)
+
+        with self.lock:
+            self.active_downloads = self.active_downloads - 1
+
+        self.setStatus(gid, 'complete', parent)
+        return 'Ok'
+
+
+class FakeCheckBox():
+    def isChecked(self):
+        return False
+
+
+# category_tree of main window. selected category is not the queue.
+class FakeCategoryTree():
+    def currentIndex(self):
+        return self
+
+    def data(self):
+        return 'All Downloads'
+
+
+# FakeMainWindow has attributes of MainWindow that Queue uses.
+class FakeMainWindow():
+    def __init__(self, maximum):
+        self.persepolis_db = data_base.PersepolisDB()
+        self.persepolis_db.createTables()
+        self.temp_db = data_base.TempDB()
+        self.temp_db.createTables()
+
+        self.persepolis_setting = QSettings('persepolis_download_manager', 'persepolis')
+        self.queue_slots = mainwindow.QueueSlots(maximum)
+        self.reverse_checkBox = FakeCheckBox()
+        self.category_tree = FakeCategoryTree()
+        self.threadPool = []
+
+    def aria2NotRespond(self):
+        pass
+
+    def closeConnections(self):
+        for thread in self.threadPool:
+            thread.wait()
+
+        self.persepolis_db.closeConnections()
+        self.temp_db.closeConnections()
+
+
+@unittest.skipIf(mainwindow is None, 'PyQt5 is not installed')
+class TestQueueMakespan(unittest.TestCase):
+    def setUp(self):
+        # use a temporary folder instead of config folder of user.
+        self.real_config_folder = data_base.config_folder
+        self.temp_folder = tempfile.mkdtemp()
+        data_base.config_folder = self.temp_folder
+
+        self.fake_aria2 = FakeAria2()
+        self.real_download_aria = mainwindow.download.downloadAria
+        mainwindow.download.downloadAria = self.fake_aria2.downloadAria
+
+        # no notification window
+        self.real_notify_send = mainwindow.notifySend
+        mainwindow.notifySend = lambda *args, **kwargs: None
+
+        self.main_window = None
+
+    def tearDown(self):
+        mainwindow.download.downloadAria = self.real_download_aria
+        mainwindow.notifySend = self.real_notify_send
+
+        if self.main_window:
+            self.main_window.closeConnections()
+
+        data_base.config_folder = self.real_config_folder
+        shutil.rmtree(self.temp_folder)
+
+    # this method creates a queue with DOWNLOADS items and runs it.
+    # it returns makespan of queue in seconds.
+    def runQueue(self, parallel_downloads, maximum):
+        # every queue has new data bases.
+        data_base.config_folder = tempfile.mkdtemp(dir=self.temp_folder)
+
+        self.main_window = FakeMainWindow(maximum)
+        persepolis_db = self.main_window.persepolis_db
+
+        persepolis_db.insertInCategoryTable({'category': 'queue', 'start_time_enable': 'no', 'start_time': '0:0',
+                                             'end_time_enable': 'no', 'end_time': '0:0', 'reverse': 'no',
+                                             'limit_enable': 'no', 'limit_value': '0K', 'after_download': 'no',
+                                             'parallel_downloads': parallel_downloads})
+
+        gid_list = ['%016x' % i for i in range(DOWNLOADS)]
+        download_list = []
+        addlink_list = []
+        for gid in gid_list:
+            download_list.append({'file_name': gid, 'status': 'stopped', 'size': '1 MiB',
+                                  'downloaded_size': '0', 'percent': '0%', 'connections': '0',
+                                  'rate': '0', 'estimate_time_left': '0', 'gid': gid,
+                                  'link': 'http://example.com/' + gid, 'first_try_date': '2024/03/10 , 10:00:00',
+                                  'last_try_date': '2024/03/10 , 10:00:00', 'category': 'queue'})
+
+            addlink_list.append({'gid': gid, 'out': None, 'start_time': None, 'end_time': None,
+                                 'link': 'http://example.com/' + gid, 'ip': None, 'port': None,
+                                 'proxy_user': None, 'proxy_passwd': None, 'download_user': None,
+                                 'download_passwd': None, 'connections': '16', 'limit_value': '0',
+                                 'download_path': None, 'referer': None, 'load_cookies': None,
+                                 'user_agent': None, 'header': None, 'after_download': 'no'})
+
+        persepolis_db.insertInDownloadTable(download_list)
+        persepolis_db.insertInAddLinkTable(addlink_list)
+        persepolis_db.setCategoryGidList('queue', gid_list)
+
+        queue = mainwindow.Queue('queue', None, None, self.main_window)
+
+        start = time.perf_counter()
+        queue.run()
+        makespan = time.perf_counter() - start
+
+        # all downloads are completed and all slots are free.
+        for gid in gid_list:
+            self.assertEqual(persepolis_db.searchGidInDownloadTable(gid)['status'], 'complete')
+        self.assertEqual(self.main_window.queue_slots.used_slots, 0)
+
+        self.main_window.closeConnections()
+        self.main_window = None
+
+        return makespan
+
+    def test_parallel_is_faster(self):
+        sequential_makespan = self.runQueue(1, 5)
+        self.assertEqual(self.fake_aria2.max_active_downloads, 1)
+        self.assertGreaterEqual(sequential_makespan, DOWNLOADS * DOWNLOAD_TIME)
+
+        self.fake_aria2.max_active_downloads = 0
+        parallel_makespan = self.runQueue(4, 5)
+        self.assertEqual(self.fake_aria2.max_active_downloads, 4)
+
+        print('')
+        print('makespan of %d downloads(%.1f s every download):' % (DOWNLOADS, DOWNLOAD_TIME))
+        print('    sequential: %.2f s, 4 parallel downloads: %.2f s' % (sequential_makespan, parallel_makespan))
+
+        # ideal makespan of 4 parallel downloads is a quarter of sequential.
+        self.assertLess(parallel_makespan, sequential_makespan / 2)
+
+    def test_queue_slots_limit_parallel_downloads(self):
+        # max-parallel-downloads of user is less than parallel_downloads of queue.
+        self.runQueue(4, 2)
+        self.assertEqual(self.fake_aria2.max_active_downloads, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
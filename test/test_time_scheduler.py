@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# tests for persepolis/scripts/time_scheduler.py
+# usage:
+#       python3 test/test_time_scheduler.py
+# or all tests:
+#       python3 -m unittest discover -s test -p "test_*.py"
+
+import datetime
+import threading
+import time
+import unittest
+
+# home folder is changed to a temporary folder before persepolis modules are imported.
+# see temporary_home.py
+import temporary_home
+
+from persepolis.scripts import time_scheduler
+from persepolis.scripts.time_scheduler import TimeScheduler, nextDeadline
+
+# startTime is in download.py and download.py needs PyQt5 and settings of Persepolis.
+# initialization.py creates settings like the first start of Persepolis.
+try:
+    import persepolis.scripts.initialization
+    from persepolis.scripts import download
+except ImportError:
+    download = None
+
+
+# this function returns seconds since epoch for local date and time.
+def localTime(year, month, day, hour, minute, second=0):
+    return datetime.datetime(year, month, day, hour, minute, second).timestamp()
+
+
+# FakeClock replaces time module of time_scheduler.
+# so tests move the clock instead of sleeping.
+class FakeClock():
+    def __init__(self, now):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+class TestNextDeadline(unittest.TestCase):
+    def test_later_today(self):
+        now = localTime(2024, 3, 10, 8, 0)
+        self.assertEqual(nextDeadline('09:30', now), localTime(2024, 3, 10, 9, 30))
+
+    def test_current_minute_is_now(self):
+        now = localTime(2024, 3, 10, 9, 30, 40)
+        self.assertEqual(nextDeadline('09:30', now), localTime(2024, 3, 10, 9, 30))
+
+    def test_passed_time_is_tomorrow(self):
+        now = localTime(2024, 3, 10, 9, 31)
+        self.assertEqual(nextDeadline('09:30', now), localTime(2024, 3, 11, 9, 30))
+
+    def test_midnight_rollover(self):
+        now = localTime(2024, 3, 10, 23, 59, 30)
+        self.assertEqual(nextDeadline('00:05', now), localTime(2024, 3, 11, 0, 5))
+        self.assertEqual(nextDeadline('23:59', now), localTime(2024, 3, 10, 23, 59))
+
+    def test_end_of_month_and_year(self):
+        now = localTime(2024, 12, 31, 22, 0)
+        self.assertEqual(nextDeadline('01:00', now), localTime(2025, 1, 1, 1, 0))
+
+
+class TestTimeScheduler(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock(localTime(2024, 3, 10, 23, 0))
+        self.real_time = time_scheduler.time
+        time_scheduler.time = self.clock
+
+        self.scheduler = TimeScheduler()
+
+    def tearDown(self):
+        time_scheduler.time = self.real_time
+
+    # move fake clock and wake scheduler thread up.
+    def moveClock(self, seconds):
+        with self.scheduler.condition:
+            self.clock.now = self.clock.now + seconds
+            self.scheduler.condition.notify_all()
+
+    def test_deadline_runs_after_midnight(self):
+        event = threading.Event()
+        deadline = nextDeadline('00:30', self.clock.now)
+
+        self.scheduler.addDeadline('gid1', 'start', deadline, event.set)
+
+        self.moveClock(60)
+        self.assertFalse(event.wait(0.2))
+
+        self.moveClock(deadline - self.clock.now)
+        self.assertTrue(event.wait(5))
+
+    def test_cancel_all_kinds(self):
+        canceled_list = []
+        for kind in ['start', 'end']:
+            self.scheduler.addDeadline('gid1', kind, self.clock.now + 60, lambda: None,
+                                       lambda kind=kind: canceled_list.append(kind))
+
+        self.scheduler.cancel('gid1')
+
+        self.assertEqual(sorted(canceled_list), ['end', 'start'])
+        self.assertEqual(self.scheduler.entry_dict, {})
+
+    def test_cancel_one_kind(self):
+        event = threading.Event()
+        canceled_list = []
+
+        self.scheduler.addDeadline('gid1', 'start', self.clock.now + 60, lambda: None,
+                                   lambda: canceled_list.append('start'))
+        self.scheduler.addDeadline('gid1', 'end', self.clock.now + 60, event.set,
+                                   lambda: canceled_list.append('end'))
+
+        self.scheduler.cancel('gid1', 'start')
+
+        self.assertEqual(canceled_list, ['start'])
+        self.assertEqual(list(self.scheduler.entry_dict.keys()), [('gid1', 'end')])
+
+        # end deadline still runs.
+        self.moveClock(60)
+        self.assertTrue(event.wait(5))
+        self.assertEqual(canceled_list, ['start'])
+
+    def test_cancel_other_gid(self):
+        self.scheduler.addDeadline('gid1', 'start', self.clock.now + 60, lambda: None)
+        self.scheduler.cancel('gid2')
+
+        self.assertEqual(list(self.scheduler.entry_dict.keys()), [('gid1', 'start')])
+
+    def test_new_deadline_replaces_old_one(self):
+        canceled_list = []
+        event = threading.Event()
+
+        self.scheduler.addDeadline('gid1', 'start', self.clock.now + 60, lambda: None,
+                                   lambda: canceled_list.append('old'))
+        self.scheduler.addDeadline('gid1', 'start', self.clock.now + 120, event.set)
+
+        self.assertEqual(canceled_list, ['old'])
+
+        self.moveClock(60)
+        self.assertFalse(event.wait(0.2))
+
+        self.moveClock(60)
+        self.assertTrue(event.wait(5))
+
+    def waitInThread(self, deadline):
+        answer_list = []
+        thread = threading.Thread(target=lambda: answer_list.append(
+            self.scheduler.waitForDeadline('gid1', 'start', deadline)), daemon=True)
+        thread.start()
+
+        # wait until deadline is added.
+        for i in range(500):
+            with self.scheduler.condition:
+                if ('gid1', 'start') in self.scheduler.entry_dict.keys():
+                    break
+            time.sleep(0.01)
+
+        return thread, answer_list
+
+    def test_wait_for_deadline_returns_true(self):
+        thread, answer_list = self.waitInThread(self.clock.now + 60)
+
+        self.moveClock(60)
+        thread.join(5)
+
+        self.assertEqual(answer_list, [True])
+
+    def test_wait_for_deadline_returns_false_after_cancel(self):
+        thread, answer_list = self.waitInThread(self.clock.now + 60)
+
+        self.scheduler.cancel('gid1')
+        thread.join(5)
+
+        self.assertEqual(answer_list, [False])
+
+        # canceled deadline doesn't run later.
+        self.moveClock(60)
+        self.assertEqual(self.scheduler.entry_dict, {})
+
+
+# FakeDataBase returns status of download like persepolis_db.
+class FakeDataBase():
+    def __init__(self, status):
+        self.status = status
+
+    def searchGidInDownloadTable(self, gid):
+        return {'gid': gid, 'status': self.status}
+
+
+class FakeMainWindow():
+    def __init__(self, status):
+        self.persepolis_db = FakeDataBase(status)
+
+
+@unittest.skipIf(download is None, 'PyQt5 is not installed')
+class TestStartTime(unittest.TestCase):
+    def test_start_time_arrived(self):
+        # current minute is now.
+        start_time = time.strftime('%H:%M')
+        self.assertEqual(download.startTime(start_time, 'gid_start', FakeMainWindow('scheduled')), 'scheduled')
+
+    def test_stopped_before_waiting(self):
+        # user stopped download before startTime added deadline,
+        # so downloadStop couldn't cancel deadline.
+        start_time = time.strftime('%H:%M', time.localtime(time.time() + 3600))
+
+        start = time.time()
+        self.assertEqual(download.startTime(start_time, 'gid_stop1', FakeMainWindow('stopped')), 'stopped')
+        self.assertLess(time.time() - start, 5)
+
+    def test_stopped_while_deadline_was_added(self):
+        # downloadStop canceled deadline before startTime added it and
+        # changed status after startTime checked it. deadline arrives, but download must not start.
+        parent = FakeMainWindow('scheduled')
+        real_wait = download.time_scheduler.waitForDeadline
+
+        def waitForDeadline(gid, kind, deadline):
+            parent.persepolis_db.status = 'stopped'
+            return real_wait(gid, kind, deadline)
+
+        download.time_scheduler.waitForDeadline = waitForDeadline
+        try:
+            self.assertEqual(download.startTime(time.strftime('%H:%M'), 'gid_stop2', parent), 'stopped')
+        finally:
+            download.time_scheduler.waitForDeadline = real_wait
+
+
+if __name__ == '__main__':
+    unittest.main()